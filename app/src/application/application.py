@@ -1,16 +1,26 @@
 import logging
 import sys
+import threading
+import time
 from PyQt5.QtCore import QObject, QTimer, pyqtSlot, Qt
 from PyQt5.QtWidgets import QApplication
 
+from src.gui.frame_scheduler import FrameScheduler
 from src.gui.gui import MainDisplayWindow, WindowListener
 from src.gui.splash_screen import SplashScreen
 from src.util import config
 
+from src.automation.rule_engine import RuleEngine
 from src.services.vehicle_service import VehicleService
 from src.services.telemetry_service import TelemetryService
 from src.services.hardware_service import HardwareService
+from src.services.io_reactor import IoReactor
+from src.can.can_master import setupCanInterface
+from src.tpms.tire_trend import TireTrendEngine
+from src.util.boot_profiler import BootProfiler
 from src.util.settings_store import SettingsStore # ★追加
+from src.util.counter_journal import get_counter_journal
+from src.util.state_store import get_state_store
 
 logger = logging.getLogger(__name__)
 
@@ -30,17 +40,25 @@ class Application(QObject, WindowListener):
         # ★追加: 設定データのロード
         self.settings = SettingsStore()
 
+        # ネットワーク系ワーカーが共有するイベントループ (perform_initializationで起動)
+        self.reactor: IoReactor = None
         self.vehicle_service = None
         self.telemetry_service = None
         self.hardware_service = None
 
         self.latest_tpms_data = {}
+        # 輪ごとの空気圧・温度の傾向 (スローパンクチャー・過熱の予兆)
+        self.tire_trends = TireTrendEngine()
         self.current_gps_data = {}
         self.current_lsd_level = 1
         self.update_count = 0
+        # GPS / TPMS / 操作でCAN以外のデータが変わったら増やす (描画の要否判定に使う)
+        self.input_seq = 0
 
-        self.gopro_connected = False
-        self.is_auto_recording = False
+        # 自動化ルール (GoPro録画・CSVログ・セッション) と、動作ごとの現在の出力
+        self.rule_engine: RuleEngine = None
+        self.rule_outputs: dict[str, bool] = {}
+        self.session_started_at: float = None
 
         if config.debug:
             print("★ App: DEBUG Mode (GPS Mock Enabled)")
@@ -50,10 +68,25 @@ class Application(QObject, WindowListener):
         self.app: QApplication = None
         self.splash: SplashScreen = None
         self.window: MainDisplayWindow = None
-        self.fuel_save_timer = QTimer()
+        self.frame_scheduler: FrameScheduler = None
+
+        # 起動の各段階の所要時間 (ログとスプラッシュに出す)
+        self.profiler = BootProfiler()
+        self.profiler.stage_finished.connect(self._on_boot_stage)
+        self._can_setup_thread: threading.Thread = None
+        self._boot_stages = []
+        self._first_can_frame_seen = False
 
     def initialize(self) -> None:
-        self.app = QApplication(sys.argv)
+        # can0 の設定 (sudo ip link) はスプラッシュのフェードインと並行して進める
+        if not config.debug:
+            self._can_setup_thread = threading.Thread(
+                target=self._setup_can_interface, name="boot-can", daemon=True
+            )
+            self._can_setup_thread.start()
+
+        with self.profiler.stage("qt"):
+            self.app = QApplication(sys.argv)
         screen_size = self.app.primaryScreen().size()
         image_path = "src/gui/icons/kitformula2.png"
 
@@ -63,62 +96,118 @@ class Application(QObject, WindowListener):
         self.splash.fade_out_finished.connect(self.show_main_window)
         
         self.splash.start()
+        self.profiler.mark("splash_shown")
         self.app.aboutToQuit.connect(self.cleanup)
         sys.exit(self.app.exec_())
 
+    def _setup_can_interface(self):
+        with self.profiler.stage("can_interface"):
+            setupCanInterface()
+
+    @pyqtSlot(str, float)
+    def _on_boot_stage(self, name: str, duration_ms: float):
+        if self.splash is None:
+            return
+        elapsed = self.profiler.elapsedMs() / 1000.0
+        if duration_ms > 0:
+            self.splash.show_status(f"{name}: {duration_ms:.0f} ms  (t+{elapsed:.1f} s)")
+        else:
+            self.splash.show_status(f"{name}  (t+{elapsed:.1f} s)")
+
     def cleanup(self):
         logger.info("Application shutting down...")
+        if self.frame_scheduler:
+            self.frame_scheduler.stop()
         # 終了時に設定を強制保存
         self.settings.save()
-        if self.vehicle_service:
-            self.vehicle_service.save_fuel_state()
         if self.telemetry_service:
-            self.telemetry_service.save_mileage()
             self.telemetry_service.stop()
         if self.hardware_service:
             self.hardware_service.stop()
+        # 各サービスの停止要求を出してから、残ったタスクごとループを止める
+        if self.reactor:
+            self.reactor.stop()
+        # 燃料・走行距離のジャーナルを state.json にまとめてから、
+        # まだ書いていない状態をファイルに書き出す
+        get_counter_journal().close()
+        get_state_store().close()
 
     def perform_initialization(self):
+        """
+        ダッシュボードを出すのに必要なもの (CAN・画面) だけをここで作り、
+        テレメトリやGPS/TPMSなどの周辺機器は表示後に1段階ずつ初期化する
+        """
         logger.info("Starting heavy initialization...")
 
-        self.vehicle_service = VehicleService()
-        self.telemetry_service = TelemetryService()
-        self.hardware_service = HardwareService()
+        with self.profiler.stage("reactor"):
+            self.reactor = IoReactor().start()
 
-        self.hardware_service.tpms_updated.connect(self.on_tpms_update)
-        self.hardware_service.gps_updated.connect(self.on_gps_update)
+        with self.profiler.stage("can"):
+            if self._can_setup_thread is not None:
+                self._can_setup_thread.join()
+            self.vehicle_service = VehicleService(
+                self.reactor, can_interface_ready=self._can_setup_thread is not None
+            )
 
-        self.vehicle_service.machine.initialise()
+            # ★追加: 起動時に保存された設定を反映
+            saved_driver = self.settings.get("driver", "None")
+            self.vehicle_service.dash_info.driver = saved_driver
 
-        # ★追加: 起動時に保存された設定を反映
-        saved_driver = self.settings.get("driver", "None")
-        self.vehicle_service.dash_info.driver = saved_driver
-        
-        # 保存されたタイヤ情報を反映
-        saved_tire = self.settings.get("tire_set", "Dry_Soft")
-        self.vehicle_service.dash_info.tire = saved_tire # dash
-        self.window = MainDisplayWindow(self, initial_settings=self.settings.settings)
+            # 保存されたタイヤ情報を反映
+            saved_tire = self.settings.get("tire_set", "Dry_Soft")
+            self.vehicle_service.dash_info.tire = saved_tire # dash
 
-        fan_val = self.settings.get("radiator_fan", 0)
-        pump_val = self.settings.get("water_pump", 0)
-        self.hardware_service.set_radiator_fan(fan_val)
-        self.hardware_service.set_water_pump(pump_val)
+            self._setup_rule_engine()
 
-        # ★追加: 初期設定をGUIに渡す
-        self.window = MainDisplayWindow(self, initial_settings=self.settings.settings)
-        self._connect_gui_signals()
+        with self.profiler.stage("window"):
+            # ★追加: 初期設定をGUIに渡す
+            self.window = MainDisplayWindow(self, initial_settings=self.settings.settings)
+            self._connect_gui_signals()
+            self._setup_frame_scheduler()
 
-        self.fuel_save_timer.timeout.connect(self.save_states_periodically)
-        self.fuel_save_timer.start(config.FUEL_SAVE_INTERVAL_MS)
+        self.profiler.mark("dashboard_ready")
+        self.splash.start_fade_out()
 
+        # 残りはイベントループに戻りながら順に初期化する (描画を止めないため)
+        self._boot_stages = [
+            ("telemetry", self._init_telemetry),
+            ("hardware", self._init_hardware),
+            ("network", self.vehicle_service.machine.initialise),
+        ]
+        QTimer.singleShot(0, self._run_next_boot_stage)
+
+    def _run_next_boot_stage(self):
+        if not self._boot_stages:
+            logger.info("Initialization complete.")
+            self.profiler.report()
+            return
+        name, init = self._boot_stages.pop(0)
+        try:
+            with self.profiler.stage(name):
+                init()
+        except Exception as e:
+            logger.error(f"Boot stage '{name}' failed: {e}")
+        QTimer.singleShot(0, self._run_next_boot_stage)
+
+    def _init_telemetry(self):
+        self.telemetry_service = TelemetryService(self.reactor)
         self.telemetry_service.start_logging_thread(self.get_current_data)
+        self._reapply_rule_action("csv_log")
 
-        self.hardware_service.start()
-        logger.info("Initialization complete.")
+    def _init_hardware(self):
+        self.hardware_service = HardwareService(self.reactor)
 
-        self.splash.start_fade_out()
+        self.hardware_service.tpms_updated.connect(self.on_tpms_update)
+        self.hardware_service.gps_updated.connect(self.on_gps_update)
 
-     
+        fan_val = self.settings.get("radiator_fan", 0)
+        pump_val = self.settings.get("water_pump", 0)
+        self.hardware_service.set_radiator_fan(fan_val)
+        self.hardware_service.set_water_pump(pump_val)
+
+        self._connect_hardware_signals()
+        self.hardware_service.start()
+        self._reapply_rule_action("gopro")
 
     def get_current_data(self):
         if not self.vehicle_service:
@@ -131,6 +220,57 @@ class Application(QObject, WindowListener):
             self.current_gps_data
         )
 
+    def _setup_rule_engine(self):
+        """CANのパケットごとに自動化ルールを評価する (受信スレッド)"""
+        dash_info = self.vehicle_service.dash_info
+        lap_timer = self.vehicle_service.lap_timer
+        self.rule_engine = RuleEngine(
+            {
+                "rpm": lambda: dash_info.rpm,
+                "speed": lambda: dash_info.speed,
+                "throttle": lambda: dash_info.throttlePosition,
+                "water_temp": lambda: dash_info.waterTemp,
+                "lap_running": lambda: lap_timer.is_timer_running,
+            }
+        )
+        self.rule_engine.rule_changed.connect(
+            self.on_rule_changed, type=Qt.QueuedConnection
+        )
+        self.vehicle_service.add_can_packet_callback(self.rule_engine.on_packet)
+
+    def _setup_frame_scheduler(self):
+        """
+        GUIスレッドの処理を消費者ごとのレートで回す (登録順が優先度)。
+        描画系は新しいデータが来たときだけ実行する
+        """
+        dash_info = self.vehicle_service.dash_info
+
+        def can_seq():
+            return dash_info.seq
+
+        def data_seq():
+            return (dash_info.seq, self.input_seq)
+
+        self.frame_scheduler = FrameScheduler(self)
+        self.frame_scheduler.add(
+            "shift_lights", config.SHIFT_LIGHT_HZ, self.render_shift_lights, can_seq
+        )
+        self.frame_scheduler.add(
+            "display", config.DISPLAY_HZ, self.render_display, data_seq
+        )
+        self.frame_scheduler.add("control", config.CONTROL_HZ, self.update_control)
+        self.frame_scheduler.add(
+            "telemetry", config.TELEMETRY_PROCESS_HZ, self.process_telemetry
+        )
+        self.frame_scheduler.add(
+            "slow_widgets", config.SLOW_WIDGET_HZ, self.render_slow_widgets, data_seq
+        )
+        # 通信状態は車両データと無関係に変わるので、新データの有無で間引かない
+        self.frame_scheduler.add(
+            "telemetry_status", config.SLOW_WIDGET_HZ, self.render_telemetry_status
+        )
+        self.frame_scheduler.start()
+
     def _connect_gui_signals(self):
         self.window.requestSetStartLine.connect(self.set_start_line)
         self.window.requestResetFuel.connect(self.reset_fuel_integrator)
@@ -146,23 +286,36 @@ class Application(QObject, WindowListener):
         self.window.requestRadiatorFanChange.connect(self.change_radiator_fan)
         self.window.requestWaterPumpChange.connect(self.change_water_pump)
 
+        # ピットメッセージは取得スレッドから届くので、GUIスレッドで処理する
+        messenger = self.vehicle_service.machine.messenger
+        messenger.message_updated.connect(
+            self.window.showPitMessage, type=Qt.QueuedConnection
+        )
+        if messenger.message.text:
+            self.window.showPitMessage(messenger.message)
+
+    def _connect_hardware_signals(self):
         self.window.requestGoProConnect.connect(
-            self.hardware_service.gopro_worker.start_connection
+            self.hardware_service.gopro_manager.start_connection
         )
         self.window.requestGoProDisconnect.connect(
-            self.hardware_service.gopro_worker.stop
+            self.hardware_service.gopro_manager.stop
+        )
+        self.window.requestGoProRecStart.connect(
+            self.hardware_service.gopro_manager.send_command_record_start
+        )
+        self.window.requestGoProRecStop.connect(
+            self.hardware_service.gopro_manager.send_command_record_stop
         )
 
-
-
-        self.hardware_service.gopro_worker.status_changed.connect(
+        self.hardware_service.gopro_manager.status_changed.connect(
             self.window.updateGoProStatus, type=Qt.QueuedConnection
         )
-        self.hardware_service.gopro_worker.battery_changed.connect(
+        self.hardware_service.gopro_manager.battery_changed.connect(
             self.window.updateGoProBattery, type=Qt.QueuedConnection
         )
         
-        self.hardware_service.gopro_worker.connection_success.connect(
+        self.hardware_service.gopro_manager.connection_success.connect(
             self.on_gopro_connection_status, type=Qt.QueuedConnection
         )
 
@@ -190,20 +343,15 @@ class Application(QObject, WindowListener):
     def change_radiator_fan(self, percent: int):
         print(f"★ Radiator Fan Changed to: {percent}%")
         self.settings.set("radiator_fan", percent)
-        self.hardware_service.set_radiator_fan(percent)
+        if self.hardware_service:
+            self.hardware_service.set_radiator_fan(percent)
 
     @pyqtSlot(int)
     def change_water_pump(self, percent: int):
         print(f"★ Water Pump Changed to: {percent}%")
         self.settings.set("water_pump", percent)
-        self.hardware_service.set_water_pump(percent)
-
-    @pyqtSlot()
-    def save_states_periodically(self):
-        if self.vehicle_service:
-            self.vehicle_service.save_fuel_state()
-        if self.telemetry_service:
-            self.telemetry_service.save_mileage()
+        if self.hardware_service:
+            self.hardware_service.set_water_pump(percent)
 
     @pyqtSlot()
     def reset_fuel_integrator(self):
@@ -214,11 +362,13 @@ class Application(QObject, WindowListener):
     def set_target_laps(self, laps: int):
         print(f"★ Target Laps Set to: {laps}")
         self.vehicle_service.set_target_laps(laps)
+        self.input_seq += 1
 
     @pyqtSlot()
     def reset_session_data(self):
         print("★ Session Data Reset Requested")
         self.vehicle_service.lap_timer.reset_state(self.vehicle_service.dash_info)
+        self.input_seq += 1
 
     @pyqtSlot()
     def set_start_line(self):
@@ -249,32 +399,44 @@ class Application(QObject, WindowListener):
 
     @pyqtSlot(dict)
     def on_tpms_update(self, data: dict):
-        self.latest_tpms_data.update(data)
+        self.tire_trends.update(data)
+        for wheel, values in data.items():
+            # 傾向と警告レベルを同じ dict に載せて、表示とテレメトリで使う
+            self.latest_tpms_data[wheel] = {
+                **values,
+                **self.tire_trends.result(wheel).as_dict(),
+            }
+        self.input_seq += 1
 
     @pyqtSlot(dict)
     def on_gps_update(self, data: dict):
         self.current_gps_data = data
+        self.input_seq += 1
         if self.vehicle_service and hasattr(self.vehicle_service.dash_info, "gpsQuality"):
             self.vehicle_service.dash_info.gpsQuality = data.get("quality", 0)
+            self.vehicle_service.dash_info.speed = data.get("speed_kph", 0.0)
             self.vehicle_service.update(data)
             
     @pyqtSlot(bool)
     def on_gopro_connection_status(self, connected: bool):
-        self.gopro_connected = connected
-        print(f"★ GoPro Connection Status: {connected}")
-        if not connected:
-            self.is_auto_recording = False
+        # 録画のあるべき状態はカメラごとに GoProManager が持ち、つながった
+        # カメラから合わせるので、ここでは接続状況を表示するだけ
+        cameras = self.hardware_service.gopro_manager.snapshot()
+        online = [name for name, state in cameras.items() if state["connected"]]
+        print(f"★ GoPro Connected: {len(online)}/{len(cameras)} {online}")
 
     def show_main_window(self):
         if self.window:
             self.window.showFullScreen()
             self.app.processEvents()
+            # メニュー画面はダッシュボードを出してから、空き時間に生成する
+            self.window.warmUpScreens()
         
         if self.splash:
             self.splash.close()
             self.splash = None
 
-    def onUpdate(self) -> None:
+    def process_telemetry(self) -> None:
         self.update_count += 1
         if not self.telemetry_service or not self.vehicle_service:
             return
@@ -285,29 +447,83 @@ class Application(QObject, WindowListener):
             self.latest_tpms_data,
             self.current_gps_data,
         )
-        
-        # GoPro Auto Rec
-        if self.gopro_connected:
-            current_rpm = self.vehicle_service.dash_info.rpm
-            if current_rpm >= 500 and not self.is_auto_recording:
-                print(f"★ Engine Started (RPM {current_rpm}): Auto-Starting GoPro Recording")
-                self.hardware_service.gopro_worker.send_command_record_start()
-                self.is_auto_recording = True
-            elif current_rpm < 500 and self.is_auto_recording:
-                print(f"★ Engine Stopped (RPM {current_rpm}): Auto-Stopping GoPro Recording")
-                self.hardware_service.gopro_worker.send_command_record_stop()
-                self.is_auto_recording = False
-
-        if self.window is not None:
+
+    def update_control(self) -> None:
+        # ルールの評価は CAN のパケットごとに行われる。ここでは CAN が途絶えたときと
+        # 最小ON/OFF時間の経過を拾う
+        self.rule_engine.tick()
+
+    @pyqtSlot(str, bool)
+    def on_rule_changed(self, name: str, active: bool):
+        # 同じ動作を持つルールが複数あれば、どれか1つが ON の間は ON
+        wanted = self.rule_engine.active_actions()
+        for action in self.rule_engine.rules[name].actions:
+            on = action in wanted
+            if self.rule_outputs.get(action, False) != on:
+                self.rule_outputs[action] = on
+                self._apply_rule_action(action, on)
+
+    def _reapply_rule_action(self, action: str):
+        """後から起動したサービスを、すでに ON になっている動作に合わせる"""
+        if self.rule_outputs.get(action):
+            self._apply_rule_action(action, True)
+
+    def _apply_rule_action(self, action: str, on: bool):
+        rpm = self.vehicle_service.dash_info.rpm
+        if action == "gopro":
+            # 未接続でも送っておけば、マネージャーが覚えておいてつながった時点で合わせる
+            if self.hardware_service:
+                print(f"★ Auto-{'Starting' if on else 'Stopping'} GoPro Recording (RPM {rpm})")
+                if on:
+                    self.hardware_service.gopro_manager.send_command_record_start()
+                else:
+                    self.hardware_service.gopro_manager.send_command_record_stop()
+        elif action == "csv_log":
+            if self.telemetry_service:
+                self.telemetry_service.set_csv_logging(on)
+        elif action == "session":
+            if on:
+                self.session_started_at = time.monotonic()
+                print(f"★ Session Started (RPM {rpm})")
+            else:
+                started = self.session_started_at or time.monotonic()
+                self.session_started_at = None
+                print(f"★ Session Ended ({(time.monotonic() - started) / 60:.1f} min)")
+                # 走行の区切りで燃料・走行距離を state.json にまとめておく
+                get_counter_journal().request_checkpoint()
+        else:
+            logger.warning(f"Unknown rule action '{action}'")
+
+    def render_shift_lights(self) -> None:
+        self.window.updateShiftLights(self.vehicle_service.dash_info)
+
+    def render_display(self) -> None:
+        if not self._first_can_frame_seen and self.vehicle_service.dash_info.seq > 0:
+            self._first_can_frame_seen = True
+            self.profiler.mark("first_can_frame")
+
+        daily_km, total_km = 0.0, 0.0
+        if self.telemetry_service:
             daily_km, total_km = self.telemetry_service.mileage_tracker.get_mileage()
-            self.window.updateDashboard(
-                self.vehicle_service.dash_info,
-                self.vehicle_service.fuel_percentage,
-                self.latest_tpms_data,
-                self.current_gps_data,
-                daily_km,
-                total_km,
-            )
+        self.window.updateDashboard(
+            self.vehicle_service.dash_info,
+            self.vehicle_service.fuel_percentage,
+            self.latest_tpms_data,
+            self.current_gps_data,
+            daily_km,
+            total_km,
+        )
+
+    def render_slow_widgets(self) -> None:
+        self.window.updateSlowWidgets(
+            self.vehicle_service.dash_info,
+            self.vehicle_service.fuel_percentage,
+            self.latest_tpms_data,
+        )
+
+    def render_telemetry_status(self) -> None:
+        health = self.telemetry_service.health() if self.telemetry_service else {}
+        self.window.updateTelemetryStatus(health.get("mqtt"))
 
     @pyqtSlot(int)
     def change_lsd_level(self, level: int):
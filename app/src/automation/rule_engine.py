@@ -0,0 +1,196 @@
+"""
+CAN データで評価する自動化ルール (GoPro 録画・CSVログ・走行セッションの開始/停止)。
+
+ルールは config.AUTO_RULES に 名前 -> (条件, ON継続秒, OFF継続秒, 動作) で書く。
+条件は "信号>=ON値:OFF値" を & (かつ) と | (または。& より弱い) でつないだもの。
+
+- 項ごとのヒステリシス: ON値以上で成立し、OFF値を下回るまで成立のまま
+  (回転がアイドル付近で揺れても開始/停止を繰り返さない)
+- 最小ON/OFF時間: 条件が続けて min_on_sec 成立したら ON、
+  続けて min_off_sec 不成立なら OFF (クランキングやエンストの一瞬では切り替えない)
+
+評価は CAN のパケットごと (受信スレッド) と、CAN が途絶えたとき用に
+Application の制御周期 (GUIスレッド) で行う。途絶えて AUTO_RULE_STALE_SEC 経った
+信号は 0 とみなす (ECU の電源が落ちた = エンジン停止)。
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+class RuleSyntaxError(ValueError):
+    pass
+
+
+@dataclass
+class Term:
+    """1つの比較 (signal >= on_value で成立、off_value 未満で不成立)"""
+
+    signal: str
+    on_value: float = 1.0
+    off_value: float = 1.0
+    state: bool = False
+
+    def update(self, value: float) -> bool:
+        threshold = self.off_value if self.state else self.on_value
+        self.state = value >= threshold
+        return self.state
+
+
+def parse_condition(text: str, signals) -> list[list[Term]]:
+    """ "a>=1:0 & b | c>=2" -> [[a, b], [c]] (外側が「または」、内側が「かつ」) """
+    groups = []
+    for group_text in text.split("|"):
+        group = []
+        for term_text in group_text.split("&"):
+            term_text = term_text.strip()
+            name, op, limits = term_text.partition(">=")
+            name = name.strip()
+            if name not in signals:
+                raise RuleSyntaxError(f"unknown signal '{name}' in '{text}'")
+            if not op:
+                # 値を書かない信号は真偽値として扱う
+                group.append(Term(name))
+                continue
+            on_text, _, off_text = limits.partition(":")
+            try:
+                on_value = float(on_text)
+                off_value = float(off_text) if off_text.strip() else on_value
+            except ValueError:
+                raise RuleSyntaxError(f"bad threshold '{term_text}'") from None
+            if off_value > on_value:
+                raise RuleSyntaxError(f"OFF value above ON value in '{term_text}'")
+            group.append(Term(name, on_value, off_value))
+        groups.append(group)
+    return groups
+
+
+@dataclass
+class Rule:
+    name: str
+    groups: list[list[Term]]
+    min_on_sec: float
+    min_off_sec: float
+    actions: tuple[str, ...]
+
+    active: bool = False
+    # 条件の成立/不成立が今の値になった時刻 (monotonic)
+    raw: bool = False
+    raw_since: float = 0.0
+
+    def evaluate(self, values: dict, now: float) -> Optional[bool]:
+        """状態が変わったら新しい状態を、変わらなければ None を返す"""
+        raw = False
+        for group in self.groups:
+            # すべての項のヒステリシス状態を更新するため、短絡評価しない
+            results = [term.update(values[term.signal]) for term in group]
+            raw = raw or all(results)
+        if raw != self.raw:
+            self.raw = raw
+            self.raw_since = now
+        if raw == self.active:
+            return None
+        hold = self.min_on_sec if raw else self.min_off_sec
+        if now - self.raw_since < hold:
+            return None
+        self.active = raw
+        return raw
+
+
+class RuleEngine(QObject):
+    """
+    config.AUTO_RULES を評価し、ON/OFF が切り替わったルールを rule_changed で知らせる。
+    シグナルは評価したスレッドから出るので、受け手は QueuedConnection でつなぐこと。
+
+    signals: 信号名 -> 現在値を返す関数 (数値または真偽値)
+    """
+
+    rule_changed = pyqtSignal(str, bool)
+
+    def __init__(self, signals: dict[str, Callable[[], float]], rules: dict = None):
+        super().__init__()
+        self.signals = signals
+        self.rules: dict[str, Rule] = {}
+        self._lock = threading.Lock()
+        self._last_packet: Optional[float] = None
+
+        for name, (condition, min_on, min_off, actions) in (
+            rules or config.AUTO_RULES
+        ).items():
+            try:
+                groups = parse_condition(condition, signals)
+            except RuleSyntaxError as e:
+                logger.error(f"Rule '{name}' ignored: {e}")
+                continue
+            self.rules[name] = Rule(name, groups, min_on, min_off, tuple(actions))
+            logger.info(
+                f"Rule '{name}': {condition} (on {min_on}s / off {min_off}s) "
+                f"-> {', '.join(actions)}"
+            )
+
+    def is_active(self, name: str) -> bool:
+        rule = self.rules.get(name)
+        return rule is not None and rule.active
+
+    def active_actions(self) -> set[str]:
+        """ON のルールが持つ動作 (後から起動したサービスに状態を合わせる用)"""
+        return {
+            action
+            for rule in self.rules.values()
+            if rule.active
+            for action in rule.actions
+        }
+
+    def on_packet(self, *args):
+        """CAN の受信スレッドから、パケットを処理するたびに呼ばれる"""
+        now = time.monotonic()
+        self._last_packet = now
+        self._evaluate(now, stale=False)
+
+    def tick(self):
+        """
+        一定周期で呼ぶ。パケットが来なくても最小ON/OFF時間を経過させ、
+        CAN が途絶えたら信号を 0 として評価する
+        """
+        now = time.monotonic()
+        stale = (
+            self._last_packet is None
+            or now - self._last_packet > config.AUTO_RULE_STALE_SEC
+        )
+        self._evaluate(now, stale)
+
+    def _evaluate(self, now: float, stale: bool):
+        if not self.rules:
+            return
+        if stale:
+            values = dict.fromkeys(self.signals, 0.0)
+        else:
+            try:
+                values = {name: float(read()) for name, read in self.signals.items()}
+            except Exception as e:
+                # CAN の受信スレッドを止めないよう、ここで握りつぶす
+                logger.error(f"Rule signal read failed: {e}")
+                return
+
+        changed = []
+        with self._lock:
+            for rule in self.rules.values():
+                state = rule.evaluate(values, now)
+                if state is not None:
+                    changed.append((rule.name, state))
+
+        for name, state in changed:
+            logger.info(
+                f"Rule '{name}' -> {'ON' if state else 'OFF'} "
+                f"({'CAN lost' if stale else values})"
+            )
+            self.rule_changed.emit(name, state)
@@ -1,9 +1,11 @@
+import struct
 import time
 import zlib
 from dataclasses import dataclass
-from typing import List
+from typing import Callable, List
 
 import can
+from src.can.channel_filters import ChannelFilters
 from src.fuel.fuel_calculator import FuelCalculator
 from src.models.models import (
     BatteryVoltage,
@@ -27,14 +29,18 @@ class DashInfoListener(can.Listener):
     PACKET_SIZE = 176
     HEADER = bytes([0x82, 0x81, 0x80])
 
-    def __init__(self, fuel_calculator: FuelCalculator) -> None:
+    def __init__(
+        self, fuel_calculator: FuelCalculator, filters: ChannelFilters = None
+    ) -> None:
         super().__init__()
         self.buffer = bytearray()
         self.dashMachineInfo = DashMachineInfo()
         self.last_packet_timestamp: float | None = None
         self.fuel_calculator = fuel_calculator
-        self._gear_voltage_history: list[float] = []  # 追加
-        self._gear_voltage_window = 5             
+        # 各チャンネルのフィルタ (ギア電圧の移動平均もここ)
+        self.filters = filters or ChannelFilters()
+        # 1パケット処理するたびに (受信スレッドで) 呼ぶ関数
+        self.packet_callbacks: list[Callable[[DashMachineInfo], None]] = []
 
     def on_message_received(self, msg: can.Message) -> None:
         if msg.arbitration_id != self.CAN_ID:
@@ -48,10 +54,10 @@ class DashInfoListener(can.Listener):
             self.buffer.extend(msg.data)
 
         if len(self.buffer) >= self.PACKET_SIZE:
-            self._process_full_packet()
+            self._process_full_packet(msg.timestamp)
             self.buffer.clear()
 
-    def _process_full_packet(self) -> None:
+    def _process_full_packet(self, timestamp: float = 0.0) -> None:
         data_to_check = self.buffer[:172]
         received_crc = int.from_bytes(self.buffer[172:176], "big")
         calculated_crc = zlib.crc32(data_to_check)
@@ -59,7 +65,8 @@ class DashInfoListener(can.Listener):
         if calculated_crc != received_crc:
             return
 
-        current_time = time.time()
+        # 受信時刻 (記録したCANログを再生するときは、記録時の時刻になる)
+        current_time = timestamp or time.time()
         delta_t = 0.0
         if self.last_packet_timestamp is not None:
             delta_t = current_time - self.last_packet_timestamp
@@ -67,45 +74,65 @@ class DashInfoListener(can.Listener):
         self.last_packet_timestamp = current_time
         self.dashMachineInfo.delta_t = delta_t
 
+        # 各チャンネルは config.CHANNEL_FILTERS のフィルタを通してから使う
+        dt = delta_t or None
+        self.filters.begin(dt)
+
+        def filtered(name: str, value: float, digits: int) -> float:
+            return round(self.filters.apply(name, value, dt), digits)
+
         try:
             # --- 既存データ ---
-            rpm_val = int.from_bytes(self.buffer[4:6], "big")
+            rpm_val = int(filtered("rpm", int.from_bytes(self.buffer[4:6], "big"), 0))
             self.dashMachineInfo.setRpm(rpm_val)
 
-            tp_val = round(int.from_bytes(self.buffer[6:8], "big") * 0.1, 1)
+            tp_val = filtered(
+                "throttle", int.from_bytes(self.buffer[6:8], "big") * 0.1, 1
+            )
             self.dashMachineInfo.throttlePosition = tp_val
 
-            wt_val = round(int.from_bytes(self.buffer[12:14], "big") * 0.1, 1)
+            wt_val = filtered(
+                "water_temp", int.from_bytes(self.buffer[12:14], "big") * 0.1, 1
+            )
             self.dashMachineInfo.waterTemp = WaterTemp(int(wt_val))
 
-            ot_val = round(int.from_bytes(self.buffer[45:47], "big") * 0.1, 1)
+            ot_val = filtered(
+                "oil_temp", int.from_bytes(self.buffer[45:47], "big") * 0.1, 1
+            )
             self.dashMachineInfo.oilTemp = OilTemp(int(ot_val))
 
-            op_val = round(int.from_bytes(self.buffer[43:45], "big") * 0.1, 1)
+            op_val = filtered(
+                "oil_press", int.from_bytes(self.buffer[43:45], "big") * 0.1, 1
+            )
             self.dashMachineInfo.oilPress.oilPress = op_val
 
-            gv_val = round(int.from_bytes(self.buffer[30:32], "big") * 0.001, 3)
-            self._gear_voltage_history.append(gv_val)
-            if len(self._gear_voltage_history) > self._gear_voltage_window:
-                self._gear_voltage_history.pop(0)
-            gv_val = sum(self._gear_voltage_history) / len(self._gear_voltage_history)
+            gv_val = filtered(
+                "gear_voltage", int.from_bytes(self.buffer[30:32], "big") * 0.001, 3
+            )
             self.dashMachineInfo.gearVoltage = GearVoltage(gv_val)
-            
 
-            bv_val = round(int.from_bytes(self.buffer[48:50], "big") * 0.01, 2)
+            bv_val = filtered(
+                "battery_voltage", int.from_bytes(self.buffer[48:50], "big") * 0.01, 2
+            )
             self.dashMachineInfo.batteryVoltage = BatteryVoltage(bv_val)
 
-            fp_val = round(int.from_bytes(self.buffer[24:26], "big") * 0.1, 1)
+            fp_val = filtered(
+                "fuel_press", int.from_bytes(self.buffer[24:26], "big") * 0.1, 1
+            )
             self.dashMachineInfo.fuelPress = FuelPress(int(fp_val))
 
             # --- ★追加: Manifold Pressure (Bytes 8:9) ---
             # 0.1 kPa 単位
-            mp_val = round(int.from_bytes(self.buffer[8:10], "big") * 0.1, 1)
+            mp_val = filtered(
+                "manifold_press", int.from_bytes(self.buffer[8:10], "big") * 0.1, 1
+            )
             self.dashMachineInfo.manifoldPressure = mp_val
 
             # --- ★追加: Lambda 1 (Bytes 14:15) ---
             # 0.001 La 単位
-            la1_val = round(int.from_bytes(self.buffer[14:16], "big") * 0.001, 3)
+            la1_val = filtered(
+                "lambda1", int.from_bytes(self.buffer[14:16], "big") * 0.001, 3
+            )
             self.dashMachineInfo.lambda1 = la1_val
 
             # --- Fuel Used (Bytes 92:93) ---
@@ -113,9 +140,14 @@ class DashInfoListener(can.Listener):
             fuel_used_ml = raw_fuel_used_value * config.FUEL_USED_SCALING
             
             self.dashMachineInfo.fuelUsed = fuel_used_ml
-            self.fuel_calculator.update_from_ecu(fuel_used_ml)
+            # 折り返しとECUの再起動は、パケットの間隔を見て FuelCalculator 側で処理する
+            self.fuel_calculator.update_from_ecu(raw_fuel_used_value, delta_t or None)
             self.dashMachineInfo.fuelConsumedTotal = self.fuel_calculator.session_consumed_total
 
+            self.dashMachineInfo.markUpdated()
+            for callback in self.packet_callbacks:
+                callback(self.dashMachineInfo)
+
         except IndexError:
             print("MoTeC Protocol: Packet parsing error due to invalid length!")
 
@@ -147,30 +179,56 @@ class UdpPayloadListener(can.Listener):
         CanIdLength(0x70E, 8),
     ]
 
+    # ヘッダ: machineId(u32) runId(u32) errorCode(u8) timestamp_ms(u64), リトルエンディアン
+    HEADER_FORMAT = struct.Struct("<IIBQ")
+
     canIdLength: List[CanIdLength]
-    receivedMessages: dict[int, can.Message]
 
     def __init__(self) -> None:
         self.canIdLength = sorted(
             self.MOTEC_CAN_ID_LENGTHS + self.DATA_LOGGER_CAN_ID_LENGTHS,
             key=lambda il: il.id,
         )
-        self.receivedMessages = {}
+
+        # CAN IDごとの書き込み位置はIDの並びで決まるので、起動時に一度だけ計算する
+        self.slots: dict[int, tuple[int, int]] = {}
+        offset = self.HEADER_FORMAT.size
+        for il in self.canIdLength:
+            self.slots[il.id] = (offset, il.length)
+            offset += il.length
+        self.payloadSize = offset
+
+        # 受信したデータはこのバッファへ直接書き込む (未受信のIDは0のまま)
+        self._payload = bytearray(self.payloadSize)
+        self._view = memoryview(self._payload)
         super().__init__()
 
     def on_message_received(self, msg: can.Message) -> None:
-        self.receivedMessages[msg.arbitration_id] = msg
+        slot = self.slots.get(msg.arbitration_id)
+        if slot is None:
+            return
+        offset, length = slot
+        size = min(length, msg.dlc, len(msg.data))
+        self._view[offset : offset + size] = msg.data[:size]
+
+    def writeUdpPayload(
+        self, buffer: bytearray, machineId: int, runId: int, errorCode: int
+    ) -> None:
+        """
+        送信用バッファ (長さ payloadSize) に現在のペイロードをコピーし、ヘッダを埋める。
+        バッファを使い回せるので、送信のたびにメモリを確保しない。
+        """
+        buffer[:] = self._payload
+        self.HEADER_FORMAT.pack_into(
+            buffer,
+            0,
+            machineId & 0xFFFFFFFF,
+            runId & 0xFFFFFFFF,
+            errorCode & 0xFF,
+            int(time.time() * 1000) & 0xFFFFFFFFFFFFFFFF,
+        )
 
     def getUdpPayload(self, machineId: int, runId: int, errorCode: int) -> bytes:
-        bs = bytearray()
-        bs += (machineId & 0xFFFFFFFF).to_bytes(4, "little")
-        bs += (runId & 0xFFFFFFFF).to_bytes(4, "little")
-        bs += (errorCode & 0xFF).to_bytes(1, "little")
-        bs += (int(time.time() * 1000) & 0xFFFFFFFFFFFFFFFF).to_bytes(8, "little")
-        for il in self.canIdLength:
-            startIndex = len(bs)
-            bs += bytes(il.length)
-            if il.id in self.receivedMessages:
-                for i in range(min(il.length, self.receivedMessages[il.id].dlc)):
-                    bs[startIndex + i] = self.receivedMessages[il.id].data[i]
-        return bytes(bs)
\ No newline at end of file
+        buffer = bytearray(self.payloadSize)
+        self.writeUdpPayload(buffer, machineId, runId, errorCode)
+        return bytes(buffer)
@@ -17,7 +17,10 @@ class CanMaster:
     notifier: can.Notifier  # notifier も型ヒントに追加
 
     # __init__ が fuel_calculator を受け取るように修正
-    def __init__(self, fuel_calculator: FuelCalculator) -> None:
+    # interfaceReady: 起動時に別スレッドで setupCanInterface() 済みなら True
+    def __init__(
+        self, fuel_calculator: FuelCalculator, interfaceReady: bool = False
+    ) -> None:
         # 1. CANバス（bus）のセットアップ
         # config.debug は config.py からインポートした debug 変数を参照
         if config.debug:
@@ -27,23 +30,8 @@ class CanMaster:
             self.bus = can.Bus(channel="debug", interface="virtual")
         else:
             logging.info("CAN master running in PROD mode (socketcan)")
-            r = subprocess.run("sudo ip link set can0 down", shell=True)
-            if r.returncode == 0:
-                logging.info("CAN interface can0 down succeeded!")
-            else:
-                logging.error("CAN interface can0 down failed!")
-            r = subprocess.run(
-                "sudo ip link set can0 type can bitrate 1000000", shell=True
-            )
-            if r.returncode == 0:
-                logging.info("CAN interface can0 setting succeeded!")
-            else:
-                logging.error("CAN interface can0 setting failed!")
-            r = subprocess.run("sudo ip link set can0 up", shell=True)
-            if r.returncode == 0:
-                logging.info("CAN interface can0 up succeeded!")
-            else:
-                logging.error("CAN interface can0 up failed!")
+            if not interfaceReady:
+                setupCanInterface()
             self.bus = can.Bus(channel="can0", interface="socketcan")
 
         self.dashInfoListener = DashInfoListener(fuel_calculator)
@@ -63,3 +51,27 @@ class CanMaster:
 
     # 外部（Application）への公式窓口
     dashMachineInfo = property(lambda self: self.dashInfoListener.dashMachineInfo)
+
+
+def setupCanInterface() -> None:
+    """
+    can0 を 1Mbps で上げ直す (sudo ip link を3回呼ぶので数百msかかる)。
+    起動時はスプラッシュ表示と並行して別スレッドで実行される。
+    """
+    r = subprocess.run("sudo ip link set can0 down", shell=True)
+    if r.returncode == 0:
+        logging.info("CAN interface can0 down succeeded!")
+    else:
+        logging.error("CAN interface can0 down failed!")
+    r = subprocess.run(
+        "sudo ip link set can0 type can bitrate 1000000", shell=True
+    )
+    if r.returncode == 0:
+        logging.info("CAN interface can0 setting succeeded!")
+    else:
+        logging.error("CAN interface can0 setting failed!")
+    r = subprocess.run("sudo ip link set can0 up", shell=True)
+    if r.returncode == 0:
+        logging.info("CAN interface can0 up succeeded!")
+    else:
+        logging.error("CAN interface can0 up failed!")
@@ -0,0 +1,345 @@
+"""
+CAN のチャンネルごとのデジタルフィルタ (表示のちらつきとテレメトリのノイズを抑える)。
+
+フィルタは config.CHANNEL_FILTERS に チャンネル名 -> "種類:パラメータ" で書く。
+    none          素通し (遅れなし)
+    ema:α         指数移動平均 y += α(x - y)。パケットごとに一定の重み
+    median:N      直近 N 点のメディアン。単発のスパイクを消す (遅れは約 N/2 点)
+    lowpass:fc    1次IIRローパス (カットオフ fc [Hz])。パケット間隔から係数を求める
+    boxcar:N      直近 N 点の移動平均 (遅れは約 (N-1)/2 点)
+
+どのフィルタも状態は固定長で、1サンプルの更新は O(1) (median は N 点の挿入位置の
+二分探索と配列の詰め直しだけ)。DashInfoListener が CAN の受信スレッドで呼ぶ。
+パケットが RESET_GAP_SEC 以上途絶えたら、古い値を引きずらないよう状態を捨てる。
+
+    python -m src.can.channel_filters             # 100Hz 入力での処理時間と効果
+    python -m src.can.channel_filters --seconds 120 --json
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import math
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+class FilterSyntaxError(ValueError):
+    pass
+
+
+class ChannelFilter:
+    """素通し (他のフィルタの基底)"""
+
+    spec = "none"
+
+    def update(self, value: float, dt: Optional[float] = None) -> float:
+        return value
+
+    def reset(self):
+        pass
+
+
+class EmaFilter(ChannelFilter):
+    def __init__(self, alpha: float):
+        if not 0.0 < alpha <= 1.0:
+            raise FilterSyntaxError(f"ema alpha must be in (0, 1]: {alpha}")
+        self.alpha = alpha
+        self.spec = f"ema:{alpha:g}"
+        self._y: Optional[float] = None
+
+    def update(self, value: float, dt: Optional[float] = None) -> float:
+        if self._y is None:
+            self._y = float(value)
+        else:
+            self._y += self.alpha * (value - self._y)
+        return self._y
+
+    def reset(self):
+        self._y = None
+
+
+class LowPassFilter(ChannelFilter):
+    """
+    1次IIR (RC) ローパス。α = dt / (τ + dt), τ = 1 / (2π fc)。
+    パケットの間隔が揺れても、時間で見た応答が変わらない。
+    """
+
+    def __init__(self, cutoff_hz: float):
+        if cutoff_hz <= 0:
+            raise FilterSyntaxError(f"lowpass cutoff must be positive: {cutoff_hz}")
+        self.cutoff_hz = cutoff_hz
+        self.spec = f"lowpass:{cutoff_hz:g}"
+        self._tau = 1.0 / (2.0 * math.pi * cutoff_hz)
+        self._y: Optional[float] = None
+        self._dt: Optional[float] = None
+
+    def update(self, value: float, dt: Optional[float] = None) -> float:
+        if dt is not None and dt > 0:
+            self._dt = dt
+        if self._y is None or self._dt is None:
+            # 最初の値と、間隔がまだ分からない間は素通し
+            self._y = float(value)
+            return self._y
+        self._y += self._dt / (self._tau + self._dt) * (value - self._y)
+        return self._y
+
+    def reset(self):
+        self._y = None
+        self._dt = None
+
+
+class MedianFilter(ChannelFilter):
+    def __init__(self, size: int):
+        if size < 1:
+            raise FilterSyntaxError(f"median size must be at least 1: {size}")
+        self.size = size
+        self.spec = f"median:{size}"
+        self.reset()
+
+    def update(self, value: float, dt: Optional[float] = None) -> float:
+        if self._count == self.size:
+            # いちばん古い値を並び順の配列から抜く
+            oldest = self._ring[self._index]
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        else:
+            self._count += 1
+        self._ring[self._index] = value
+        self._index = (self._index + 1) % self.size
+        bisect.insort(self._sorted, value)
+
+        middle = self._count // 2
+        if self._count % 2:
+            return self._sorted[middle]
+        return (self._sorted[middle - 1] + self._sorted[middle]) / 2.0
+
+    def reset(self):
+        self._ring = [0.0] * self.size
+        self._sorted: list[float] = []
+        self._index = 0
+        self._count = 0
+
+
+class BoxcarFilter(ChannelFilter):
+    def __init__(self, size: int):
+        if size < 1:
+            raise FilterSyntaxError(f"boxcar size must be at least 1: {size}")
+        self.size = size
+        self.spec = f"boxcar:{size}"
+        self.reset()
+
+    def update(self, value: float, dt: Optional[float] = None) -> float:
+        if self._count == self.size:
+            self._sum -= self._ring[self._index]
+        else:
+            self._count += 1
+        self._ring[self._index] = value
+        self._sum += value
+        self._index = (self._index + 1) % self.size
+        if self._index == 0 and self._count == self.size:
+            # 足し引きの丸め誤差が溜まらないよう、1周ごとに合計を取り直す
+            self._sum = math.fsum(self._ring)
+        return self._sum / self._count
+
+    def reset(self):
+        self._ring = [0.0] * self.size
+        self._sum = 0.0
+        self._index = 0
+        self._count = 0
+
+
+_FILTER_TYPES = {
+    "ema": (EmaFilter, float),
+    "lowpass": (LowPassFilter, float),
+    "median": (MedianFilter, int),
+    "boxcar": (BoxcarFilter, int),
+}
+
+
+def parse_filter(spec: str) -> ChannelFilter:
+    """ "ema:0.3" -> EmaFilter(0.3)。"none" や空文字は素通し"""
+    kind, _, param = spec.strip().lower().partition(":")
+    if kind in ("", "none"):
+        return ChannelFilter()
+    if kind not in _FILTER_TYPES:
+        raise FilterSyntaxError(f"unknown filter '{kind}' in '{spec}'")
+    cls, param_type = _FILTER_TYPES[kind]
+    try:
+        return cls(param_type(param))
+    except ValueError as e:
+        if isinstance(e, FilterSyntaxError):
+            raise
+        raise FilterSyntaxError(f"bad parameter in '{spec}'") from None
+
+
+class ChannelFilters:
+    """チャンネル名 -> フィルタ。表にないチャンネルは素通し"""
+
+    RESET_GAP_SEC = 1.0
+
+    def __init__(self, table: dict[str, str] = None):
+        self.filters: dict[str, ChannelFilter] = {}
+        for name, spec in (config.CHANNEL_FILTERS if table is None else table).items():
+            try:
+                channel_filter = parse_filter(spec)
+            except FilterSyntaxError as e:
+                logger.error(f"Filter for '{name}' ignored: {e}")
+                continue
+            if type(channel_filter) is not ChannelFilter:
+                self.filters[name] = channel_filter
+                logger.info(f"Channel filter '{name}': {channel_filter.spec}")
+        self._passthrough = ChannelFilter()
+
+    def begin(self, dt: Optional[float]):
+        """パケットごとに最初に呼ぶ (長く途絶えた後なら状態を捨てる)"""
+        if dt is not None and dt >= self.RESET_GAP_SEC:
+            self.reset()
+
+    def apply(self, name: str, value: float, dt: Optional[float] = None) -> float:
+        return self.filters.get(name, self._passthrough).update(value, dt)
+
+    def reset(self):
+        for channel_filter in self.filters.values():
+            channel_filter.reset()
+
+
+# ===============================================
+# ベンチマーク (100Hz の入力)
+# ===============================================
+
+
+@dataclass
+class FilterBenchResult:
+    channel: str
+    spec: str
+    us_per_sample: float
+    noise_rms: float  # フィルタ前の (真値との差の) RMS
+    filtered_rms: float  # フィルタ後の RMS
+    spikes_passed: int  # 真値から大きく外れたまま出た単発スパイクの数
+    step_delay_ms: float  # ステップ入力が半分に届くまでの時間
+
+
+def _test_signal(seconds: float, rate_hz: float, seed: int = 1):
+    """(時刻, 真値, 入力) の列。ゆっくりした変化 + 白色雑音 + 単発スパイク + ステップ"""
+    rng = random.Random(seed)
+    samples = []
+    n = int(seconds * rate_hz)
+    step_at = n // 2
+    for i in range(n):
+        t = i / rate_hz
+        truth = math.sin(2 * math.pi * 0.2 * t) + (2.0 if i >= step_at else 0.0)
+        value = truth + rng.gauss(0.0, 0.1)
+        if rng.random() < 0.01:
+            value += rng.choice((-1.0, 1.0)) * 3.0
+        samples.append((t, truth, value))
+    return samples, step_at / rate_hz
+
+
+def bench_filter(
+    channel: str, channel_filter: ChannelFilter, seconds: float, rate_hz: float
+) -> FilterBenchResult:
+    samples, step_t = _test_signal(seconds, rate_hz)
+    dt = 1.0 / rate_hz
+
+    # 処理時間 (出力を捨てて、更新だけを測る)
+    update = channel_filter.update
+    channel_filter.reset()
+    values = [value for _, _, value in samples]
+    start = time.perf_counter()
+    for value in values:
+        update(value, dt)
+    us_per_sample = (time.perf_counter() - start) * 1e6 / len(values)
+
+    # 効果と遅れ (ステップの前後は遅れの評価にだけ使う)
+    channel_filter.reset()
+    raw_sq = filtered_sq = 0.0
+    counted = spikes_passed = 0
+    step_delay = None
+    for t, truth, value in samples:
+        out = update(value, dt)
+        if t >= step_t and step_delay is None and out - truth >= -1.0:
+            step_delay = t - step_t
+        if abs(t - step_t) < 1.0:
+            continue
+        raw_sq += (value - truth) ** 2
+        filtered_sq += (out - truth) ** 2
+        counted += 1
+        if abs(out - truth) > 1.5:
+            spikes_passed += 1
+
+    return FilterBenchResult(
+        channel=channel,
+        spec=channel_filter.spec,
+        us_per_sample=us_per_sample,
+        noise_rms=math.sqrt(raw_sq / max(counted, 1)),
+        filtered_rms=math.sqrt(filtered_sq / max(counted, 1)),
+        spikes_passed=spikes_passed,
+        step_delay_ms=(step_delay or 0.0) * 1000.0,
+    )
+
+
+def format_results(results: list[FilterBenchResult], rate_hz: float) -> str:
+    lines = [
+        f"{'channel':<16}{'filter':<14}{'us/sample':>10}"
+        f"{'rms in':>9}{'rms out':>9}{'spikes':>8}{'delay ms':>10}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.channel:<16}{r.spec:<14}{r.us_per_sample:>10.2f}"
+            f"{r.noise_rms:>9.3f}{r.filtered_rms:>9.3f}"
+            f"{r.spikes_passed:>8}{r.step_delay_ms:>10.0f}"
+        )
+    total_us = sum(r.us_per_sample for r in results)
+    budget_us = 1e6 / rate_hz
+    lines.append(
+        f"per packet: {total_us:.1f} us "
+        f"({total_us / budget_us:.3%} of the {budget_us / 1000:.0f} ms budget at "
+        f"{rate_hz:g} Hz)"
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="CANチャンネルのフィルタを 100Hz の合成入力で計測する"
+    )
+    parser.add_argument("--seconds", type=float, default=60.0, help="入力の長さ [秒]")
+    parser.add_argument("--rate", type=float, default=100.0, help="入力の周波数 [Hz]")
+    parser.add_argument(
+        "--filter",
+        action="append",
+        metavar="NAME=SPEC",
+        help="config の表の代わりに計測するフィルタ (複数指定可)",
+    )
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.filter:
+        table = dict(item.partition("=")[::2] for item in args.filter)
+    else:
+        table = config.CHANNEL_FILTERS
+    filters = ChannelFilters(table)
+
+    results = [
+        bench_filter(name, channel_filter, args.seconds, args.rate)
+        for name, channel_filter in filters.filters.items()
+    ]
+    if args.json:
+        print(json.dumps([asdict(r) for r in results], indent=4))
+    else:
+        print(format_results(results, args.rate))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
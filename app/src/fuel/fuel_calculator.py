@@ -1,4 +1,8 @@
 import threading
+from typing import Callable, Optional
+
+from src.fuel.fuel_counter import FuelCounterUnwrapper
+from src.util import config
 
 
 class FuelCalculator:
@@ -12,6 +16,8 @@ class FuelCalculator:
         tank_capacity_ml: float,
         current_remaining_ml: float,
         initial_consumed_total: float = 0.0, # ★追加引数
+        last_ecu_fuel_used: Optional[float] = None,
+        on_update: Callable[[float, float], None] = None,
     ):
         # 満タン容量
         self.tank_capacity_ml = max(0.0, tank_capacity_ml)
@@ -22,11 +28,21 @@ class FuelCalculator:
         # 今回のセッションでの消費量 (残量計算用)
         self._session_consumed = 0.0
 
+        # 起動してからの消費量 (給油リセットでも0に戻さない。周回ごとの燃費計算用)
+        self._consumed_since_start = 0.0
+
         # ★ 表示用の合計消費量 (前回保存分 + 今回の消費分)
         self._base_consumed_total = initial_consumed_total
 
-        # 前回ECUから受け取った生の値
-        self._last_ecu_fuel_used_raw = None
+        # ECUの16bitカウンタの折り返し・再起動の処理 (前回の起動の最後の値を引き継ぐ)
+        last_raw = None
+        if last_ecu_fuel_used is not None and config.FUEL_USED_SCALING > 0:
+            last_raw = round(last_ecu_fuel_used / config.FUEL_USED_SCALING)
+        self.counter = FuelCounterUnwrapper(last_raw)
+
+        # on_update(今回消費した分, 基準にしているECUの値): 値を受け取るたびに呼ぶ
+        # (ジャーナル記録用)
+        self.on_update = on_update
 
         self._lock = threading.Lock()
 
@@ -57,6 +73,12 @@ class FuelCalculator:
         with self._lock:
             return self._base_consumed_total + self._session_consumed
 
+    @property
+    def consumed_since_start(self) -> float:
+        """起動してからの消費量 (給油リセットの影響を受けない)"""
+        with self._lock:
+            return self._consumed_since_start
+
     @property
     def remaining_fuel_percent(self) -> float:
         if self.tank_capacity_ml <= 0:
@@ -64,17 +86,16 @@ class FuelCalculator:
         percentage = (self.remaining_fuel_ml / self.tank_capacity_ml) * 100.0
         return max(0.0, min(100.0, percentage))
 
-    def update_from_ecu(self, current_fuel_used_raw: float):
+    def update_from_ecu(self, raw_value: int, delta_t: Optional[float] = None):
+        """
+        raw_value: ECUの Fuel Used (16bit の生の値)
+        delta_t: 前のパケットからの秒数 (分からなければ None)
+        """
         with self._lock:
-            if self._last_ecu_fuel_used_raw is None:
-                self._last_ecu_fuel_used_raw = current_fuel_used_raw
-                return
+            diff = self.counter.update(raw_value, delta_t) * config.FUEL_USED_SCALING
+            self._session_consumed += diff
+            self._consumed_since_start += diff
+            last_ml = self.counter.last * config.FUEL_USED_SCALING
 
-            diff = current_fuel_used_raw - self._last_ecu_fuel_used_raw
-
-            if diff >= 0:
-                self._session_consumed += diff
-            else:
-                print(f"FuelCalc: ECU reset detected ({self._last_ecu_fuel_used_raw} -> {current_fuel_used_raw})")
-            
-            self._last_ecu_fuel_used_raw = current_fuel_used_raw
\ No newline at end of file
+        if self.on_update:
+            self.on_update(diff, last_ml)
@@ -0,0 +1,111 @@
+"""
+ECU の Fuel Used (16bit の積算カウンタ) を、折り返しを展開した増分にする。
+
+カウンタは 65535 の次に 0 に戻る (raw × FUEL_USED_SCALING ≒ 10.9 L で1周)。
+前回の値との差を 65536 の剰余で取れば、折り返しをまたいでも正しい増分になる。
+
+剰余で取った差は常に 0 以上なので、値が戻った (ノイズ・ECUの再起動) ときも
+大きな増分に見える。そこで、前のパケットからの経過時間 (delta_t) で流せる
+最大量 (FUEL_MAX_FLOW_ML_PER_SEC) を超える増分は採用しない。
+
+- パケットが FUEL_ECU_RESET_GAP_SEC 以上途絶えた後に値が戻っていたら、ECU が
+  再起動して 0 から数え直したとみなし、今の値をそれ以降の消費量として数える
+- それ以外のありえない値は捨てる。ただし次の値がその値から見て妥当なら、
+  そちらが正しかった (途絶えずに再起動した等) とみなして基準を乗り換える
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FuelCounterStats:
+    """再生ツールやログ用の集計"""
+
+    samples: int = 0
+    counts: int = 0  # 採用した増分の合計 [raw]
+    wraps: int = 0  # 65535 -> 0 の折り返し
+    resets: int = 0  # ECU の再起動
+    rejected: int = 0  # 流量的にありえないので捨てた値
+    resyncs: int = 0  # 捨てた値を正しかったとして基準を乗り換えた回数
+
+
+class FuelCounterUnwrapper:
+    MODULUS = 65536
+    # 受信側で測る delta_t は、パケットがまとめて届くと実際の間隔より短くなる
+    MIN_WINDOW_SEC = 0.25
+
+    def __init__(self, last_raw: Optional[int] = None, scaling: float = None):
+        self.scaling = config.FUEL_USED_SCALING if scaling is None else scaling
+        # 増分の基準にしている値 (最後に採用した raw)。None なら次の値から数え始める
+        self.last: Optional[int] = last_raw
+        # 捨てた値 (次の値がこれに続いていれば、こちらを基準に乗り換える)
+        self._candidate: Optional[int] = None
+        self.stats = FuelCounterStats()
+
+    def _max_counts(self, seconds: float) -> float:
+        """seconds 秒で増えうる最大の raw (丸めの分として2カウントの余裕を持つ)"""
+        if self.scaling <= 0:
+            return float(self.MODULUS)
+        seconds = max(seconds, self.MIN_WINDOW_SEC)
+        return config.FUEL_MAX_FLOW_ML_PER_SEC * seconds / self.scaling + 2
+
+    def update(self, raw: int, delta_t: Optional[float] = None) -> int:
+        """
+        raw: ECU から届いた値 (0〜65535)
+        delta_t: 前のパケットからの秒数 (起動直後などで分からなければ None)
+        戻り値: 前回からの増分 [raw]
+        """
+        raw %= self.MODULUS
+        self.stats.samples += 1
+        if self.last is None:
+            self.last = raw
+            return 0
+
+        last = self.last
+        diff = (raw - last) % self.MODULUS
+        gap_unknown = delta_t is None or delta_t <= 0
+        if gap_unknown:
+            # 前回の起動から ECU が動き続けていたかは分からない
+            plausible = raw >= last
+        else:
+            plausible = diff <= self._max_counts(delta_t)
+
+        if plausible:
+            if raw < last:
+                self.stats.wraps += 1
+            return self._accept(raw, diff)
+
+        if raw < last and (gap_unknown or delta_t >= config.FUEL_ECU_RESET_GAP_SEC):
+            # 途絶えている間に ECU が再起動し、0 から数え直した
+            self.stats.resets += 1
+            logger.info(f"ECU fuel counter reset ({last} -> {raw}, gap {delta_t})")
+            limit = None if gap_unknown else self._max_counts(delta_t)
+            return self._accept(raw, raw if limit is None or raw <= limit else 0)
+
+        candidate = self._candidate
+        if (
+            candidate is not None
+            and not gap_unknown
+            and (raw - candidate) % self.MODULUS <= self._max_counts(delta_t)
+        ):
+            # 続けて同じ流れの値が来た: 捨てた値のほうが正しかった
+            self.stats.resyncs += 1
+            logger.warning(f"ECU fuel counter resynced ({last} -> {candidate})")
+            return self._accept(raw, (raw - candidate) % self.MODULUS)
+
+        self.stats.rejected += 1
+        self._candidate = raw
+        logger.debug(f"ECU fuel counter jump rejected ({last} -> {raw}, dt {delta_t})")
+        return 0
+
+    def _accept(self, raw: int, counts: int) -> int:
+        self.last = raw
+        self._candidate = None
+        self.stats.counts += counts
+        return counts
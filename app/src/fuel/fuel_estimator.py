@@ -0,0 +1,125 @@
+"""
+周回ごとの燃料消費から、残りで走れる周回数・距離と、目標周回数 (targetLaps)
+まで燃料が足りるかを見積もる。
+
+LapTimer の周回イベントごとに、その周で使った燃料と走った距離を記録し、
+直近 FUEL_ESTIMATE_LAPS 周の平均を燃費とする。ピットインやイエローで
+極端に遅い周 (窓の最速ラップの FUEL_ESTIMATE_SLOW_LAP_RATIO 倍以上) は外す。
+
+1周の消費量は FuelCalculator の「起動してからの消費量」(給油リセットで
+0に戻らない) の差で取る。周の途中で給油リセットしても、その周の消費量が
+負になったり満タン分飛んだりせず、残量だけが給油後の値で見積もり直される。
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from src.fuel.fuel_calculator import FuelCalculator
+from src.models.models import DashMachineInfo
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LapFuel:
+    """1周分の記録"""
+
+    lap: int
+    lap_time: float  # [s]
+    fuel_ml: float
+    distance_km: float
+
+
+class FuelEstimator:
+    """
+    見積もりは dash_info の燃料見積もり欄 (fuelPerLap など) に書き込み、
+    ダッシュボード・MQTT・Google Sheets はそこから読む。
+    周回イベントと GPS 更新 (どちらも GUIスレッド) のたびに見積もり直す。
+    """
+
+    def __init__(
+        self,
+        fuel_calculator: FuelCalculator,
+        dash_info: DashMachineInfo,
+        window_laps: int = None,
+    ):
+        self.fuel_calculator = fuel_calculator
+        self.dash_info = dash_info
+        self.laps: deque[LapFuel] = deque(
+            maxlen=window_laps or config.FUEL_ESTIMATE_LAPS
+        )
+        # 今の周が始まったときの (起動してからの消費量, 走行距離)
+        self._lap_start: Optional[tuple[float, float]] = None
+        self._distance_km = 0.0
+
+    def update(self, gps_data: dict):
+        """GPS 更新ごとに呼ぶ (走行距離を覚えて、残量から見積もり直す)"""
+        self._distance_km = gps_data.get("total_distance_km", self._distance_km)
+        self._publish()
+
+    def on_lap(self, completed_laps: int, lap_time: float):
+        """LapTimer の周回イベント (スタート時は completed_laps=0)"""
+        consumed = self.fuel_calculator.consumed_since_start
+        if self._lap_start is not None and completed_laps > 0:
+            start_consumed, start_km = self._lap_start
+            lap = LapFuel(
+                completed_laps,
+                lap_time,
+                consumed - start_consumed,
+                max(0.0, self._distance_km - start_km),
+            )
+            self.laps.append(lap)
+            self.dash_info.lastLapFuel = lap.fuel_ml
+            logger.info(
+                f"Lap {lap.lap} fuel: {lap.fuel_ml:.0f} ml "
+                f"({lap.distance_km:.2f} km, {lap.lap_time:.1f} s)"
+            )
+        self._lap_start = (consumed, self._distance_km)
+        self._publish()
+
+    def _representative_laps(self) -> list[LapFuel]:
+        """燃費の計算に使う周 (遅すぎる周を除く)"""
+        timed = [lap.lap_time for lap in self.laps if lap.lap_time > 0]
+        if not timed:
+            return []
+        limit = min(timed) * config.FUEL_ESTIMATE_SLOW_LAP_RATIO
+        return [lap for lap in self.laps if 0 < lap.lap_time <= limit]
+
+    def _publish(self):
+        info = self.dash_info
+        laps = self._representative_laps()
+        remaining = self.fuel_calculator.remaining_fuel_ml
+
+        per_lap = sum(lap.fuel_ml for lap in laps) / len(laps) if laps else None
+        distance = sum(lap.distance_km for lap in laps)
+        per_km = (
+            sum(lap.fuel_ml for lap in laps) / distance
+            if distance >= config.FUEL_ESTIMATE_MIN_KM
+            else None
+        )
+        if per_lap is not None and per_lap <= 0:
+            per_lap = None
+        if per_km is not None and per_km <= 0:
+            per_km = None
+
+        info.fuelPerLap = per_lap
+        info.fuelPerKm = per_km
+        info.fuelLapsRemaining = None if per_lap is None else remaining / per_lap
+        info.fuelKmRemaining = None if per_km is None else remaining / per_km
+        info.fuelMarginLaps = None
+        if per_lap is None or info.targetLaps <= 0:
+            return
+
+        # 目標までに必要な燃料 (今の周で使った分は差し引く)
+        if info.isRaceFinished:
+            laps_to_go = 0
+        else:
+            laps_to_go = max(0, info.targetLaps - max(0, info.lapCount - 1))
+        in_lap = 0.0
+        if self._lap_start is not None and info.lapCount > 0:
+            in_lap = self.fuel_calculator.consumed_since_start - self._lap_start[0]
+        needed = max(0.0, laps_to_go * per_lap - min(in_lap, per_lap))
+        info.fuelMarginLaps = (remaining - needed) / per_lap
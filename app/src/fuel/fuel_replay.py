@@ -0,0 +1,226 @@
+"""
+CAN の記録を DashInfoListener に流し、Fuel Used の積算を検証する。
+
+    python -m src.fuel.fuel_replay capture.asc            # python-can で読めるログ
+    python -m src.fuel.fuel_replay capture.log --expected-ml 2350
+    python -m src.fuel.fuel_replay --synthetic 1800       # 合成した記録で検証
+
+記録は can.LogReader が読める形式 (.asc / .blf / .log / .csv / .trc)。
+--synthetic は MockMachine と同じ形のパケットを、16bit の折り返し・途絶えた間の
+ECU 再起動・1回だけの異常値・再起動なしの途絶えを入れて作り、真値と比べる。
+
+従来の計算 (値が戻ったら捨てる) と FuelCounterUnwrapper の結果を並べて出し、
+真値 (--expected-ml または合成時の値) との差が --tolerance を超えたら 1 を返す。
+"""
+
+import argparse
+import json
+import logging
+import sys
+from dataclasses import asdict, dataclass
+from typing import Iterable, Optional
+
+import can
+from src.can.can_listeners import DashInfoListener
+from src.can.mock_can_sender import MockMachine
+from src.fuel.fuel_calculator import FuelCalculator
+from src.fuel.fuel_counter import FuelCounterUnwrapper
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayResult:
+    packets: int
+    duration_sec: float
+    wraps: int
+    resets: int
+    rejected: int
+    resyncs: int
+    unwrapped_ml: float
+    legacy_ml: float
+    expected_ml: Optional[float]
+
+    @property
+    def error_ml(self) -> Optional[float]:
+        if self.expected_ml is None:
+            return None
+        return self.unwrapped_ml - self.expected_ml
+
+
+class LegacyIntegrator:
+    """以前の FuelCalculator と同じ計算 (値が戻ったら ECU リセットとして捨てる)"""
+
+    def __init__(self):
+        self.last: Optional[float] = None
+        self.total = 0.0
+
+    def __call__(self, info):
+        if self.last is not None and info.fuelUsed >= self.last:
+            self.total += info.fuelUsed - self.last
+        self.last = info.fuelUsed
+
+
+# ===============================================
+# 記録の読み込み / 合成
+# ===============================================
+
+
+def capture_messages(path: str) -> Iterable[can.Message]:
+    return can.LogReader(path)
+
+
+def _flow_ml_per_sec(t: float) -> float:
+    """MockCanSender と同じ流量モデル (乱数を使わないので毎回同じ結果になる)"""
+    t_ms = int(t * 1000)
+    rpm = 2500 + (t_ms % 12000)
+    throttle = (t_ms % 1001) / 10.0
+    return 0.2 + (rpm / 15000.0) * 8.0 + (throttle / 100.0) * 2.0
+
+
+def synthetic_messages(
+    seconds: float, rate_hz: float = 20.0
+) -> tuple[list[can.Message], float]:
+    """
+    (メッセージ, 真の消費量 [ml]) を返す。
+    カウンタは折り返し直前から始め、途中で次の出来事を起こす:
+      40%: 3秒途絶えて ECU 再起動 (カウンタが 0 から。エンジン停止中は消費なし)
+      60%: 1パケットだけ異常な値
+      75%: 2秒途絶える (ECU は動き続けて消費も続く)
+    """
+    machine = MockMachine()
+    dt = 1.0 / rate_hz
+    scaling = config.FUEL_USED_SCALING
+    counter_ml = (FuelCounterUnwrapper.MODULUS - 3000) * scaling
+    truth_ml = 0.0
+    messages = []
+
+    t = 0.0
+    reset_at, glitch_at, dropout_at = 0.4 * seconds, 0.6 * seconds, 0.75 * seconds
+    reset_done = glitch_done = dropout_done = False
+    while t < seconds:
+        if not reset_done and t >= reset_at:
+            reset_done = True
+            t += 3.0
+            counter_ml = 0.0
+            continue
+        if not dropout_done and t >= dropout_at:
+            dropout_done = True
+            for _ in range(int(2.0 / dt)):
+                flow = _flow_ml_per_sec(t) * dt
+                counter_ml += flow
+                truth_ml += flow
+                t += dt
+            continue
+
+        flow = _flow_ml_per_sec(t) * dt
+        counter_ml += flow
+        truth_ml += flow
+        raw = int(counter_ml / scaling) % FuelCounterUnwrapper.MODULUS
+        if not glitch_done and t >= glitch_at:
+            glitch_done = True
+            raw ^= 0x8000
+        machine.fuelUsedRaw = raw
+        for i, msg in enumerate(machine.to_motec_set3_messages()):
+            msg.timestamp = 1_000_000.0 + t + i * 0.0005
+            messages.append(msg)
+        t += dt
+    return messages, truth_ml
+
+
+# ===============================================
+# 再生
+# ===============================================
+
+
+def replay(
+    messages: Iterable[can.Message], expected_ml: Optional[float] = None
+) -> ReplayResult:
+    calculator = FuelCalculator(config.INITIAL_FUEL_ML, config.INITIAL_FUEL_ML)
+    listener = DashInfoListener(calculator)
+    legacy = LegacyIntegrator()
+    listener.packet_callbacks.append(legacy)
+
+    first = last = None
+    for msg in messages:
+        if msg.arbitration_id != DashInfoListener.CAN_ID:
+            continue
+        if first is None:
+            first = msg.timestamp
+        last = msg.timestamp
+        listener.on_message_received(msg)
+
+    stats = calculator.counter.stats
+    return ReplayResult(
+        packets=stats.samples,
+        duration_sec=0.0 if first is None else last - first,
+        wraps=stats.wraps,
+        resets=stats.resets,
+        rejected=stats.rejected,
+        resyncs=stats.resyncs,
+        unwrapped_ml=calculator.consumed_since_start,
+        legacy_ml=legacy.total,
+        expected_ml=expected_ml,
+    )
+
+
+def format_result(result: ReplayResult) -> str:
+    lines = [
+        f"packets      : {result.packets} ({result.duration_sec:.1f} s)",
+        f"wraps        : {result.wraps}",
+        f"ECU resets   : {result.resets}",
+        f"rejected     : {result.rejected} (resynced {result.resyncs})",
+        f"unwrapped    : {result.unwrapped_ml:.1f} ml",
+        f"legacy       : {result.legacy_ml:.1f} ml",
+    ]
+    if result.expected_ml is not None:
+        lines.append(f"expected     : {result.expected_ml:.1f} ml")
+        lines.append(
+            f"error        : {result.error_ml:+.1f} ml "
+            f"(legacy {result.legacy_ml - result.expected_ml:+.1f} ml)"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="CANの記録で Fuel Used の積算 (折り返し・ECU再起動) を検証する"
+    )
+    parser.add_argument("capture", nargs="?", help="python-can で読めるCANログ")
+    parser.add_argument(
+        "--synthetic", type=float, metavar="SEC", help="合成した記録を使う (秒数)"
+    )
+    parser.add_argument("--expected-ml", type=float, help="実測の消費量 [ml]")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.01, help="許容する誤差 (割合)"
+    )
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.synthetic:
+        messages, truth = synthetic_messages(args.synthetic)
+        expected = args.expected_ml if args.expected_ml is not None else truth
+    elif args.capture:
+        messages, expected = capture_messages(args.capture), args.expected_ml
+    else:
+        parser.error("capture file or --synthetic is required")
+
+    result = replay(messages, expected)
+    if args.json:
+        print(json.dumps({**asdict(result), "error_ml": result.error_ml}, indent=4))
+    else:
+        print(format_result(result))
+
+    if result.expected_ml:
+        error = abs(result.error_ml) / result.expected_ml
+        if error > args.tolerance:
+            print(f"FAIL: error {error:.2%} exceeds {args.tolerance:.2%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import asyncio
+import functools
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from src.gopro.gopro_worker import GoProWorker, ShutterAck
+from src.logger.gopro_sync_log import GoProSyncLog
+from src.services.io_reactor import IoReactor
+from src.util import config
+from src.util.gopro_store import GoProStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CameraState:
+    """1台分の状態 (ワーカーのシグナルで更新する)"""
+
+    name: str
+    address: Optional[str] = None
+    status: str = "Not Connected"
+    connected: bool = False
+    battery: Optional[int] = None
+    recording: Optional[bool] = None
+
+
+class GoProManager(QObject):
+    """
+    複数の GoPro (車載・リア・ドライバーなど) との BLE 接続を、IoReactor の
+    1つのループ上で同時に保つ。カメラごとに GoProWorker を1つ持つ。
+
+    - 録画の開始/停止は asyncio.gather で全カメラへ並列に送り、各カメラで
+      反映された時刻を GoProSyncLog に残す (映像の頭出し合わせ用)
+    - カメラごとの状態は CameraState に持ち、GUI 向けのシグナルはまとめて出す
+      (状態は全台を並べた文字列、電池は一番少ないカメラ、接続は1台でもつながっているか)
+
+    シグナルと公開メソッドは GoProWorker と同じなので、1台のときは従来どおりに使える。
+    """
+
+    status_changed = pyqtSignal(str)
+    connection_success = pyqtSignal(bool)
+    battery_changed = pyqtSignal(int)
+
+    def __init__(self, reactor: IoReactor, cameras: list = None, sync_log=None):
+        super().__init__()
+        self.reactor = reactor
+        self.sync_log = sync_log or GoProSyncLog()
+        self.workers: dict[str, GoProWorker] = {}
+        self.states: dict[str, CameraState] = {}
+        self._any_connected = False
+        self._battery: Optional[int] = None
+
+        for index, (name, address) in enumerate(cameras or config.GOPRO_CAMERAS):
+            worker = GoProWorker(
+                reactor,
+                name=name,
+                # 1台だった頃の保存ファイルは先頭のカメラのものとして引き継ぐ
+                store=GoProStore(name, legacy=index == 0),
+                address=address,
+                exclude=functools.partial(self._addresses_except, name),
+            )
+            worker.status_changed.connect(functools.partial(self._on_status, name))
+            worker.connection_success.connect(
+                functools.partial(self._on_connection, name)
+            )
+            worker.battery_changed.connect(functools.partial(self._on_battery, name))
+            worker.recording_changed.connect(
+                functools.partial(self._on_recording, name)
+            )
+            self.workers[name] = worker
+            self.states[name] = CameraState(name, address=worker.target_address)
+
+    def _addresses_except(self, name: str) -> set:
+        return {
+            w.target_address
+            for n, w in self.workers.items()
+            if n != name and w.target_address
+        }
+
+    # -------------------------------------------------
+    # GUI から呼ばれる (GoProWorker と同じ名前)
+    # -------------------------------------------------
+    def start_connection(self):
+        for worker in self.workers.values():
+            worker.start_connection()
+
+    def stop(self):
+        for worker in self.workers.values():
+            worker.stop()
+
+    def send_command_record_start(self):
+        self.reactor.submit(self._shutter_all(True))
+
+    def send_command_record_stop(self):
+        self.reactor.submit(self._shutter_all(False))
+
+    def snapshot(self) -> dict[str, dict]:
+        """{カメラ名: 状態} を返す"""
+        return {name: asdict(state) for name, state in self.states.items()}
+
+    # -------------------------------------------------
+    # 録画の一斉開始/停止
+    # -------------------------------------------------
+    async def _shutter_all(self, recording: bool):
+        issued = time.time()
+        names = list(self.workers)
+        results = await asyncio.gather(
+            *(
+                self.workers[name].set_recording(
+                    recording, config.GOPRO_SYNC_TIMEOUT_SEC
+                )
+                for name in names
+            ),
+            return_exceptions=True,
+        )
+        rows = self._sync_rows(recording, issued, names, results)
+        try:
+            await self.reactor.run_blocking(self.sync_log.append, rows)
+        except Exception as e:
+            logger.error(f"GoPro sync log write failed: {e}")
+
+    def _sync_rows(self, recording, issued, names, results) -> list[list]:
+        event = "START" if recording else "STOP"
+        acks = {
+            name: result
+            for name, result in zip(names, results)
+            if isinstance(result, ShutterAck)
+        }
+        first = min((ack.estimated_time for ack in acks.values()), default=None)
+
+        rows, summary = [], []
+        for name, result in zip(names, results):
+            worker = self.workers[name]
+            ack = acks.get(name)
+            head = [event, f"{issued:.3f}", name, worker.target_address or ""]
+            if ack is None:
+                if isinstance(result, Exception):
+                    note = f"error: {result}"
+                elif worker.desired_recording != recording:
+                    note = "superseded"
+                elif not worker.is_connected:
+                    note = "offline"
+                else:
+                    note = "timeout"
+                rows.append(head + ["", "", "", "", note])
+                summary.append(f"{name} {note}")
+                continue
+            skew = (ack.estimated_time - first) * 1000.0
+            rows.append(
+                head
+                + [
+                    f"{ack.wall_time:.3f}",
+                    "" if ack.rtt_ms is None else f"{ack.rtt_ms:.0f}",
+                    f"{ack.estimated_time:.3f}",
+                    f"{skew:.0f}",
+                    "already" if ack.already else "",
+                ]
+            )
+            summary.append(f"{name} +{skew:.0f} ms")
+
+        spread = 0.0
+        if acks:
+            spread = (max(a.estimated_time for a in acks.values()) - first) * 1000.0
+        logger.info(
+            f"GoPro REC {event} synced {len(acks)}/{len(names)} "
+            f"(spread {spread:.0f} ms): {', '.join(summary)}"
+        )
+        return rows
+
+    # -------------------------------------------------
+    # ワーカーからの通知 (リアクターのスレッドで呼ばれる)
+    # -------------------------------------------------
+    def _on_status(self, name: str, text: str):
+        self.states[name].status = text
+        self.states[name].address = self.workers[name].target_address
+        if len(self.states) == 1:
+            self.status_changed.emit(text)
+        else:
+            self.status_changed.emit(
+                " / ".join(f"{s.name}: {s.status}" for s in self.states.values())
+            )
+
+    def _on_connection(self, name: str, connected: bool):
+        self.states[name].connected = connected
+        if not connected:
+            self.states[name].recording = None
+        any_connected = any(s.connected for s in self.states.values())
+        logger.info(
+            f"GoPro {name} {'connected' if connected else 'disconnected'} "
+            f"({sum(s.connected for s in self.states.values())}/{len(self.states)})"
+        )
+        if any_connected != self._any_connected:
+            self._any_connected = any_connected
+            self.connection_success.emit(any_connected)
+
+    def _on_battery(self, name: str, percent: int):
+        self.states[name].battery = percent
+        levels = [s.battery for s in self.states.values() if s.battery is not None]
+        lowest = min(levels)
+        if lowest != self._battery:
+            self._battery = lowest
+            self.battery_changed.emit(lowest)
+
+    def _on_recording(self, name: str, recording: bool):
+        self.states[name].recording = recording
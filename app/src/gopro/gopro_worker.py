@@ -1,243 +1,538 @@
 import asyncio
 import logging
-import threading
-from bleak import BleakScanner, BleakClient
-from bleak.exc import BleakError
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from src.services.io_reactor import IoReactor
+from src.util import config
+from src.util.gopro_store import GoProStore
+from src.util.lazy_import import lazy_import
+
+# 接続を開始したときに読み込む
+bleak = lazy_import("bleak")
+
 logger = logging.getLogger(__name__)
 
-# --- GoPro UUIDs ---
-COMMAND_REQ_UUID = "b5f90072-aa8d-11e3-9046-0002a5d5c51b"
-CMD_SHUTTER_ON = bytearray([0x03, 0x01, 0x01, 0x01])
-CMD_SHUTTER_OFF = bytearray([0x03, 0x01, 0x01, 0x00])
+# --- GoPro UUIDs (Open GoPro BLE) ---
+_GOPRO_UUID = "b5f9{}-aa8d-11e3-9046-0002a5d5c51b"
+COMMAND_REQ_UUID = _GOPRO_UUID.format("0072")
+COMMAND_RSP_UUID = _GOPRO_UUID.format("0073")
+SETTINGS_REQ_UUID = _GOPRO_UUID.format("0074")
+SETTINGS_RSP_UUID = _GOPRO_UUID.format("0075")
+QUERY_REQ_UUID = _GOPRO_UUID.format("0076")
+QUERY_RSP_UUID = _GOPRO_UUID.format("0077")
 UUID_BATTERY_LEVEL = "00002a19-0000-1000-8000-00805f9b34fb"
 
+CMD_SHUTTER = 0x01
+CMD_SHUTTER_ON = bytearray([0x03, CMD_SHUTTER, 0x01, 0x01])
+CMD_SHUTTER_OFF = bytearray([0x03, CMD_SHUTTER, 0x01, 0x00])
+# 設定 91 (Keep Alive) に 66 を書く。カメラのスリープ防止と接続の生存確認を兼ねる
+SETTING_KEEP_ALIVE = 0x5B
+CMD_KEEP_ALIVE = bytearray([0x03, SETTING_KEEP_ALIVE, 0x01, 0x42])
+
+# ステータスの通知登録 (0x53) と、その後に届く変化の通知 (0x93)
+QUERY_REGISTER_STATUS = 0x53
+QUERY_STATUS_PUSH = 0x93
+STATUS_ENCODING = 10  # 録画中なら 1
+STATUS_BATTERY_PERCENT = 70
+CMD_REGISTER_STATUS = bytearray(
+    [0x03, QUERY_REGISTER_STATUS, STATUS_ENCODING, STATUS_BATTERY_PERCENT]
+)
+
+
+class _PacketAssembler:
+    """
+    GoPro の BLE 応答は 20 バイトごとに分割されて届くので、ヘッダーの長さを
+    見て1メッセージに組み立てる。
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._remaining = 0
+
+    def feed(self, data: bytes) -> Optional[bytes]:
+        """完成したらメッセージ (ヘッダーを除く) を返す"""
+        if not data:
+            return None
+        header = data[0]
+        if header & 0x80:  # 続きのパケット
+            payload = data[1:]
+        else:
+            kind = (header >> 5) & 0x03
+            if kind == 0:  # 5bit 長
+                self._remaining = header & 0x1F
+                payload = data[1:]
+            elif kind == 1:  # 13bit 長
+                self._remaining = ((header & 0x1F) << 8) | data[1]
+                payload = data[2:]
+            else:  # 16bit 長
+                self._remaining = (data[1] << 8) | data[2]
+                payload = data[3:]
+            self._buffer = bytearray()
+        self._buffer += payload
+        self._remaining -= len(payload)
+        if self._remaining > 0:
+            return None
+        message, self._buffer = bytes(self._buffer), bytearray()
+        return message
+
+
+@dataclass
+class ShutterAck:
+    """録画の開始/停止がカメラに反映されたことの確認"""
+
+    wall_time: float  # 反映を知った時刻 (epoch秒)
+    rtt_ms: Optional[float] = None  # コマンドの往復時間。通知で知った場合は None
+    already: bool = False  # 頼む前からその状態だった
+
+    @property
+    def estimated_time(self) -> float:
+        """カメラが実際に切り替わったと見なす時刻 (往復の中間)"""
+        if self.rtt_ms is None:
+            return self.wall_time
+        return self.wall_time - self.rtt_ms / 2000.0
+
 
 class GoProWorker(QObject):
+    """
+    GoPro 1台との BLE 接続を IoReactor のループ上で保つ。
+    複数台を使うときは GoProManager がカメラごとに1つ作る。
+
+    - 最後に接続できたアドレスとペアリング状態を GoProStore に保存し、
+      次回はスキャンせずに直接接続する (ペアリング済みなら pair() もしない)
+    - 電池残量と録画状態はステータスの通知で受け取る (定期的な読み出しはしない)
+    - 録画の開始/停止は「あるべき状態」として持ち、カメラの状態と違うときだけ
+      コマンドを送る。連続した START/STOP は最後の1つにまとまる
+    - コマンドを書いてから応答の通知が来るまでの時間を RTT として測る
+    """
+
     # GUIへの通知用シグナル
     status_changed = pyqtSignal(str)
     connection_success = pyqtSignal(bool)
     battery_changed = pyqtSignal(int)
-
-    def __init__(self):
+    recording_changed = pyqtSignal(bool)
+
+    def __init__(
+        self,
+        reactor: IoReactor,
+        name: str = "onboard",
+        store: GoProStore = None,
+        address: Optional[str] = None,
+        exclude: Optional[Callable[[], set]] = None,
+    ):
         super().__init__()
-        self.target_address = None
+        self.reactor = reactor
+        self.name = name
+        self.store = store or GoProStore(name, legacy=True)
+        cached = self.store.load()
+        # address を指定したらそのカメラにしかつながない
+        self.pinned_address = address
+        if address and cached["address"] != address:
+            cached = {"address": address, "name": None, "bonded": False}
+        self.target_address: Optional[str] = cached["address"]
+        self.target_name: Optional[str] = cached["name"]
+        self.bonded: bool = bool(cached["bonded"])
         self.ignore_addresses = set()
+        # 他のカメラが使っているアドレス (スキャンで拾わない)
+        self.exclude = exclude or set
 
+        # 接続処理は共有の IoReactor のループ上で動かす
         self.loop = None
-        self.thread = None
+        self._future = None
         self._keep_running = False
-        self._command_queue = asyncio.Queue()
+        self._wake: Optional[asyncio.Event] = None
+
+        # カメラの状態 (通知で更新) と、あるべき録画状態
+        self.is_connected = False
+        self.is_encoding: Optional[bool] = None
+        self.battery: Optional[int] = None
+        self.desired_recording: Optional[bool] = None
+
+        self._pending: dict[tuple[str, int], asyncio.Future] = {}
+        # set_recording() で反映を待っている (録画状態, Future)
+        self._ack_waiters: list[tuple[bool, asyncio.Future]] = []
+        self._assemblers: dict[str, _PacketAssembler] = {}
+        self.last_rtt_ms: Optional[float] = None
+        self.commands_sent = 0
+        self.commands_coalesced = 0
 
     def start_connection(self):
-        if self.thread and self.thread.is_alive():
+        if self._future and not self._future.done():
             return
 
         self._keep_running = True
-        self.target_address = None
         self.ignore_addresses.clear()
 
-        self.thread = threading.Thread(target=self._run_async_loop, daemon=True)
-        self.thread.start()
+        self.loop = self.reactor.loop
+        self._future = self.reactor.submit(self._run())
 
     def stop(self):
         """GUIから呼ばれる: 処理を停止"""
         # ▼ ログ追加: ボタンが効いているか確認しやすくする
-        logger.info(">>> GoProWorker: STOP SIGNAL RECEIVED <<<")
+        logger.info(f">>> GoProWorker[{self.name}]: STOP SIGNAL RECEIVED <<<")
 
         self._keep_running = False
-        if self.loop:
-            self.loop.call_soon_threadsafe(self._command_queue.put_nowait, None)
+        self._notify()
 
     def send_command_record_start(self):
-        if self.loop:
-            self.loop.call_soon_threadsafe(
-                self._command_queue.put_nowait, "RECORD_START"
-            )
+        self._set_desired(True)
 
     def send_command_record_stop(self):
-        if self.loop:
-            self.loop.call_soon_threadsafe(
-                self._command_queue.put_nowait, "RECORD_STOP"
-            )
+        self._set_desired(False)
+
+    def _set_desired(self, recording: bool):
+        # 未接続でも覚えておき、つながった時点でカメラをその状態にする
+        if self._recording_mismatch() or recording == self.desired_recording:
+            # まだ送っていない要求を上書きした / 同じ要求の繰り返し
+            self.commands_coalesced += 1
+        self.desired_recording = recording
+        self._notify()
+
+    async def set_recording(
+        self, recording: bool, timeout: float
+    ) -> Optional[ShutterAck]:
+        """
+        ループのスレッドから呼ぶ。あるべき録画状態を変え、カメラに反映されるまで待つ。
+        接続を開始していない / timeout 秒以内に反映されなければ None。
+        """
+        self._set_desired(recording)
+        if self.is_connected and self.is_encoding == recording:
+            return ShutterAck(time.time(), already=True)
+        if self._wake is None:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        waiter = (recording, future)
+        self._ack_waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if waiter in self._ack_waiters:
+                self._ack_waiters.remove(waiter)
+
+    def _notify(self):
+        loop, wake = self.loop, self._wake
+        if loop is not None and wake is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # ループが閉じている
 
-    def _run_async_loop(self):
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
+    async def _run(self):
+        self._wake = asyncio.Event()
         try:
-            self.loop.run_until_complete(self._main_logic())
+            await self._main_logic()
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
-            logger.error(f"GoPro Worker Critical Error: {e}")
+            logger.error(f"GoPro Worker[{self.name}] Critical Error: {e}")
             self.status_changed.emit(f"Sys Error: {e}")
         finally:
-            try:
-                tasks = asyncio.all_tasks(self.loop)
-                for task in tasks:
-                    task.cancel()
-                self.loop.run_until_complete(
-                    asyncio.gather(*tasks, return_exceptions=True)
-                )
-            except Exception:
-                pass
-            self.loop.close()
-            self.thread = None
+            # 停止中に届いたコマンドは受け付けない
+            self.loop = None
+            self._wake = None
+            self.is_connected = False
             self.status_changed.emit("Disconnected")
 
+    # -------------------------------------------------
+    # 接続
+    # -------------------------------------------------
+    async def _scan(self) -> bool:
+        """GoPro を探して target_address を決める。見つかれば True"""
+        self.status_changed.emit("Scanning...")
+        logger.info(f"[{self.name}] Scanning for GoPro...")
+        taken = self.exclude()
+        try:
+            # ▼ 修正: タイムアウトを 8.0 -> 3.0 に短縮してレスポンス向上
+            device = await bleak.BleakScanner.find_device_by_filter(
+                lambda d, ad: d.name
+                and "GoPro" in d.name
+                and d.address not in self.ignore_addresses
+                and d.address not in taken
+                and self.pinned_address in (None, d.address),
+                timeout=3.0,
+            )
+        except asyncio.TimeoutError:
+            device = None
+
+        if not device:
+            self.status_changed.emit("Not Found / Retrying")
+            if self.ignore_addresses:
+                logger.info(f"Ignored addresses: {self.ignore_addresses}")
+            return False
+
+        if device.address != self.target_address:
+            # 別のカメラなのでペアリングからやり直す
+            self.bonded = False
+        self.target_address = device.address
+        self.target_name = device.name
+        self.status_changed.emit(f"Found: {device.name}")
+        logger.info(f"[{self.name}] Found GoPro: {self.target_address}")
+        return True
+
     async def _main_logic(self):
+        delay = config.GOPRO_RECONNECT_MIN_SEC
+        direct_failures = 0
         while self._keep_running:
+            scanned = False
             try:
                 # -------------------------------------------------
-                # 1. スキャン (アドレスが未定の場合)
+                # 1. 前回のカメラへ直接接続。失敗が続いたらスキャンする
                 # -------------------------------------------------
-                if self.target_address is None:
-                    self.status_changed.emit("Scanning...")
-                    logger.info("Scanning for GoPro...")
-
-                    if not self._command_queue.empty():
-                        cmd = self._command_queue.get_nowait()
-                        if cmd is None:
-                            return
-
-                    try:
-                        # ▼ 修正: タイムアウトを 8.0 -> 3.0 に短縮してレスポンス向上
-                        device = await BleakScanner.find_device_by_filter(
-                            lambda d, ad: d.name
-                            and "GoPro" in d.name
-                            and d.address not in self.ignore_addresses,
-                            timeout=3.0,
-                        )
-                    except asyncio.TimeoutError:
-                        device = None
-
-                    if not self._keep_running:
-                        return
-
-                    if not device:
-                        self.status_changed.emit("Not Found / Retrying")
-                        if self.ignore_addresses:
-                            logger.info(f"Ignored addresses: {self.ignore_addresses}")
-
-                        # ▼ 修正: 待機時間を 2.0 -> 1.0 に短縮
+                if (
+                    self.target_address is None
+                    or direct_failures >= config.GOPRO_DIRECT_CONNECT_ATTEMPTS
+                ):
+                    if not await self._scan():
                         await asyncio.sleep(1.0)
                         continue
-
-                    self.target_address = device.address
-                    self.status_changed.emit(f"Found: {device.name}")
-                    logger.info(f"Found GoPro: {self.target_address}")
+                    scanned = True
+                    direct_failures = 0
 
                 # -------------------------------------------------
                 # 2. 接続試行
                 # -------------------------------------------------
                 self.status_changed.emit("Connecting...")
-
-                async with BleakClient(
+                started = time.monotonic()
+                timeout = 20.0 if scanned else config.GOPRO_DIRECT_CONNECT_TIMEOUT_SEC
+                async with bleak.BleakClient(
                     self.target_address,
-                    timeout=20.0,
+                    timeout=timeout,
                     disconnected_callback=self._on_disconnect,
                 ) as client:
                     if not client.is_connected:
                         raise Exception("Connection failed (is_connected=False)")
 
-                    self.status_changed.emit("Pairing...")
-                    try:
-                        await client.pair(protection_level=2)
-                        logger.info("Pairing requested")
-                    except Exception as e:
-                        logger.warning(f"Pairing warning (continuing): {e}")
-
-                    self.status_changed.emit("Verifying...")
-                    try:
-                        bat_val = await client.read_gatt_char(UUID_BATTERY_LEVEL)
-                        bat_percent = int(bat_val[0])
-
-                        self.status_changed.emit(f"Connected! Bat:{bat_percent}%")
-                        self.battery_changed.emit(bat_percent)
-                        self.connection_success.emit(True)
-
-                        self.ignore_addresses.clear()
-
-                    except Exception as e:
-                        self.status_changed.emit("Auth Failed")
-                        raise Exception(f"Authentication/Read Failed: {e}")
-
-                    # -------------------------------------------------
-                    # 3. コマンド待機ループ
-                    # -------------------------------------------------
-                    logger.info("Entered command loop")
-                    while self._keep_running and client.is_connected:
-                        try:
-                            cmd = await asyncio.wait_for(
-                                self._command_queue.get(), timeout=5.0
-                            )
-
-                            if cmd is None:
-                                logger.info("Stop command received. Exiting main loop.")
-                                return
-
-                            if cmd == "RECORD_START":
-                                self.status_changed.emit("REC: Starting...")
-                                await client.write_gatt_char(
-                                    COMMAND_REQ_UUID, CMD_SHUTTER_ON, response=True
-                                )
-                                self.status_changed.emit("Recording!")
-
-                            elif cmd == "RECORD_STOP":
-                                self.status_changed.emit("REC: Stopping...")
-                                await client.write_gatt_char(
-                                    COMMAND_REQ_UUID, CMD_SHUTTER_OFF, response=True
-                                )
-                                self.status_changed.emit("Ready")
-
-                        except asyncio.TimeoutError:
-                            try:
-                                bat_val = await client.read_gatt_char(
-                                    UUID_BATTERY_LEVEL
-                                )
-                                bat_percent = int(bat_val[0])
-                                self.battery_changed.emit(bat_percent)
-                            except Exception as hb_err:
-                                logger.warning(f"Heartbeat failed: {hb_err}")
-                                break
-
-                        except Exception as e:
-                            logger.error(f"Command Loop Error: {e}")
-                            break
+                    was_bonded = self.bonded
+                    await self._setup_session(client)
+                    logger.info(
+                        f"[{self.name}] GoPro ready in "
+                        f"{(time.monotonic() - started) * 1000:.0f} ms "
+                        f"({'scan' if scanned else 'direct'}, "
+                        f"{'bonded' if was_bonded else 'paired'})"
+                    )
+                    delay = config.GOPRO_RECONNECT_MIN_SEC
+                    direct_failures = 0
+                    await self._command_loop(client)
 
             # -------------------------------------------------
-            # 4. エラーハンドリング
+            # 3. エラーハンドリング
             # -------------------------------------------------
-            except (BleakError, Exception) as e:
+            except (bleak.exc.BleakError, Exception) as e:
                 if not self._keep_running:
                     return
 
-                logger.error(f"Connection/Runtime Error: {e}")
+                logger.error(f"[{self.name}] Connection/Runtime Error: {e}")
                 self.status_changed.emit("Error / Retrying...")
-                self.connection_success.emit(False)
-
-                if self.target_address:
-                    logger.info(f"Adding {self.target_address} to ignore list")
+                if not scanned:
+                    direct_failures += 1
+                elif self.target_address and not self.pinned_address:
+                    # スキャンで見つけたのに使えなかったカメラは当面避ける
+                    logger.info(
+                        f"[{self.name}] Adding {self.target_address} to ignore list"
+                    )
                     self.ignore_addresses.add(self.target_address)
 
-                    self.status_changed.emit("Cleaning up...")
-                    try:
-                        async with BleakClient(self.target_address) as temp_client:
-                            await temp_client.unpair()
-                        logger.info("Unpair successful")
-                    except Exception as unpair_err:
-                        logger.warning(f"Unpair failed: {unpair_err}")
-
             finally:
-                if not self._keep_running:
+                self._connection_lost()
+
+            if not self._keep_running:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, config.GOPRO_RECONNECT_MAX_SEC)
+
+    async def _setup_session(self, client):
+        """ペアリング (必要なら) と通知の登録。終わったら録画状態を合わせる"""
+        if not self.bonded:
+            self.status_changed.emit("Pairing...")
+            try:
+                await client.pair(protection_level=2)
+                logger.info("Pairing requested")
+            except Exception as e:
+                logger.warning(f"Pairing warning (continuing): {e}")
+
+        self.status_changed.emit("Verifying...")
+        self._assemblers.clear()
+        try:
+            # 通知の登録には暗号化が要るので、ここが通ればペアリングは有効
+            for uuid in (COMMAND_RSP_UUID, SETTINGS_RSP_UUID, QUERY_RSP_UUID):
+                await client.start_notify(uuid, self._on_notify)
+            await self._request(
+                client, QUERY_REQ_UUID, CMD_REGISTER_STATUS, QUERY_RSP_UUID,
+                QUERY_REGISTER_STATUS,
+            )
+        except Exception as e:
+            self.status_changed.emit("Auth Failed")
+            if self.bonded:
+                # 保存していたペアリング情報が無効になっている。次はやり直す
+                self.bonded = False
+                await self._unpair(client)
+            raise Exception(f"Authentication/Notify Failed: {e}")
+
+        if self.battery is None:
+            # 電池残量のステータスに対応しない機種向け (接続時の1回だけ読む)
+            try:
+                bat_val = await client.read_gatt_char(UUID_BATTERY_LEVEL)
+                self._set_battery(int(bat_val[0]))
+            except Exception as e:
+                logger.debug(f"Battery read skipped: {e}")
+
+        self.bonded = True
+        self.is_connected = True
+        self.ignore_addresses.clear()
+        self.store.save(self.target_address, self.target_name, self.bonded)
+        bat = f" Bat:{self.battery}%" if self.battery is not None else ""
+        self.status_changed.emit(f"Connected!{bat}")
+        self.connection_success.emit(True)
+
+    async def _unpair(self, client):
+        self.status_changed.emit("Cleaning up...")
+        try:
+            await client.unpair()
+            logger.info("Unpair successful")
+        except Exception as unpair_err:
+            logger.warning(f"Unpair failed: {unpair_err}")
+        self.store.save(self.target_address, self.target_name, False)
+
+    def _connection_lost(self):
+        if self.is_connected:
+            self.connection_success.emit(False)
+        self.is_connected = False
+        self.is_encoding = None
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    # -------------------------------------------------
+    # コマンド
+    # -------------------------------------------------
+    async def _command_loop(self, client):
+        """あるべき録画状態に合わせ、何もなければキープアライブを送る"""
+        logger.info(f"[{self.name}] Entered command loop")
+        while self._keep_running and client.is_connected:
+            if self._recording_mismatch():
+                await self._apply_recording(client, self.desired_recording)
+            self._wake.clear()
+            if self._recording_mismatch():
+                continue  # 送っている間に要求が変わった
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), timeout=config.GOPRO_KEEPALIVE_SEC
+                )
+            except asyncio.TimeoutError:
+                try:
+                    await self._request(
+                        client, SETTINGS_REQ_UUID, CMD_KEEP_ALIVE, SETTINGS_RSP_UUID,
+                        SETTING_KEEP_ALIVE,
+                    )
+                except Exception as hb_err:
+                    logger.warning(f"Keep-alive failed: {hb_err}")
                     return
 
-                self.target_address = None
-                await asyncio.sleep(3.0)
+        if not self._keep_running:
+            logger.info("Stop command received. Exiting main loop.")
+
+    def _recording_mismatch(self) -> bool:
+        return (
+            self.desired_recording is not None
+            and self.desired_recording != self.is_encoding
+        )
+
+    async def _apply_recording(self, client, recording: bool):
+        self.status_changed.emit(
+            "REC: Starting..." if recording else "REC: Stopping..."
+        )
+        rtt = await self._request(
+            client, COMMAND_REQ_UUID,
+            CMD_SHUTTER_ON if recording else CMD_SHUTTER_OFF,
+            COMMAND_RSP_UUID, CMD_SHUTTER,
+        )
+        # 通知より先に応答が来るので、ここで状態を確定させておく
+        self._set_encoding(recording, rtt)
+        logger.info(
+            f"[{self.name}] GoPro shutter {'ON' if recording else 'OFF'} acknowledged "
+            f"in {rtt:.0f} ms (wall {time.time():.3f})"
+        )
+        self.status_changed.emit("Recording!" if recording else "Ready")
+
+    async def _request(self, client, uuid, data, rsp_uuid, rsp_id) -> float:
+        """書き込んで応答の通知を待ち、往復時間 [ms] を返す"""
+        key = (rsp_uuid, rsp_id)
+        future = self.loop.create_future()
+        self._pending[key] = future
+        started = time.perf_counter()
+        try:
+            await client.write_gatt_char(uuid, data, response=True)
+            status = await asyncio.wait_for(
+                future, timeout=config.GOPRO_RESPONSE_TIMEOUT_SEC
+            )
+        finally:
+            self._pending.pop(key, None)
+        rtt = (time.perf_counter() - started) * 1000.0
+        self.last_rtt_ms = rtt
+        self.commands_sent += 1
+        if status != 0:
+            raise Exception(f"GoPro rejected 0x{rsp_id:02X} (status {status})")
+        return rtt
+
+    # -------------------------------------------------
+    # 通知
+    # -------------------------------------------------
+    def _on_notify(self, characteristic, data: bytearray):
+        uuid = str(getattr(characteristic, "uuid", characteristic)).lower()
+        assembler = self._assemblers.setdefault(uuid, _PacketAssembler())
+        message = assembler.feed(bytes(data))
+        if not message or len(message) < 2:
+            return
+        rsp_id, status = message[0], message[1]
+
+        if uuid == QUERY_RSP_UUID and rsp_id in (
+            QUERY_REGISTER_STATUS,
+            QUERY_STATUS_PUSH,
+        ):
+            self._parse_status(message[2:])
+
+        future = self._pending.get((uuid, rsp_id))
+        if future is not None and not future.done():
+            future.set_result(status)
+
+    def _parse_status(self, body: bytes):
+        """(ID, 長さ, 値) の並びを読む"""
+        i = 0
+        while i + 2 <= len(body):
+            status_id, length = body[i], body[i + 1]
+            value = int.from_bytes(body[i + 2 : i + 2 + length], "big")
+            i += 2 + length
+            if status_id == STATUS_ENCODING:
+                self._set_encoding(bool(value))
+            elif status_id == STATUS_BATTERY_PERCENT:
+                self._set_battery(value)
+
+    def _set_encoding(self, encoding: bool, rtt_ms: Optional[float] = None):
+        if encoding != self.is_encoding:
+            self.is_encoding = encoding
+            self.recording_changed.emit(encoding)
+            if self._wake is not None:
+                self._wake.set()  # 手元で録画を止められた場合なども合わせ直す
+        if self._ack_waiters:
+            ack = ShutterAck(time.time(), rtt_ms)
+            for target, future in self._ack_waiters:
+                if target == encoding and not future.done():
+                    future.set_result(ack)
+
+    def _set_battery(self, percent: int):
+        if percent != self.battery:
+            self.battery = percent
+            self.battery_changed.emit(percent)
 
     def _on_disconnect(self, client):
-        logger.info("GoPro Disconnected callback")
-        self.connection_success.emit(False)
-        if self.loop and self._keep_running:
-            self.loop.call_soon_threadsafe(
-                self._command_queue.put_nowait, "DISCONNECTED_EVENT"
-            )
+        logger.info(f"[{self.name}] GoPro Disconnected callback")
+        if self.is_connected:
+            self.is_connected = False
+            self.connection_success.emit(False)
+        self._notify()
@@ -3,10 +3,14 @@ import math
 import time
 import threading
 import subprocess
-import serial
 import random
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from src.util.lazy_import import lazy_import
+
+# 実機でポートを開くときに読み込む (DEBUGのモックでは使わない)
+serial = lazy_import("serial")
+
 # ===============================================
 # ヘルパー関数
 # ===============================================
@@ -0,0 +1,93 @@
+import logging
+import time
+
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QLayout, QStackedWidget, QWidget
+
+logger = logging.getLogger(__name__)
+
+
+class FontCache:
+    """
+    ラベルの大きさから決まるフォントを (family, scale, size) ごとに使い回す。
+
+    同じ大きさのラベルは毎回同じフォントになるので、QFont の生成と
+    ピクセルサイズの計算を1回で済ませる。
+    """
+
+    def __init__(self):
+        self._fonts: dict[tuple[str, float, int, int], QFont] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def pixelSizeFor(scale: float, width: int, height: int) -> int:
+        # 横幅の半分と高さの小さい方を基準にする (QCustomLabel の従来の計算)
+        baseSize = min(width / 2, height)
+        # ピクセルサイズが1以上になるようにガード
+        return max(1, int(baseSize * scale))
+
+    def get(self, family: str, scale: float, size: QSize) -> QFont:
+        key = (family, scale, size.width(), size.height())
+        font = self._fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+
+        self.misses += 1
+        font = QFont()
+        if family:
+            font.setFamily(family)
+        font.setPixelSize(self.pixelSizeFor(scale, size.width(), size.height()))
+        self._fonts[key] = font
+        return font
+
+    def __len__(self):
+        return len(self._fonts)
+
+
+# 全ラベルで共有するキャッシュ
+font_cache = FontCache()
+
+
+def warmUpLayout(root: QWidget, size: QSize) -> None:
+    """
+    表示前に root 以下のレイアウトを size (パネルの解像度) で確定させ、
+    各ラベルのフォントを先に決めておく。
+
+    QStackedWidget の非表示ページも含めて計算するので、起動後の最初の表示や
+    画面切り替えのときには、フォントの変更とテキストの再レイアウトが起きない。
+    """
+    # 循環インポートを避けるためここで読み込む
+    from src.gui.self_defined_widgets import QCustomLabel
+
+    start = time.perf_counter()
+    root.resize(size)
+    # スタイルシートを先に適用しておかないと、表示時にサイズヒントが変わる
+    for widget in [root] + root.findChildren(QWidget):
+        widget.ensurePolished()
+    # findChildren は親→子の順に返すので、外側のレイアウトから確定していく
+    for widget in [root] + root.findChildren(QWidget):
+        parent = widget.parentWidget()
+        if isinstance(parent, QStackedWidget):
+            # QStackedLayout は表示中のページしか配置しないので、他のページも合わせる
+            widget.setGeometry(parent.contentsRect())
+        # self.layout を属性で上書きしているウィジェットがあるので QWidget 経由で取る
+        layout: QLayout = QWidget.layout(widget)
+        if layout is not None:
+            # 非表示のウィジェットでは activate() が子の配置を保留するので直接配置する
+            if widget.testAttribute(Qt.WA_LayoutOnEntireRect):
+                layout.setGeometry(widget.rect())
+            else:
+                layout.setGeometry(widget.contentsRect())
+
+    labels = root.findChildren(QCustomLabel)
+    for label in labels:
+        label.applyFontSize(label.size())
+
+    logger.debug(
+        f"Layout warmed up for {size.width()}x{size.height()}: "
+        f"{len(labels)} labels, {len(font_cache)} fonts "
+        f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
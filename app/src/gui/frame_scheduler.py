@@ -0,0 +1,140 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QObject, Qt, QTimer
+
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FrameConsumer:
+    name: str
+    period: float
+    callback: Callable[[], None]
+    # 新しいデータの有無を判定する関数 (None なら周期ごとに必ず実行)
+    data_seq: Optional[Callable[[], object]] = None
+
+    next_due: float = 0.0
+    last_seq: object = None
+    runs: int = 0
+    skipped_no_data: int = 0
+    skipped_late: int = 0
+    busy_time: float = 0.0
+
+
+class FrameScheduler(QObject):
+    """
+    GUIスレッドで動く処理を、消費者ごとに独立したレートで呼び出す。
+
+    - 1本の QTimer を最も速い消費者のレートで回し、期限が来た消費者だけ実行する
+    - data_seq を持つ消費者は、前回から値が変わっていなければ実行しない
+      (データが来た時点で期限を過ぎていれば、次のtickですぐ描画する)
+    - 処理落ちした分は取り戻さない。1tickの予算を使い切ったら、
+      残りの消費者はそのtickを見送る (登録順が優先度)
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.consumers: list[FrameConsumer] = []
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+        self.tick_interval = 0.05
+        self._stats_window_start = time.monotonic()
+
+    def add(
+        self,
+        name: str,
+        rate_hz: float,
+        callback: Callable[[], None],
+        data_seq: Optional[Callable[[], object]] = None,
+    ) -> FrameConsumer:
+        consumer = FrameConsumer(name, 1.0 / rate_hz, callback, data_seq)
+        self.consumers.append(consumer)
+        return consumer
+
+    def start(self):
+        fastest = min(c.period for c in self.consumers)
+        self.tick_interval = fastest
+        now = time.monotonic()
+        for consumer in self.consumers:
+            consumer.next_due = now
+        self.timer.start(max(1, int(fastest * 1000)))
+        logger.info(
+            "Frame scheduler started: "
+            + ", ".join(f"{c.name}={1.0 / c.period:g}Hz" for c in self.consumers)
+        )
+
+    def stop(self):
+        self.timer.stop()
+
+    def _tick(self):
+        tick_start = time.monotonic()
+        budget_end = tick_start + self.tick_interval
+
+        for consumer in self.consumers:
+            now = time.monotonic()
+            if now < consumer.next_due:
+                continue
+
+            if consumer.data_seq is not None:
+                seq = consumer.data_seq()
+                if seq == consumer.last_seq:
+                    consumer.skipped_no_data += 1
+                    continue
+            else:
+                seq = None
+
+            if now >= budget_end:
+                # 予算切れ: このtickは見送り、次のtickで改めて判定する
+                consumer.skipped_late += 1
+                continue
+
+            try:
+                consumer.callback()
+            except Exception as e:
+                logger.error(f"Frame consumer '{consumer.name}' failed: {e}")
+            done = time.monotonic()
+            consumer.busy_time += done - now
+            consumer.runs += 1
+            consumer.last_seq = seq
+
+            # 遅れた分をまとめて実行しないよう、期限を過ぎていたら今から数え直す
+            consumer.next_due += consumer.period
+            if consumer.next_due < done:
+                consumer.next_due = done + consumer.period
+
+        self._maybe_log(tick_start)
+
+    def stats(self) -> dict:
+        window = max(time.monotonic() - self._stats_window_start, 1e-9)
+        return {
+            c.name: {
+                "hz": c.runs / window,
+                "busy_ms": c.busy_time / max(c.runs, 1) * 1000.0,
+                "skipped_no_data": c.skipped_no_data,
+                "skipped_late": c.skipped_late,
+            }
+            for c in self.consumers
+        }
+
+    def _maybe_log(self, now: float):
+        if config.RENDER_STATS_LOG_SEC <= 0:
+            return
+        if now - self._stats_window_start < config.RENDER_STATS_LOG_SEC:
+            return
+        for name, s in self.stats().items():
+            logger.info(
+                f"Frame '{name}': {s['hz']:.1f} Hz, {s['busy_ms']:.2f} ms/run, "
+                f"no-data {s['skipped_no_data']}, late {s['skipped_late']}"
+            )
+        for consumer in self.consumers:
+            consumer.runs = 0
+            consumer.skipped_no_data = 0
+            consumer.skipped_late = 0
+            consumer.busy_time = 0.0
+        self._stats_window_start = now
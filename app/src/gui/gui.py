@@ -1,7 +1,11 @@
-from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtCore import pyqtSignal, QSize, Qt
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QDialog, QGridLayout, QStackedWidget, QApplication
 
+from src.gui.font_cache import warmUpLayout
+from src.gui.screen_registry import ScreenRegistry
+from src.util import config
+
 # 分割したファイルのインポート
 from src.gui.screens.dashboard import DashboardWidget, WindowListener
 from src.gui.screens.menu_main import SettingsScreen
@@ -10,7 +14,7 @@ from src.gui.screens.menu_machine import MachineMenuScreen, LSDMenuScreen, FuelR
 from src.gui.screens.menu_device import DeviceMenuScreen, GoProMenuScreen, PwmDeviceMenuScreen
 
 # ★この行が一番重要です！この行がないと InfoMenuScreen エラーが出ます
-from src.gui.screens.menu_info import InfoMenuScreen, MileageScreen
+from src.gui.screens.menu_info import InfoMenuScreen, MileageScreen, TelemetryStatusScreen
 
 
 class MainDisplayWindow(QDialog):
@@ -33,7 +37,7 @@ class MainDisplayWindow(QDialog):
 
     def __init__(self, listener: WindowListener, initial_settings=None): # ★初期設定を受け取るように変更
         super(MainDisplayWindow, self).__init__(None)
-        self.resize(800, 480)
+        self.resize(config.PANEL_WIDTH, config.PANEL_HEIGHT)
         palette = QApplication.palette()
         palette.setColor(self.backgroundRole(), QColor("#000"))
         palette.setColor(self.foregroundRole(), QColor("#FFF"))
@@ -45,116 +49,187 @@ class MainDisplayWindow(QDialog):
         self._button_held = False
 
         # 設定のデフォルト値
-        fan_val = initial_settings.get("radiator_fan", 0) if initial_settings else 0
-        pump_val = initial_settings.get("water_pump", 0) if initial_settings else 0
-        driver_val = initial_settings.get("driver", "None") if initial_settings else "None"
-        tire_val = initial_settings.get("tire_set", "Dry_Soft") if initial_settings else "Dry_Soft"
+        self._initial_settings = initial_settings or {}
+        # GoPro画面ができる前に届いた状態 (画面の生成時に反映する)
+        self._gopro_status = None
+        self._gopro_battery = None
+
+        # 画面は名前で登録し、初めて表示するときに生成する
+        self.screens = ScreenRegistry(self.stack, self)
+        self._registerScreens()
 
-        # 1. Dashboard (Main View)
+        # 1. Dashboard (Main View) だけは起動時に作る
         self.dashboard = DashboardWidget(listener)
         self.dashboard.requestSetStartLine.connect(self.requestSetStartLine.emit)
+        self.screens.add("dashboard", self.dashboard)
 
-        # 2. Main Menu
-        self.settings = SettingsScreen()
-        self.settings.requestOpenRaceMenu.connect(lambda: self.stack.setCurrentWidget(self.race_menu))
-        self.settings.requestOpenMachineMenu.connect(lambda: self.stack.setCurrentWidget(self.machine_menu))
-        self.settings.requestOpenDeviceMenu.connect(lambda: self.stack.setCurrentWidget(self.device_menu))
-        self.settings.requestOpenInfoMenu.connect(lambda: self.stack.setCurrentWidget(self.info_menu))
-        self.settings.requestExit.connect(self.return_to_dashboard)
+        layout = QGridLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.stack)
+        self.setLayout(layout)
+
+        # 表示前に全画面のレイアウトとフォントをパネルの解像度で確定させておく
+        warmUpLayout(self, QSize(config.PANEL_WIDTH, config.PANEL_HEIGHT))
 
+    def _registerScreens(self):
+        r = self.screens
+        # 2. Main Menu
+        r.register("settings", self._buildSettings)
         # 3. Category Menus & Sub Screens
         # [RACE SETUP]
-        self.race_menu = RaceMenuScreen()
-        self.race_menu.requestOpenDriver.connect(lambda: self.stack.setCurrentWidget(self.driver_screen))
-        self.race_menu.requestOpenStartLine.connect(lambda: self.stack.setCurrentWidget(self.gps_set_screen))
-        self.race_menu.requestOpenSector.connect(lambda: self.stack.setCurrentWidget(self.gps_sector_screen))
-        self.race_menu.requestOpenTargetLaps.connect(lambda: self.stack.setCurrentWidget(self.target_laps_screen))
-        self.race_menu.requestResetSession.connect(self.requestResetSession.emit)
-        self.race_menu.requestBack.connect(self.return_to_settings)
-
-        # ★ ここが消えていた（または読み込まれていなかった）箇所です
-        self.driver_screen = DriverSelectScreen()
-        if hasattr(self.driver_screen, 'set_current_driver'):
-            self.driver_screen.set_current_driver(driver_val)
-        self.driver_screen.driverChanged.connect(self.requestDriverChange.emit)
-        self.driver_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.race_menu))
-
-        self.gps_set_screen = GpsSetScreen()
-        self.gps_set_screen.requestSetLine.connect(self.requestSetStartLine.emit)
-        self.gps_set_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.race_menu))
-
-        self.gps_sector_screen = GpsSectorScreen()
-        self.gps_sector_screen.requestSetSector.connect(self.requestSetSector.emit)
-        self.gps_sector_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.race_menu))
-
-        self.target_laps_screen = TargetLapsScreen()
-        self.target_laps_screen.requestSetLaps.connect(self.requestSetTargetLaps.emit)
-        self.target_laps_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.race_menu))
-
+        r.register("race_menu", self._buildRaceMenu)
+        r.register("driver", self._buildDriverScreen)
+        r.register("gps_set", self._buildGpsSetScreen)
+        r.register("gps_sector", self._buildGpsSectorScreen)
+        r.register("target_laps", self._buildTargetLapsScreen)
         # [MACHINE SETUP]
-        self.machine_menu = MachineMenuScreen()
-        self.machine_menu.requestOpenLSD.connect(lambda: self.stack.setCurrentWidget(self.lsd_screen))
-        self.machine_menu.requestOpenFuel.connect(lambda: self.stack.setCurrentWidget(self.fuel_screen))
-        self.machine_menu.requestOpenTire.connect(lambda: self.stack.setCurrentWidget(self.tire_screen)) 
-        self.machine_menu.requestOpenRadiatorFan.connect(lambda: self.stack.setCurrentWidget(self.fan_screen))
-        self.machine_menu.requestOpenWaterPump.connect(lambda: self.stack.setCurrentWidget(self.pump_screen))
-        self.machine_menu.requestBack.connect(self.return_to_settings)
-
-        self.lsd_screen = LSDMenuScreen()
-        self.lsd_screen.lsdLevelChanged.connect(self.requestLsdChange.emit)
-        self.lsd_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.machine_menu))
-
-        self.fuel_screen = FuelResetScreen()
-        self.fuel_screen.requestReset.connect(self.requestResetFuel.emit)
-        self.fuel_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.machine_menu))
-
-        self.tire_screen = TireSelectScreen()
-        if hasattr(self.tire_screen, 'set_current_tire'):
-            self.tire_screen.set_current_tire(tire_val)
-        self.tire_screen.tireSetChanged.connect(self.requestTireChange.emit)
-        self.tire_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.machine_menu))
-
-        self.fan_screen = PwmDeviceMenuScreen("Radiator Fan", initial_value=fan_val)
-        self.fan_screen.valueChanged.connect(self.requestRadiatorFanChange.emit)
-        self.fan_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.machine_menu))
-
-        self.pump_screen = PwmDeviceMenuScreen("Water Pump", initial_value=pump_val)
-        self.pump_screen.valueChanged.connect(self.requestWaterPumpChange.emit)
-        self.pump_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.machine_menu))
-
+        r.register("machine_menu", self._buildMachineMenu)
+        r.register("lsd", self._buildLsdScreen)
+        r.register("fuel", self._buildFuelScreen)
+        r.register("tire", self._buildTireScreen)
+        r.register("fan", self._buildFanScreen)
+        r.register("pump", self._buildPumpScreen)
         # [DEVICES]
-        self.device_menu = DeviceMenuScreen()
-        self.device_menu.requestOpenGoPro.connect(lambda: self.stack.setCurrentWidget(self.gopro_screen))
-        self.device_menu.requestBack.connect(self.return_to_settings)
-
-        self.gopro_screen = GoProMenuScreen()
-        self.gopro_screen.requestConnect.connect(self.requestGoProConnect.emit)
-        self.gopro_screen.requestDisconnect.connect(self.requestGoProDisconnect.emit)
-        self.gopro_screen.requestRecStart.connect(self.requestGoProRecStart.emit)
-        self.gopro_screen.requestRecStop.connect(self.requestGoProRecStop.emit)
-        self.gopro_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.device_menu))
-
+        r.register("device_menu", self._buildDeviceMenu)
+        r.register("gopro", self._buildGoProScreen)
         # [INFO / LOG]
-        self.info_menu = InfoMenuScreen()
-        self.info_menu.requestOpenMileage.connect(lambda: self.stack.setCurrentWidget(self.mileage_screen))
-        self.info_menu.requestBack.connect(self.return_to_settings)
-
-        self.mileage_screen = MileageScreen()
-        self.mileage_screen.requestBack.connect(lambda: self.stack.setCurrentWidget(self.info_menu))
-
-        # Stackに追加
-        for w in [self.dashboard, self.settings, 
-                  self.race_menu, self.driver_screen, self.gps_set_screen, self.gps_sector_screen, self.target_laps_screen,
-                  self.machine_menu, self.lsd_screen, self.fuel_screen, self.tire_screen, self.fan_screen, self.pump_screen,
-                  self.device_menu, self.gopro_screen,
-                  self.info_menu, self.mileage_screen]:
-            self.stack.addWidget(w)
-
-        layout = QGridLayout()
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(self.stack)
-        self.setLayout(layout)
-
+        r.register("info_menu", self._buildInfoMenu)
+        r.register("mileage", self._buildMileageScreen)
+        r.register("telemetry_status", self._buildTelemetryStatusScreen)
+
+    def _openScreen(self, name: str):
+        return lambda: self.screens.show(name)
+
+    def _buildSettings(self):
+        w = SettingsScreen()
+        w.requestOpenRaceMenu.connect(self._openScreen("race_menu"))
+        w.requestOpenMachineMenu.connect(self._openScreen("machine_menu"))
+        w.requestOpenDeviceMenu.connect(self._openScreen("device_menu"))
+        w.requestOpenInfoMenu.connect(self._openScreen("info_menu"))
+        w.requestExit.connect(self.return_to_dashboard)
+        return w
+
+    def _buildRaceMenu(self):
+        w = RaceMenuScreen()
+        w.requestOpenDriver.connect(self._openScreen("driver"))
+        w.requestOpenStartLine.connect(self._openScreen("gps_set"))
+        w.requestOpenSector.connect(self._openScreen("gps_sector"))
+        w.requestOpenTargetLaps.connect(self._openScreen("target_laps"))
+        w.requestResetSession.connect(self.requestResetSession.emit)
+        w.requestBack.connect(self.return_to_settings)
+        return w
+
+    def _buildDriverScreen(self):
+        w = DriverSelectScreen()
+        if hasattr(w, 'set_current_driver'):
+            w.set_current_driver(self._initial_settings.get("driver", "None"))
+        w.driverChanged.connect(self.requestDriverChange.emit)
+        w.requestBack.connect(self._openScreen("race_menu"))
+        return w
+
+    def _buildGpsSetScreen(self):
+        w = GpsSetScreen()
+        w.requestSetLine.connect(self.requestSetStartLine.emit)
+        w.requestBack.connect(self._openScreen("race_menu"))
+        return w
+
+    def _buildGpsSectorScreen(self):
+        w = GpsSectorScreen()
+        w.requestSetSector.connect(self.requestSetSector.emit)
+        w.requestBack.connect(self._openScreen("race_menu"))
+        return w
+
+    def _buildTargetLapsScreen(self):
+        w = TargetLapsScreen()
+        w.requestSetLaps.connect(self.requestSetTargetLaps.emit)
+        w.requestBack.connect(self._openScreen("race_menu"))
+        return w
+
+    def _buildMachineMenu(self):
+        w = MachineMenuScreen()
+        w.requestOpenLSD.connect(self._openScreen("lsd"))
+        w.requestOpenFuel.connect(self._openScreen("fuel"))
+        w.requestOpenTire.connect(self._openScreen("tire"))
+        w.requestOpenRadiatorFan.connect(self._openScreen("fan"))
+        w.requestOpenWaterPump.connect(self._openScreen("pump"))
+        w.requestBack.connect(self.return_to_settings)
+        return w
+
+    def _buildLsdScreen(self):
+        w = LSDMenuScreen()
+        w.lsdLevelChanged.connect(self.requestLsdChange.emit)
+        w.requestBack.connect(self._openScreen("machine_menu"))
+        return w
+
+    def _buildFuelScreen(self):
+        w = FuelResetScreen()
+        w.requestReset.connect(self.requestResetFuel.emit)
+        w.requestBack.connect(self._openScreen("machine_menu"))
+        return w
+
+    def _buildTireScreen(self):
+        w = TireSelectScreen()
+        if hasattr(w, 'set_current_tire'):
+            w.set_current_tire(self._initial_settings.get("tire_set", "Dry_Soft"))
+        w.tireSetChanged.connect(self.requestTireChange.emit)
+        w.requestBack.connect(self._openScreen("machine_menu"))
+        return w
+
+    def _buildFanScreen(self):
+        w = PwmDeviceMenuScreen(
+            "Radiator Fan", initial_value=self._initial_settings.get("radiator_fan", 0)
+        )
+        w.valueChanged.connect(self.requestRadiatorFanChange.emit)
+        w.requestBack.connect(self._openScreen("machine_menu"))
+        return w
+
+    def _buildPumpScreen(self):
+        w = PwmDeviceMenuScreen(
+            "Water Pump", initial_value=self._initial_settings.get("water_pump", 0)
+        )
+        w.valueChanged.connect(self.requestWaterPumpChange.emit)
+        w.requestBack.connect(self._openScreen("machine_menu"))
+        return w
+
+    def _buildDeviceMenu(self):
+        w = DeviceMenuScreen()
+        w.requestOpenGoPro.connect(self._openScreen("gopro"))
+        w.requestBack.connect(self.return_to_settings)
+        return w
+
+    def _buildGoProScreen(self):
+        w = GoProMenuScreen()
+        w.requestConnect.connect(self.requestGoProConnect.emit)
+        w.requestDisconnect.connect(self.requestGoProDisconnect.emit)
+        w.requestRecStart.connect(self.requestGoProRecStart.emit)
+        w.requestRecStop.connect(self.requestGoProRecStop.emit)
+        w.requestBack.connect(self._openScreen("device_menu"))
+        if self._gopro_status is not None:
+            w.update_status(self._gopro_status)
+        if self._gopro_battery is not None:
+            w.update_battery(self._gopro_battery)
+        return w
+
+    def _buildInfoMenu(self):
+        w = InfoMenuScreen()
+        w.requestOpenMileage.connect(self._openScreen("mileage"))
+        w.requestOpenTelemetryStatus.connect(self._openScreen("telemetry_status"))
+        w.requestBack.connect(self.return_to_settings)
+        return w
+
+    def _buildMileageScreen(self):
+        w = MileageScreen()
+        w.requestBack.connect(self._openScreen("info_menu"))
+        return w
+
+    def _buildTelemetryStatusScreen(self):
+        w = TelemetryStatusScreen()
+        w.requestBack.connect(self._openScreen("info_menu"))
+        return w
+
+    def warmUpScreens(self):
+        """ダッシュボード表示後のアイドル時間に、よく使う画面を先に作っておく"""
+        self.screens.warmUpIdle(config.SCREEN_WARMUP, config.SCREEN_WARMUP_INTERVAL_MS)
 
     def keyPressEvent(self, event):
         """
@@ -168,32 +243,55 @@ class MainDisplayWindow(QDialog):
             super().keyPressEvent(event)
 
     def return_to_settings(self):
-        self.stack.setCurrentWidget(self.settings)
+        self.screens.show("settings")
     
     def return_to_dashboard(self):
         self.stack.setCurrentWidget(self.dashboard)
 
     # --- 更新メソッド ---
     def updateGoProStatus(self, text: str):
-        self.gopro_screen.update_status(text)
+        self._gopro_status = text
+        gopro_screen = self.screens.peek("gopro")
+        if gopro_screen is not None:
+            gopro_screen.update_status(text)
+
+    def showPitMessage(self, message):
+        self.dashboard.showPitMessage(message.text)
 
     def updateGoProBattery(self, value: int):
         self.dashboard.updateGoProBattery(value)
-        self.gopro_screen.update_battery(value)
+        self._gopro_battery = value
+        gopro_screen = self.screens.peek("gopro")
+        if gopro_screen is not None:
+            gopro_screen.update_battery(value)
 
     def updateDashboard(self, dashMachineInfo, fuel_percentage, tpms_data, gps_data, daily_km=0.0, total_km=0.0):
         current_widget = self.stack.currentWidget()
+        current_name = self.screens.currentName()
 
         if current_widget == self.dashboard:
-            self.dashboard.updateDashboard(dashMachineInfo, fuel_percentage, tpms_data)
-        elif current_widget == self.gps_set_screen:
-            self.gps_set_screen.update_data(gps_data)
-        elif current_widget == self.gps_sector_screen:
-            self.gps_sector_screen.update_gps_data(gps_data)
-        elif current_widget == self.fuel_screen:
-            self.fuel_screen.update_fuel(fuel_percentage)
-        elif current_widget == self.mileage_screen:
-            self.mileage_screen.update_distance(daily_km, total_km)
+            self.dashboard.updateFast(dashMachineInfo)
+        elif current_name == "gps_set":
+            current_widget.update_data(gps_data)
+        elif current_name == "gps_sector":
+            current_widget.update_gps_data(gps_data)
+        elif current_name == "fuel":
+            current_widget.update_fuel(fuel_percentage)
+        elif current_name == "mileage":
+            current_widget.update_distance(daily_km, total_km)
+
+    def updateShiftLights(self, dashMachineInfo):
+        if self.stack.currentWidget() == self.dashboard:
+            self.dashboard.updateShiftLights(dashMachineInfo)
+
+    def updateSlowWidgets(self, dashMachineInfo, fuel_percentage, tpms_data):
+        if self.stack.currentWidget() == self.dashboard:
+            self.dashboard.updateSlow(dashMachineInfo, fuel_percentage, tpms_data)
+
+    def updateTelemetryStatus(self, health):
+        # 状態画面を開いているときだけ更新する (CANが来ていなくても回るように別の消費者で呼ぶ)
+        if self.screens.currentName() == "telemetry_status":
+            self.stack.currentWidget().update_health(health)
 
     # --- 入力ハンドリング ---
     def input_cw(self): self._dispatch_input("CW")
@@ -210,4 +308,4 @@ class MainDisplayWindow(QDialog):
         # ダッシュボードからの移動はボタンを押しながら回したときのみ
         if input_type in ["CW", "CCW"] and current_widget == self.dashboard:
             if self._button_held:  # ← 条件追加
-                self.stack.setCurrentWidget(self.settings)
\ No newline at end of file
+                self.screens.show("settings")
\ No newline at end of file
@@ -0,0 +1,80 @@
+import logging
+import time
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWidgets import QStackedWidget, QWidget
+
+from src.gui.font_cache import warmUpLayout
+
+logger = logging.getLogger(__name__)
+
+
+class ScreenRegistry(QObject):
+    """
+    QStackedWidget に載せる画面を名前で管理し、初めて表示するときに生成する。
+
+    起動時はダッシュボードだけを作り、メニュー画面は最初の遷移時か、
+    warmUpIdle() で指定した画面をアイドル時間に1つずつ作る。
+    """
+
+    def __init__(self, stack: QStackedWidget, parent=None):
+        super().__init__(parent)
+        self.stack = stack
+        self._factories: dict[str, Callable[[], QWidget]] = {}
+        self._screens: dict[str, QWidget] = {}
+        self._names: dict[int, str] = {}
+        self._warmupQueue: list[str] = []
+        self._warmupTimer = QTimer(self)
+        self._warmupTimer.setSingleShot(True)
+        self._warmupTimer.timeout.connect(self._warmUpNext)
+
+    def register(self, name: str, factory: Callable[[], QWidget]) -> None:
+        self._factories[name] = factory
+
+    def add(self, name: str, screen: QWidget) -> QWidget:
+        """生成済みの画面を登録する"""
+        self._screens[name] = screen
+        self._names[id(screen)] = name
+        self.stack.addWidget(screen)
+        return screen
+
+    def get(self, name: str) -> QWidget:
+        screen = self._screens.get(name)
+        if screen is None:
+            start = time.perf_counter()
+            screen = self.add(name, self._factories[name]())
+            # 表示中の画面と同じ大きさでレイアウトとフォントを確定させておく
+            warmUpLayout(screen, self.stack.contentsRect().size())
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"Screen '{name}' built in {elapsed_ms:.1f} ms")
+        return screen
+
+    def peek(self, name: str) -> Optional[QWidget]:
+        """生成済みなら画面を返す (生成はしない)"""
+        return self._screens.get(name)
+
+    def show(self, name: str) -> None:
+        self.stack.setCurrentWidget(self.get(name))
+
+    def currentName(self) -> Optional[str]:
+        return self._names.get(id(self.stack.currentWidget()))
+
+    def isBuilt(self, name: str) -> bool:
+        return name in self._screens
+
+    def warmUpIdle(self, names: list[str], interval_ms: int) -> None:
+        """names の画面を interval_ms ごとに1つずつ生成する (GUIを長く止めない)"""
+        self._warmupQueue = [n for n in names if n in self._factories]
+        self._warmupInterval = interval_ms
+        if self._warmupQueue:
+            self._warmupTimer.start(interval_ms)
+
+    def _warmUpNext(self):
+        while self._warmupQueue:
+            name = self._warmupQueue.pop(0)
+            if not self.isBuilt(name):
+                self.get(name)
+                break
+        if self._warmupQueue:
+            self._warmupTimer.start(self._warmupInterval)
@@ -2,13 +2,15 @@ import time
 from PyQt5 import QtCore
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QColor
-from PyQt5.QtWidgets import QGridLayout, QGroupBox, QWidget, QApplication
+from PyQt5.QtWidgets import QGridLayout, QGroupBox, QLabel, QWidget, QApplication
 
 from src.gui.self_defined_widgets import (
     DeltaBox, GearLabel, IconValueBox, PedalBar,
-    RpmLabel, RpmLightBar, TitleValueBox, TpmsBox,
+    RpmLabel, RpmLightBar, StaticTextLabel, TitleValueBox, TpmsBox,
 )
+from src.gui.widget_binding import render_stats
 from src.models.models import DashMachineInfo
+from src.util import config
 
 def format_lap_time(seconds: float) -> str:
     if seconds is None or seconds < 0: return "0:00.00"
@@ -24,7 +26,6 @@ class DashboardWidget(QWidget):
     def __init__(self, listener: WindowListener):
         super(DashboardWidget, self).__init__(None)
         self.listener = listener
-        self.timer = QTimer(self); self.timer.timeout.connect(self.listener.onUpdate); self.timer.start(50)
         p = QApplication.palette(); p.setColor(self.backgroundRole(), QColor("#000")); p.setColor(self.foregroundRole(), QColor("#FFF")); self.setPalette(p)
         self.setStyleSheet("QGroupBox { border: none; margin: 0px; padding: 0px; } QGroupBox#LeftBox, QGroupBox#CenterBox, QGroupBox#RightBox { background-color: #FFF; }")
         
@@ -35,36 +36,71 @@ class DashboardWidget(QWidget):
         mainLayout.setColumnStretch(0, 3); mainLayout.setColumnStretch(1, 2); mainLayout.setColumnStretch(2, 3)
         mainLayout.setRowStretch(0, 1); mainLayout.setRowStretch(1, 1); mainLayout.setRowStretch(2, 0)
         self._last_gopro_val = -1
+        self.createPitMessageOverlay()
 
     def updateGoProBattery(self, value: int):
         if self._last_gopro_val == value: return
         self._last_gopro_val = value
-        c = "#0F0" if value > 50 else "#FF0" if value > 20 else "#F00"
-        self.goproLabel.updateValueLabel(f"{value}%"); self.goproLabel.valueLabel.setStyleSheet(f"color: {c}; font-size: 30px; font-weight: bold;")
+        self.goproLabel.updateValueLabel(f"{value}%")
+        self.goproLabel.value.setTone("good" if value > 50 else "caution" if value > 20 else "bad")
 
     def handle_input(self, input_type: str) -> bool: return False
 
+    def createPitMessageOverlay(self):
+        # レイアウトに入れず、ダッシュボードの上に重ねて表示する
+        self.pitMessageLabel = QLabel(self); self.pitMessageLabel.setAlignment(Qt.AlignCenter); self.pitMessageLabel.setWordWrap(True)
+        self.pitMessageLabel.setStyleSheet("font-family: 'DejaVu Sans'; font-size: 48px; font-weight: bold; color: #000; background-color: #FF0; border: 4px solid #F00;")
+        self.pitMessageLabel.hide()
+        self.pitMessageTimer = QTimer(self); self.pitMessageTimer.setSingleShot(True); self.pitMessageTimer.timeout.connect(self.pitMessageLabel.hide)
+
+    def showPitMessage(self, text: str):
+        """ピットからのメッセージを一定時間だけ重ねて表示する (空文字なら消す)"""
+        if not text:
+            self.pitMessageTimer.stop(); self.pitMessageLabel.hide(); return
+        self.pitMessageLabel.setText(text); self._layoutPitMessage()
+        self.pitMessageLabel.show(); self.pitMessageLabel.raise_()
+        self.pitMessageTimer.start(int(config.PIT_MESSAGE_DISPLAY_SEC * 1000))
+
+    def _layoutPitMessage(self):
+        w, h = self.width(), self.height()
+        self.pitMessageLabel.setGeometry(int(w * 0.05), int(h * 0.3), int(w * 0.9), int(h * 0.4))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event); self._layoutPitMessage()
+
     def updateDashboard(self, info: DashMachineInfo, fuel: float, tpms: dict):
-        self.rpmLightBar.updateRpmBar(info.rpm); self.rpmLabel.updateRpmLabel(info.rpm); self.gearLabel.updateGearLabel(info.gearVoltage.gearType)
+        # 全ウィジェットをまとめて更新する。通常は FrameScheduler が下の3つを別々のレートで呼ぶ
+        self.updateShiftLights(info); self.updateFast(info); self.updateSlow(info, fuel, tpms)
+
+    def updateShiftLights(self, info: DashMachineInfo):
+        self.rpmLightBar.updateRpmBar(info.rpm)
+
+    def updateFast(self, info: DashMachineInfo):
+        # 各ウィジェットは前回と同じ値なら何もしない。反映/スキップ数とフレーム時間を計測する
+        with render_stats.frame():
+            self.rpmLabel.updateRpmLabel(info.rpm); self.gearLabel.updateGearLabel(info.gearVoltage.gearType)
+            self.opsBar.updatePedalBar(info.oilPress.oilPress)
+            self.brakeBiasTitleValueBox.updateValueLabel(info.brakePress.bias); self.tpsTitleValueBox.updateValueLabel(info.throttlePosition)
+            self.bpsFTitleValueBox.updateValueLabel(info.brakePress.front); self.bpsRTitleValueBox.updateValueLabel(info.brakePress.rear)
+
+            if getattr(info, "isRaceFinished", False):
+                self.lapTimeBox.updateValueLabel("FINISH"); self.lapTimeBox.value.setTone("finish")
+            else:
+                self.lapTimeBox.updateValueLabel(format_lap_time(info.currentLapTime)); self.lapTimeBox.value.setTone("normal")
+
+            self.lapCountBox.updateValueLabel(info.lapCount); self.deltaBox.updateDelta(info.lapTimeDiff)
+
+    def updateSlow(self, info: DashMachineInfo, fuel: float, tpms: dict):
+        # 温度・電圧・燃料・TPMS はゆっくりしか変わらないので低レートで更新する
         self.waterTempTitleValueBox.updateTempValueLabel(info.waterTemp); self.waterTempTitleValueBox.updateWaterTempWarning(info.waterTemp)
         self.oilTempTitleValueBox.updateTempValueLabel(info.oilTemp); self.oilTempTitleValueBox.updateOilTempWarning(info.oilTemp)
-        self.opsBar.updatePedalBar(info.oilPress.oilPress)
         self.fanSwitchStateTitleValueBox.updateBoolValueLabel(info.fanEnabled); self.fanSwitchStateTitleValueBox.updateFanWarning(info.fanEnabled)
-        self.brakeBiasTitleValueBox.updateValueLabel(info.brakePress.bias); self.tpsTitleValueBox.updateValueLabel(info.throttlePosition)
-        self.bpsFTitleValueBox.updateValueLabel(info.brakePress.front); self.bpsRTitleValueBox.updateValueLabel(info.brakePress.rear)
-        self.batteryIconValueBox.updateBatteryValueLabel(info.batteryVoltage); self.fuelcaluculatorIconValueBox.updateFuelPercentLabel(fuel)
+        self.batteryIconValueBox.updateBatteryValueLabel(info.batteryVoltage); self.fuelcaluculatorIconValueBox.updateFuelPercentLabel(fuel, info.fuelLapsRemaining, info.fuelMarginLaps)
 
-        if getattr(info, "isRaceFinished", False):
-            self.lapTimeBox.updateValueLabel("FINISH"); self.lapTimeBox.valueLabel.setStyleSheet("font-weight: bold; color: #FF00FF; background-color: #000;")
-        else:
-            self.lapTimeBox.updateValueLabel(format_lap_time(info.currentLapTime)); self.lapTimeBox.valueLabel.setStyleSheet("font-weight: bold; color: #FFF; background-color: #000;")
-
-        self.lapCountBox.updateValueLabel(info.lapCount); self.deltaBox.updateDelta(info.lapTimeDiff)
-        
-        self.tpms_fl.updateTemperature(tpms.get("FL", {}).get("temp_c")); self.tpms_fl.updatePressure(tpms.get("FL", {}).get("pressure_kpa"))
-        self.tpms_fr.updateTemperature(tpms.get("FR", {}).get("temp_c")); self.tpms_fr.updatePressure(tpms.get("FR", {}).get("pressure_kpa"))
-        self.tpms_rl.updateTemperature(tpms.get("RL", {}).get("temp_c")); self.tpms_rl.updatePressure(tpms.get("RL", {}).get("pressure_kpa"))
-        self.tpms_rr.updateTemperature(tpms.get("RR", {}).get("temp_c")); self.tpms_rr.updatePressure(tpms.get("RR", {}).get("pressure_kpa"))
+        for box, wheel in ((self.tpms_fl, "FL"), (self.tpms_fr, "FR"), (self.tpms_rl, "RL"), (self.tpms_rr, "RR")):
+            t = tpms.get(wheel, {}); stale = t.get("stale", False)
+            box.updateTemperature(t.get("temp_c"), stale); box.updatePressure(t.get("pressure_kpa"), stale)
+            box.updateAlert(t.get("alert", 0))
 
     def createAllWidgets(self):
         self.rpmLabel = RpmLabel(); self.rpmLabel.setStyleSheet("border: none; border-radius: 0px; font-weight: bold; color: #FFF; background-color: #000")
@@ -74,9 +110,9 @@ class DashboardWidget(QWidget):
         self.switchStateRemiderLabel = TitleValueBox("SWITCH CHECK! \n1. Fan \n2. TPS MAX"); self.switchStateRemiderLabel.titleLabel.setAlignment(QtCore.Qt.AlignVCenter); self.switchStateRemiderLabel.titleLabel.setFontScale(0.25)
         self.tpsTitleValueBox = TitleValueBox("TPS"); self.bpsFTitleValueBox = TitleValueBox("BPS F"); self.bpsRTitleValueBox = TitleValueBox("BPS R"); self.brakeBiasTitleValueBox = TitleValueBox("Brake\nBias F%")
         self.opsBar = PedalBar("#F00", 300)
-        self.batteryIconValueBox = IconValueBox(); self.fuelcaluculatorIconValueBox = IconValueBox(); self.lapCountLabel = IconValueBox()
+        self.batteryIconValueBox = IconValueBox(); self.fuelcaluculatorIconValueBox = IconValueBox(withSubLabel=True); self.lapCountLabel = IconValueBox()
         self.tpms_fl = TpmsBox(""); self.tpms_fr = TpmsBox(""); self.tpms_rl = TpmsBox(""); self.tpms_rr = TpmsBox("")
-        self.lapTimeBox = TitleValueBox("Lap Time"); self.lapTimeBox.valueLabel.setFontScale(0.55)
+        self.lapTimeBox = TitleValueBox("Lap Time", valueLabelClass=StaticTextLabel); self.lapTimeBox.valueLabel.setFontScale(0.55)
         self.lapCountBox = TitleValueBox("Lap"); self.deltaBox = DeltaBox("Delta"); self.goproLabel = TitleValueBox("GoPro Bat")
 
     def createTopGroupBox(self):
@@ -4,6 +4,7 @@ from PyQt5.QtWidgets import QLabel, QVBoxLayout, QListWidget, QWidget
 
 class InfoMenuScreen(QWidget):
     requestOpenMileage = pyqtSignal()
+    requestOpenTelemetryStatus = pyqtSignal()
     requestBack = pyqtSignal()
 
     def __init__(self):
@@ -17,7 +18,7 @@ class InfoMenuScreen(QWidget):
             QListWidget::item { padding: 20px; }
             QListWidget::item:selected { background-color: #00008B; border: 2px solid #00BFFF; }
         """)
-        self.list.addItems(["1. Mileage Info >", "2. << BACK"])
+        self.list.addItems(["1. Mileage Info >", "2. Telemetry Status >", "3. << BACK"])
         self.list.setCurrentRow(0)
         self.layout.addWidget(self.list)
         self.setLayout(self.layout)
@@ -25,11 +26,12 @@ class InfoMenuScreen(QWidget):
 
     def handle_input(self, i):
         row = self.list.currentRow()
-        if i == "CW": self.list.setCurrentRow(0 if row >= 1 else row + 1); return True
-        elif i == "CCW": self.list.setCurrentRow(1 if row <= 0 else row - 1); return True
+        if i == "CW": self.list.setCurrentRow(0 if row >= 2 else row + 1); return True
+        elif i == "CCW": self.list.setCurrentRow(2 if row <= 0 else row - 1); return True
         elif i == "ENTER":
             if row == 0: self.requestOpenMileage.emit()
-            elif row == 1: self.requestBack.emit()
+            elif row == 1: self.requestOpenTelemetryStatus.emit()
+            elif row == 2: self.requestBack.emit()
             return True
         return False
 
@@ -50,4 +52,40 @@ class MileageScreen(QWidget):
     def update_distance(self, d, t): self.today.setText(f"Today: {d:.1f} km"); self.total.setText(f"Total: {t:.1f} km")
     def handle_input(self, i): 
         if i in ["CW", "CCW", "ENTER"]: self.requestBack.emit(); return True
-        return False
\ No newline at end of file
+        return False
+
+
+class TelemetryStatusScreen(QWidget):
+    """MQTT 接続の状態 (状態 / RTT / 再接続回数 / 送信遅延 / 未送信件数) を表示する"""
+    requestBack = pyqtSignal()
+    STATE_COLORS = {"ONLINE": "#0F0", "HANDSHAKE": "#FF0", "CONNECTING": "#FF0"}
+
+    def __init__(self):
+        super().__init__()
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(QLabel("TELEMETRY STATUS", alignment=Qt.AlignCenter, styleSheet="font-size: 32px; font-weight: bold; color: #00BFFF;"))
+        self.state = QLabel("MQTT: ---", alignment=Qt.AlignCenter, styleSheet="font-size: 48px; font-weight: bold; color: #AAA;")
+        self.link = QLabel("RTT: --- ms   Reconnects: -", alignment=Qt.AlignCenter, styleSheet="font-size: 32px; color: white;")
+        self.latency = QLabel("Latency p50/max: --- / --- ms", alignment=Qt.AlignCenter, styleSheet="font-size: 32px; color: white;")
+        self.queue = QLabel("Sent: -   Queued: -   Dropped: -", alignment=Qt.AlignCenter, styleSheet="font-size: 28px; color: #AAA;")
+        self.error = QLabel("", alignment=Qt.AlignCenter, styleSheet="font-size: 20px; color: #F80;")
+        for w in (self.state, self.link, self.latency, self.queue, self.error): self.layout.addWidget(w)
+        self.layout.addWidget(QLabel("Rotary: BACK", alignment=Qt.AlignCenter, styleSheet="font-size: 20px; color: #AAA;"))
+        self.setLayout(self.layout)
+        p = self.palette(); p.setColor(self.backgroundRole(), QColor("#333")); self.setPalette(p); self.setAutoFillBackground(True)
+
+    def update_health(self, health):
+        if not health:
+            self.state.setText("MQTT: DISABLED"); return
+        def ms(v): return "---" if v is None else f"{v:.0f}"
+        state = health["state"]
+        self.state.setText(f"MQTT: {state}")
+        self.state.setStyleSheet(f"font-size: 48px; font-weight: bold; color: {self.STATE_COLORS.get(state, '#F00')};")
+        self.link.setText(f"RTT: {ms(health['rtt_ms'])} ms   Reconnects: {health['reconnects']}")
+        self.latency.setText(f"Latency p50/max: {ms(health['latency_p50_ms'])} / {ms(health['latency_max_ms'])} ms")
+        self.queue.setText(f"Sent: {health['sent']}   Queued: {health['queued']}   Dropped: {health['dropped']}")
+        self.error.setText(health["last_error"])
+
+    def handle_input(self, i):
+        if i in ["CW", "CCW", "ENTER"]: self.requestBack.emit(); return True
+        return False
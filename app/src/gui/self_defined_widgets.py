@@ -1,7 +1,19 @@
+import bisect
 import datetime
 
 from PyQt5 import QtCore
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtCore import QEvent, QPointF, QRect, QTimer
+from PyQt5.QtGui import (
+    QBrush,
+    QColor,
+    QFont,
+    QFontMetricsF,
+    QPainter,
+    QPalette,
+    QPixmap,
+    QStaticText,
+    QTransform,
+)
 from PyQt5.QtWidgets import (
     QFrame,
     QGridLayout,
@@ -9,6 +21,9 @@ from PyQt5.QtWidgets import (
     QLabel,
     QProgressBar,
     QSizePolicy,
+    QStyle,
+    QStyleOption,
+    QWidget,
 )
 
 from src.models.models import (
@@ -24,44 +39,145 @@ from src.models.models import (
     WaterTemp,
     WaterTempStatus,
 )
+from src.gui.font_cache import font_cache
+from src.gui.widget_binding import LabelBinding, render_stats
+from src.util import config
+
+# 値ラベルの色は動的プロパティ "tone" で切り替える (スタイルシートは生成時に一度だけ設定)
+VALUE_LABEL_STYLE = """
+QLabel { font-weight: bold; color: #FFF; background-color: #000; }
+QLabel[tone="cold"] { background-color: #00bfff; border-radius: 5px; }
+QLabel[tone="warn"] { background-color: #FB0; border-radius: 5px; }
+QLabel[tone="alert"] { background-color: #F00; border-radius: 5px; }
+QLabel[tone="good"] { color: #0F0; }
+QLabel[tone="caution"] { color: #FF0; }
+QLabel[tone="bad"] { color: #F00; }
+QLabel[tone="finish"] { color: #FF00FF; }
+"""
+
+ICON_VALUE_LABEL_STYLE = """
+QLabel { font-weight: bold; color: #FFF; background-color: #000; }
+QLabel[tone="ok"] { color: #7fff00; }
+QLabel[tone="warn"] { color: #ECC94B; }
+QLabel[tone="alert"] { color: #E53E3E; }
+"""
+
+GEAR_LABEL_STYLE = """
+QLabel { font-weight: bold; color: #FFF; background-color: #000; }
+QLabel[tone="neutral"] { color: #00ff7f; }
+"""
+
+TPMS_LABEL_STYLE = """
+QLabel { font-family: 'DejaVu Sans'; font-size: %dpx; font-weight: bold;
+         color: #888; background-color: #000; }
+QLabel[tone="ok"] { color: #FFF; }
+QLabel[tone="cold"] { color: #00BFFF; }
+QLabel[tone="mild"] { color: #FFFF00; }
+QLabel[tone="warm"] { color: #FFA500; }
+QLabel[tone="hot"] { color: #FF0000; }
+QLabel[tone="stale"] { color: #444; }
+"""
 
 
 class QCustomLabel(QLabel):
     def __init__(self):
         super(QCustomLabel, self).__init__()
-        self._font = QFont()
-        # self.setFont(self._font)
+        self._fontFamily = ""
+        self._appliedFont = None
         self.setAlignment(QtCore.Qt.AlignVCenter | QtCore.Qt.AlignHCenter)
         self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
         self._fontScale = 1.0
 
     def setFontFamily(self, face):
-        self._font.setFamily(face)
+        self._fontFamily = face
 
     def setFontScale(self, scale):
         self._fontScale = scale
 
-    def resizeEvent(self, evt):
+    def applyFontSize(self, size):
         # ★修正: サイズが0以下のときは計算を行わない（エラーログ防止）
-        if self.size().width() <= 0 or self.size().height() <= 0:
+        if size.width() <= 0 or size.height() <= 0:
             return
 
-        width = self.size().width() / 2
-        height = self.size().height()
-        baseSize = 0
-        if width > height:
-            baseSize = height
-        else:
-            baseSize = width
-        
-        # ピクセルサイズが1以上になるようにガード
-        pixel_size = max(1, int(baseSize * self._fontScale))
-        
-        self._font.setPixelSize(pixel_size)
-        self.setFont(self._font)
+        font = font_cache.get(self._fontFamily, self._fontScale, size)
+        # 同じフォントなら setFont しない (テキストの再レイアウトが起きるため)
+        if font == self._appliedFont:
+            return
+        self._appliedFont = font
+        self.setFont(font)
+
+    def resizeEvent(self, evt):
+        self.applyFontSize(self.size())
+
+
+class StaticTextLabel(QCustomLabel):
+    """
+    回転数・ラップタイム・ギアのように毎フレーム変わるラベル用。
+
+    文字ごとの QStaticText をフォントが変わったときに作っておき、描画では
+    それを並べるだけにする。setText でも QLabel のレイアウト計算は行わない。
+    """
+
+    # フォントが決まった時点で用意しておく文字
+    PRESET_GLYPHS = "0123456789:.-+N"
+
+    def __init__(self):
+        super(StaticTextLabel, self).__init__()
+        self._text = ""
+        self._glyphs: dict[str, tuple[QStaticText, float]] = {}
+        self._metrics = None
+
+    def setText(self, text):
+        if text == self._text:
+            return
+        self._text = text
+        self.update()
+
+    def text(self):
+        return self._text
+
+    def changeEvent(self, evt):
+        if evt.type() == QEvent.FontChange:
+            self._glyphs.clear()
+            self._metrics = QFontMetricsF(self.font())
+            for ch in self.PRESET_GLYPHS:
+                self._glyph(ch)
+        super().changeEvent(evt)
+
+    def _glyph(self, ch: str) -> tuple[QStaticText, float]:
+        glyph = self._glyphs.get(ch)
+        if glyph is None:
+            if self._metrics is None:
+                self._metrics = QFontMetricsF(self.font())
+            staticText = QStaticText(ch)
+            staticText.setTextFormat(QtCore.Qt.PlainText)
+            staticText.prepare(QTransform(), self.font())
+            glyph = (staticText, self._metrics.horizontalAdvance(ch))
+            self._glyphs[ch] = glyph
+        return glyph
+
+    def paintEvent(self, evt):
+        painter = QPainter(self)
+        # スタイルシートの背景 (tone による背景色など) を描く
+        opt = QStyleOption()
+        opt.initFrom(self)
+        self.style().drawPrimitive(QStyle.PE_Widget, opt, painter, self)
+
+        glyphs = [self._glyph(ch) for ch in self._text]
+        textWidth = sum(advance for _, advance in glyphs)
+        x = (self.width() - textWidth) / 2
+        y = (self.height() - self._metrics.height()) / 2 if self._metrics else 0
+
+        painter.setFont(self.font())
+        painter.setPen(self.palette().color(QPalette.WindowText))
+        for staticText, advance in glyphs:
+            painter.drawStaticText(QPointF(x, y), staticText)
+            x += advance
+        painter.end()
+
 
 class TitleValueBox(QGroupBox):
-    def __init__(self, titleLabel):
+    def __init__(self, titleLabel, valueLabelClass=QCustomLabel):
         super(TitleValueBox, self).__init__(None)
         self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
         self.setAutoFillBackground(True)
@@ -78,7 +194,6 @@ class TitleValueBox(QGroupBox):
         self.TitleFont = "DejaVu Sans"
         self.titleColor = "#FD6"
         self.valueFont = "DejaVu Sans"  # Monoを削除
-        self.valueColor = "#FFF"
         self.titleBackgroundColor = "#000"
 
         self.titleLabel = QCustomLabel()
@@ -94,14 +209,13 @@ class TitleValueBox(QGroupBox):
             + ";font-weight: bold;"
         )
 
-        self.valueLabel = QCustomLabel()
+        self.valueLabel = valueLabelClass()
         self.valueLabel.setAlignment(QtCore.Qt.AlignCenter)
         self.valueLabel.setFontFamily(self.valueFont)
         self.valueLabel.setFontScale(0.75)
         # ラベル自体にも背景黒を指定して透過を防ぐ
-        self.valueLabel.setStyleSheet(
-            "font-weight: bold; color :" + self.valueColor + "; background-color: #000;"
-        )
+        self.valueLabel.setStyleSheet(VALUE_LABEL_STYLE)
+        self.value = LabelBinding(self.valueLabel)
 
         self.layout.addWidget(self.titleLabel, 0, 0)
         self.layout.addWidget(self.valueLabel, 1, 0)
@@ -114,13 +228,13 @@ class TitleValueBox(QGroupBox):
         self.setLayout(self.layout)
 
     def updateValueLabel(self, value):
-        self.valueLabel.setText(str(value))
+        self.value.setText(str(value))
 
     def updateBoolValueLabel(self, value: bool):
         if value:
-            self.valueLabel.setText("ON")
+            self.value.setText("ON")
         else:
-            self.valueLabel.setText("OFF")
+            self.value.setText("OFF")
 
     def updateTempValueLabel(self, waterTemp: WaterTemp):
         """
@@ -131,45 +245,33 @@ class TitleValueBox(QGroupBox):
         else:
             display_text = f"{int(waterTemp):.0f}"
 
-        self.valueLabel.setText(display_text)
+        self.value.setText(display_text)
 
     # --------------- update background warning color  ----------
     def updateWaterTempWarning(self, waterTemp: WaterTemp):
         if waterTemp.status == WaterTempStatus.LOW:
-            color = "#00bfff"
+            tone = "cold"
         elif waterTemp.status == WaterTempStatus.MIDDLE:
-            color = "#000000"
+            tone = "normal"
         elif waterTemp.status == WaterTempStatus.WARNING:
-            color = "#FB0"
+            tone = "warn"
         elif waterTemp.status == WaterTempStatus.HIGH:
-            color = "#F00"
+            tone = "alert"
 
-        # 背景色が変わる場合でも、他のスタイル（配置など）を維持する
-        self.valueLabel.setStyleSheet(
-            f"font-weight: bold; border-radius: 5px; color: #FFF; qproperty-alignment: 'AlignCenter'; background-color: {color};"
-        )
+        self.value.setTone(tone)
 
     def updateOilTempWarning(self, oilTemp: OilTemp):
         if oilTemp.status == OilTempStatus.LOW:
-            color = "#000"
+            tone = "normal"
         elif oilTemp.status == OilTempStatus.MIDDLE:
-            color = "#FB0"
+            tone = "warn"
         elif oilTemp.status == OilTempStatus.HIGH:
-            color = "#F00"
+            tone = "alert"
 
-        self.valueLabel.setStyleSheet(
-            f"font-weight: bold; border-radius: 5px; color: #FFF; qproperty-alignment: 'AlignCenter'; background-color: {color};"
-        )
+        self.value.setTone(tone)
 
     def updateFanWarning(self, fanEnable: bool):
-        if fanEnable:
-            color = "#000"
-        else:
-            color = "#F00"
-
-        self.valueLabel.setStyleSheet(
-            f"font-weight: bold; border-radius: 5px; color: #FFF; background-color: {color};"
-        )
+        self.value.setTone("normal" if fanEnable else "alert")
 
 
 # ★★★ 追加: デルタタイム専用の表示ボックス (SOLID原則: 単一責任の原則) ★★★
@@ -189,27 +291,25 @@ class DeltaBox(TitleValueBox):
             diff (float): ラップタイム差分 (秒)
         """
         # 1. 符号付きでフォーマット (+0.00, -0.00)
-        self.valueLabel.setText(f"{diff:+.2f}")
+        self.value.setText(f"{diff:+.2f}")
 
         # 2. 値に応じた色の決定
         if diff < 0:
             # マイナス（速い） -> 緑
-            color = "#0F0"
+            tone = "good"
         elif diff > 0:
             # プラス（遅い） -> 赤
-            color = "#F00"
+            tone = "bad"
         else:
             # ゼロ -> 白
-            color = "#FFF"
+            tone = "normal"
 
         # 3. スタイルの適用 (背景黒を維持)
-        self.valueLabel.setStyleSheet(
-            f"font-weight: bold; color: {color}; background-color: #000;"
-        )
+        self.value.setTone(tone)
 
 
 class IconValueBox(QGroupBox):
-    def __init__(self, iconPath=None):
+    def __init__(self, iconPath=None, withSubLabel=False):
         super(IconValueBox, self).__init__(None)
         self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
         self.setAutoFillBackground(True)
@@ -217,7 +317,6 @@ class IconValueBox(QGroupBox):
 
         # ★修正: 写真のような太めのサンセリフ体（DejaVu Sans）に統一
         self.valueFont = QFont("DejaVu Sans", 18, QFont.Bold)  # Monoを削除
-        self.valueColor = "#FFF"
         self.layout = QGridLayout()
 
         self.setObjectName("IconValueBox")
@@ -230,11 +329,8 @@ class IconValueBox(QGroupBox):
         self.valueLabel.setFontScale(0.75)
         self.valueLabel.setFontFamily("DejaVu Sans")  # Monoを削除
         # ここでも背景黒を明示
-        self.valueLabel.setStyleSheet(
-            "QLabel { color : "
-            + self.valueColor
-            + "; background-color: #000; font-weight: bold; }"
-        )
+        self.valueLabel.setStyleSheet(ICON_VALUE_LABEL_STYLE)
+        self.value = LabelBinding(self.valueLabel)
 
         if iconPath:
             self.iconLabel = QLabel(self)
@@ -249,60 +345,84 @@ class IconValueBox(QGroupBox):
         else:
             self.layout.addWidget(self.valueLabel, 0, 0, 1, 2)
 
+        # 補助の値 (燃料の残り周回数など) を下に小さく出す行
+        self.subLabel = None
+        if withSubLabel:
+            self.subLabel = QCustomLabel()
+            self.subLabel.setAlignment(QtCore.Qt.AlignCenter)
+            self.subLabel.setFontScale(0.75)
+            self.subLabel.setFontFamily("DejaVu Sans")
+            self.subLabel.setStyleSheet(ICON_VALUE_LABEL_STYLE)
+            self.sub = LabelBinding(self.subLabel)
+            self.layout.addWidget(self.subLabel, 1, 0, 1, 2)
+            self.layout.setRowStretch(0, 2)
+            self.layout.setRowStretch(1, 1)
+
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
         self.setLayout(self.layout)
 
     def updateBatteryValueLabel(self, batteryVoltage: BatteryVoltage):
         display_text = f" {batteryVoltage:.1f} V"
-        color_to_set = "#7fff00"
+        tone = "ok"
 
         if batteryVoltage < 13.0:
-            color_to_set = "#E53E3E"
+            tone = "alert"
         elif batteryVoltage <= 13.4:
-            color_to_set = "#ECC94B"
+            tone = "warn"
 
-        self.valueLabel.setStyleSheet(
-            f"font-weight: bold; color: {color_to_set}; background-color: #000;"
-        )
-        self.valueLabel.setText(display_text)
+        self.value.setTone(tone)
+        self.value.setText(display_text)
 
     def updateFuelPressValueLabel(self, fuelPress: FuelPress):
         display_text = f"{fuelPress:.1f} kPa"
-        new_color = "#7fff00"
 
         if fuelPress < 28.0:
-            new_color = "#E53E3E"
+            tone = "alert"
         else:
-            new_color = "#7fff00"
-        self.valueLabel.setStyleSheet(
-            f"font-weight: bold; color: {new_color}; background-color: #000;"
-        )
-        self.valueLabel.setText(display_text)
-
-    def updateFuelPercentLabel(self, fuel_percentage: float):
+            tone = "ok"
+        self.value.setTone(tone)
+        self.value.setText(display_text)
+
+    def updateFuelPercentLabel(
+        self,
+        fuel_percentage: float,
+        laps_remaining: float = None,
+        margin_laps: float = None,
+    ):
         # ★修正: floatの小数点以下を表示せず、intに変換して整数表示にする
         display_text = f"{int(fuel_percentage)} %"
-        new_color = "#7fff00"
 
-        if fuel_percentage < 20.0:
-            new_color = "#E53E3E"
+        # 目標周回数が決まっていれば、走り切れるかどうかで色を決める
+        if margin_laps is not None:
+            if margin_laps < 0.0:
+                tone = "alert"
+            elif margin_laps < 1.0:
+                tone = "warn"
+            else:
+                tone = "ok"
+        elif fuel_percentage < 20.0:
+            tone = "alert"
         elif fuel_percentage < 50.0:
-            new_color = "#ECC94B"
+            tone = "warn"
         else:
-            new_color = "#7fff00"
+            tone = "ok"
 
-        self.valueLabel.setStyleSheet(
-            f"font-weight: bold; color: {new_color}; qproperty-alignment: 'AlignCenter'; background-color: #000;"
-        )
-        self.valueLabel.setText(display_text)
+        self.value.setTone(tone)
+        self.value.setText(display_text)
+
+        # 残量で走れる周回数は下の行に出す ("L" だとリットルと読めるので LAPS と書く)
+        if self.subLabel is not None:
+            laps_text = "--" if laps_remaining is None else f"{laps_remaining:.1f}"
+            self.sub.setTone(tone)
+            self.sub.setText(f"{laps_text} LAPS")
 
     def updateMessageLabel(self, message: Message):
-        self.valueLabel.setText(message.text)
+        self.value.setText(message.text)
 
     def updateTime(self):
         dt_now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=9)))
-        self.valueLabel.setText(dt_now.strftime("%H:%M"))
+        self.value.setText(dt_now.strftime("%H:%M"))
 
 
 class PedalBar(QProgressBar):
@@ -332,149 +452,156 @@ class PedalBar(QProgressBar):
         )
 
     def updatePedalBar(self, value):
-        self.setValue(int(value))
+        value = int(value)
+        if value == self.value():
+            render_stats.skipped += 1
+            return
+        self.setValue(value)
+        render_stats.applied += 1
 
 
-class RpmLightBar(QGroupBox):
-    def __init__(self):
+class RpmLightBar(QWidget):
+    """
+    シフトライトを1つのウィジェットで描画する。
+
+    - ライトごとのスタイルシートを使わず、paintEvent でキャッシュ済みの QBrush を塗る
+    - 点灯数が変わったときは、変化したライトの範囲だけを再描画する
+    - シフト回転数以上では全ライトを shiftColor で点滅させる
+    """
+
+    # (点灯回転数, 色) を左から順に並べたもの。shift point 9000
+    DEFAULT_LIGHT_MAP = [
+        (1000, "#0F0"),
+        (2000, "#0F0"),
+        (3000, "#0F0"),
+        (4000, "#0F0"),
+        (5000, "#0F0"),
+        (5500, "#F00"),
+        (6000, "#F00"),
+        (7900, "#F00"),
+        (8000, "#F00"),
+        (9000, "#F00"),
+        (10000, "#00ffff"),
+        (10500, "#00ffff"),
+        (11000, "#00ffff"),
+        (11500, "#00ffff"),
+        (12000, "#00ffff"),
+    ]
+
+    MARGIN = 6
+    SPACING = 6
+
+    def __init__(self, lightMap=None, shiftRpm=None, flashHz=None):
         super(RpmLightBar, self).__init__(None)
-        self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
-        self.setAutoFillBackground(True)
-        self.setFlat(True)
-        self.setStyleSheet("border:0; background-color: #000;")
+        # 背景も自前で塗るので、Qtによる背景消去を省く
+        self.setAttribute(QtCore.Qt.WA_OpaquePaintEvent, True)
+        self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
 
-        self.layout = QGridLayout()
+        lightMap = lightMap or config.RPM_LIGHT_MAP or self.DEFAULT_LIGHT_MAP
+        lightMap = sorted(lightMap, key=lambda light: light[0])
+        self.thresholds = [rpm for rpm, _ in lightMap]
+        self.shiftRpm = config.RPM_SHIFT_RPM if shiftRpm is None else shiftRpm
 
-        # shift point 9000
-        self.lightRpm_1 = 1000
-        self.lightRpm_2 = 2000
-        self.lightRpm_3 = 3000
-        self.lightRpm_4 = 4000
-        self.lightRpm_5 = 5000
-        self.lightRpm_6 = 5500
-        self.lightRpm_7 = 6000
-        self.lightRpm_8 = 7900
-        self.lightRpm_9 = 8000
-        self.lightRpm_10 = 9000
-        self.lightRpm_11 = 10000
-        self.lightRpm_12 = 10500
-        self.lightRpm_13 = 11000
-        self.lightRpm_14 = 11500
-        self.lightRpm_15 = 12000
-
-        self.greenLightColor = "#0F0"
-        self.BlueLightColor = "#00ffff"
-        self.redLightColor = "#F00"
-        self.blueLightColor = "#8FF"
-
-        self.light_1 = RpmLight(self.lightRpm_1, self.greenLightColor)
-        self.light_2 = RpmLight(self.lightRpm_2, self.greenLightColor)
-        self.light_3 = RpmLight(self.lightRpm_3, self.greenLightColor)
-        self.light_4 = RpmLight(self.lightRpm_4, self.greenLightColor)
-        self.light_5 = RpmLight(self.lightRpm_5, self.greenLightColor)
-        self.light_6 = RpmLight(self.lightRpm_6, self.redLightColor)
-        self.light_7 = RpmLight(self.lightRpm_7, self.redLightColor)
-        self.light_8 = RpmLight(self.lightRpm_8, self.redLightColor)
-        self.light_9 = RpmLight(self.lightRpm_9, self.redLightColor)
-        self.light_10 = RpmLight(self.lightRpm_10, self.redLightColor)
-        self.light_11 = RpmLight(self.lightRpm_11, self.BlueLightColor)
-        self.light_12 = RpmLight(self.lightRpm_12, self.BlueLightColor)
-        self.light_13 = RpmLight(self.lightRpm_13, self.BlueLightColor)
-        self.light_14 = RpmLight(self.lightRpm_14, self.BlueLightColor)
-        self.light_15 = RpmLight(self.lightRpm_15, self.BlueLightColor)
-
-        self.layout.addWidget(self.light_1, 0, 0)
-        self.layout.addWidget(self.light_2, 0, 1)
-        self.layout.addWidget(self.light_3, 0, 2)
-        self.layout.addWidget(self.light_4, 0, 3)
-        self.layout.addWidget(self.light_5, 0, 4)
-        self.layout.addWidget(self.light_6, 0, 5)
-        self.layout.addWidget(self.light_7, 0, 6)
-        self.layout.addWidget(self.light_8, 0, 7)
-        self.layout.addWidget(self.light_9, 0, 8)
-        self.layout.addWidget(self.light_10, 0, 9)
-        self.layout.addWidget(self.light_11, 0, 10)
-        self.layout.addWidget(self.light_12, 0, 11)
-        self.layout.addWidget(self.light_13, 0, 12)
-        self.layout.addWidget(self.light_14, 0, 13)
-        self.layout.addWidget(self.light_15, 0, 14)
+        self.backgroundBrush = QBrush(QColor("#000"))
+        self.offBrush = QBrush(QColor("#333"))  # dark gray
+        self.shiftBrush = QBrush(QColor("#ffff00"))
+        self.onBrushes = [QBrush(QColor(color)) for _, color in lightMap]
 
-        self.setLayout(self.layout)
+        self.litCount = 0
+        self.isShift = False
+        self.flashOn = True
+        self.lightRects: list[QRect] = []
 
-    def updateRpmBar(self, rpm: Rpm):
-        self.light_1.updateRpmLightColor(rpm)
-        self.light_2.updateRpmLightColor(rpm)
-        self.light_3.updateRpmLightColor(rpm)
-        self.light_4.updateRpmLightColor(rpm)
-        self.light_5.updateRpmLightColor(rpm)
-        self.light_6.updateRpmLightColor(rpm)
-        self.light_7.updateRpmLightColor(rpm)
-        self.light_8.updateRpmLightColor(rpm)
-        self.light_9.updateRpmLightColor(rpm)
-        self.light_10.updateRpmLightColor(rpm)
-        self.light_11.updateRpmLightColor(rpm)
-        self.light_12.updateRpmLightColor(rpm)
-        self.light_13.updateRpmLightColor(rpm)
-        self.light_14.updateRpmLightColor(rpm)
-        self.light_15.updateRpmLightColor(rpm)
-
-
-class RpmLight(QGroupBox):
-    def __init__(self, onRpm, onColor):
-        super(RpmLight, self).__init__(None)
-        self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
-        self.setAutoFillBackground(True)
-        self.setFlat(True)
-        self.setStyleSheet("border:0;")
+        flashHz = config.RPM_SHIFT_FLASH_HZ if flashHz is None else flashHz
+        self.flashTimer = QTimer(self)
+        self.flashTimer.timeout.connect(self._toggleFlash)
+        self.flashInterval = int(500 / flashHz) if flashHz > 0 else 0
 
-        self.offColor = "#333"  # dark gray
-        self.shiftRpm = 12300
-        self.shiftColor = "#ffff00"
+    def resizeEvent(self, evt):
+        count = len(self.thresholds)
+        width = self.width() - self.MARGIN * 2 - self.SPACING * (count - 1)
+        height = self.height() - self.MARGIN * 2
+        self.lightRects = []
+        for i in range(count):
+            left = self.MARGIN + (width * i) // count + self.SPACING * i
+            right = self.MARGIN + (width * (i + 1)) // count + self.SPACING * i
+            self.lightRects.append(QRect(left, self.MARGIN, right - left, height))
+        super().resizeEvent(evt)
 
-        self.onRpm = onRpm
-        self.onColor = onColor
+    def updateRpmBar(self, rpm: Rpm):
+        litCount = bisect.bisect_right(self.thresholds, rpm)
+        isShift = rpm >= self.shiftRpm
+
+        if isShift != self.isShift:
+            self.isShift = isShift
+            self.flashOn = True
+            if isShift and self.flashInterval > 0:
+                self.flashTimer.start(self.flashInterval)
+            else:
+                self.flashTimer.stop()
+            self.litCount = litCount
+            self.update()
+            return
 
-    def updateRpmLightColor(self, rpm: Rpm):
-        if rpm < self.onRpm:
-            color = self.offColor
-        elif rpm < self.shiftRpm:
-            color = self.onColor
-        else:
-            color = self.shiftColor
-        self.setStyleSheet("background-color: " + color + ";")
+        if litCount != self.litCount:
+            low, high = sorted((self.litCount, litCount))
+            self.litCount = litCount
+            if self.lightRects and not isShift:
+                # 点灯状態が変わったライトの範囲だけ再描画する
+                self.update(self.lightRects[low].united(self.lightRects[high - 1]))
+            else:
+                self.update()
+
+    def _toggleFlash(self):
+        self.flashOn = not self.flashOn
+        self.update()
+
+    def paintEvent(self, evt):
+        painter = QPainter(self)
+        painter.fillRect(evt.rect(), self.backgroundBrush)
+        dirty = evt.rect()
+        for i, rect in enumerate(self.lightRects):
+            if not dirty.intersects(rect):
+                continue
+            if i >= self.litCount:
+                brush = self.offBrush
+            elif self.isShift:
+                brush = self.shiftBrush if self.flashOn else self.offBrush
+            else:
+                brush = self.onBrushes[i]
+            painter.fillRect(rect, brush)
+        painter.end()
 
 
-class GearLabel(QCustomLabel):
+class GearLabel(StaticTextLabel):
     def __init__(self):
         super(GearLabel, self).__init__()
         self.setAlignment(QtCore.Qt.AlignCenter)
         self.setFontFamily("DejaVu Sans")  # ★修正: 太字ゴシック
         self.setFontScale(2.5)
-        self.setStyleSheet("color : #FFF; background-color: #000; font-weight: bold;")
+        self.setStyleSheet(GEAR_LABEL_STYLE)
+        self.binding = LabelBinding(self)
 
     def updateGearLabel(self, gearType: GearType):
         if int(gearType) == GearType.NEUTRAL:
-            self.setText("N")
-            self.setStyleSheet(
-                "font-weight: bold; color : #00ff7f; background-color: #000;"
-            )
+            self.binding.setText("N")
+            self.binding.setTone("neutral")
         else:
-            self.setText(str(int(gearType)))
-            self.setStyleSheet(
-                "font-weight: bold; color : #FFF; background-color: #000;"
-            )
+            self.binding.setText(str(int(gearType)))
+            self.binding.setTone("normal")
 
 
-class RpmLabel(QCustomLabel):
+class RpmLabel(StaticTextLabel):
     def __init__(self):
         super(RpmLabel, self).__init__()
         self.setAlignment(QtCore.Qt.AlignCenter)
         self.setFontFamily("DejaVu Sans")  # ★修正: 太字ゴシック
         self.setFontScale(0.8)
         self.setStyleSheet("font-weight: bold; color : #FFF; background-color: #000")
+        self.binding = LabelBinding(self)
 
     def updateRpmLabel(self, rpm: Rpm):
-        self.setText(str(rpm))
+        self.binding.setText(str(rpm))
 
 
 class LapTimerLabel(QCustomLabel):
@@ -502,35 +629,27 @@ class TpmsBox(QGroupBox):
         self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
         self.setAutoFillBackground(True)
 
-        # ★修正: 写真のような太めのサンセリフ体（DejaVu Sans）に統一
-        self.temp_style_base = (
-            "font-family: 'DejaVu Sans'; font-size: 70px; font-weight: bold;"
-        )
-        self.pressure_style_base = (
-            "font-family: 'DejaVu Sans'; font-size: 20px; font-weight: bold;"
-        )
-
-        self.color_ok = "color: #FFF;"
-        self.color_no_data = "color: #888;"
-
         self.setObjectName("TpmsBox")
+        # alert プロパティで枠の色を切り替える (傾向監視の警告レベル)
         self.setStyleSheet(
             "QGroupBox#TpmsBox { border: none; background-color: #000; margin: 0px; }"
+            'QGroupBox#TpmsBox[alert="warn"] { border: 4px solid #ECC94B; }'
+            'QGroupBox#TpmsBox[alert="alert"] { border: 4px solid #E53E3E; }'
         )
+        self.alert = LabelBinding(self, property_name="alert")
 
+        # ★修正: 写真のような太めのサンセリフ体（DejaVu Sans）に統一
         # 1. 気温表示用のラベル (背景黒を追加)
         self.tempLabel = QLabel("---")
         self.tempLabel.setAlignment(QtCore.Qt.AlignCenter)
-        self.tempLabel.setStyleSheet(
-            f"{self.temp_style_base} {self.color_no_data} background-color: #000;"
-        )
+        self.tempLabel.setStyleSheet(TPMS_LABEL_STYLE % 70)
+        self.temp = LabelBinding(self.tempLabel)
 
         # 2. 気圧表示用のラベル (背景黒を追加)
         self.pressureLabel = QLabel("---")
         self.pressureLabel.setAlignment(QtCore.Qt.AlignCenter)
-        self.pressureLabel.setStyleSheet(
-            f"{self.pressure_style_base} {self.color_no_data} background-color: #000;"
-        )
+        self.pressureLabel.setStyleSheet(TPMS_LABEL_STYLE % 20)
+        self.pressure = LabelBinding(self.pressureLabel)
 
         # 3. 真ん中の横線
         self.line = QFrame()
@@ -552,39 +671,35 @@ class TpmsBox(QGroupBox):
 
         self.setLayout(layout)
 
-    def updateTemperature(self, temp_c: float | None):
-        """気温ラベルを更新する"""
+    def updateTemperature(self, temp_c: float | None, stale: bool = False):
+        """気温ラベルを更新する (stale: しばらく受信がなく古い値)"""
         if temp_c is None:
-            self.tempLabel.setText("---")
-            self.tempLabel.setStyleSheet(
-                f"{self.temp_style_base} {self.color_no_data} background-color: #000;"
-            )
+            self.temp.setText("---")
+            self.temp.setTone("no_data")
         else:
             val = int(temp_c)
-            self.tempLabel.setText(f"{val}")
+            self.temp.setText(f"{val}")
 
             if val < 30:
-                color = "#00BFFF"
+                tone = "cold"
             elif val < 40:
-                color = "#FFFF00"
+                tone = "mild"
             elif val < 50:
-                color = "#FFA500"
+                tone = "warm"
             else:
-                color = "#FF0000"
+                tone = "hot"
+
+            self.temp.setTone("stale" if stale else tone)
 
-            self.tempLabel.setStyleSheet(
-                f"{self.temp_style_base} color: {color}; background-color: #000;"
-            )
+    def updateAlert(self, level: int):
+        """傾向監視の警告レベル (TireAlert の値) を枠の色で示す"""
+        self.alert.setTone({1: "warn", 2: "alert"}.get(level, "ok"))
 
-    def updatePressure(self, pressure_kpa: float | None):
+    def updatePressure(self, pressure_kpa: float | None, stale: bool = False):
         """気圧ラベルを更新する"""
         if pressure_kpa is None:
-            self.pressureLabel.setText("---")
-            self.pressureLabel.setStyleSheet(
-                f"{self.pressure_style_base} {self.color_no_data} background-color: #000;"
-            )
+            self.pressure.setText("---")
+            self.pressure.setTone("no_data")
         else:
-            self.pressureLabel.setText(f"{pressure_kpa:.0f} kPa")
-            self.pressureLabel.setStyleSheet(
-                f"{self.pressure_style_base} {self.color_ok} background-color: #000;"
-            )
+            self.pressure.setText(f"{pressure_kpa:.0f} kPa")
+            self.pressure.setTone("stale" if stale else "ok")
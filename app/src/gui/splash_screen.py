@@ -29,6 +29,7 @@ class SplashScreen(QWidget):
         
         # メンバー変数の初期化
         self.logo_label = None
+        self.status_label = None
         self.opacity_effect = None
         self.fade_in = None
         self.fade_out = None
@@ -62,6 +63,14 @@ class SplashScreen(QWidget):
         # 3. レイアウトを使ってQLabelを中央に配置
         layout = QVBoxLayout(self)
         layout.addWidget(self.logo_label)
+
+        # 起動段階の進捗と所要時間を表示する行
+        self.status_label = QLabel(self)
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.status_label.setStyleSheet(
+            "color: #888; font-family: 'DejaVu Sans'; font-size: 16px;"
+        )
+        layout.addWidget(self.status_label, 0)
         self.setLayout(layout)
 
         # 4. ロゴラベルに透明度エフェクトを設定
@@ -102,6 +111,13 @@ class SplashScreen(QWidget):
         else:
             print("エラー: スプラッシュはすでに開始されているか、不正な状態です。")
 
+    def show_status(self, text: str):
+        """起動段階の表示を更新する (初期化中でイベントループが回らないので即時描画する)"""
+        if self.status_label is None:
+            return
+        self.status_label.setText(text)
+        self.status_label.repaint()
+
     def start_fade_out(self):
         """フェードアウトを開始"""
         if self.fade_out:
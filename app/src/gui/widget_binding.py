@@ -0,0 +1,122 @@
+import contextlib
+import logging
+import time
+
+from PyQt5.QtWidgets import QWidget
+
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+class RenderStats:
+    """
+    ダッシュボード描画の計測。
+    反映した更新・スキップした更新の数と、1フレームの処理時間を集計し、
+    RENDER_STATS_LOG_SEC ごとにログへ出す (0 なら出さない)。
+    """
+
+    def __init__(self, log_interval_sec: float = None):
+        if log_interval_sec is None:
+            log_interval_sec = config.RENDER_STATS_LOG_SEC
+        self.log_interval_sec = log_interval_sec
+        self.reset()
+
+    def reset(self):
+        self.applied = 0
+        self.skipped = 0
+        self.frames = 0
+        self.frame_time_total = 0.0
+        self.frame_time_max = 0.0
+        self._window_start = time.monotonic()
+
+    @contextlib.contextmanager
+    def frame(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.frames += 1
+            self.frame_time_total += elapsed
+            self.frame_time_max = max(self.frame_time_max, elapsed)
+            self._maybe_log()
+
+    def summary(self) -> dict:
+        window = max(time.monotonic() - self._window_start, 1e-9)
+        frames = max(self.frames, 1)
+        return {
+            "fps": self.frames / window,
+            "frame_ms_avg": self.frame_time_total / frames * 1000.0,
+            "frame_ms_max": self.frame_time_max * 1000.0,
+            "applied": self.applied,
+            "skipped": self.skipped,
+        }
+
+    def _maybe_log(self):
+        if self.log_interval_sec <= 0:
+            return
+        if time.monotonic() - self._window_start < self.log_interval_sec:
+            return
+        s = self.summary()
+        logger.info(
+            f"Render: {s['fps']:.1f} fps, {s['frame_ms_avg']:.2f} ms/frame "
+            f"(max {s['frame_ms_max']:.2f}), updates {s['applied']} applied / "
+            f"{s['skipped']} skipped"
+        )
+        self.reset()
+
+
+# ダッシュボード全体で共有する計測
+render_stats = RenderStats()
+
+
+class LabelBinding:
+    """
+    QLabel などへの表示更新を、前回と同じ値なら何もしないラッパー。
+
+    色の切り替えはスタイルシートの文字列を作り直さず、ウィジェットに
+    動的プロパティ (既定は "tone") を設定して切り替える。
+    ウィジェット側には、あらかじめ QLabel[tone="warn"] { ... } のような
+    セレクタを含むスタイルシートを一度だけ設定しておくこと。
+    """
+
+    def __init__(
+        self, widget: QWidget, stats: RenderStats = None, property_name="tone"
+    ):
+        self.widget = widget
+        self.stats = stats or render_stats
+        self.property_name = property_name
+        self._text = widget.text() if hasattr(widget, "text") else None
+        self._tone = None
+
+    def setText(self, text: str) -> bool:
+        if text == self._text:
+            self.stats.skipped += 1
+            return False
+        self._text = text
+        self.widget.setText(text)
+        self.stats.applied += 1
+        return True
+
+    def setTone(self, tone: str) -> bool:
+        if tone == self._tone:
+            self.stats.skipped += 1
+            return False
+        self._tone = tone
+        self.widget.setProperty(self.property_name, tone)
+        # プロパティセレクタを再評価させる (スタイルシートの再解析は起きない)
+        style = self.widget.style()
+        style.unpolish(self.widget)
+        style.polish(self.widget)
+        self.widget.update()
+        self.stats.applied += 1
+        return True
+
+    @property
+    def text(self):
+        return self._text
+
+    @property
+    def tone(self):
+        return self._tone
@@ -1,7 +1,11 @@
 from PyQt5.QtCore import QObject, pyqtSignal
-from gpiozero import RotaryEncoder, Button  # Buttonを追加
 import logging
 
+from src.util.lazy_import import lazy_import
+
+# エンコーダー生成時 (ハードウェアの初期化段階) に読み込む
+gpiozero = lazy_import("gpiozero")
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,7 +22,7 @@ class EncoderWorker(QObject):
 
         try:
             # ロータリーエンコーダー初期化
-            self.rotor = RotaryEncoder(a=pin_a, b=pin_b, max_steps=0)
+            self.rotor = gpiozero.RotaryEncoder(a=pin_a, b=pin_b, max_steps=0)
             self.rotor.when_rotated = self._on_rotate
             self.last_steps = 0
 
@@ -26,7 +30,7 @@ class EncoderWorker(QObject):
             if pin_sw is not None:
                 # ★修正: bounce_time を設定してチャタリング(誤検知)を防ぐ
                 # 0.05秒(50ms)以内の信号変化を無視します
-                self.button = Button(pin_sw, bounce_time=0.05)
+                self.button = gpiozero.Button(pin_sw, bounce_time=0.05)
                 self.button.when_pressed = self._on_button_press
                 self.button.when_released = self._on_button_release
 
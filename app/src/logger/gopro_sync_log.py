@@ -0,0 +1,43 @@
+import csv
+import datetime
+import os
+
+
+class GoProSyncLog:
+    """
+    複数の GoPro に録画の開始/停止を送ったときの、カメラごとの反映時刻を
+    CSV に追記するクラス。後で映像どうし・車両ログ (CsvLogger) と
+    頭出しを合わせるのに使う。
+
+    logs/<日付>/gopro_sync.csv に1カメラ1行で書く。時刻はすべて epoch 秒。
+    """
+
+    HEADER = [
+        "Event",  # START / STOP
+        "Issued",  # 全カメラへ送り始めた時刻
+        "Camera",
+        "Address",
+        "Acked",  # 反映を確認した時刻 (空欄なら時間内に反映されなかった)
+        "RTT_ms",
+        "Estimated",  # カメラが切り替わったと見なす時刻 (Acked - RTT/2)
+        "Skew_ms",  # 一番早く切り替わったカメラとの差
+        "Note",
+    ]
+
+    def __init__(self, base_dir="logs"):
+        self.base_dir = base_dir
+
+    def append(self, rows: list[list]):
+        """ブロッキングなので IoReactor.run_blocking から呼ぶ"""
+        date_str = datetime.datetime.now().strftime("%Y-%m-%d")
+        log_dir = os.path.join(self.base_dir, date_str)
+        os.makedirs(log_dir, exist_ok=True)
+        file_path = os.path.join(log_dir, "gopro_sync.csv")
+
+        is_new = not os.path.exists(file_path)
+        with open(file_path, mode="a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(self.HEADER)
+            writer.writerows(rows)
+        return file_path
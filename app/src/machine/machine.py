@@ -1,8 +1,9 @@
 from src.can.can_master import CanMaster
 
-# from src.message.message import Messenger
+from src.message.message import Messenger
 # from src.udp.udp_transmitter import UdpTransmitter
 from src.fuel.fuel_calculator import FuelCalculator
+from src.services.io_reactor import IoReactor
 
 
 class MachineException(BaseException):
@@ -14,15 +15,23 @@ class Machine:
 
     canMaster: CanMaster
     # udpTransmitter: UdpTransmitter
-    # messenger: Messenger
-
-    def __init__(self, fuel_calculator: FuelCalculator) -> None:
+    messenger: Messenger
+
+    def __init__(
+        self,
+        fuel_calculator: FuelCalculator,
+        reactor: IoReactor,
+        canInterfaceReady: bool = False,
+    ) -> None:
         # ★★★ 3. 受け取った fuel_calculator を CanMaster に渡す ★★★
-        self.canMaster = CanMaster(fuel_calculator)
-        # self.messenger = Messenger()
+        self.canMaster = CanMaster(fuel_calculator, interfaceReady=canInterfaceReady)
+        # UDP送信・メッセージ取得は共有の IoReactor 上で動かす
+        self.reactor = reactor
+        self.messenger = Messenger(self.reactor)
 
     def initialise(self) -> None:
-        # self.udpTransmitter = UdpTransmitter(self.canMaster.udpPayloadListener)
+        # self.udpTransmitter = UdpTransmitter(
+        #     self.canMaster.udpPayloadListener, self.reactor
+        # )
         # self.udpTransmitter.start()
-        # self.messenger.start()
-        pass
+        self.messenger.start()
@@ -1,41 +1,165 @@
+import asyncio
 import logging
-import threading
-import time
+from typing import Optional
 
-import requests  # type: ignore
+from PyQt5.QtCore import QObject, pyqtSignal
 
 from src.models.models import Message
+from src.services.io_reactor import IoReactor
 from src.util import config
+from src.util.lazy_import import lazy_import
 
+# 最初の取得時 (スレッドプール上) に読み込む
+requests = lazy_import("requests")
 
-class Messenger:
-    GET_INTERVAL_TIME = 5
+logger = logging.getLogger(__name__)
+
+
+class Messenger(QObject):
+    """
+    ピットからのメッセージとラップタイムを取得し、変化したときだけ通知する。
+
+    - requests.Session で接続を使い回す (毎回のTCP/TLSハンドシェイクをなくす)
+    - ETag / Last-Modified による条件付きGETで、変化がなければ 304 で済ませる
+    - CLOUD_PIT_API_ENDPOINT があれば1回のGETでメッセージとラップタイムを取る
+    - MESSAGE_LONG_POLL_SEC > 0 ならロングポーリングで、更新をすぐ受け取る
+    """
+
+    # 取得したメッセージ (Message) をダッシュボードへ通知する
+    message_updated = pyqtSignal(object)
+
+    GET_INTERVAL_TIME = config.MESSAGE_POLL_INTERVAL_SEC
+    MAX_BACKOFF_SEC = 60.0
+    # ロングポーリング非対応のサーバーがすぐ応答しても、連続で叩かないための間隔
+    LONG_POLL_MIN_GAP_SEC = 1.0
 
-    thread: threading.Thread
     message: Message
 
-    def __init__(self) -> None:
+    def __init__(self, reactor: IoReactor) -> None:
+        super().__init__()
+        self.reactor = reactor
         self.message = Message()
+        self._future = None
+        # 最初の取得時に作る (requests の読み込みを起動時に行わないため)
+        self.session = None
 
-    def tryGetMessage(self):
-        try:
-            res = requests.get(config.cloudMessageApiEndpoint)
-            self.message.text = str(res.json()["message"]["text"])
-        except BaseException:
-            logging.warning("Get message failed!")
+        # URLごとの検証子 (ETag, Last-Modified) と最後に受け取ったJSON
+        self._validators: dict[str, tuple[Optional[str], Optional[str]]] = {}
+        self._bodies: dict[str, dict] = {}
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(
+            config.cloudPitApiEndpoint
+            or config.cloudMessageApiEndpoint
+            or config.cloudLaptimeApiEndpoint
+        )
+
+    def _getSession(self):
+        if self.session is None:
+            self.session = requests.Session()
+            # 同時に張る接続は高々2本 (個別エンドポイントの場合)。リトライは自前で行う
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=2, max_retries=0
+            )
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        return self.session
+
+    def _conditionalGet(self, url: str, longPoll: bool = False) -> dict:
+        """条件付きGET。304 のときは前回の本文を返す"""
+        headers = {}
+        etag, lastModified = self._validators.get(url, (None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if lastModified:
+            headers["If-Modified-Since"] = lastModified
+
+        params = None
+        readTimeout = config.MESSAGE_READ_TIMEOUT_SEC
+        if longPoll and config.MESSAGE_LONG_POLL_SEC > 0:
+            params = {"wait": int(config.MESSAGE_LONG_POLL_SEC)}
+            readTimeout += config.MESSAGE_LONG_POLL_SEC
+
+        res = self._getSession().get(
+            url,
+            headers=headers,
+            params=params,
+            timeout=(config.MESSAGE_CONNECT_TIMEOUT_SEC, readTimeout),
+        )
+        if res.status_code == 304:
+            return self._bodies.get(url, {})
+        res.raise_for_status()
+
+        body = res.json()
+        self._validators[url] = (
+            res.headers.get("ETag"),
+            res.headers.get("Last-Modified"),
+        )
+        self._bodies[url] = body
+        return body
+
+    def tryGetMessage(self) -> bool:
+        """
+        メッセージとラップタイムを取得する (スレッドプールで実行される)。
+        取得に成功した場合は True
+        """
+        text, laptime = self.message.text, self.message.laptime
         try:
-            res = requests.get(config.cloudLaptimeApiEndpoint)
-            self.message.laptime = float(res.json()["laptime"])
-        except BaseException:
-            logging.warning("Get laptime failed!")
+            if config.cloudPitApiEndpoint:
+                body = self._conditionalGet(config.cloudPitApiEndpoint, longPoll=True)
+                text = str(body["message"]["text"])
+                laptime = float(body["laptime"])
+            else:
+                if config.cloudMessageApiEndpoint:
+                    body = self._conditionalGet(
+                        config.cloudMessageApiEndpoint, longPoll=True
+                    )
+                    text = str(body["message"]["text"])
+                if config.cloudLaptimeApiEndpoint:
+                    body = self._conditionalGet(config.cloudLaptimeApiEndpoint)
+                    laptime = float(body["laptime"])
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Get message failed: {e}")
+            return False
+
+        if text != self.message.text or laptime != self.message.laptime:
+            self.message = Message()
+            self.message.text = text
+            self.message.laptime = laptime
+            logger.info(f"message: {text}")
+            self.message_updated.emit(self.message)
+        return True
 
-    def getEvery(self):
-        while True:
-            self.tryGetMessage()
-            time.sleep(self.GET_INTERVAL_TIME)
-            logging.info(f"message: {self.message.text}")
+    async def getEvery(self):
+        backoff = self.GET_INTERVAL_TIME
+        try:
+            while True:
+                # requests はブロッキングなのでスレッドプールで実行する
+                ok = await self.reactor.run_blocking(self.tryGetMessage)
+                if ok:
+                    backoff = self.GET_INTERVAL_TIME
+                    # ロングポーリング中はサーバー側で待つので、間を空けずに次を投げる
+                    if config.MESSAGE_LONG_POLL_SEC > 0:
+                        await asyncio.sleep(self.LONG_POLL_MIN_GAP_SEC)
+                    else:
+                        await asyncio.sleep(self.GET_INTERVAL_TIME)
+                else:
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.MAX_BACKOFF_SEC)
+        finally:
+            if self.session is not None:
+                self.session.close()
+                self.session = None
 
     def start(self):
-        self.thread = threading.Thread(target=self.getEvery)
-        self.thread.setDaemon(True)
-        self.thread.start()
+        if not self.is_configured:
+            logger.info("Pit message endpoints are not set. Messenger disabled.")
+            return
+        if self._future is None:
+            self._future = self.reactor.submit(self.getEvery())
+
+    def stop(self):
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
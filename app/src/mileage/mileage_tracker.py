@@ -35,27 +35,27 @@ class MileageTracker:
         self.current_total_km = self.loaded_total_km
         self.current_daily_km = self.start_daily_base
 
+        # 前回受け取った「今回の起動ごとの走行距離」(ここからの増分をジャーナルに書く)
+        self._last_session_km = 0.0
+
     def update(self, session_km: float):
         """
         GPSWorkerから得られた「今回の起動ごとの走行距離」を受け取り、
         トータルと日別の距離を更新する。
         """
-        # トータル = ロード時の値 + 今回の走行分
-        self.current_total_km = self.loaded_total_km + session_km
+        delta_km = session_km - self._last_session_km
+        self._last_session_km = session_km
+        if delta_km <= 0:
+            # 同じ値 (停車中) か、GPS側の積算がやり直された
+            return
 
-        # 今日の距離 = 今日の開始時の値 + 今回の走行分
-        self.current_daily_km = self.start_daily_base + session_km
+        # トータルと今日の距離に、前回からの増分を足す
+        self.current_total_km += delta_km
+        self.current_daily_km += delta_km
+        self.store.record(delta_km)
 
     def get_mileage(self) -> tuple[float, float]:
         """
         (今日の距離, 総走行距離) を返す
         """
         return self.current_daily_km, self.current_total_km
-
-    def save(self):
-        """
-        現在の状態を保存する
-        """
-        # 日付が変わっている可能性もあるため、保存時に現在日付で更新してもよいが
-        # ここではシンプルに計算中の値を保存する
-        self.store.save_state(self.current_total_km, self.current_daily_km)
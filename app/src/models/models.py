@@ -1,5 +1,6 @@
 from datetime import timedelta
 from enum import IntEnum
+from typing import Optional
 
 
 class RpmStatus(IntEnum):
@@ -178,6 +179,12 @@ class BatteryVoltage(float):
             return BatteryStatus.HIGH
 
 
+class TireAlert(IntEnum):
+    OK = 0
+    WARNING = 1
+    ALERT = 2
+
+
 class BrakePress:
     front: float
     rear: float
@@ -196,6 +203,10 @@ class BrakePress:
             return round(100.0 * front / (front + rear), 1)
 
 
+def _optional_round(value: Optional[float], digits: int) -> Optional[float]:
+    return None if value is None else round(float(value), digits)
+
+
 class DashMachineInfo:
     """
     車両の全情報を保持するデータクラス
@@ -222,6 +233,13 @@ class DashMachineInfo:
     # 燃料関連
     fuelUsed: float
     fuelConsumedTotal: float
+    # 燃料の見積もり (FuelEstimator が書く。周回データが揃うまでは None)
+    lastLapFuel: float  # 前の周で使った量 [ml]
+    fuelPerLap: Optional[float]  # [ml/周]
+    fuelPerKm: Optional[float]  # [ml/km]
+    fuelLapsRemaining: Optional[float]  # 残量で走れる周回数
+    fuelKmRemaining: Optional[float]  # 残量で走れる距離 [km]
+    fuelMarginLaps: Optional[float]  # 目標周回数の後に残る周回数 (負なら足りない)
 
     # 追加センサー
     manifoldPressure: float
@@ -239,7 +257,11 @@ class DashMachineInfo:
     # ★追加: タイヤセット情報
     tireSet: str
 
+    # 値が更新されるたびに増える通し番号 (描画側が新しいデータの有無を判定する)
+    seq: int
+
     def __init__(self) -> None:
+        self.seq = 0
         self.rpm = Rpm(0)
         self.speed = 0.0
         self.throttlePosition = 0.0
@@ -254,6 +276,12 @@ class DashMachineInfo:
         
         self.fuelUsed = 0.0
         self.fuelConsumedTotal = 0.0
+        self.lastLapFuel = 0.0
+        self.fuelPerLap = None
+        self.fuelPerKm = None
+        self.fuelLapsRemaining = None
+        self.fuelKmRemaining = None
+        self.fuelMarginLaps = None
         
         self.manifoldPressure = 0.0
         self.lambda1 = 0.0
@@ -280,6 +308,9 @@ class DashMachineInfo:
         self.rpm = Rpm(rpm)
         self.oilPress.rpm = rpm
 
+    def markUpdated(self):
+        self.seq += 1
+
     def to_telemetry_payload(self) -> dict:
         gear_val = self.gearVoltage.gearType.value
         gear_str = "N" if gear_val == 0 else str(gear_val)
@@ -297,6 +328,10 @@ class DashMachineInfo:
             "clt": round(float(self.currentLapTime), 2),
             "ltd": round(float(self.lapTimeDiff), 2),
             "fp": round(float(self.fuelPress), 1),
+            "fpl": _optional_round(self.fuelPerLap, 1),
+            "flr": _optional_round(self.fuelLapsRemaining, 2),
+            "fkr": _optional_round(self.fuelKmRemaining, 2),
+            "fml": _optional_round(self.fuelMarginLaps, 2),
         }
 
 
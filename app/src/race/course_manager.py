@@ -1,9 +1,9 @@
-import json
 import math
-import os
 from dataclasses import dataclass, asdict
 from typing import List, Optional
 
+from src.util.state_store import StateStore, get_state_store, load_legacy_json
+
 
 @dataclass
 class SectorPoint:
@@ -19,10 +19,13 @@ class CourseManager:
     通過判定に必要なゲート情報を提供するクラス。
     """
 
+    # 旧形式のコースファイル (StateStore に "course" 区画がなければここから移行する)
     COURSE_FILE_PATH = "course_data.json"
+    SECTION = "course"
     GATE_WIDTH_METERS = 10.0  # ゲートの幅 (左右合計)
 
-    def __init__(self):
+    def __init__(self, store: StateStore = None):
+        self.store = store or get_state_store()
         self.sectors: List[SectorPoint] = []
         self.load_course()
 
@@ -122,19 +125,20 @@ class CourseManager:
     def save_course(self):
         try:
             data = [asdict(s) for s in self.sectors]
-            with open(self.COURSE_FILE_PATH, "w") as f:
-                json.dump(data, f, indent=4)
+            self.store.set(self.SECTION, data)
         except Exception as e:
             print(f"Failed to save course: {e}")
 
     def load_course(self):
-        if not os.path.exists(self.COURSE_FILE_PATH):
-            return
+        data = self.store.get(self.SECTION)
+        if data is None:
+            data = load_legacy_json(self.COURSE_FILE_PATH)
+            if data is None:
+                return
+            self.store.set(self.SECTION, data)  # 旧ファイルから移行
         try:
-            with open(self.COURSE_FILE_PATH, "r") as f:
-                data = json.load(f)
-                self.sectors = [SectorPoint(**d) for d in data]
-                self.sectors.sort(key=lambda s: s.index)
+            self.sectors = [SectorPoint(**d) for d in data]
+            self.sectors.sort(key=lambda s: s.index)
             print(f"Loaded {len(self.sectors)} sectors.")
         except Exception as e:
             print(f"Failed to load course: {e}")
\ No newline at end of file
@@ -1,5 +1,6 @@
 import time
 import logging
+from typing import Callable
 from src.models.models import DashMachineInfo
 from src.race.course_manager import CourseManager
 
@@ -34,6 +35,10 @@ class LapTimer:
 
         self.target_laps = 0  # 内部保持用の設定値
 
+        # 周回イベントの通知先: listener(完了した周回数, ラップタイム)
+        # スタートラインを初めて通ったときは (0, 0.0) で呼ぶ
+        self.lap_listeners: list[Callable[[int, float], None]] = []
+
     # ★追加: 外部（Service層など）からターゲット周回数を設定するためのメソッド
     def set_target_laps(self, laps: int):
         """ターゲット周回数を設定する (0=無制限)"""
@@ -156,6 +161,7 @@ class LapTimer:
                 dash_info.sector_times = {}
                 dash_info.sector_diffs = {}
                 print("--- RACE START ---")
+                self._notify_lap(0, 0.0)
             else:
                 # ゴール (周回完了)
                 self._record_sector_time(0, sector_time, dash_info)
@@ -166,6 +172,7 @@ class LapTimer:
                 # ★修正: ターゲット周回数に達したかの判定
                 # _register_lapでlap_countが+1されているため、完了したラップ数は (self.lap_count - 1)
                 completed_laps = self.lap_count - 1
+                self._notify_lap(completed_laps, final_lap_time)
                 if self.target_laps > 0 and completed_laps >= self.target_laps:
                     print(f"--- RACE FINISHED (Target: {self.target_laps} Laps) ---")
                     # タイマーを停止し、終了フラグを立てる
@@ -199,6 +206,13 @@ class LapTimer:
                 next_index = 0
             self.target_sector_index = next_index
 
+    def _notify_lap(self, completed_laps: int, lap_time: float):
+        for listener in self.lap_listeners:
+            try:
+                listener(completed_laps, lap_time)
+            except Exception as e:
+                logger.error(f"Lap listener failed: {e}")
+
     def _record_sector_time(
         self, sector_idx: int, current_time: float, dash_info: DashMachineInfo
     ):
@@ -1,9 +1,10 @@
 from PyQt5.QtCore import QObject, pyqtSignal, Qt
 from src.tpms.tpms_worker import TpmsWorker
 from src.gps.gps_worker import GpsWorker
-from src.gopro.gopro_worker import GoProWorker
+from src.gopro.gopro_manager import GoProManager
 from src.hardware.encoder_worker import EncoderWorker
 from src.hardware.pwm_controller import RPiPwmController # ★追加
+from src.services.io_reactor import IoReactor
 from src.util import config
 import threading
 
@@ -11,7 +12,7 @@ class HardwareService(QObject):
     tpms_updated = pyqtSignal(dict)
     gps_updated = pyqtSignal(dict)
 
-    def __init__(self, parent=None):
+    def __init__(self, reactor: IoReactor, parent=None):
         super().__init__(parent)
 
         self.tpms_worker = TpmsWorker(
@@ -30,7 +31,8 @@ class HardwareService(QObject):
         self.gps_worker.data_received.connect(self.gps_updated)
         self.gps_worker.error_occurred.connect(lambda err: print(f"GPS Error: {err}"))
 
-        self.gopro_worker = GoProWorker()
+        # GOPRO_CAMERAS のカメラすべてを1つのループ上でつなぐ
+        self.gopro_manager = GoProManager(reactor)
         self.encoder_worker = EncoderWorker(pin_a=20, pin_b=21, pin_sw=18)
         self.gps_thread = None
 
@@ -59,8 +61,8 @@ class HardwareService(QObject):
             self.gps_worker.stop()
         if self.encoder_worker:
             self.encoder_worker.stop()
-        if self.gopro_worker:
-            self.gopro_worker.stop()
+        if self.gopro_manager:
+            self.gopro_manager.stop()
         # ★追加
         self.radiator_fan.stop()
         self.water_pump.stop()
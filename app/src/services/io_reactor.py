@@ -0,0 +1,147 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import threading
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+class QtBridge(QObject):
+    """
+    イベントループのスレッドから、GUIスレッドで関数を実行するための橋渡し。
+    GUIスレッドで生成すること (QObjectは生成したスレッドに属する)。
+    """
+
+    _invoke = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._invoke.connect(self._run, type=Qt.QueuedConnection)
+
+    def post(self, fn, *args) -> None:
+        self._invoke.emit(functools.partial(fn, *args))
+
+    @pyqtSlot(object)
+    def _run(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"Qt bridge callback error: {e}")
+
+
+class IoReactor:
+    """
+    ネットワーク系ワーカー (Sheets / MQTT / UDP / Messenger / GoPro) が共有する
+    asyncio イベントループ。
+
+    - ループは専用スレッド1本で回す
+    - requests や gspread などのブロッキング呼び出しは run_blocking() で
+      小さなスレッドプールに逃がす
+    - GUIへの通知は post_to_qt() (または各ワーカーの pyqtSignal) で行う
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or config.IO_REACTOR_WORKERS
+        self.loop: asyncio.AbstractEventLoop = None
+        self.qt = QtBridge()
+
+        self._thread = None
+        self._thread_id = None
+        self._executor = None
+        self._ready = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self.loop is not None and self.loop.is_running()
+
+    def start(self) -> "IoReactor":
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(
+            target=self._run_loop, name="io-reactor", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        logger.info(f"IoReactor started (blocking workers: {self.max_workers})")
+        return self
+
+    def stop(self, timeout: float = 3.0) -> None:
+        """実行中のタスクをキャンセルし、ループとスレッドプールを止める"""
+        if self._thread is None:
+            return
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        logger.info("IoReactor stopped.")
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="io-blocking"
+        )
+        loop.set_default_executor(self._executor)
+        self.loop = loop
+        self._thread_id = threading.get_ident()
+        self._ready.set()
+
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                tasks = asyncio.all_tasks(loop)
+                for task in tasks:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            except Exception as e:
+                logger.warning(f"IoReactor shutdown error: {e}")
+            # 応答しないブロッキング呼び出しを待って終了が遅れないようにする
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            loop.close()
+
+    # ---------------------------------------------
+    # 他スレッドからの操作
+    # ---------------------------------------------
+
+    def threads(self) -> list[threading.Thread]:
+        """ループとスレッドプールのスレッド (ベンチマークでCPU時間を集計する用)"""
+        threads = [self._thread] if self._thread is not None else []
+        if self._executor is not None:
+            threads.extend(self._executor._threads)
+        return threads
+
+    def in_loop_thread(self) -> bool:
+        return threading.get_ident() == self._thread_id
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """コルーチンをループで実行する。戻り値の Future で結果取得やキャンセルをする"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, fn, *args) -> None:
+        """ループのスレッドで fn を実行する (ループのスレッドからなら即時実行)"""
+        if self.in_loop_thread():
+            fn(*args)
+        elif self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(fn, *args)
+        # 停止後に届いた後始末の呼び出し (GC時のソケット解除など) は捨てる
+
+    def post_to_qt(self, fn, *args) -> None:
+        """GUIスレッドで fn を実行する"""
+        self.qt.post(fn, *args)
+
+    # ---------------------------------------------
+    # コルーチンから使うヘルパー
+    # ---------------------------------------------
+
+    async def run_blocking(self, fn, *args, **kwargs):
+        """ブロッキング関数をスレッドプールで実行して結果を待つ"""
+        return await self.loop.run_in_executor(
+            None, functools.partial(fn, *args, **kwargs)
+        )
@@ -4,24 +4,37 @@ import logging
 from src.telemetry.google_sheets_sender import GoogleSheetsSender
 from src.telemetry.mqtt_sender import MqttTelemetrySender
 from src.telemetry.plotjuggler_sender import PlotJugglerSender
+from src.telemetry.sender_interface import TelemetrySender
 from src.logger.csv_logger import CsvLogger
 from src.mileage.mileage_tracker import MileageTracker
+from src.services.io_reactor import IoReactor
+from src.util import config
 
 logger = logging.getLogger(__name__)
 
+# config.TELEMETRY_SENDERS の名前と送信機の生成関数 (引数は共有の IoReactor)
+STREAM_SENDER_TYPES = {
+    "mqtt": lambda reactor: MqttTelemetrySender(reactor),
+    "plotjuggler": lambda reactor: PlotJugglerSender(),
+}
+
 class TelemetryService:
-    def __init__(self):
+    def __init__(self, reactor: IoReactor):
+        self.reactor = reactor
         self.sender = GoogleSheetsSender(
-            json_keyfile="service_account.json", spreadsheet_name="KIT_FORMULA_Log_2026"
+            reactor,
+            json_keyfile="service_account.json",
+            spreadsheet_name="KIT_FORMULA_Log_2026",
         )
-        
-        # ▼▼▼ MQTT (HiveMQ) の停止 ▼▼▼
-        self.mqtt_sender = MqttTelemetrySender()
-        self.mqtt_sender.start()
+        self.sender.start()
 
-        # PlotJuggler送信機の初期化と開始
-        # self.pj_sender = PlotJugglerSender()
-        # self.pj_sender.start()
+        # GUI周期で車両データを流すストリーム系送信機 (MQTT / PlotJuggler)
+        self.stream_senders_by_name = self._create_stream_senders(
+            config.TELEMETRY_SENDERS, reactor
+        )
+        self.stream_senders = list(self.stream_senders_by_name.values())
+        for sender in self.stream_senders:
+            sender.start()
 
         self.logger = CsvLogger(base_dir="logs")
         self.mileage_tracker = MileageTracker()
@@ -31,6 +44,22 @@ class TelemetryService:
         self._logging_thread = None
         self._logging_active = False
         self._data_provider = None  # データ取得用関数
+        # CSVに記録するかどうか (自動化ルールの csv_log 動作で切り替える)
+        self.csv_logging_enabled = False
+
+    @staticmethod
+    def _create_stream_senders(
+        names: list[str], reactor: IoReactor
+    ) -> dict[str, TelemetrySender]:
+        senders = {}
+        for name in names:
+            sender_type = STREAM_SENDER_TYPES.get(name)
+            if sender_type is None:
+                logger.warning(f"Unknown telemetry sender '{name}' ignored.")
+                continue
+            senders[name] = sender_type(reactor)
+        logger.info(f"Telemetry stream senders: {names}")
+        return senders
 
     def start_logging_thread(self, data_provider_func):
         """
@@ -46,6 +75,12 @@ class TelemetryService:
         self._logging_thread.start()
         logger.info("Precision Logging Thread Started")
 
+    def set_csv_logging(self, enabled: bool):
+        """CSVログの記録を開始/停止する (ファイルの開閉はログ用スレッドが行う)"""
+        if enabled != self.csv_logging_enabled:
+            logger.info(f"CSV logging {'enabled' if enabled else 'disabled'}")
+        self.csv_logging_enabled = enabled
+
     def _logging_loop(self):
         """
         ドリフト補正付きの精密ループ (50ms)
@@ -59,8 +94,8 @@ class TelemetryService:
                 if self._data_provider:
                     dash_info, _, tpms_data, _ = self._data_provider()
                     
-                    # 2. 記録判定 (RPM 500以上)
-                    if dash_info and dash_info.rpm >= 500:
+                    # 2. 記録判定 (自動化ルールが ON にしている間だけ)
+                    if dash_info and self.csv_logging_enabled:
                         if not self.logger.is_active:
                             self.logger.start()
 
@@ -103,12 +138,10 @@ class TelemetryService:
         GUIスレッド(QTimer)から呼ばれる処理。
         ここには「リアルタイム性が重要でない」または「イベント駆動」の処理だけ残す。
         """
-        # 1. MQTT送信 (停止中)
-        # ▼▼▼ ここもコメントアウトしました ▼▼▼
-        self.mqtt_sender.send(dash_info, fuel_percent, tpms_data)
-
-        # PlotJugglerへの送信 (UDPなので軽量、GUI更新と同じタイミングで送信)
-        # self.pj_sender.send(dash_info, fuel_percent, tpms_data)
+        # 1. ストリーム送信 (MQTT / PlotJuggler)
+        # PlotJugglerは最新値を受け取るだけで、送信は独立したレートの自前スレッドが行う
+        for sender in self.stream_senders:
+            sender.send(dash_info, fuel_percent, tpms_data)
 
         # 2. Google Sheets送信 (ラップ更新時)
         if dash_info.lapCount < self.last_processed_lap:
@@ -131,8 +164,13 @@ class TelemetryService:
         session_km = gps_data.get("total_distance_km", 0.0)
         self.mileage_tracker.update(session_km)
 
-    def save_mileage(self):
-        self.mileage_tracker.save()
+    def health(self) -> dict:
+        """接続状態を返せるストリーム送信機の状態 (名前 -> dict)"""
+        return {
+            name: sender.health()
+            for name, sender in self.stream_senders_by_name.items()
+            if hasattr(sender, "health")
+        }
 
     def stop(self):
         # スレッド停止処理
@@ -143,8 +181,6 @@ class TelemetryService:
         if self.logger.is_active:
             self.logger.stop()
         self.sender.stop()
-        
-        # ▼▼▼ ここもコメントアウトしました ▼▼▼
-        self.mqtt_sender.stop()
-        
-        #self.pj_sender.stop()
\ No newline at end of file
+
+        for sender in self.stream_senders:
+            sender.stop()
\ No newline at end of file
@@ -1,45 +1,57 @@
 from src.fuel.fuel_calculator import FuelCalculator
+from src.fuel.fuel_estimator import FuelEstimator
 from src.race.lap_timer import LapTimer
 from src.race.course_manager import CourseManager
 from src.machine.machine import Machine
+from src.services.io_reactor import IoReactor
 from src.util import config
 from src.util.fuel_store import FuelStore
 
 
 class VehicleService:
-    def __init__(self):
+    def __init__(self, reactor: IoReactor, can_interface_ready: bool = False):
         self.fuel_store = FuelStore()
         self.tank_capacity_ml = config.INITIAL_FUEL_ML
         
-        # ★変更: load_stateが2つの値を返すようになったので受け取る
-        loaded_remaining, loaded_consumed = self.fuel_store.load_state()
-        
-        # データがない場合は初期値
-        current_start_ml = loaded_remaining if loaded_remaining is not None else self.tank_capacity_ml
-        
+        # 残量・合計消費量と、前回最後に受け取ったECUの Fuel Used
+        loaded_remaining, loaded_consumed, last_ecu_used = self.fuel_store.load_state()
+
+        # データがない場合は満タンから始め、そのスナップショットを残しておく
+        if loaded_remaining is None:
+            loaded_remaining = self.tank_capacity_ml
+            self.fuel_store.reset(loaded_remaining)
+
         self.fuel_calculator = FuelCalculator(
             tank_capacity_ml=self.tank_capacity_ml,
-            current_remaining_ml=current_start_ml,
-            initial_consumed_total=loaded_consumed # ★これcalcに渡す
+            current_remaining_ml=loaded_remaining,
+            initial_consumed_total=loaded_consumed,
+            last_ecu_fuel_used=last_ecu_used,
+            on_update=self.fuel_store.record,
         )
 
         self.course_manager = CourseManager()
         self.lap_timer = LapTimer(self.course_manager)
-        self.machine = Machine(self.fuel_calculator)
+        self.machine = Machine(
+            self.fuel_calculator, reactor, canInterfaceReady=can_interface_ready
+        )
+
+        # 周回ごとの燃費から、残り周回数と目標周回数までの余裕を見積もる
+        self.fuel_estimator = FuelEstimator(self.fuel_calculator, self.dash_info)
+        self.lap_timer.lap_listeners.append(self.fuel_estimator.on_lap)
+
+    def add_can_packet_callback(self, callback):
+        """CANの受信スレッドで、パケットを処理するたびに callback(dash_info) を呼ぶ"""
+        self.machine.canMaster.dashInfoListener.packet_callbacks.append(callback)
 
     def update(self, gps_data):
+        # 周回イベントで使う走行距離を先に渡しておく
+        self.fuel_estimator.update(gps_data)
         self.lap_timer.update(gps_data, self.machine.canMaster.dashMachineInfo)
 
-    def save_fuel_state(self):
-        # ★変更: 残量と、合計消費量の両方を保存する
-        current_ml = self.fuel_calculator.remaining_fuel_ml
-        total_consumed = self.fuel_calculator.session_consumed_total
-        self.fuel_store.save_state(current_ml, total_consumed)
-
     def reset_fuel(self):
         # 残量を満タンにし、消費量を0リセット
         self.fuel_calculator.remaining_fuel_ml = self.tank_capacity_ml
-        self.save_fuel_state()
+        self.fuel_store.reset(self.tank_capacity_ml)
 
     def set_target_laps(self, laps: int):
         print(f"VehicleService: Setting target laps to {laps}")
@@ -0,0 +1,497 @@
+import argparse
+import contextlib
+import csv
+import json
+import logging
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from src.models.models import (
+    BatteryVoltage,
+    DashMachineInfo,
+    FuelPress,
+    GearType,
+    GearVoltage,
+    OilTemp,
+    WaterTemp,
+)
+from src.telemetry.loopback import (
+    FakeSheetsClient,
+    LoopbackMqttBroker,
+    UdpSink,
+    install_fake_sheets,
+)
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+ALL_SENDERS = ("plotjuggler", "plotjuggler-verbose", "mqtt", "sheets")
+
+# 回帰とみなす指標と、その方向 (+1: 大きいほど良い / -1: 小さいほど良い)
+REGRESSION_METRICS = {
+    "msgs_per_sec": +1,
+    "p99_us": -1,
+    "cpu_us_per_msg": -1,
+}
+
+
+@dataclass
+class BenchResult:
+    """p50/p90/p99/max はエンコード1回の時間、cpu_us_per_msg は送信機のスレッドの合計"""
+
+    sender: str
+    messages: int
+    delivered: int
+    elapsed_sec: float
+    msgs_per_sec: float
+    bytes_per_sec: float
+    p50_us: float
+    p90_us: float
+    p99_us: float
+    max_us: float
+    cpu_us_per_msg: float
+
+
+Frame = tuple[DashMachineInfo, float, dict]
+
+
+# ===============================================
+# 車両データの再生
+# ===============================================
+
+
+def synthetic_frames(count: int, rate_hz: float = 20.0) -> list[Frame]:
+    """
+    MockCanSender と同じ変動パターンで車両データを生成する。
+    乱数を使わないので、毎回同じ入力でベンチマークできる。
+    """
+    frames = []
+    fuel_percent = 100.0
+    for i in range(count):
+        t_ms = int(i * 1000 / rate_hz)
+        info = DashMachineInfo()
+        info.setRpm(2500 + (t_ms % 12000))
+        info.throttlePosition = (t_ms % 1001) / 10.0
+        info.waterTemp = WaterTemp(int(50 + (t_ms % 400) / 10.0))
+        info.oilTemp = OilTemp(int(90 + (t_ms % 400) / 10.0))
+        info.oilPress.oilPress = round(30.0 + (t_ms % 70) / 0.1, 1)
+        info.gearVoltage = GearVoltage(0.5 + (t_ms % 4501) / 1000.0)
+        info.batteryVoltage = BatteryVoltage(12.0 + (t_ms % 200) / 100.0)
+        info.fuelPress = FuelPress(300.0 + (t_ms % 200) / 10.0)
+        info.manifoldPressure = 100.0 + (t_ms % 5000) / 50.0
+        info.lambda1 = 0.8 + (t_ms % 4000) / 10000.0
+        info.fuelUsed = i * 0.5
+        info.fuelConsumedTotal = i * 0.5
+        _fill_lap_fields(info, i, rate_hz)
+
+        fuel_percent = max(0.0, fuel_percent - 0.001)
+        frames.append((info, fuel_percent, _tpms_snapshot(i)))
+    return frames
+
+
+def csv_frames(path: str, count: int, rate_hz: float = 20.0) -> list[Frame]:
+    """
+    CsvLogger が出力したログ (logs/YYYY-MM-DD/HH-MM-SS.csv) を再生する。
+    ログが count 行に満たない場合は先頭から繰り返す。
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        raise ValueError(f"Replay log is empty: {path}")
+
+    frames = []
+    for i in range(count):
+        row = rows[i % len(rows)]
+        info = DashMachineInfo()
+        info.setRpm(int(float(row["RPM"])))
+        info.throttlePosition = float(row["Throttle"])
+        info.waterTemp = WaterTemp(int(float(row["WaterTemp"])))
+        info.oilPress.oilPress = float(row["OilPress"])
+        gear = min(max(int(float(row["Gear"])), 0), len(GearType) - 1)
+        info.gearVoltage = GearVoltage(GearVoltage.EACH_VOLTAGES[gear])
+        _fill_lap_fields(info, i, rate_hz)
+
+        tpms = {}
+        for wheel in ("FL", "FR", "RL", "RR"):
+            tpms[wheel] = {
+                "temp_c": float(row[f"TPMS_{wheel}"]),
+                "pressure_kpa": 200.0,
+            }
+        frames.append((info, 100.0, tpms))
+    return frames
+
+
+def _fill_lap_fields(info: DashMachineInfo, i: int, rate_hz: float):
+    # Sheets送信はラップ完了ごとなので、各フレームを1ラップとして扱う
+    info.lapCount = i + 2
+    info.currentLapTime = (i % 1200) / rate_hz
+    info.lastLapTime = 60.0 + (i % 50) * 0.1
+    info.lapTimeDiff = ((i % 21) - 10) * 0.05
+    info.sector_times = {1: 20.1, 2: 19.8, 0: 20.5}
+    info.sector_diffs = {1: -0.1, 2: 0.05, 0: 0.2}
+    info.driver = "Bench"
+
+
+def _tpms_snapshot(i: int) -> dict:
+    return {
+        wheel: {"temp_c": 25.0 + (i + n) % 15, "pressure_kpa": 200.0 + (i % 3) * 10}
+        for n, wheel in enumerate(("FL", "FR", "RL", "RR"))
+    }
+
+
+# ===============================================
+# 計測
+# ===============================================
+
+
+@contextlib.contextmanager
+def _override_config(**values):
+    saved = {key: getattr(config, key) for key in values}
+    for key, value in values.items():
+        setattr(config, key, value)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            setattr(config, key, value)
+
+
+def _percentile(sorted_values: list[int], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index] / 1000.0
+
+
+class _SenderCpu:
+    """
+    送信処理にかかったCPU時間。呼び出し側スレッドに加えて、送信機が使う
+    スレッド (IoReactor のループとスレッドプール) の分も合計する。
+    ループバックのシンク (受信側) のスレッドは含めない。
+    スレッドごとのCPU時計が使えない環境では、プロセス全体のCPU時間で代用する。
+    """
+
+    def __init__(self, threads=lambda: []):
+        self._threads = threads
+        self._per_thread = hasattr(time, "pthread_getcpuclockid")
+        self._start: dict[int, int] = {}
+
+    def _read(self) -> dict[int, int]:
+        if not self._per_thread:
+            return {0: time.process_time_ns()}
+        idents = {threading.get_ident()}
+        idents.update(t.ident for t in self._threads() if t.is_alive() and t.ident)
+        clocks = {}
+        for ident in idents:
+            try:
+                clock = time.pthread_getcpuclockid(ident)
+                clocks[ident] = time.clock_gettime_ns(clock)
+            except OSError:
+                pass  # 計測中に終了したスレッド
+        return clocks
+
+    def start(self) -> "_SenderCpu":
+        self._start = self._read()
+        return self
+
+    def elapsed_ns(self) -> int:
+        # 途中で起動したスレッド (スレッドプールは必要になってから作る) は 0 から数える
+        return sum(
+            max(0, now - self._start.get(ident, 0))
+            for ident, now in self._read().items()
+        )
+
+
+def _encode_latencies(encode, frames: list[Frame]) -> list[int]:
+    """送信機のエンコード処理だけを1フレームずつ計る [ns]"""
+    latencies_ns = []
+    for info, fuel_percent, tpms in frames:
+        t0 = time.perf_counter_ns()
+        encode(info, fuel_percent, tpms)
+        latencies_ns.append(time.perf_counter_ns() - t0)
+    return latencies_ns
+
+
+def _drive(sender, frames: list[Frame], rate_hz: float) -> float:
+    """
+    sender.send() をフレーム数だけ呼び、開始時刻 (perf_counter) を返す。
+    rate_hz が 0 のときは全力で送る (スループット計測)。
+    """
+    interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+    next_tick = time.monotonic()
+
+    wall_start = time.perf_counter()
+    for info, fuel_percent, tpms in frames:
+        sender.send(info, fuel_percent, tpms)
+
+        if interval:
+            next_tick += interval
+            sleep_time = next_tick - time.monotonic()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+    return wall_start
+
+
+def _result(name, frames, delivered, payload_bytes, latencies_ns, wall_start, cpu_ns):
+    elapsed = max(time.perf_counter() - wall_start, 1e-9)
+    latencies_ns.sort()
+    return BenchResult(
+        sender=name,
+        messages=len(frames),
+        delivered=delivered,
+        elapsed_sec=round(elapsed, 4),
+        msgs_per_sec=round(delivered / elapsed, 1),
+        bytes_per_sec=round(payload_bytes / elapsed, 1),
+        p50_us=round(_percentile(latencies_ns, 0.50), 2),
+        p90_us=round(_percentile(latencies_ns, 0.90), 2),
+        p99_us=round(_percentile(latencies_ns, 0.99), 2),
+        max_us=round(latencies_ns[-1] / 1000.0 if latencies_ns else 0.0, 2),
+        cpu_us_per_msg=round(cpu_ns / 1000.0 / max(len(frames), 1), 2),
+    )
+
+
+def bench_plotjuggler(
+    frames: list[Frame], rate_hz: float, timeout: float, payload_format="compact"
+):
+    from src.telemetry.plotjuggler_sender import PlotJugglerSender
+
+    sink = UdpSink().start()
+    # rate_hz=0: 送信スレッドを使わず、send() 1回ごとのエンコード+送信を測る
+    sender = PlotJugglerSender(rate_hz=0, payload_format=payload_format, mode="unicast")
+    sender.target_ips = [sink.host]
+    sender.target_port = sink.port
+    # スキーマは送らない (既定と同じ。データのメッセージだけを数える)
+    sender.schema_interval = 0.0
+    encode = (
+        sender.encode_compact if payload_format == "compact" else sender.encode_verbose
+    )
+    try:
+        latencies = _encode_latencies(
+            lambda info, fuel, tpms: encode(info, fuel), frames
+        )
+        sender.start()
+        # rate_hz=0 なので送信は呼び出し側スレッドだけで行われる
+        cpu = _SenderCpu().start()
+        wall_start = _drive(sender, frames, rate_hz)
+        sink.wait_for_messages(len(frames), timeout)
+        cpu_ns = cpu.elapsed_ns()
+        return _result(
+            "plotjuggler" if payload_format == "compact" else "plotjuggler-verbose",
+            frames,
+            sink.messages,
+            sink.payload_bytes,
+            latencies,
+            wall_start,
+            cpu_ns,
+        )
+    finally:
+        sender.stop()
+        sink.stop()
+
+
+def bench_mqtt(frames: list[Frame], rate_hz: float, timeout: float, reactor):
+    from src.telemetry.mqtt_sender import MqttTelemetrySender
+
+    broker = LoopbackMqttBroker().start()
+    try:
+        with _override_config(
+            MQTT_BROKER_URL=broker.host, MQTT_BROKER_PORT=broker.port
+        ):
+            sender = MqttTelemetrySender(reactor)
+            sender.start()
+
+            deadline = time.monotonic() + timeout
+            while not sender.is_connected and time.monotonic() < deadline:
+                time.sleep(0.01)
+            if not sender.is_connected:
+                raise RuntimeError("MQTT sender did not connect to loopback broker")
+
+            latencies = _encode_latencies(sender.encode, frames)
+            broker.reset_counters()
+            # publish はリアクタースレッドで行われる
+            cpu = _SenderCpu(reactor.threads).start()
+            wall_start = _drive(sender, frames, rate_hz)
+            broker.wait_for_messages(len(frames), timeout)
+            cpu_ns = cpu.elapsed_ns()
+            result = _result(
+                "mqtt",
+                frames,
+                broker.messages,
+                broker.payload_bytes,
+                latencies,
+                wall_start,
+                cpu_ns,
+            )
+            sender.stop()
+            return result
+    finally:
+        broker.stop()
+
+
+def bench_sheets(
+    frames: list[Frame], rate_hz: float, timeout: float, reactor, latency_ms=0.0
+):
+    from src.telemetry.google_sheets_sender import GoogleSheetsSender
+
+    client = FakeSheetsClient(latency_sec=latency_ms / 1000.0)
+    sender = GoogleSheetsSender(reactor, json_keyfile="", spreadsheet_name="bench")
+    install_fake_sheets(sender, client)
+    try:
+        latencies = _encode_latencies(
+            lambda info, fuel, tpms: sender.build_row(sender.snapshot(info)), frames
+        )
+        sender.start()
+        # 書き込みはリアクターのコルーチンとスレッドプールで行われる
+        cpu = _SenderCpu(reactor.threads).start()
+        wall_start = _drive(sender, frames, rate_hz)
+        # ヘッダー行の1件を加えた数だけ書き込まれるのを待つ
+        client.sheet.wait_for_inserts(len(frames) + 1, timeout)
+        cpu_ns = cpu.elapsed_ns()
+        return _result(
+            "sheets",
+            frames,
+            max(0, client.sheet.insert_count - 1),
+            client.sheet.row_bytes,
+            latencies,
+            wall_start,
+            cpu_ns,
+        )
+    finally:
+        sender.stop()
+
+
+def run_benchmarks(
+    senders, frames: list[Frame], rate_hz=0.0, timeout=10.0, sheets_latency_ms=0.0
+) -> list[BenchResult]:
+    from src.services.io_reactor import IoReactor
+
+    # アプリと同じく、MQTT・Sheetsは共有のイベントループ上で動かす
+    reactor = IoReactor().start()
+    results = []
+    for name in senders:
+        try:
+            if name == "plotjuggler":
+                result = bench_plotjuggler(frames, rate_hz, timeout)
+            elif name == "plotjuggler-verbose":
+                result = bench_plotjuggler(frames, rate_hz, timeout, "verbose")
+            elif name == "mqtt":
+                result = bench_mqtt(frames, rate_hz, timeout, reactor)
+            elif name == "sheets":
+                result = bench_sheets(
+                    frames, rate_hz, timeout, reactor, sheets_latency_ms
+                )
+            else:
+                raise ValueError(f"Unknown sender: {name}")
+        except ImportError as e:
+            # 依存パッケージが入っていない環境では、その送信機だけスキップする
+            print(f"[skip] {name}: {e}")
+            continue
+        results.append(result)
+    reactor.stop()
+    return results
+
+
+# ===============================================
+# レポートと回帰チェック
+# ===============================================
+
+
+def format_table(results: list[BenchResult]) -> str:
+    header = (
+        f"{'sender':<20}{'sent':>8}{'recv':>8}{'msg/s':>11}{'B/s':>12}"
+        f"{'p50us':>9}{'p90us':>9}{'p99us':>9}{'maxus':>10}{'cpu us/msg':>12}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.sender:<20}{r.messages:>8}{r.delivered:>8}{r.msgs_per_sec:>11.1f}"
+            f"{r.bytes_per_sec:>12.0f}{r.p50_us:>9.1f}{r.p90_us:>9.1f}"
+            f"{r.p99_us:>9.1f}{r.max_us:>10.1f}{r.cpu_us_per_msg:>12.2f}"
+        )
+    return "\n".join(lines)
+
+
+def find_regressions(
+    results: list[BenchResult], baseline: dict, tolerance: float
+) -> list[str]:
+    """
+    ベースライン (save_baseline で保存したJSON) と比較し、
+    tolerance (0.2 = 20%) を超えて悪化した指標を返す。
+    """
+    problems = []
+    for r in results:
+        base = baseline.get(r.sender)
+        if not base:
+            continue
+        if r.delivered < r.messages:
+            problems.append(f"{r.sender}: dropped {r.messages - r.delivered} messages")
+        for metric, direction in REGRESSION_METRICS.items():
+            old = float(base.get(metric, 0.0))
+            new = float(getattr(r, metric))
+            if old <= 0:
+                continue
+            if direction > 0 and new < old * (1.0 - tolerance):
+                problems.append(f"{r.sender}: {metric} {old} -> {new}")
+            elif direction < 0 and new > old * (1.0 + tolerance):
+                problems.append(f"{r.sender}: {metric} {old} -> {new}")
+    return problems
+
+
+def save_baseline(path: str, results: list[BenchResult]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({r.sender: asdict(r) for r in results}, f, indent=4)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="テレメトリ送信機のループバック・ベンチマーク"
+    )
+    parser.add_argument("--senders", default=",".join(ALL_SENDERS))
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument(
+        "--rate", type=float, default=0.0, help="送信レート [Hz] (0 = 全力)"
+    )
+    parser.add_argument("--replay", help="CsvLogger のCSVログを再生する")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--sheets-latency-ms", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    senders = [s.strip() for s in args.senders.split(",") if s.strip()]
+    if args.replay:
+        frames = csv_frames(args.replay, args.messages)
+    else:
+        frames = synthetic_frames(args.messages)
+
+    results = run_benchmarks(
+        senders, frames, args.rate, args.timeout, args.sheets_latency_ms
+    )
+
+    if args.json:
+        print(json.dumps([asdict(r) for r in results], indent=4))
+    else:
+        print(format_table(results))
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = find_regressions(results, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,47 @@
+import asyncio
 import logging
-import threading
-import time
-import queue
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
+from typing import Optional
 from src.models.models import DashMachineInfo
+from src.services.io_reactor import IoReactor
 from src.telemetry.sender_interface import TelemetrySender
+from src.util.lazy_import import lazy_import
+
+# 最初の接続時 (スレッドプール上) に読み込む
+gspread = lazy_import("gspread")
+service_account = lazy_import("oauth2client.service_account")
 
 logger = logging.getLogger(__name__)
 
 class GoogleSheetsSender(TelemetrySender):
+    """
+    ラップごとの記録をGoogle Sheetsへ書き込む。
+    書き込みは IoReactor 上のコルーチンが順番に行い、
+    API呼び出しだけスレッドプールで実行する。
+    """
+
+    RETRY_INTERVAL_SEC = 5
+    # 1行目のヘッダー (この後に区間ごとの S1, S1_Diff, ... が続く)
+    HEADERS = ["Date", "Driver", "Tire", "Lap", "Total", "Fuel_ml", "Fuel_Laps_Left"]
+    # 燃料の列は後から Total の後ろに追加した。古いヘッダーのシートはこの列を差し込む
+    FUEL_HEADERS = ["Fuel_ml", "Fuel_Laps_Left"]
+
     def __init__(
-        self, json_keyfile="service_account.json", spreadsheet_name="KIT_FORMULA_Log_2026"
+        self,
+        reactor: IoReactor,
+        json_keyfile="service_account.json",
+        spreadsheet_name="KIT_FORMULA_Log_2026",
     ):
+        self.reactor = reactor
         self.json_keyfile = json_keyfile
         self.spreadsheet_name = spreadsheet_name
         self.client = None
         self.sheet = None
-        
-        self.queue = queue.Queue()
-        self.running = True
-        
-        self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self.worker_thread.start()
+        self._header_checked = False
+
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.running = False
+        self._future = None
 
     def _connect(self):
         try:
@@ -32,11 +50,11 @@ class GoogleSheetsSender(TelemetrySender):
                 "https://www.googleapis.com/auth/drive",
                 "https://www.googleapis.com/auth/drive.file",
             ]
-            creds = ServiceAccountCredentials.from_json_keyfile_name(
-                self.json_keyfile, scope
-            )
+            credentials = service_account.ServiceAccountCredentials
+            creds = credentials.from_json_keyfile_name(self.json_keyfile, scope)
             self.client = gspread.authorize(creds)
             self.sheet = self.client.open(self.spreadsheet_name).sheet1
+            self._header_checked = False
             logger.info(f"Google Sheets '{self.spreadsheet_name}' Connected successfully.")
             return True
         except Exception as e:
@@ -46,101 +64,132 @@ class GoogleSheetsSender(TelemetrySender):
             return False
 
     def start(self) -> None:
-        pass
+        if self._future is None:
+            self.running = True
+            self._future = self.reactor.submit(self._worker())
 
     def stop(self) -> None:
         self.running = False
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
 
     def send(self, info: DashMachineInfo, fuel_percent: float, tpms_data: dict) -> None:
+        data_snapshot = self.snapshot(info)
+        if data_snapshot is None:
+            return
+
+        # asyncio.Queue はスレッドセーフではないので、ループのスレッドで積む
+        self.reactor.call_soon(self.queue.put_nowait, data_snapshot)
+
+    @staticmethod
+    def snapshot(info: DashMachineInfo) -> Optional[dict]:
+        """直前に終わった周の記録 (まだ1周も終わっていなければ None)"""
         finished_lap_num = info.lapCount - 1
         if finished_lap_num < 1:
-            return
+            return None
 
         now = datetime.now()
-        data_snapshot = {
+        return {
             "datetime": now.strftime("%Y-%m-%d %H:%M:%S"),
             "driver": info.driver,
             "tire": getattr(info, "tireSet", "Unknown"), # ★追加
             "lap": finished_lap_num,
             "total_time": info.lastLapTime,
+            # 燃料: その周で使った量と、残量で走れる周回数
+            "lap_fuel": info.lastLapFuel,
+            "laps_left": info.fuelLapsRemaining,
             "sector_times": info.sector_times.copy(),
             "sector_diffs": info.sector_diffs.copy(),
         }
 
-        self.queue.put(data_snapshot)
-
-    def _worker_loop(self):
+    async def _worker(self):
         logger.info("Sheet Worker Started.")
-        
+
         while self.running:
-            try:
+            data = await self.queue.get()
+
+            sent_success = False
+            while not sent_success and self.running:
                 try:
-                    data = self.queue.get(timeout=1.0)
-                except queue.Empty:
-                    continue
-
-                sent_success = False
-                while not sent_success and self.running:
-                    try:
-                        if self.client is None or self.sheet is None:
-                            logger.info("Connecting to Google Sheets...")
-                            if not self._connect():
-                                time.sleep(5)
-                                continue
-
-                        if self.sheet is None:
-                            logger.error("Sheet object is None. Cannot write.")
-                            time.sleep(5)
+                    if self.client is None or self.sheet is None:
+                        logger.info("Connecting to Google Sheets...")
+                        if not await self.reactor.run_blocking(self._connect):
+                            await asyncio.sleep(self.RETRY_INTERVAL_SEC)
                             continue
 
-                        total_time_val = round(data['total_time'], 3) if data["total_time"] else ""
-                        
-                        # ★データ列の構成変更
-                        row_data = [
-                            data["datetime"],
-                            data["driver"],
-                            data["tire"], # ★ここにTire列を追加
-                            data["lap"],
-                            total_time_val,
-                        ]
-
-                        all_keys = list(data["sector_times"].keys())
-                        int_keys = [k for k in all_keys if isinstance(k, int)]
-                        sorted_keys = sorted([k for k in int_keys if k != 0])
-                        if 0 in int_keys: sorted_keys.append(0)
-
-                        for idx in sorted_keys:
-                            row_data.append(round(data["sector_times"][idx], 3))
-                            if idx in data["sector_diffs"]:
-                                row_data.append(round(data["sector_diffs"][idx], 3))
-                            else:
-                                row_data.append("")
-
-                        # ヘッダーチェック（初回のみ）
-                        try:
-                            if not self.sheet.acell("A1").value:
-                                # ★ヘッダーにもTireを追加
-                                headers = ["Date", "Driver", "Tire", "Lap", "Total"]
-                                for idx in sorted_keys:
-                                    name = "Final" if idx == 0 else f"S{idx}"
-                                    headers.extend([name, f"{name}_Diff"])
-                                self.sheet.insert_row(headers, index=1)
-                        except:
-                            pass
-
-                        # ★ insert_row で2行目に挿入（上に追加）
-                        self.sheet.insert_row(row_data, index=2)
-                        
-                        logger.info(f"Logged to Sheet (Top): Lap {data['lap']} - SUCCESS")
-                        
-                        sent_success = True
-                        self.queue.task_done()
-
-                    except Exception as e:
-                        logger.warning(f"Sheet Write Error: {e}. Retrying in 5s...")
-                        self.client = None
-                        self.sheet = None
-                        time.sleep(5)
-
+                    await self.reactor.run_blocking(self._write_row, data)
+                    logger.info(f"Logged to Sheet (Top): Lap {data['lap']} - SUCCESS")
+
+                    sent_success = True
+                    self.queue.task_done()
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Sheet Write Error: {e}. Retrying in 5s...")
+                    self.client = None
+                    self.sheet = None
+                    await asyncio.sleep(self.RETRY_INTERVAL_SEC)
+
+    @staticmethod
+    def build_row(data: dict) -> tuple[list, list]:
+        """snapshot() の記録から (書き込む行, 区間の並び) を作る"""
+        total_time_val = round(data['total_time'], 3) if data["total_time"] else ""
+
+        # ★データ列の構成変更
+        row_data = [
+            data["datetime"],
+            data["driver"],
+            data["tire"], # ★ここにTire列を追加
+            data["lap"],
+            total_time_val,
+            round(data["lap_fuel"], 1),
+            "" if data["laps_left"] is None else round(data["laps_left"], 1),
+        ]
+
+        all_keys = list(data["sector_times"].keys())
+        int_keys = [k for k in all_keys if isinstance(k, int)]
+        sorted_keys = sorted([k for k in int_keys if k != 0])
+        if 0 in int_keys: sorted_keys.append(0)
+
+        for idx in sorted_keys:
+            row_data.append(round(data["sector_times"][idx], 3))
+            if idx in data["sector_diffs"]:
+                row_data.append(round(data["sector_diffs"][idx], 3))
+            else:
+                row_data.append("")
+        return row_data, sorted_keys
+
+    def _ensure_header(self, sorted_keys: list):
+        """
+        ヘッダーがなければ書き、燃料の列がない古いヘッダーなら列を差し込む
+        (既存の行の燃料の欄は空になり、区間の列の位置が今の行と揃う)
+        """
+        current = self.sheet.row_values(1)
+        if not current:
+            # ★ヘッダーにもTireを追加
+            headers = list(self.HEADERS)
+            for idx in sorted_keys:
+                name = "Final" if idx == 0 else f"S{idx}"
+                headers.extend([name, f"{name}_Diff"])
+            self.sheet.insert_row(headers, index=1)
+        elif self.FUEL_HEADERS[0] not in current and "Total" in current:
+            col = current.index("Total") + 2  # Total の次の列 (1始まり)
+            self.sheet.insert_cols([[name] for name in self.FUEL_HEADERS], col=col)
+            logger.info(f"Sheet header migrated: inserted {self.FUEL_HEADERS}")
+
+    def _write_row(self, data: dict):
+        """スレッドプールで実行される (gspreadの呼び出しはブロッキング)"""
+        row_data, sorted_keys = self.build_row(data)
+
+        # ヘッダーチェック（接続ごとに1回）
+        if not self._header_checked:
+            try:
+                self._ensure_header(sorted_keys)
+                self._header_checked = True
             except Exception as e:
-                logger.error(f"Worker Loop Error: {e}")
\ No newline at end of file
+                logger.warning(f"Sheet header check failed: {e}")
+
+        # ★ insert_row で2行目に挿入（上に追加）
+        self.sheet.insert_row(row_data, index=2)
@@ -0,0 +1,345 @@
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# --- MQTT 3.1.1 パケット種別 (固定ヘッダ上位4bit) ---
+_MQTT_CONNECT = 1
+_MQTT_PUBLISH = 3
+_MQTT_PUBACK = 4
+_MQTT_SUBSCRIBE = 8
+_MQTT_PINGREQ = 12
+_MQTT_DISCONNECT = 14
+
+
+class _MqttStubHandler(socketserver.BaseRequestHandler):
+    """
+    1クライアント分の接続を処理するハンドラ。
+    CONNECT / PUBLISH / SUBSCRIBE / PINGREQ / DISCONNECT だけを理解する。
+    """
+
+    def handle(self):
+        broker: "LoopbackMqttBroker" = self.server.broker  # type: ignore[attr-defined]
+        sock: socket.socket = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        broker._on_client_connected()
+
+        try:
+            while broker.is_running:
+                header = self._recv_exact(sock, 1)
+                if header is None:
+                    return
+                packet_type = header[0] >> 4
+                flags = header[0] & 0x0F
+
+                remaining = self._recv_remaining_length(sock)
+                if remaining is None:
+                    return
+                body = self._recv_exact(sock, remaining) if remaining else b""
+                if body is None:
+                    return
+
+                if packet_type == _MQTT_CONNECT:
+                    # CONNACK (Session Present=0, Return Code=0)
+                    sock.sendall(bytes([0x20, 0x02, 0x00, 0x00]))
+                elif packet_type == _MQTT_PUBLISH:
+                    self._handle_publish(sock, broker, flags, body, 1 + remaining)
+                elif packet_type == _MQTT_SUBSCRIBE:
+                    packet_id = body[0:2]
+                    # 要求された全トピックを QoS0 で許可する
+                    count = max(1, self._count_topic_filters(body[2:]))
+                    sock.sendall(bytes([0x90, 2 + count]) + packet_id + bytes(count))
+                elif packet_type == _MQTT_PINGREQ:
+                    sock.sendall(bytes([0xD0, 0x00]))
+                elif packet_type == _MQTT_DISCONNECT:
+                    return
+        except OSError:
+            pass
+        finally:
+            broker._on_client_disconnected()
+
+    @staticmethod
+    def _handle_publish(sock, broker, flags, body, packet_size):
+        qos = (flags >> 1) & 0x03
+        topic_len = int.from_bytes(body[0:2], "big")
+        topic = body[2 : 2 + topic_len].decode("utf-8", errors="replace")
+        offset = 2 + topic_len
+        if qos > 0:
+            packet_id = body[offset : offset + 2]
+            offset += 2
+            if qos == 1:
+                sock.sendall(bytes([_MQTT_PUBACK << 4, 0x02]) + packet_id)
+        broker._on_publish(topic, body[offset:], packet_size)
+
+    @staticmethod
+    def _count_topic_filters(payload: bytes) -> int:
+        count = 0
+        i = 0
+        while i + 2 <= len(payload):
+            length = int.from_bytes(payload[i : i + 2], "big")
+            i += 2 + length + 1  # トピック + 要求QoS
+            count += 1
+        return count
+
+    @staticmethod
+    def _recv_exact(sock, size):
+        chunks = bytearray()
+        while len(chunks) < size:
+            chunk = sock.recv(size - len(chunks))
+            if not chunk:
+                return None
+            chunks += chunk
+        return bytes(chunks)
+
+    def _recv_remaining_length(self, sock):
+        multiplier = 1
+        value = 0
+        for _ in range(4):
+            encoded = self._recv_exact(sock, 1)
+            if encoded is None:
+                return None
+            value += (encoded[0] & 0x7F) * multiplier
+            if encoded[0] & 0x80 == 0:
+                return value
+            multiplier *= 128
+        return None
+
+
+class _ThreadingTcpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LoopbackMqttBroker:
+    """
+    ベンチマーク・動作確認用のインプロセスMQTTブローカー (スタブ)。
+    127.0.0.1 の空きポートで待ち受け、受信した PUBLISH を数えるだけで配送はしない。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, keep_payloads=False):
+        self._server = _ThreadingTcpServer((host, port), _MqttStubHandler)
+        self._server.broker = self  # type: ignore[attr-defined]
+        self.host, self.port = self._server.server_address[:2]
+        self.keep_payloads = keep_payloads
+
+        self.is_running = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+
+        self.connections = 0
+        self.active_clients = 0
+        self.messages = 0
+        self.payload_bytes = 0
+        self.wire_bytes = 0
+        self.payloads: list[tuple[str, bytes]] = []
+
+    def start(self) -> "LoopbackMqttBroker":
+        self.is_running = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.1},
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info(f"Loopback MQTT broker listening on {self.host}:{self.port}")
+        return self
+
+    def stop(self) -> None:
+        self.is_running = False
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.messages = 0
+            self.payload_bytes = 0
+            self.wire_bytes = 0
+            self.payloads = []
+
+    def wait_for_messages(self, count: int, timeout: float = 5.0) -> bool:
+        """PUBLISH が count 件届くまで待つ。タイムアウト時は False"""
+        deadline = time.monotonic() + timeout
+        with self._published:
+            while self.messages < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._published.wait(remaining)
+        return True
+
+    def _on_client_connected(self):
+        with self._lock:
+            self.connections += 1
+            self.active_clients += 1
+
+    def _on_client_disconnected(self):
+        with self._lock:
+            self.active_clients -= 1
+
+    def _on_publish(self, topic: str, payload: bytes, packet_size: int):
+        with self._published:
+            self.messages += 1
+            self.payload_bytes += len(payload)
+            self.wire_bytes += packet_size
+            if self.keep_payloads:
+                self.payloads.append((topic, payload))
+            self._published.notify_all()
+
+
+class UdpSink:
+    """
+    PlotJuggler の代わりにUDPデータグラムを受け取って数えるシンク。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, keep_payloads=False):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.2)
+        self.host, self.port = self.sock.getsockname()[:2]
+        self.keep_payloads = keep_payloads
+
+        self.is_running = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self._received = threading.Condition(self._lock)
+
+        self.messages = 0
+        self.payload_bytes = 0
+        self.payloads: list[bytes] = []
+
+    def start(self) -> "UdpSink":
+        self.is_running = True
+        self._thread = threading.Thread(target=self._recv_loop, daemon=True)
+        self._thread.start()
+        logger.info(f"UDP sink listening on {self.host}:{self.port}")
+        return self
+
+    def stop(self) -> None:
+        self.is_running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        self.sock.close()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.messages = 0
+            self.payload_bytes = 0
+            self.payloads = []
+
+    def wait_for_messages(self, count: int, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._received:
+            while self.messages < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._received.wait(remaining)
+        return True
+
+    def _recv_loop(self):
+        while self.is_running:
+            try:
+                data = self.sock.recv(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with self._received:
+                self.messages += 1
+                self.payload_bytes += len(data)
+                if self.keep_payloads:
+                    self.payloads.append(data)
+                self._received.notify_all()
+
+
+class _FakeCell:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeWorksheet:
+    """
+    gspread.Worksheet の代わりに行をメモリ上に保持するフェイク。
+    GoogleSheetsSender が使う acell / row_values / insert_row / insert_cols
+    だけを実装する。
+    """
+
+    def __init__(self, latency_sec: float = 0.0):
+        self.latency_sec = latency_sec
+        self.rows: list[list] = []
+        self.row_bytes = 0
+        self._lock = threading.Lock()
+        self._inserted = threading.Condition(self._lock)
+        self.insert_count = 0
+
+    def acell(self, label: str):
+        with self._lock:
+            if label == "A1" and self.rows:
+                return _FakeCell(self.rows[0][0])
+        return _FakeCell(None)
+
+    def row_values(self, row: int) -> list:
+        with self._lock:
+            if 0 < row <= len(self.rows):
+                return list(self.rows[row - 1])
+        return []
+
+    def insert_cols(self, values, col=1, **kwargs):
+        """values は列のリスト (各列は1行目からの値)。足りない行は空欄"""
+        with self._lock:
+            for index, row in enumerate(self.rows):
+                cells = [
+                    column[index] if index < len(column) else "" for column in values
+                ]
+                row[col - 1 : col - 1] = cells
+
+    def insert_row(self, values, index=1, **kwargs):
+        if self.latency_sec > 0:
+            # APIのラウンドトリップを模擬する
+            time.sleep(self.latency_sec)
+        encoded = json.dumps(values, default=str)
+        with self._inserted:
+            self.rows.insert(max(0, index - 1), list(values))
+            self.row_bytes += len(encoded)
+            self.insert_count += 1
+            self._inserted.notify_all()
+
+    def wait_for_inserts(self, count: int, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._inserted:
+            while self.insert_count < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._inserted.wait(remaining)
+        return True
+
+
+class _FakeSpreadsheet:
+    def __init__(self, sheet: FakeWorksheet):
+        self.sheet1 = sheet
+
+
+class FakeSheetsClient:
+    """gspread.Client の代わり (open().sheet1 のみ)"""
+
+    def __init__(self, latency_sec: float = 0.0):
+        self.sheet = FakeWorksheet(latency_sec=latency_sec)
+
+    def open(self, name: str) -> _FakeSpreadsheet:
+        return _FakeSpreadsheet(self.sheet)
+
+
+def install_fake_sheets(sender, client: FakeSheetsClient) -> None:
+    """
+    GoogleSheetsSender に認証済みのフェイククライアントを差し込む。
+    client/sheet が設定済みなので、ワーカーは本物の _connect() を呼ばない。
+    """
+    sender.client = client
+    sender.sheet = client.sheet
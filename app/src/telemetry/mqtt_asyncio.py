@@ -0,0 +1,172 @@
+import asyncio
+import enum
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from src.services.io_reactor import IoReactor
+
+if TYPE_CHECKING:
+    import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+
+class MqttState(enum.Enum):
+    """MQTT 接続の状態 (値はダッシュボードに出す表示名)"""
+
+    STOPPED = "STOP"
+    CONNECTING = "CONNECTING"  # TCP接続中 (スレッドプール)
+    WAIT_CONNACK = "HANDSHAKE"  # TCPはつながり、CONNACK待ち
+    CONNECTED = "ONLINE"
+    BACKOFF = "RETRY WAIT"  # 失敗後、再接続まで待機中
+
+
+class AsyncioMqttHelper:
+    """
+    paho の loop_start() スレッドの代わりに、IoReactor のイベントループで
+    MQTTソケットを監視する (paho のソケットコールバックを使う)。
+
+    - 受信: add_reader で loop_read()
+    - 送信待ち: paho が要求したときだけ add_writer で loop_write()
+    - キープアライブ: 1秒ごとに loop_misc()
+    - 切断時: min_delay〜max_delay の指数バックオフ (ジッター付き) で再接続
+
+    接続状態は MqttState で管理し、変化するたびに on_state_changed を
+    リアクタースレッドから呼ぶ。on_connect / on_disconnect はこのクラスが使うので、
+    送信側は on_state_changed で状態を受け取ること。
+    """
+
+    MISC_INTERVAL_SEC = 1.0
+
+    def __init__(
+        self,
+        reactor: IoReactor,
+        client: "mqtt.Client",
+        min_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        self.reactor = reactor
+        self.client = client
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._fd = None
+
+        self.state = MqttState.STOPPED
+        self.on_state_changed: Optional[Callable[[MqttState], None]] = None
+        self.connects = 0  # CONNACK 成功の回数 (2回目以降が再接続)
+        self.connected_since: Optional[float] = None  # monotonic
+        self.last_error = ""
+
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    @property
+    def reconnects(self) -> int:
+        return max(0, self.connects - 1)
+
+    def _set_state(self, state: MqttState):
+        if state is self.state:
+            return
+        logger.debug(f"MQTT state: {self.state.name} -> {state.name}")
+        self.state = state
+        if state is MqttState.CONNECTED:
+            self.connects += 1
+            self.connected_since = time.monotonic()
+        else:
+            self.connected_since = None
+        if self.on_state_changed is not None:
+            try:
+                self.on_state_changed(state)
+            except Exception as e:
+                logger.error(f"MQTT state callback failed: {e}")
+
+    # --- paho コールバック (いずれもリアクタースレッドで呼ばれる) ---
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            logger.info("MQTT Broker Connected successfully.")
+            self.last_error = ""
+            self._set_state(MqttState.CONNECTED)
+        else:
+            # ブローカーが接続を拒否した。ソケットが閉じられたら run() がバックオフする
+            logger.error(f"MQTT Connection Failed. Return code: {rc}")
+            self.last_error = f"CONNACK rc={rc}"
+
+    def _on_disconnect(self, client, userdata, rc):
+        if rc != 0:
+            logger.warning("MQTT Disconnected unexpectedly. Attempting to reconnect...")
+            self.last_error = f"disconnect rc={rc}"
+        if self.state is MqttState.CONNECTED:
+            # 走行中の切断はすぐに1回つなぎ直す。失敗したら run() がバックオフする
+            self._set_state(MqttState.BACKOFF)
+
+    # ソケットは閉じられた後に登録解除されることがあるので、fd番号で管理する
+    def _on_socket_open(self, client, userdata, sock):
+        self._fd = sock.fileno()
+        self.reactor.call_soon(self.reactor.loop.add_reader, self._fd, client.loop_read)
+
+    def _on_socket_close(self, client, userdata, sock):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            self.reactor.call_soon(self._remove_fd, fd)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        fd = self._fd
+        if fd is not None:
+            self.reactor.call_soon(self.reactor.loop.add_writer, fd, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        fd = self._fd
+        if fd is not None:
+            self.reactor.call_soon(self.reactor.loop.remove_writer, fd)
+
+    def _remove_fd(self, fd):
+        self.reactor.loop.remove_reader(fd)
+        self.reactor.loop.remove_writer(fd)
+
+    async def _backoff(self, delay: float) -> float:
+        """ジッター付きで待ち、次の待ち時間の基準値を返す"""
+        self._set_state(MqttState.BACKOFF)
+        # 全台が同時に再接続してブローカーに集中しないよう、待ち時間をばらつかせる
+        wait = delay * random.uniform(0.5, 1.0)
+        logger.warning(f"MQTT reconnect in {wait:.1f}s ({self.last_error})")
+        await asyncio.sleep(wait)
+        return min(delay * 2, self.max_delay)
+
+    async def run(self, host: str, port: int, keepalive: int):
+        """接続を維持するコルーチン。キャンセルされるまで戻らない"""
+        delay = self.min_delay
+        try:
+            while True:
+                if self._fd is None:
+                    if self.state is MqttState.WAIT_CONNACK:
+                        # CONNACK前に切られた (拒否など) 場合も間隔を空ける
+                        delay = await self._backoff(delay)
+                    self._set_state(MqttState.CONNECTING)
+                    try:
+                        # DNS解決とTCP接続はブロッキングなのでスレッドプールで行う
+                        await self.reactor.run_blocking(
+                            self.client.connect, host, port, keepalive=keepalive
+                        )
+                    except Exception as e:
+                        self.last_error = str(e) or type(e).__name__
+                        delay = await self._backoff(delay)
+                        continue
+                    if self.state is MqttState.CONNECTING:
+                        self._set_state(MqttState.WAIT_CONNACK)
+
+                await asyncio.sleep(self.MISC_INTERVAL_SEC)
+                if self._fd is not None:
+                    self.client.loop_misc()
+                if self.state is MqttState.CONNECTED:
+                    delay = self.min_delay
+        finally:
+            if self._fd is not None:
+                self._remove_fd(self._fd)
+            self._set_state(MqttState.STOPPED)
@@ -1,12 +1,18 @@
+import asyncio
 import json
 import logging
 import time
-
-import paho.mqtt.client as mqtt
+from collections import deque
+from typing import Optional
 
 from src.models.models import DashMachineInfo, GearType
+from src.services.io_reactor import IoReactor
+from src.telemetry.mqtt_asyncio import AsyncioMqttHelper, MqttState
 from src.telemetry.sender_interface import TelemetrySender
 from src.util import config
+from src.util.lazy_import import lazy_import
+
+mqtt = lazy_import("paho.mqtt.client")
 
 logger = logging.getLogger(__name__)
 
@@ -17,37 +23,55 @@ SEND_INTERVAL_SEC = 0.1
 class MqttTelemetrySender(TelemetrySender):
     """
     MQTT (HiveMQ Cloud) を利用して車両データをリアルタイム送信するクラス
+    ソケットの監視と再接続は共有の IoReactor 上で行う (loop_start スレッドは使わない)
+
+    publish はリアクタースレッドで行う。未接続の間のデータは最大
+    MQTT_OFFLINE_QUEUE_SIZE 件まで溜め (古いものから捨てる)、接続したら送る。
+    接続状態・RTT・再接続回数・送信遅延は health() で取り出せる。
     """
 
-    def __init__(self):
+    LATENCY_WINDOW = 100  # 送信遅延の統計に使う直近の件数
+
+    def __init__(self, reactor: IoReactor):
+        self.reactor = reactor
         unique_id = f"pi-telemetry-{config.machineId}-{int(time.time() * 1000)}"
 
         self.client = mqtt.Client(
             client_id=unique_id,
             clean_session=True,
         )
-        self.is_connected = False
+        self._future = None
+        self._probe_future = None
         self._setup_client()
+        self._helper = AsyncioMqttHelper(
+            reactor,
+            self.client,
+            min_delay=config.MQTT_RECONNECT_MIN_SEC,
+            max_delay=config.MQTT_RECONNECT_MAX_SEC,
+        )
+        self._helper.on_state_changed = self._on_state_changed
 
-    def _on_connect(self, client, userdata, flags, rc):
-        if rc == 0:
-            logger.info("MQTT Broker Connected successfully.")
-            self.is_connected = True
-        else:
-            logger.error(f"MQTT Connection Failed. Return code: {rc}")
-            self.is_connected = False
+        # 以下はリアクタースレッドだけが書き換える
+        self._queue: deque[tuple[float, str]] = deque(
+            maxlen=config.MQTT_OFFLINE_QUEUE_SIZE
+        )
+        # mid -> enqueue時刻 (monotonic)。溜めてから送ったものは遅延を測らないので None
+        self._inflight: dict[int, Optional[float]] = {}
+        self._probe_mid: Optional[int] = None
+        self._probe_sent_at = 0.0
+        self._latencies: deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+        self.rtt_ms: Optional[float] = None
+        self.sent = 0
+        self.dropped = 0
 
-    def _on_disconnect(self, client, userdata, rc):
-        self.is_connected = False
-        if rc != 0:
-            logger.warning("MQTT Disconnected unexpectedly. Attempting to reconnect...")
+    @property
+    def is_connected(self) -> bool:
+        return self._helper.state is MqttState.CONNECTED
 
     def _setup_client(self):
         # self.client.tls_set()
         # self.client.username_pw_set(config.MQTT_USERNAME, config.MQTT_PASSWORD)
-        self.client.on_connect = self._on_connect
-        self.client.on_disconnect = self._on_disconnect
-        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+        self.client.on_publish = self._on_publish
         self.client.will_set(
             f"{config.MQTT_TOPIC}/status",
             payload=f"Machine {config.machineId} Disconnected",
@@ -55,38 +79,137 @@ class MqttTelemetrySender(TelemetrySender):
             retain=False,
         )
 
-    def start(self) -> None:
+    def _on_state_changed(self, state: MqttState):
+        if state is MqttState.CONNECTED:
+            self._flush_queue()
+        else:
+            # 切断で PUBACK / 送信完了は来なくなるので、計測中のものは捨てる
+            self._inflight.clear()
+            self._probe_mid = None
+
+    def _on_publish(self, client, userdata, mid):
+        now = time.monotonic()
+        if mid == self._probe_mid:
+            # QoS1 の PUBACK までの往復時間
+            self.rtt_ms = (now - self._probe_sent_at) * 1000.0
+            self._probe_mid = None
+            return
+        if mid not in self._inflight:
+            return
+        enqueued = self._inflight.pop(mid)
+        self.sent += 1
+        if enqueued is not None:
+            self._latencies.append((now - enqueued) * 1000.0)
+
+    def _enqueue(self, enqueued: float, payload: str):
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append((enqueued, payload))
+
+    def _publish(self, enqueued: float, payload: str, measure: bool = True):
+        """(リアクタースレッド) 接続中なら送信し、そうでなければ溜めておく"""
+        if not self.is_connected:
+            self._enqueue(enqueued, payload)
+            return
         try:
-            self.client.connect(
-                config.MQTT_BROKER_URL,
-                config.MQTT_BROKER_PORT,
-                keepalive=config.MQTT_KEEP_ALIVE_SEC,
-            )
-            self.client.loop_start()
-            logger.info("MQTT loop started.")
+            # 機体IDを付与せず、configの設定("sensor/motec")をそのまま使う
+            info = self.client.publish(config.MQTT_TOPIC, payload, qos=0)
         except Exception as e:
-            logger.error(f"Failed to start MQTT connection: {e}")
+            logger.error(f"MQTT Publish Failed: {e}")
+            return
+        if info.rc == mqtt.MQTT_ERR_SUCCESS:
+            self._inflight[info.mid] = enqueued if measure else None
+        else:
+            self._enqueue(enqueued, payload)
+
+    def _flush_queue(self):
+        if self._queue:
+            logger.info(f"MQTT: sending {len(self._queue)} queued messages.")
+        while self._queue and self.is_connected:
+            enqueued, payload = self._queue.popleft()
+            self._publish(enqueued, payload, measure=False)
+
+    async def _probe_loop(self, interval: float):
+        """接続中、QoS1 の小さなメッセージを送って PUBACK までの RTT を測る"""
+        topic = f"{config.MQTT_TOPIC}/status/ping"
+        while True:
+            await asyncio.sleep(interval)
+            if not self.is_connected or self._probe_mid is not None:
+                continue
+            try:
+                self._probe_sent_at = time.monotonic()
+                info = self.client.publish(topic, str(int(time.time() * 1000)), qos=1)
+                if info.rc == mqtt.MQTT_ERR_SUCCESS:
+                    self._probe_mid = info.mid
+            except Exception as e:
+                logger.debug(f"MQTT RTT probe failed: {e}")
+
+    def health(self) -> dict:
+        """ダッシュボード表示用の接続状態 (GUIスレッドから読む)"""
+        helper = self._helper
+        latencies = sorted(self._latencies)
+        uptime = (
+            time.monotonic() - helper.connected_since
+            if helper.connected_since is not None
+            else 0.0
+        )
+        return {
+            "state": helper.state.value,
+            "connected": self.is_connected,
+            "uptime_sec": uptime,
+            "rtt_ms": self.rtt_ms,
+            "reconnects": helper.reconnects,
+            "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+            "latency_max_ms": latencies[-1] if latencies else None,
+            "queued": len(self._queue),
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "last_error": helper.last_error,
+        }
+
+    def start(self) -> None:
+        # 接続はバックグラウンドで行うので、ブローカーに届かなくても起動は止まらない
+        if self._future is None:
+            self._future = self.reactor.submit(
+                self._helper.run(
+                    config.MQTT_BROKER_URL,
+                    config.MQTT_BROKER_PORT,
+                    keepalive=config.MQTT_KEEP_ALIVE_SEC,
+                )
+            )
+            if config.MQTT_RTT_PROBE_SEC > 0:
+                self._probe_future = self.reactor.submit(
+                    self._probe_loop(config.MQTT_RTT_PROBE_SEC)
+                )
+            logger.info("MQTT connection task started.")
 
     def stop(self) -> None:
         if self.is_connected:
-            self.client.loop_stop()
             self.client.disconnect()
             logger.info("MQTT connection stopped.")
+        for future in (self._probe_future, self._future):
+            if future is not None:
+                future.cancel()
+        self._future = None
+        self._probe_future = None
 
     def send(self, info: DashMachineInfo, fuel_percent: float, tpms_data: dict) -> None:
-        
-        if not self.is_connected:
-            return
-
-    def send(self, info: DashMachineInfo, fuel_percent: float, tpms_data: dict) -> None:
-        if not self.is_connected:
-            return
-            
         # ★追加: デバッグモードならコンソールに出力するだけで送信をスキップ
         # if config.debug:
         #     logger.debug("Debug Mode: Skipped MQTT Send.")
         #     return
 
+        payload = self.encode(info, fuel_percent, tpms_data)
+        if payload is None:
+            return
+        self.reactor.call_soon(self._publish, time.monotonic(), payload)
+
+    @staticmethod
+    def encode(
+        info: DashMachineInfo, fuel_percent: float, tpms_data: dict
+    ) -> Optional[str]:
+        """送信するJSON文字列を作る (エンコードできなければ None)"""
+
         def safe_val(val):
             try:
                 return float(val)
@@ -129,20 +252,37 @@ class MqttTelemetrySender(TelemetrySender):
 
         # --- 燃料とTPMSデータ ---
         payload_data["fp"] = round(fuel_percent, 2)
+
+        # 燃料の見積もり: 1周あたり [ml]・残り周回数・残り距離 [km]・
+        # 目標周回数を走り切った後の余裕 [周]
+        def optional_round(name, digits):
+            val = getattr(info, name, None)
+            return None if val is None else round(safe_val(val), digits)
+
+        payload_data["fpl"] = optional_round("fuelPerLap", 1)
+        payload_data["flr"] = optional_round("fuelLapsRemaining", 2)
+        payload_data["fkr"] = optional_round("fuelKmRemaining", 2)
+        payload_data["fml"] = optional_round("fuelMarginLaps", 2)
         
         # もし積算使用量も送信したい場合は以下を追加
         # payload_data["fuel_used_L"] = round(safe_val(getattr(info, "fuelUsed", 0)) / 1000.0, 3)
 
         for wheel, data in tpms_data.items():
             wheel_key = wheel.lower()  # fr, fl, rr, rl
-            payload_data[f"t_{wheel_key}_p"] = data.get("pressure_psi")
-            payload_data[f"t_{wheel_key}_t"] = data.get("temperature_c")
+            payload_data[f"t_{wheel_key}_p"] = data.get("pressure_kpa")
+            payload_data[f"t_{wheel_key}_t"] = data.get("temp_c")
+            # 傾向監視: 警告レベル (0/1/2) と冷間圧の変化 [kPa/分]
+            payload_data[f"t_{wheel_key}_a"] = data.get("alert", 0)
+            slope = data.get("pressure_slope")
+            payload_data[f"t_{wheel_key}_s"] = (
+                None if slope is None else round(slope, 2)
+            )
 
-        try:
-            payload = json.dumps(payload_data, separators=(",", ":"))
-            # 以下の行を変更: 機体IDを付与せず、configの設定("sensor/motec")をそのまま使う
-            full_topic = config.MQTT_TOPIC 
-            self.client.publish(full_topic, payload, qos=0)
+        # 溜めてから送ることがあるので、取得時刻を付けておく (epoch ms)
+        payload_data["ts"] = int(time.time() * 1000)
 
-        except Exception as e:
-            logger.error(f"MQTT Publish Failed: {e}")
\ No newline at end of file
+        try:
+            return json.dumps(payload_data, separators=(",", ":"))
+        except (TypeError, ValueError) as e:
+            logger.error(f"MQTT payload encode failed: {e}")
+            return None
@@ -1,5 +1,7 @@
 import json
+import math
 import socket
+import threading
 import time
 import logging
 from src.models.models import DashMachineInfo
@@ -8,23 +10,109 @@ from src.util import config
 
 logger = logging.getLogger(__name__)
 
+# compact形式のチャンネル定義: (短縮キー, PlotJugglerでの表示名, 書式)
+# 並び順は encode_compact() の values と一致させること
+COMPACT_CHANNELS = [
+    ("rpm", "RPM", "%d"),
+    ("tp", "Throttle (%)", "%.1f"),
+    ("wt", "Water Temp (C)", "%d"),
+    ("ot", "Oil Temp (C)", "%d"),
+    ("op", "Oil Press (bar)", "%.2f"),
+    ("gv", "Gear Volts (V)", "%.3f"),
+    ("v", "Battery (V)", "%.2f"),
+    ("map", "Manifold Pressure (kPa)", "%.1f"),
+    ("la1", "Lambda 1", "%.3f"),
+    ("fp", "Fuel Level (%)", "%.2f"),
+    ("fu", "Fuel Used (mL)", "%.1f"),
+    ("fct", "Fuel Consumed Total (mL)", "%.1f"),
+]
+
+# キー配置は固定なので、JSON文字列のテンプレートを一度だけ組み立てておく
+_COMPACT_TEMPLATE = (
+    "{" + ",".join(f'"{key}":{fmt}' for key, _, fmt in COMPACT_CHANNELS) + "}"
+)
+_SCHEMA_PAYLOAD = json.dumps(
+    {"schema": {key: name for key, name, _ in COMPACT_CHANNELS}},
+    separators=(",", ":"),
+).encode("utf-8")
+
+
 class PlotJugglerSender(TelemetrySender):
     """
     PlotJuggler等の外部ツールへUDPでJSONデータを送信するクラス
+
+    - 既定は verbose 形式 (PlotJuggler でそのまま表示名のチャンネルになる)
+    - compact形式 (PLOTJUGGLER_FORMAT=compact で有効): 数値だけの平らなJSONを
+      短縮キーで送る。PlotJuggler では短縮キーがそのままチャンネル名になる。
+      キーと表示名の対応 (スキーマ) は PLOTJUGGLER_SCHEMA_INTERVAL_SEC > 0 のときだけ
+      送る (PlotJuggler は解釈しないので、短縮キーを表示名に戻せる自作の受信側向け)
+    - NaN / inf はJSONにできないので、そのチャンネルだけ送らない
+    - multicast / broadcast: ピットのPCが何台でも sendto は1回
+    - rate_hz > 0: 専用スレッドがGUIの更新周期とは独立したレートで最新値を送る
     """
-    def __init__(self):
+
+    def __init__(self, rate_hz=None, payload_format=None, mode=None):
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        
+
         # 設定からターゲットIPリストを取得
         self.target_ips = config.PLOTJUGGLER_TARGET_IPS
         self.target_port = config.PLOTJUGGLER_PORT
-        
-        logger.info(f"PlotJuggler Sender initialized. Targets: {self.target_ips}:{self.target_port}")
+
+        self.mode = mode or config.PLOTJUGGLER_MODE
+        self.payload_format = payload_format or config.PLOTJUGGLER_FORMAT
+        self.rate_hz = config.PLOTJUGGLER_RATE_HZ if rate_hz is None else rate_hz
+        self.schema_interval = config.PLOTJUGGLER_SCHEMA_INTERVAL_SEC
+
+        self._configure_socket()
+
+        self._latest = None
+        self._last_schema_time = 0.0
+        self._thread = None
+        self._running = False
+
+        logger.info(
+            f"PlotJuggler Sender initialized. Mode: {self.mode}, "
+            f"Format: {self.payload_format}, Rate: {self.rate_hz}Hz, "
+            f"Targets: {self._destinations()}"
+        )
+
+    def _configure_socket(self):
+        if self.mode == "multicast":
+            self.sock.setsockopt(
+                socket.IPPROTO_IP,
+                socket.IP_MULTICAST_TTL,
+                config.PLOTJUGGLER_MULTICAST_TTL,
+            )
+            # 同じマシン上のPlotJugglerでも受信できるようにする
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        elif self.mode == "broadcast":
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+    def _destinations(self) -> list[tuple[str, int]]:
+        if self.mode == "multicast":
+            return [(config.PLOTJUGGLER_MULTICAST_GROUP, self.target_port)]
+        if self.mode == "broadcast":
+            return [(config.PLOTJUGGLER_BROADCAST_ADDRESS, self.target_port)]
+        return [(ip, self.target_port) for ip in self.target_ips]
+
+    @property
+    def sends_schema(self) -> bool:
+        return self.payload_format == "compact" and self.schema_interval > 0
 
     def start(self) -> None:
-        pass
+        if self.sends_schema:
+            self._send_schema()
+
+        if self.rate_hz > 0 and not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._send_loop, daemon=True)
+            self._thread.start()
 
     def stop(self) -> None:
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
         try:
             self.sock.close()
         except Exception:
@@ -32,48 +120,122 @@ class PlotJugglerSender(TelemetrySender):
 
     def send(self, info: DashMachineInfo, fuel_percent: float, tpms_data: dict) -> None:
         """
-        DashMachineInfoのデータをJSONに変換してUDP送信する
+        最新の車両データを受け取る。
+        送信スレッドが動いている場合は参照を保持するだけで、送信はスレッド側が行う。
+        """
+        if self._running:
+            self._latest = (info, fuel_percent)
+            return
+        self._send_now(info, fuel_percent)
+
+    def _send_loop(self):
+        """
+        ドリフト補正付きの送信ループ。
+        DashMachineInfo はCANスレッドが随時更新するので、
+        GUIより高いレートでも最新値を送れる。
         """
+        interval = 1.0 / self.rate_hz
+        next_tick = time.monotonic() + interval
+
+        while self._running:
+            latest = self._latest
+            if latest is not None:
+                self._send_now(*latest)
+
+            now = time.monotonic()
+            sleep_time = next_tick - now
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+                next_tick += interval
+            else:
+                # 処理落ちした場合は溜まった分を取り戻そうとしない
+                next_tick = now + interval
+
+    def _send_now(self, info: DashMachineInfo, fuel_percent: float):
         try:
-            # DashMachineInfo から PlotJuggler 用の辞書を作成
-            data = {
-                # "timestamp": time.time(),  # 無効化中
-                
-                # --- 基本情報 ---
-                "RPM": int(info.rpm),
-                "Throttle (%)": info.throttlePosition,
-                "Water Temp (C)": int(info.waterTemp),
-                "Oil Temp (C)": int(info.oilTemp),
-                "Oil Press (bar)": info.oilPress.oilPress, 
-                # "Fuel Press (kPa)": float(info.fuelPress), # 無効化中
-                "Gear Volts (V)": float(info.gearVoltage),
-                "Battery (V)": float(info.batteryVoltage),
-                
-                # ★追加: 新しい計測項目
-                "Manifold Pressure (kPa)": getattr(info, "manifoldPressure", 0.0),
-                "Lambda 1": getattr(info, "lambda1", 0.0),
-                
-                # --- 燃料情報 ---
-                "Fuel Level (%)": fuel_percent,
-                "Fuel Used (mL)": getattr(info, "fuelUsed", 0.0),
-                
-                # 積算消費量
-                "Fuel Consumed Total (mL)": getattr(info, "fuelConsumedTotal", 0.0),
-
-                # --- ラップタイム情報 ---
-                # "Lap Count": info.lapCount,       # 無効化中
-                # "Lap Time": info.currentLapTime   # 無効化中
-            }
-
-            # JSON変換
-            json_payload = json.dumps(data).encode('utf-8')
-
-            # 各ターゲットへ送信
-            for ip in self.target_ips:
-                try:
-                    self.sock.sendto(json_payload, (ip, self.target_port))
-                except OSError as e:
-                    pass
+            if self.payload_format == "compact":
+                now = time.monotonic()
+                if (
+                    self.sends_schema
+                    and now - self._last_schema_time >= self.schema_interval
+                ):
+                    # 後から起動したPCのために定期的にスキーマを再送する
+                    self._send_schema()
+                payload = self.encode_compact(info, fuel_percent)
+            else:
+                payload = self.encode_verbose(info, fuel_percent)
+            self._sendto_all(payload)
 
         except Exception as e:
-            logger.error(f"PlotJuggler send error: {e}")
\ No newline at end of file
+            logger.error(f"PlotJuggler send error: {e}")
+
+    def _send_schema(self):
+        self._last_schema_time = time.monotonic()
+        self._sendto_all(_SCHEMA_PAYLOAD)
+
+    def _sendto_all(self, payload: bytes):
+        for address in self._destinations():
+            try:
+                self.sock.sendto(payload, address)
+            except OSError:
+                pass
+
+    @staticmethod
+    def encode_compact(info: DashMachineInfo, fuel_percent: float) -> bytes:
+        values = (
+            int(info.rpm),
+            info.throttlePosition,
+            int(info.waterTemp),
+            int(info.oilTemp),
+            info.oilPress.oilPress,
+            float(info.gearVoltage),
+            float(info.batteryVoltage),
+            getattr(info, "manifoldPressure", 0.0),
+            getattr(info, "lambda1", 0.0),
+            fuel_percent,
+            getattr(info, "fuelUsed", 0.0),
+            getattr(info, "fuelConsumedTotal", 0.0),
+        )
+        if all(math.isfinite(value) for value in values):
+            return (_COMPACT_TEMPLATE % values).encode("ascii")
+        # NaN / inf を含むときだけ、そのキーを除いて組み立てる (まれなので遅くてよい)
+        data = {
+            key: value
+            for (key, _, _), value in zip(COMPACT_CHANNELS, values)
+            if math.isfinite(value)
+        }
+        return json.dumps(data, separators=(",", ":")).encode("ascii")
+
+    @staticmethod
+    def encode_verbose(info: DashMachineInfo, fuel_percent: float) -> bytes:
+        """従来形式 (表示名をそのままキーにしたJSON)"""
+        # DashMachineInfo から PlotJuggler 用の辞書を作成
+        data = {
+            # "timestamp": time.time(),  # 無効化中
+            # --- 基本情報 ---
+            "RPM": int(info.rpm),
+            "Throttle (%)": info.throttlePosition,
+            "Water Temp (C)": int(info.waterTemp),
+            "Oil Temp (C)": int(info.oilTemp),
+            "Oil Press (bar)": info.oilPress.oilPress,
+            # "Fuel Press (kPa)": float(info.fuelPress), # 無効化中
+            "Gear Volts (V)": float(info.gearVoltage),
+            "Battery (V)": float(info.batteryVoltage),
+            # ★追加: 新しい計測項目
+            "Manifold Pressure (kPa)": getattr(info, "manifoldPressure", 0.0),
+            "Lambda 1": getattr(info, "lambda1", 0.0),
+            # --- 燃料情報 ---
+            "Fuel Level (%)": fuel_percent,
+            "Fuel Used (mL)": getattr(info, "fuelUsed", 0.0),
+            # 積算消費量
+            "Fuel Consumed Total (mL)": getattr(info, "fuelConsumedTotal", 0.0),
+            # --- ラップタイム情報 ---
+            # "Lap Count": info.lapCount,       # 無効化中
+            # "Lap Time": info.currentLapTime   # 無効化中
+        }
+        data = {
+            key: value
+            for key, value in data.items()
+            if not isinstance(value, float) or math.isfinite(value)
+        }
+        return json.dumps(data).encode("utf-8")
@@ -0,0 +1,103 @@
+"""
+rtl_433 の TPMS デコード結果 (JSON) を、機種ごとに kPa / ℃ へ変換する表。
+
+rtl_433 の出力はメーカーによってキー名と単位が違い、センサーによっては
+rtl_433 のデコード値そのものに補正が必要なもの (Abarth-124Spider) もある。
+PROTOCOLS に model 名 → TpmsProtocol を登録しておけば、TPMS_ID_MAP の
+センサーIDがどのメーカーのものでも同じ形で取り込める。
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+PSI_TO_KPA = 6.894757
+
+
+def _identity(value: float) -> float:
+    return value
+
+
+def linear_pressure(
+    scale: float, offset: float, step: float = 0.0
+) -> Callable[[float], float]:
+    """
+    rtl_433 の値 y から x = (y + offset) / scale を求める補正関数を作る。
+    step > 0 ならセンサーの分解能に合わせてその倍数に丸める。
+    """
+
+    def calibrate(y: float) -> float:
+        x = (y + offset) / scale
+        if step > 0:
+            return round(x / step) * step
+        return x
+
+    return calibrate
+
+
+def temperature_offset(offset: float) -> Callable[[float], float]:
+    """取得した温度に offset を足す補正関数を作る"""
+
+    def calibrate(temperature_c: float) -> float:
+        return temperature_c + offset
+
+    return calibrate
+
+
+@dataclass(frozen=True)
+class TpmsProtocol:
+    """1機種分のキー名・単位・補正"""
+
+    model: str
+    pressure_key: str = "pressure_kPa"
+    pressure_to_kpa: float = 1.0  # pressure_key の単位 → kPa
+    temperature_key: str = "temperature_C"
+    calibrate_pressure: Callable[[float], float] = _identity  # kPa → kPa
+    calibrate_temperature: Callable[[float], float] = _identity  # ℃ → ℃
+
+    def raw(self, data: dict) -> Optional[tuple]:
+        """重複判定に使う補正前の値 (圧力がなければ None)"""
+        pressure = data.get(self.pressure_key)
+        if pressure is None:
+            return None
+        return pressure, data.get(self.temperature_key)
+
+    def decode(self, data: dict) -> Optional[tuple[float, Optional[float]]]:
+        """(圧力 kPa, 温度 ℃) を返す。温度を送らないセンサーは温度が None"""
+        pressure = data.get(self.pressure_key)
+        if pressure is None:
+            return None
+        pressure_kpa = self.calibrate_pressure(float(pressure) * self.pressure_to_kpa)
+        temperature = data.get(self.temperature_key)
+        if temperature is None:
+            return pressure_kpa, None
+        return pressure_kpa, self.calibrate_temperature(float(temperature))
+
+
+# 圧力補正: x = (y + 0.6896) / 0.4221 を 10 kPa 単位に丸める (実測から求めた係数)
+# 温度補正: 取得値から 5 を引く
+ABARTH_124_SPIDER = TpmsProtocol(
+    model="Abarth-124Spider",
+    calibrate_pressure=linear_pressure(0.4221, 0.6896, step=10),
+    calibrate_temperature=temperature_offset(-5),
+)
+
+# rtl_433 の model 名 → 変換方法。補正が不要な機種は単位の変換だけ
+PROTOCOLS: dict[str, TpmsProtocol] = {
+    protocol.model: protocol
+    for protocol in (
+        ABARTH_124_SPIDER,
+        TpmsProtocol("Schrader"),
+        TpmsProtocol("Citroen"),
+        TpmsProtocol("Renault"),
+        TpmsProtocol("Jansite"),
+        TpmsProtocol("PMV-107J"),
+        TpmsProtocol("Hyundai-VDO"),
+        TpmsProtocol("Toyota", pressure_key="pressure_PSI", pressure_to_kpa=PSI_TO_KPA),
+        TpmsProtocol("Ford", pressure_key="pressure_PSI", pressure_to_kpa=PSI_TO_KPA),
+    )
+}
+
+
+def protocols_for(models: list[str]) -> dict[str, TpmsProtocol]:
+    """config.TPMS_MODELS で有効にした機種だけを返す (表にない機種は無視)"""
+    return {model: PROTOCOLS[model] for model in models if model in PROTOCOLS}
@@ -0,0 +1,251 @@
+"""
+タイヤの空気圧・温度の傾向から、スローパンクチャーや過熱を早めに見つける。
+
+輪ごとの冷間圧と温度は共有の時系列ストア (src/util/time_series.py) のチャンネル
+tire_<輪>_cold_kpa / tire_<輪>_temp に受信時刻 (epoch秒) 付きで溜め、受信のたびに
+直近 TIRE_TREND_WINDOW_SEC の窓を取り出して回帰直線の傾きをベクトル演算で求める。
+TPMS は数秒に1回なので、窓 (百数十点) を毎回なめ直しても軽い。
+
+空気圧は走行で温まると上がるので、そのままでは漏れが隠れる。ボイル=シャルルの
+法則 (体積一定なら 絶対圧 / 絶対温度 が一定) で基準温度の冷間圧に換算してから
+傾きを取る。
+
+警告レベルは上がるときはすぐに変え、下がるときは低いレベルが
+TIRE_ALERT_CLEAR_SEC 続いてから変える。低下速度のしきい値には解除側の値
+(× TIRE_LEAK_CLEAR_RATIO) も持たせ、しきい値付近の値で行き来しないようにする。
+漏れ切って圧力が下げ止まると傾きは 0 に戻るので、LEAK は冷間圧が漏れ始めの値まで
+戻る (空気を入れ直す) まで解除しない。
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from src.models.models import TireAlert
+from src.util import config
+from src.util.time_series import (
+    Channel,
+    TimeSeriesStore,
+    get_time_series_store,
+    regression_slope,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ATMOSPHERE_KPA = 101.325
+ZERO_CELSIUS_K = 273.15
+
+
+def cold_pressure_kpa(pressure_kpa: float, temp_c: float, ref_temp_c: float) -> float:
+    """ゲージ圧 pressure_kpa (温度 temp_c) を、ref_temp_c のときのゲージ圧に換算する"""
+    absolute = pressure_kpa + ATMOSPHERE_KPA
+    ratio = (ref_temp_c + ZERO_CELSIUS_K) / (temp_c + ZERO_CELSIUS_K)
+    return absolute * ratio - ATMOSPHERE_KPA
+
+
+@dataclass
+class TireTrendResult:
+    """1輪分の傾向と警告"""
+
+    alert: TireAlert = TireAlert.OK
+    reason: str = ""
+    cold_kpa: Optional[float] = None
+    pressure_slope: Optional[float] = None  # 冷間圧の変化 [kPa/分]
+    temp_slope: Optional[float] = None  # 温度の変化 [℃/分]
+    predicted_temp_c: Optional[float] = None  # TIRE_PREDICT_SEC 後の温度
+
+    def as_dict(self) -> dict:
+        return {
+            "alert": int(self.alert),
+            "alert_reason": self.reason,
+            "cold_kpa": self.cold_kpa,
+            "pressure_slope": self.pressure_slope,
+            "temp_slope": self.temp_slope,
+            "predicted_temp_c": self.predicted_temp_c,
+        }
+
+
+class WheelTrend:
+    """1輪分の判定。履歴は時系列ストアの2チャンネル (冷間圧と温度) に置く"""
+
+    def __init__(self, cold: Channel, temps: Channel, window_sec: float):
+        self.cold = cold  # 冷間換算の圧力 [kPa]
+        self.temps = temps  # ℃
+        self.window_sec = window_sec
+        self.last_time: Optional[float] = None  # 最後に追加したサンプルの時刻 (epoch秒)
+        self.last_temp: Optional[float] = None
+        self.result = TireTrendResult()
+        # 判定が今のレベルより低くなった時刻 (下げるのを待っている間だけ値を持つ)
+        self._lower_since: Optional[float] = None
+        # LEAK を出した時点のウィンドウ内の最高冷間圧と、出したレベル
+        # (冷間圧がここまで戻るまで LEAK を保つ)
+        self._leak_onset_kpa: Optional[float] = None
+        self._leak_level = TireAlert.OK
+
+    def add(
+        self, timestamp: float, pressure_kpa: float, temp_c: Optional[float]
+    ) -> bool:
+        """1サンプル追加する。時刻が進んでいなければ (同じ受信の再通知) 何もしない"""
+        if self.last_time is not None and timestamp <= self.last_time:
+            return False
+        # 温度を送らないセンサーは直前の温度 (なければ基準温度) で換算する
+        if temp_c is None:
+            temp_c = self.last_temp
+            if temp_c is None:
+                temp_c = config.TIRE_COLD_REF_C
+        self.last_temp = temp_c
+        cold = cold_pressure_kpa(pressure_kpa, temp_c, config.TIRE_COLD_REF_C)
+        self.cold.append(cold, timestamp)
+        self.temps.append(temp_c, timestamp)
+        self.last_time = timestamp
+        return True
+
+    def evaluate(self) -> TireTrendResult:
+        now = self.last_time
+        times, cold = self.cold.window(self.window_sec, now)
+        temp_times, temps = self.temps.window(self.window_sec, now)
+        result = TireTrendResult(cold_kpa=float(cold[-1]))
+        temp_now = float(temps[-1])
+        span = times[-1] - times[0]
+
+        if (
+            len(times) >= config.TIRE_TREND_MIN_SAMPLES
+            and span >= config.TIRE_TREND_MIN_SPAN_SEC
+        ):
+            p_slope = regression_slope(times, cold)
+            t_slope = regression_slope(temp_times, temps)
+            if p_slope is not None:
+                result.pressure_slope = p_slope * 60.0
+            if t_slope is not None:
+                result.temp_slope = t_slope * 60.0
+                result.predicted_temp_c = temp_now + t_slope * config.TIRE_PREDICT_SEC
+
+        levels: list[tuple[TireAlert, str]] = []
+        # スローパンクチャー: 冷間圧が下がり続けている
+        leak_level = TireAlert.OK
+        if result.pressure_slope is not None:
+            leak = -result.pressure_slope
+            if leak >= self._leak_threshold(
+                TireAlert.ALERT, config.TIRE_LEAK_ALERT_KPA_PER_MIN
+            ):
+                leak_level = TireAlert.ALERT
+            elif leak >= self._leak_threshold(
+                TireAlert.WARNING, config.TIRE_LEAK_WARN_KPA_PER_MIN
+            ):
+                leak_level = TireAlert.WARNING
+        leak_level = self._latch_leak(leak_level, cold)
+        if leak_level > TireAlert.OK:
+            levels.append((leak_level, "LEAK"))
+        # 冷間圧が下限を切った / このままだと切る
+        if config.TIRE_COLD_MIN_KPA > 0:
+            if result.cold_kpa < config.TIRE_COLD_MIN_KPA:
+                levels.append((TireAlert.ALERT, "LOW"))
+            elif (
+                result.pressure_slope is not None
+                and result.cold_kpa
+                + result.pressure_slope / 60.0 * config.TIRE_PREDICT_SEC
+                < config.TIRE_COLD_MIN_KPA
+            ):
+                levels.append((TireAlert.WARNING, "LOW"))
+        # 過熱: 今の温度、または予測温度が上限を超える
+        if temp_now >= config.TIRE_TEMP_ALERT_C:
+            levels.append((TireAlert.ALERT, "HOT"))
+        elif (
+            result.predicted_temp_c is not None
+            and result.predicted_temp_c >= config.TIRE_TEMP_ALERT_C
+        ):
+            levels.append((TireAlert.WARNING, "HOT"))
+
+        if levels:
+            result.alert, result.reason = max(levels, key=lambda level: level[0])
+        self._hold_alert(result, now)
+        self.result = result
+        return result
+
+    def _latch_leak(self, level: TireAlert, cold: "np.ndarray") -> TireAlert:
+        """下げ止まっても、冷間圧が漏れ始めの値に戻るまでは LEAK のレベルを保つ"""
+        if level > TireAlert.OK:
+            if self._leak_onset_kpa is None:
+                self._leak_onset_kpa = float(cold.max())
+            self._leak_level = max(self._leak_level, level)
+            return self._leak_level
+        if self._leak_onset_kpa is not None and cold[-1] < self._leak_onset_kpa:
+            return self._leak_level
+        self._leak_onset_kpa = None
+        self._leak_level = TireAlert.OK
+        return TireAlert.OK
+
+    def _leak_threshold(self, level: TireAlert, threshold: float) -> float:
+        """今 level 以上の LEAK なら、解除側 (低い方) のしきい値を使う"""
+        previous = self.result
+        if previous.reason == "LEAK" and previous.alert >= level:
+            return threshold * config.TIRE_LEAK_CLEAR_RATIO
+        return threshold
+
+    def _hold_alert(self, result: TireTrendResult, now: float):
+        """レベルを下げるのは、低い判定が TIRE_ALERT_CLEAR_SEC 続いてから"""
+        previous = self.result
+        if result.alert >= previous.alert:
+            self._lower_since = None
+            return
+        if self._lower_since is None:
+            self._lower_since = now
+        if now - self._lower_since < config.TIRE_ALERT_CLEAR_SEC:
+            result.alert, result.reason = previous.alert, previous.reason
+        else:
+            self._lower_since = None
+
+
+class TireTrendEngine:
+    """
+    4輪分の WheelTrend をまとめる。TpmsWorker の data_updated の dict をそのまま渡す。
+    警告レベルが変わったときはログに出す。
+    """
+
+    def __init__(self, series: TimeSeriesStore = None):
+        self.series = series or get_time_series_store()
+        self.wheels: dict[str, WheelTrend] = {}
+
+    def _wheel(self, position: str) -> WheelTrend:
+        wheel = self.wheels.get(position)
+        if wheel is None:
+            key = position.lower()
+            wheel = WheelTrend(
+                self.series.channel(f"tire_{key}_cold_kpa"),
+                self.series.channel(f"tire_{key}_temp"),
+                config.TIRE_TREND_WINDOW_SEC,
+            )
+            self.wheels[position] = wheel
+        return wheel
+
+    def update(self, tpms_data: dict) -> dict[str, TireTrendResult]:
+        """新しく受信した輪だけ履歴に足して評価し、{輪: 結果} を返す"""
+        results = {}
+        for position, values in tpms_data.items():
+            pressure = values.get("pressure_kpa")
+            timestamp = values.get("last_seen")
+            if pressure is None or not timestamp or values.get("stale"):
+                continue
+            if isinstance(pressure, float) and math.isnan(pressure):
+                continue
+            wheel = self._wheel(position)
+            if not wheel.add(timestamp, float(pressure), values.get("temp_c")):
+                continue
+            previous = wheel.result.alert
+            result = wheel.evaluate()
+            if result.alert != previous:
+                logger.warning(
+                    f"Tire {position}: {previous.name} -> {result.alert.name} "
+                    f"({result.reason}, cold {result.cold_kpa:.1f} kPa, "
+                    f"slope {result.pressure_slope} kPa/min)"
+                )
+            results[position] = result
+        return results
+
+    def result(self, position: str) -> TireTrendResult:
+        wheel = self.wheels.get(position)
+        return wheel.result if wheel is not None else TireTrendResult()
@@ -1,45 +1,72 @@
 import json
+import logging
+import os
 import random  # ★ 2. モックのランダムデータ用にインポート
+import select
+import socket
 import subprocess
 import threading
 import time  # ★ 1. モックの待機用にインポート
+from dataclasses import dataclass
+from typing import Optional
 
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
 
-# ===============================================
-# TPMS 補正関数
-# ===============================================
+from src.tpms.protocols import ABARTH_124_SPIDER, protocols_for
+from src.util import config
 
-# 圧力補正関数: x = (y + 0.6896) / 0.4221
-def get_correct_pressure_kpa(wrong_kpa_from_rtl433: float) -> float:
-    """
-    rtl_433が出力した誤認識値(y)から、正しい圧力(x)を計算し、
-    結果を最も近い10 kPaの倍数に丸める。
-    """
-    y = wrong_kpa_from_rtl433
-    # 0除算を避けるための安全チェック
-    if abs(0.4221) < 1e-6:
-        return 0.0
-    
-    # 1. 補正計算
-    x = (y + 0.6896) / 0.4221
-    
-    # 2. 最も近い10 kPaの倍数に丸める (10 kPa単位のセンサー出力に合わせる)
-    rounded_x = round(x / 10) * 10
-    
-    return rounded_x
-
-# 温度補正関数: 取得値から 5 を引く
-def correct_temperature(temperature_from_rtl433: float) -> float:
-    """rtl_433が出力した温度に -5 の補正を適用する"""
-    return temperature_from_rtl433 - 5
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 65536
 
 # ===============================================
 # TPMS Worker クラス
 # ===============================================
 
 
+@dataclass
+class SensorState:
+    """センサー1個分の最新値と受信状況"""
+
+    position: str
+    temp_c: Optional[float] = None
+    pressure_kpa: Optional[float] = None
+    raw: Optional[tuple] = None  # 重複判定用の補正前の値
+    rssi: Optional[float] = None  # dB (rtl_433 -M level)
+    last_seen: float = 0.0  # epoch秒 (重複バーストも含めて最後に受信した時刻)
+    last_changed: float = 0.0  # monotonic (値を採用した時刻)
+    packets: int = 0
+    duplicates: int = 0
+    stale: bool = False
+
+    def payload(self) -> dict:
+        return {
+            "temp_c": self.temp_c,
+            "pressure_kpa": self.pressure_kpa,
+            "rssi": self.rssi,
+            "last_seen": self.last_seen,
+            "stale": self.stale,
+        }
+
+
 class TpmsWorker(QObject):
+    """
+    rtl_433 の出力を読み、4輪のTPMS値をまとめて data_updated で通知する。
+
+    - rtl_433 の出力は、パイプ (TPMS_INPUT=pipe) か UDP の syslog
+      (TPMS_INPUT=udp) からまとめて読み、行に分けて処理する
+    - 行の段階で model と登録済みIDを文字列検索し、該当しない行は JSON 解析しない
+    - 機種ごとのキー名・単位・補正は protocols.PROTOCOLS (TPMS_MODELS で選ぶ)
+    - 1回の送信は同じ値が何度も繰り返されるので、センサーごとに
+      TPMS_DEDUP_WINDOW_SEC 以内の同じ値は捨てる
+    - 受信スレッドは最新値を書き込むだけで、GUIスレッドのタイマーが
+      TPMS_EMIT_HZ で変化のあった輪だけを1回の emit にまとめて送る
+    - TPMS_STALE_SEC 以上受信のないセンサーは stale=True にして通知する
+    - rtl_433 が終了したら、間隔を空けながら起動し直す
+
+    data_updated の形式: { position: { temp_c, pressure_kpa, rssi, last_seen, stale } }
+    """
+
     data_updated = pyqtSignal(dict)
 
     # ★ 3. __init__ を修正 (debug_mode を受け取る)
@@ -52,51 +79,234 @@ class TpmsWorker(QObject):
         self.thread = None
         self.is_running = False
 
+        self.dedup_window = config.TPMS_DEDUP_WINDOW_SEC
+        self.stale_sec = config.TPMS_STALE_SEC
+        self.sensors = {
+            sensor_id: SensorState(position) for sensor_id, position in id_map.items()
+        }
+        # JSONにする前の絞り込みに使う文字列 (IDは "id" : "a61b44e3" の形で出てくる)
+        self.protocols = protocols_for(config.TPMS_MODELS)
+        self._model_needles = [f'"{model}"'.encode() for model in self.protocols]
+        self._id_needles = [
+            (f'"{sensor_id}"'.encode(), sensor_id) for sensor_id in id_map
+        ]
+        self._dirty: set[str] = set()  # 前回の emit 以降に変化した sensor_id
+        self._lock = threading.Lock()
+        self.lines = 0
+        self.parsed = 0
+        self.restarts = 0
+        self._stop_event = threading.Event()
+        self._sock: Optional[socket.socket] = None
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(max(1, int(1000 / config.TPMS_EMIT_HZ)))
+        self._flush_timer.timeout.connect(self._flush)
+
+    def _match_line(self, line: bytes) -> Optional[str]:
+        """対象のセンサーの行なら sensor_id を返す (JSON解析の前の安い絞り込み)"""
+        if not any(needle in line for needle in self._model_needles):
+            return None
+        for needle, sensor_id in self._id_needles:
+            if needle in line:
+                return sensor_id
+        return None
+
+    def _ingest(self, sensor_id: str, raw: tuple, pressure_kpa, temp_c, rssi=None):
+        """
+        (受信スレッド) 補正済みの1パケット分の値を取り込む。
+        raw (補正前の値) が直前と同じで、重複判定の時間内なら値は更新しない
+        """
+        state = self.sensors.get(sensor_id)
+        if state is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            state.packets += 1
+            state.last_seen = time.time()
+            if rssi is not None:
+                state.rssi = rssi
+            if state.stale:
+                state.stale = False
+                self._dirty.add(sensor_id)
+            if raw == state.raw and now - state.last_changed < self.dedup_window:
+                state.duplicates += 1
+                return
+            state.raw = raw
+            state.last_changed = now
+            state.pressure_kpa = pressure_kpa
+            state.temp_c = temp_c
+            self._dirty.add(sensor_id)
+
+    def _flush(self):
+        """(GUIスレッド) 変化した輪と stale になった輪をまとめて1回送る"""
+        now = time.time()
+        with self._lock:
+            for sensor_id, state in self.sensors.items():
+                # 一度も受信していないセンサーは "---" 表示のままなので対象外
+                if (
+                    not state.stale
+                    and state.last_seen > 0
+                    and now - state.last_seen > self.stale_sec
+                ):
+                    state.stale = True
+                    self._dirty.add(sensor_id)
+                    logger.warning(
+                        f"TPMS {state.position} ({sensor_id}) stale: "
+                        f"no packet for {self.stale_sec:.0f}s"
+                    )
+            if not self._dirty:
+                return
+            update = {
+                self.sensors[sensor_id].position: self.sensors[sensor_id].payload()
+                for sensor_id in self._dirty
+            }
+            self._dirty.clear()
+        self.data_updated.emit(update)
+
+    def stats(self) -> dict:
+        """受信状況 (行数・解析数・センサーごとのパケット数/重複数/RSSI)"""
+        with self._lock:
+            return {
+                "lines": self.lines,
+                "parsed": self.parsed,
+                "restarts": self.restarts,
+                "sensors": {
+                    state.position: {
+                        "packets": state.packets,
+                        "duplicates": state.duplicates,
+                        "rssi": state.rssi,
+                        "last_seen": state.last_seen,
+                        "stale": state.stale,
+                    }
+                    for state in self.sensors.values()
+                },
+            }
+
+    def _command(self) -> list[str]:
+        # 周波数とゲイン '37' を追加。-M level で rssi/snr/noise を出力させる
+        command = ["rtl_433", "-f", self.frequency, "-g", "37", "-M", "level"]
+        if config.TPMS_INPUT == "udp":
+            # JSON を syslog 形式の UDP で受け取る (1パケット = 1データグラム)
+            command += ["-F", f"syslog:127.0.0.1:{config.TPMS_UDP_PORT}"]
+        else:
+            command += ["-F", "json"]
+        return command
+
     def _run(self):
-        """(内部メソッド) 「本番用」スレッド (rtl_433 を実行)"""
+        """(内部メソッド) 「本番用」スレッド (rtl_433 を実行し、終了したら起動し直す)"""
+        delay = config.TPMS_RESTART_MIN_SEC
+        try:
+            if config.TPMS_INPUT == "udp":
+                # rtl_433 を起動し直しても同じソケットで受ける
+                self._sock = self._open_socket()
+
+            while self.is_running:
+                started = time.monotonic()
+                try:
+                    returncode = self._run_once()
+                except FileNotFoundError:
+                    print("エラー: rtl_433 コマンドが見つかりません。")
+                    break
+                if not self.is_running:
+                    break
 
-        # 周波数とゲイン '37' を追加
-        command = ["rtl_433", "-f", self.frequency, "-g", "37", "-F", "json"]
+                uptime = time.monotonic() - started
+                if uptime >= config.TPMS_RESTART_RESET_SEC:
+                    # しばらく動いていたなら、一時的な不調とみなして間隔を戻す
+                    delay = config.TPMS_RESTART_MIN_SEC
+                self.restarts += 1
+                logger.warning(
+                    f"rtl_433 exited (rc={returncode}) after {uptime:.0f}s. "
+                    f"Restart #{self.restarts} in {delay:.0f}s"
+                )
+                if self._stop_event.wait(delay):
+                    break
+                delay = min(delay * 2, config.TPMS_RESTART_MAX_SEC)
+        finally:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
 
-        try:
-            self.process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding="utf-8",
-            )
-        except FileNotFoundError:
-            print("エラー: rtl_433 コマンドが見つかりません。")
+        if self.is_running:
+            print("TPMSワーカー(本番)が停止しました。")
             self.is_running = False
-            return
 
+    def _open_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # 受信が遅れてもバーストを落とさないよう、受信バッファを広めに取る
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        sock.bind(("127.0.0.1", config.TPMS_UDP_PORT))
+        sock.setblocking(False)
+        return sock
+
+    def _run_once(self) -> Optional[int]:
+        """rtl_433 を1回起動し、終了するまで出力を読む。終了コードを返す"""
+        command = self._command()
+        udp = self._sock is not None
+        self.process = subprocess.Popen(
+            command,
+            # パイプはバイナリのまま大きく読む。UDP のときは標準出力は使わない
+            stdout=subprocess.DEVNULL if udp else subprocess.PIPE,
+            # stderr は読まないと詰まって rtl_433 が止まるので捨てる
+            stderr=subprocess.DEVNULL,
+        )
         print(f"TPMSワーカー開始 (本番モード): {command}")
-
-        while self.is_running and self.process.stdout:
+        try:
+            if udp:
+                self._read_udp(self.process)
+            else:
+                self._read_pipe(self.process)
+        finally:
+            if self.process.poll() is None:
+                self.process.terminate()
             try:
-                line = self.process.stdout.readline()
-                if not line:
+                return self.process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                return self.process.wait()
+
+    def _read_pipe(self, process: subprocess.Popen):
+        fd = process.stdout.fileno()
+        pending = b""
+        while self.is_running:
+            chunk = os.read(fd, READ_CHUNK)  # 届いている分をまとめて読む
+            if not chunk:
+                break  # EOF (rtl_433 が終了した)
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()  # 最後の行は途中かもしれないので次に回す
+            for line in lines:
+                self._handle_line(line)
+
+    def _read_udp(self, process: subprocess.Popen):
+        sock = self._sock
+        while self.is_running and process.poll() is None:
+            ready, _, _ = select.select([sock], [], [], 0.5)
+            if not ready:
+                continue
+            # 溜まっているデータグラムを全部読んでから待ちに戻る
+            while True:
+                try:
+                    datagram = sock.recv(READ_CHUNK)
+                except BlockingIOError:
                     break
+                self._handle_line(datagram)
+
+    def _handle_line(self, line: bytes):
+        """JSON 1件分 (syslog の場合はヘッダー付き) を処理する"""
+        self.lines += 1
+        # 対象のモデルとIDを含まない行 (起動メッセージや他車のTPMSなど) は
+        # JSON解析をせずに捨てる
+        if self._match_line(line) is None:
+            return
+        start = line.find(b"{")  # syslog はヘッダーの後ろが JSON
+        try:
+            data = json.loads(line[start:])
+        except ValueError:
+            return
+        self.parsed += 1
+        self._parse(data)
 
-                # JSONではない出力（起動メッセージなど）は無視
-                if line.strip().startswith('{'):
-                    data = json.loads(line.strip())
-
-                    # 'id' の存在とマッピングをチェック
-                    if data.get("model") == 'Abarth-124Spider' and str(data.get("id")) in self.id_map:
-                        self._parse_and_emit(data)
-
-            except json.JSONDecodeError:
-                pass
-            except Exception as e:
-                if self.is_running:
-                    print(f"TPMSワーカーエラー (実行中): {e}")
-
-        if self.is_running:
-            print("TPMSワーカー(本番)が停止しました。")
-            self.is_running = False
-            
     # ★ 4. 「モック用」のスレッドを新設
     def _run_mock(self):
         """(内部メソッド) 「デバッグ用」スレッド (偽のデータを送信)"""
@@ -105,31 +315,32 @@ class TpmsWorker(QObject):
         while self.is_running:
             try:
                 # 4つのタイヤのモックデータを作成
-                for sensor_id, position in self.id_map.items():
-                    
+                for sensor_id in self.id_map:
+
                     # 補正前の 'rtl_433っぽい' 生データを作成
                     # Pressure (例: 200kPa前後, 10kPa単位丸め前の値)
                     raw_pressure = round(200.0 + random.uniform(-10.0, 10.0), 1)
                     # Temperature (例: 25C前後)
                     raw_temperature = round(25.0 + random.uniform(-5.0, 5.0), 1)
-                    
-                    # ★ 補正計算の実行 (モックデータにも適用) ★
-                    correct_pressure = get_correct_pressure_kpa(raw_pressure)
-                    corrected_temperature = correct_temperature(raw_temperature)
-
-                    # 1つずつ送る (よりリアルなシミュレーション)
-                    # Application側が期待する形式: { position: { temp_c: X, pressure_kpa: Y } }
-                    payload_for_main_window = {
-                        position: {
-                            "temp_c": corrected_temperature, 
-                            "pressure_kpa": correct_pressure
-                        }
-                    }
-                    self.data_updated.emit(payload_for_main_window)
+                    rssi = round(-12.0 + random.uniform(-3.0, 3.0), 1)
+
+                    # 本番と同じ経路で取り込む (補正・重複除去・まとめて通知)
+                    self._parse({
+                        "model": ABARTH_124_SPIDER.model,
+                        "id": sensor_id,
+                        "pressure_kPa": raw_pressure,
+                        "temperature_C": raw_temperature,
+                        "rssi": rssi,
+                    })
                     time.sleep(0.1)  # わずかに時間をずらす
 
                 # ログにはFLだけ表示
-                print(f"MOCK TPMSデータ送信: {self.id_map['64f3850c']}: {correct_pressure:.0f} kPa / {corrected_temperature:.0f} °C") 
+                fl = self.sensors.get("64f3850c")
+                if fl is not None and fl.pressure_kpa is not None:
+                    print(
+                        f"MOCK TPMSデータ送信: {fl.position}: "
+                        f"{fl.pressure_kpa:.0f} kPa / {fl.temp_c:.0f} °C"
+                    )
 
                 # 2秒待機
                 time.sleep(2.0)
@@ -140,36 +351,20 @@ class TpmsWorker(QObject):
 
         print("TPMSワーカー(モック)が停止しました。")
 
-    def _parse_and_emit(self, data: dict):
-        """(本番用) JSONを解析し、補正を適用してシグナルを発行"""
+    def _parse(self, data: dict):
+        """(本番用) JSONから機種ごとの変換で値を取り出して取り込む"""
         try:
-            sensor_id_str = str(data["id"])
-            
-            # マッピングに存在しないIDはここでKeyErrorが発生する
-            tire_position = self.id_map[sensor_id_str]
-
-            temp_raw = data.get("temperature_C") # raw の温度
-            pressure_raw = data.get("pressure_kPa") # raw の圧力
-
-            if temp_raw is not None and pressure_raw is not None:
-                
-                # ★ 圧力と温度の補正計算を実行 ★
-                correct_pressure = get_correct_pressure_kpa(pressure_raw)
-                corrected_temperature = correct_temperature(temp_raw)
-                
-                # シグナルで送信するデータ構造を構築 (補正済みの値を使用)
-                # 形式: { position: { temp_c: X, pressure_kpa: Y } }
-                update_data = {
-                    tire_position: {
-                        "temp_c": corrected_temperature, 
-                        "pressure_kpa": correct_pressure
-                    }
-                }
-                self.data_updated.emit(update_data)
-
-        except KeyError:
-            # マッピング辞書に存在しないIDを受信した場合
-            pass
+            # 文字列検索は目安なので、解析後にもう一度確かめる
+            protocol = self.protocols.get(data.get("model"))
+            sensor_id = str(data.get("id"))
+            if protocol is None or sensor_id not in self.id_map:
+                return
+            raw = protocol.raw(data)
+            values = protocol.decode(data)
+            if values is None:
+                return
+            pressure_kpa, temp_c = values
+            self._ingest(sensor_id, raw, pressure_kpa, temp_c, data.get("rssi"))
         except Exception as e:
             print(f"TPMSデータの解析に失敗: {e} - JSON: {data}")
 
@@ -178,6 +373,7 @@ class TpmsWorker(QObject):
         """ワーカーを別スレッドで起動する"""
         if not self.is_running:
             self.is_running = True
+            self._stop_event.clear()
 
             if self.debug_mode:
                 # デバッグモードなら、モック用スレッドを開始
@@ -188,11 +384,14 @@ class TpmsWorker(QObject):
 
             self.thread.daemon = True
             self.thread.start()
+            self._flush_timer.start()
 
     def stop(self):
         """ワーカーとサブプロセスを停止する"""
         print("TPMSワーカーを停止しています...")
         self.is_running = False
+        self._stop_event.set()
+        self._flush_timer.stop()
 
         if self.process:
             try:
@@ -201,4 +400,5 @@ class TpmsWorker(QObject):
                 pass
 
         if self.thread:
-            self.thread.join(timeout=1.0)
\ No newline at end of file
+            self.thread.join(timeout=1.0)
+        logger.info(f"TPMS stats: {self.stats()}")
@@ -1,85 +1,175 @@
+import asyncio
 import datetime
 import logging
-import socket
-import threading
+import random
 import time
-
-import requests  # type: ignore
+from typing import Optional
 
 from src.can.can_listeners import UdpPayloadListener
+from src.services.io_reactor import IoReactor
 from src.util import config
+from src.util.lazy_import import lazy_import
+
+requests = lazy_import("requests")
+
+logger = logging.getLogger(__name__)
+
+# ローカルで採番したRun IDは最上位ビットを立て、サーバー採番のIDと区別する
+LOCAL_RUN_ID_FLAG = 0x80000000
+
+
+class _UdpSendProtocol(asyncio.DatagramProtocol):
+    """
+    送信用エンドポイントのプロトコル。
+    asyncio のデータグラム送信は sendto() で例外を出さず、送信先に届かない
+    (ICMP port unreachable など) エラーは error_received() に来るのでここで数える
+    """
+
+    def __init__(self, transmitter: "UdpTransmitter"):
+        self.transmitter = transmitter
+
+    def error_received(self, exc: Exception):
+        self.transmitter.onSendError(exc)
 
 
 class UdpTransmitter:
-    UDP_INTERVAL_TIME = 0.030
+    """
+    CANのペイロードを一定周期でUDP送信する。
+
+    - 送信は IoReactor 上のデータグラムエンドポイントで行い、送信用バッファも使い回す
+    - Run IDはサーバーから取れるまでローカルの仮IDで送信を始め、
+      取得できた時点で切り替える (起動をブロックしない)
+    """
+
+    UDP_INTERVAL_TIME = config.UDP_INTERVAL_SEC
 
     machineId: int
     runId: int
     errorCode: int
 
-    udpSocket: socket.socket
-    thread: threading.Thread
     udpPayloadListener: UdpPayloadListener
 
-    def __init__(self, udpPayloadListener: UdpPayloadListener) -> None:
+    def __init__(
+        self, udpPayloadListener: UdpPayloadListener, reactor: IoReactor
+    ) -> None:
         self.udpPayloadListener = udpPayloadListener
+        self.reactor = reactor
         self.machineId = config.machineId
         self.udpAddress = config.udpAddress
-        self.udpSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        super().__init__()
+        self.errorCode = 0
+
+        self.runId = makeLocalRunId()
+        self.isRunIdConfirmed = False
+        self.sendBuffer = bytearray(udpPayloadListener.payloadSize)
 
-    def __del__(self):
-        self.udpSocket.close()
+        self.transport: asyncio.DatagramTransport = None
+        self.sendErrors = 0
+        self._futures = []
+        super().__init__()
 
     def trySend(self):
         try:
-            payload = self.udpPayloadListener.getUdpPayload(
-                self.machineId, self.runId, 0
+            self.udpPayloadListener.writeUdpPayload(
+                self.sendBuffer, self.machineId, self.runId, self.errorCode
             )
-            self.udpSocket.sendto(payload, self.udpAddress)
-        except BaseException:
-            logging.error("UDP send failed!")
-
-    def sendEvery(self):
-        baseTime = time.time()
+            self.transport.sendto(self.sendBuffer)
+        except OSError as e:
+            self.onSendError(e)
+
+    def onSendError(self, exc: Exception):
+        self.sendErrors += 1
+        # 周期送信なので、エラーログは間引いて出す
+        if self.sendErrors % 100 == 1:
+            logger.error(f"UDP send failed ({self.sendErrors} times): {exc}")
+
+    async def openEndpoint(self):
+        """送信先のエンドポイントを開けるまで、間隔を延ばしながら再試行する"""
+        loop = asyncio.get_running_loop()
+        backoff = 1.0
         while True:
-            # 処理を別スレッドで実行する
-            t = threading.Thread(target=self.trySend)
-            t.start()
+            try:
+                self.transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _UdpSendProtocol(self), remote_addr=self.udpAddress
+                )
+                return
+            except OSError as e:
+                logger.error(
+                    f"UDP endpoint {self.udpAddress} unavailable: {e}. "
+                    f"Retrying in {backoff:.0f}s."
+                )
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, config.UDP_ENDPOINT_RETRY_MAX_SEC)
+
+    async def sendEvery(self):
+        loop = asyncio.get_running_loop()
+        await self.openEndpoint()
+        interval = self.UDP_INTERVAL_TIME
+        next_tick = loop.time()
+        try:
+            while True:
+                self.trySend()
+
+                next_tick += interval
+                sleep_sec = next_tick - loop.time()
+                if sleep_sec > 0:
+                    await asyncio.sleep(sleep_sec)
+                else:
+                    # 処理落ちした場合は溜まった分を取り戻そうとしない
+                    next_tick = loop.time()
+                    await asyncio.sleep(0)
+        finally:
+            self.transport.close()
+            self.transport = None
+
+    async def acquireRunId(self):
+        """サーバーからRun IDを取得できるまで、間隔を延ばしながら再試行する"""
+        if not config.cloudRunApiEndpoint:
+            logger.warning(
+                f"CLOUD_RUN_API_ENDPOINT is not set. Using local Run ID {self.runId}."
+            )
+            return
 
-            # 基準時刻と現在時刻の剰余を元に、次の実行までの時間を計算する
-            now = time.time()
-            elapsedTime = now - baseTime
-            sleep_sec = self.UDP_INTERVAL_TIME - (elapsedTime % self.UDP_INTERVAL_TIME)
+        startAt = datetime.datetime.now(datetime.timezone.utc)
+        backoff = 1.0
+        while True:
+            runId = await self.reactor.run_blocking(getRunId, self.machineId, startAt)
+            if runId is not None:
+                logger.info(f"Run ID: {runId} (replaces local Run ID {self.runId})")
+                self.runId = runId
+                self.isRunIdConfirmed = True
+                return
+            # 複数台が同時に再試行しないよう揺らぎを入れる
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, config.RUN_ID_RETRY_MAX_SEC)
 
-            time.sleep(max(sleep_sec, 0))
+    def start(self):
+        if self._futures:
+            return
+        self._futures = [
+            self.reactor.submit(self.sendEvery()),
+            self.reactor.submit(self.acquireRunId()),
+        ]
 
-    def initialize(self):
-        self.runId = getRunId(
-            self.machineId, datetime.datetime.now(datetime.timezone.utc)
-        )
+    def stop(self):
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
 
-    def run(self):
-        self.initialize()
-        self.sendEvery()
 
-    def start(self):
-        self.thread = threading.Thread(target=self.run)
-        self.thread.setDaemon(True)
-        self.thread.start()
+def makeLocalRunId() -> int:
+    # 起動時刻 (秒) ベースなので、同じ車両で続けて起動しても重複しにくい
+    return LOCAL_RUN_ID_FLAG | (int(time.time()) & 0x7FFFFFFF)
 
 
-def getRunId(machineId: int, dt: datetime.datetime) -> int:  # dt は UTCを渡す
+def getRunId(machineId: int, dt: datetime.datetime) -> Optional[int]:  # dt は UTC
+    """Run IDを1回だけ要求する。失敗した場合は None"""
     url = config.cloudRunApiEndpoint
     data = {"start_at": dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ"), "machine_id": machineId}
-    while True:
-        try:
-            res = requests.post(url, json=data)
-            if res.status_code == 200:
-                runId = res.json()["run"]["id"]
-                logging.info(f"Run ID: {runId}")
-                return runId
-            else:
-                raise BaseException
-        except BaseException:
-            time.sleep(1)
+    try:
+        res = requests.post(url, json=data, timeout=config.RUN_ID_REQUEST_TIMEOUT_SEC)
+        if res.status_code == 200:
+            return res.json()["run"]["id"]
+        logger.warning(f"Run ID request failed: HTTP {res.status_code}")
+    except (requests.RequestException, ValueError, KeyError) as e:
+        logger.warning(f"Run ID request failed: {e}")
+    return None
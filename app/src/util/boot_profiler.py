@@ -0,0 +1,92 @@
+import contextlib
+import logging
+import os
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+def _processAge() -> float:
+    """プロセス起動からの経過秒数 (Linux 以外や取得失敗時は 0)"""
+    try:
+        with open("/proc/self/stat") as f:
+            # comm に空白が入ることがあるので、')' より後ろを数える
+            fields = f.read().rsplit(")", 1)[1].split()
+        startTicks = int(fields[19])
+        startSec = startTicks / os.sysconf("SC_CLK_TCK")
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - startSec)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+def _systemUptime() -> float:
+    """電源投入 (カーネル起動) からの経過秒数。取得できなければ -1"""
+    try:
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    except (OSError, AttributeError):
+        return -1.0
+
+
+class BootProfiler(QObject):
+    """
+    起動の各段階にかかった時間を記録し、ログとスプラッシュに出す。
+
+    時刻はプロセス起動 (インタプリタとimportを含む) を 0 とした経過時間。
+    stage() はどのスレッドからでも使える。stage_finished は記録したスレッドから
+    発行されるので、GUIで受けるときは QueuedConnection にすること。
+    """
+
+    # 段階名, 所要時間[ms]
+    stage_finished = pyqtSignal(str, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.t0 = time.monotonic() - _processAge()
+        self.records: list[tuple[str, float, float, str]] = []
+        self._lock = threading.Lock()
+
+    def elapsedMs(self) -> float:
+        return (time.monotonic() - self.t0) * 1000.0
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.monotonic())
+
+    def mark(self, name: str) -> None:
+        """所要時間のない節目 (ダッシュボード表示、最初のCANフレームなど) を記録する"""
+        now = time.monotonic()
+        self._record(name, now, now)
+
+    def _record(self, name: str, start: float, end: float):
+        atMs = (start - self.t0) * 1000.0
+        durationMs = (end - start) * 1000.0
+        thread = threading.current_thread().name
+        with self._lock:
+            self.records.append((name, atMs, durationMs, thread))
+        if durationMs > 0:
+            logger.info(
+                f"Boot stage '{name}': {durationMs:.0f} ms "
+                f"(t+{atMs:.0f} ms, {thread})"
+            )
+        else:
+            logger.info(f"Boot mark '{name}' at t+{atMs:.0f} ms")
+        self.stage_finished.emit(name, durationMs)
+
+    def report(self) -> None:
+        """記録した段階を開始順に一覧でログへ出す"""
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r[1])
+        lines = [f"{'stage':<20} {'start':>8} {'took':>8}  thread"]
+        for name, atMs, durationMs, thread in records:
+            lines.append(f"{name:<20} {atMs:>6.0f}ms {durationMs:>6.0f}ms  {thread}")
+        uptime = _systemUptime()
+        if uptime >= 0:
+            lines.append(f"system uptime: {uptime:.1f} s")
+        logger.info("Boot profile:\n" + "\n".join(lines))
@@ -14,20 +14,146 @@ udpAddress = (
     int(os.environ.get("UDP_PORT", 5005)),
 )
 cloudRunApiEndpoint = os.environ.get("CLOUD_RUN_API_ENDPOINT", "")
+# UDP送信周期と、Run ID取得 (Cloud Run API) のタイムアウト・再試行間隔の上限
+UDP_INTERVAL_SEC = float(os.environ.get("UDP_INTERVAL_SEC", 0.030))
+RUN_ID_REQUEST_TIMEOUT_SEC = float(os.environ.get("RUN_ID_REQUEST_TIMEOUT_SEC", 3.0))
+RUN_ID_RETRY_MAX_SEC = float(os.environ.get("RUN_ID_RETRY_MAX_SEC", 30.0))
+# UDPの送信先を開けなかった (名前解決の失敗など) ときの再試行間隔の上限 [秒]
+UDP_ENDPOINT_RETRY_MAX_SEC = float(os.environ.get("UDP_ENDPOINT_RETRY_MAX_SEC", 30.0))
 cloudMessageApiEndpoint = os.environ.get("CLOUD_MESSAGE_API_ENDPOINT", "")
 cloudLaptimeApiEndpoint = os.environ.get("CLOUD_LAPTIME_API_ENDPOINT", "")
+# メッセージとラップタイムをまとめて返すエンドポイント (設定時は上の2つより優先)
+cloudPitApiEndpoint = os.environ.get("CLOUD_PIT_API_ENDPOINT", "")
+
+# --- ピットメッセージ取得設定 ---
+MESSAGE_POLL_INTERVAL_SEC = float(os.environ.get("MESSAGE_POLL_INTERVAL_SEC", 5.0))
+# 0より大きい場合は ?wait=秒 を付けてロングポーリングする (サーバー側の対応が必要)
+MESSAGE_LONG_POLL_SEC = float(os.environ.get("MESSAGE_LONG_POLL_SEC", 0))
+MESSAGE_CONNECT_TIMEOUT_SEC = float(os.environ.get("MESSAGE_CONNECT_TIMEOUT_SEC", 2.0))
+MESSAGE_READ_TIMEOUT_SEC = float(os.environ.get("MESSAGE_READ_TIMEOUT_SEC", 3.0))
+# ダッシュボードにピットメッセージを重ねて表示する時間
+PIT_MESSAGE_DISPLAY_SEC = float(os.environ.get("PIT_MESSAGE_DISPLAY_SEC", 10.0))
 
 # --- 燃料計算設定 ---
 INITIAL_FUEL_ML = float(os.environ.get("INITIAL_FUEL_ML", 4500.0))
-FUEL_SAVE_INTERVAL_MS = int(os.environ.get("FUEL_SAVE_INTERVAL_MS", 1000))
+# 燃料・走行距離の差分をジャーナル (counters.journal) に書いて fsync する間隔
+JOURNAL_COMMIT_SEC = float(os.environ.get("JOURNAL_COMMIT_SEC", 1.0))
+# ジャーナルがこのサイズを超えたら state.json にまとめて空にする (6バイト/レコード)
+JOURNAL_CHECKPOINT_BYTES = int(os.environ.get("JOURNAL_CHECKPOINT_BYTES", 65536))
+# 状態ファイル (state.json) への書き込みは、最初の変更からこの秒数待ってまとめて行う
+STATE_COALESCE_SEC = float(os.environ.get("STATE_COALESCE_SEC", 5.0))
+
+# 燃費 (1周あたり・1kmあたり) は直近この周回数の平均で見積もる
+FUEL_ESTIMATE_LAPS = int(os.environ.get("FUEL_ESTIMATE_LAPS", 5))
+# 窓の最速ラップのこの倍率より遅い周 (ピットイン・イエローなど) は燃費の計算から外す
+FUEL_ESTIMATE_SLOW_LAP_RATIO = float(
+    os.environ.get("FUEL_ESTIMATE_SLOW_LAP_RATIO", 1.3)
+)
+# 1kmあたりの燃費は、記録した周の距離の合計がこれ以上になってから出す
+FUEL_ESTIMATE_MIN_KM = float(os.environ.get("FUEL_ESTIMATE_MIN_KM", 0.5))
 
 # ★変更: ECUからの "Fuel Used" (Raw) を ml に変換する係数
 # ユーザー指定の実測値係数
 FUEL_USED_SCALING = float(os.environ.get("FUEL_USED_SCALING", 0.1666666667))
+# Fuel Used の増分がこの流量 [ml/s] を超えたら、ありえない値として捨てる
+FUEL_MAX_FLOW_ML_PER_SEC = float(os.environ.get("FUEL_MAX_FLOW_ML_PER_SEC", 25.0))
+# パケットがこの秒数以上途絶えた後に Fuel Used が戻っていたら ECU の再起動とみなす
+FUEL_ECU_RESET_GAP_SEC = float(os.environ.get("FUEL_ECU_RESET_GAP_SEC", 1.0))
 
 # --- TPMS設定 ---
 RTL433_FREQUENCY = os.environ.get("RTL433_FREQUENCY", "429.5M")
 TPMS_ID_MAP = {"a61b44e3": "FR", "64f3850c": "FL", "766b4951": "RR", "74f4be1b": "RL"}
+# 受け付ける rtl_433 の機種名 (カンマ区切り。変換方法は src/tpms/protocols.py)
+TPMS_MODELS = [
+    m.strip()
+    for m in os.environ.get("TPMS_MODELS", "Abarth-124Spider").split(",")
+    if m.strip()
+]
+# rtl_433 の出力の受け取り方: "pipe" (標準出力) / "udp" (syslog 形式で UDP に出させる)
+TPMS_INPUT = os.environ.get("TPMS_INPUT", "pipe").lower()
+TPMS_UDP_PORT = int(os.environ.get("TPMS_UDP_PORT", 1433))
+# rtl_433 が終了したときの再起動間隔 (失敗が続くと倍、上限まで)
+TPMS_RESTART_MIN_SEC = float(os.environ.get("TPMS_RESTART_MIN_SEC", 1.0))
+TPMS_RESTART_MAX_SEC = float(os.environ.get("TPMS_RESTART_MAX_SEC", 30.0))
+# この秒数以上動いてから終了した場合は、再起動間隔を最小に戻す
+TPMS_RESTART_RESET_SEC = float(os.environ.get("TPMS_RESTART_RESET_SEC", 60.0))
+# 同じセンサーの同じ値をこの秒数以内に再受信したら捨てる (1回の送信で数回繰り返される)
+TPMS_DEDUP_WINDOW_SEC = float(os.environ.get("TPMS_DEDUP_WINDOW_SEC", 2.0))
+# 変化のあった輪をまとめて GUI に通知する頻度 [Hz]
+TPMS_EMIT_HZ = float(os.environ.get("TPMS_EMIT_HZ", 2))
+# この秒数以上受信のないセンサーは表示をグレーにする
+TPMS_STALE_SEC = float(os.environ.get("TPMS_STALE_SEC", 120.0))
+
+# --- 時系列ストア (src/util/time_series.py) ---
+# チャンネルごとに保持する件数 (タイヤの傾向監視が使う。TPMS の2秒周期で約34分)
+SERIES_CAPACITY = int(os.environ.get("SERIES_CAPACITY", 1024))
+
+# --- CANチャンネルのフィルタ (src/can/channel_filters.py) ---
+# チャンネル名 -> "種類:パラメータ"。表示とテレメトリにはフィルタ後の値が入る
+# 種類: none (素通し), ema:α (0<α≤1, 1で素通し), median:N (N点メディアン),
+#       lowpass:fc (1次IIR、カットオフ[Hz]、パケット間隔に追従), boxcar:N (N点移動平均)
+# シフトに使う rpm は遅れを出さないよう素通し。ギア電圧は従来どおり5点移動平均
+CHANNEL_FILTERS = {
+    name: os.environ.get(f"FILTER_{name.upper()}", default)
+    for name, default in {
+        "rpm": "none",
+        "throttle": "median:3",
+        "water_temp": "none",
+        "oil_temp": "none",
+        "oil_press": "lowpass:2.0",
+        "gear_voltage": "boxcar:5",
+        "battery_voltage": "ema:0.2",
+        "fuel_press": "median:3",
+        "manifold_press": "none",
+        "lambda1": "ema:0.3",
+    }.items()
+}
+
+# --- タイヤの傾向監視 (src/tpms/tire_trend.py) ---
+# 傾きを求める期間 [秒] (履歴は時系列ストアに SERIES_CAPACITY 件まで溜める)
+TIRE_TREND_WINDOW_SEC = float(os.environ.get("TIRE_TREND_WINDOW_SEC", 300.0))
+# 傾きを信用するのに必要なサンプル数と期間
+TIRE_TREND_MIN_SAMPLES = int(os.environ.get("TIRE_TREND_MIN_SAMPLES", 6))
+TIRE_TREND_MIN_SPAN_SEC = float(os.environ.get("TIRE_TREND_MIN_SPAN_SEC", 60.0))
+# 冷間圧に換算するときの基準温度 [℃]
+TIRE_COLD_REF_C = float(os.environ.get("TIRE_COLD_REF_C", 20.0))
+# 冷間圧の低下速度 [kPa/分] がこれを超えたら警告 / 異常 (スローパンクチャー)
+TIRE_LEAK_WARN_KPA_PER_MIN = float(os.environ.get("TIRE_LEAK_WARN_KPA_PER_MIN", 1.0))
+TIRE_LEAK_ALERT_KPA_PER_MIN = float(os.environ.get("TIRE_LEAK_ALERT_KPA_PER_MIN", 3.0))
+# 一度超えた低下速度のしきい値は、この割合まで戻るまで超えたままとみなす
+TIRE_LEAK_CLEAR_RATIO = float(os.environ.get("TIRE_LEAK_CLEAR_RATIO", 0.7))
+# 警告レベルは上がるときはすぐ、下がるときは低いレベルがこの秒数続いてから変える
+# (しきい値付近で ALERT と WARNING を行き来して枠の色がちらつかないように)
+TIRE_ALERT_CLEAR_SEC = float(os.environ.get("TIRE_ALERT_CLEAR_SEC", 60.0))
+# 冷間圧の下限 [kPa] (規定圧 200kPa 前後の 3/4。0 で判定しない)
+TIRE_COLD_MIN_KPA = float(os.environ.get("TIRE_COLD_MIN_KPA", 150.0))
+# 温度の上限 [℃]。予測温度 (TIRE_PREDICT_SEC 秒後) が超える場合は警告
+TIRE_TEMP_ALERT_C = float(os.environ.get("TIRE_TEMP_ALERT_C", 80.0))
+TIRE_PREDICT_SEC = float(os.environ.get("TIRE_PREDICT_SEC", 120.0))
+
+# --- GoPro (BLE) 設定 ---
+# 前回のカメラへスキャンせずに直接つなぐときのタイムアウトと、スキャンに切り替えるまでの回数
+GOPRO_DIRECT_CONNECT_TIMEOUT_SEC = float(
+    os.environ.get("GOPRO_DIRECT_CONNECT_TIMEOUT_SEC", 5.0)
+)
+GOPRO_DIRECT_CONNECT_ATTEMPTS = int(os.environ.get("GOPRO_DIRECT_CONNECT_ATTEMPTS", 2))
+# 切断・失敗後の再接続の間隔 (失敗が続くと倍、上限まで)
+GOPRO_RECONNECT_MIN_SEC = float(os.environ.get("GOPRO_RECONNECT_MIN_SEC", 0.5))
+GOPRO_RECONNECT_MAX_SEC = float(os.environ.get("GOPRO_RECONNECT_MAX_SEC", 10.0))
+# コマンドがないときにキープアライブを送る間隔と、応答を待つ時間
+GOPRO_KEEPALIVE_SEC = float(os.environ.get("GOPRO_KEEPALIVE_SEC", 3.0))
+GOPRO_RESPONSE_TIMEOUT_SEC = float(os.environ.get("GOPRO_RESPONSE_TIMEOUT_SEC", 2.0))
+# 同時につなぐカメラ。"名前" または "名前=アドレス" をカンマ区切りで並べる
+# (例: "onboard,rear=AA:BB:CC:DD:EE:FF,driver")。アドレスを書いたカメラはそれ以外に接続しない
+_gopro_cameras_str = os.environ.get("GOPRO_CAMERAS", "onboard")
+GOPRO_CAMERAS = [
+    (name.strip(), address.strip() or None)
+    for name, _, address in (
+        item.partition("=") for item in _gopro_cameras_str.split(",") if item.strip()
+    )
+]
+# 録画の開始/停止を全カメラへ送ったあと、各カメラの応答を待つ時間
+GOPRO_SYNC_TIMEOUT_SEC = float(os.environ.get("GOPRO_SYNC_TIMEOUT_SEC", 5.0))
 
 # --- GPS設定 ---
 GPS_PORT = os.environ.get("GPS_PORT", "/dev/ttyACM0")
@@ -45,6 +171,13 @@ MQTT_USERNAME = os.environ.get("MQTT_USERNAME", "") # ← 認証を使わない
 MQTT_PASSWORD = os.environ.get("MQTT_PASSWORD", "") # ← 同上
 MQTT_TOPIC = os.environ.get("MQTT_TOPIC", "sensor/motec") # ← トピック名を指定のものに変更
 MQTT_KEEP_ALIVE_SEC = int(os.environ.get("MQTT_KEEP_ALIVE_SEC", 10))
+# 再接続の待ち時間 (失敗するたびに倍、上限まで。実際はその 50〜100% でばらつかせる)
+MQTT_RECONNECT_MIN_SEC = float(os.environ.get("MQTT_RECONNECT_MIN_SEC", 1.0))
+MQTT_RECONNECT_MAX_SEC = float(os.environ.get("MQTT_RECONNECT_MAX_SEC", 30.0))
+# 未接続の間に溜めておくメッセージ数 (10Hz で約60秒分。超えたら古いものから捨てる)
+MQTT_OFFLINE_QUEUE_SIZE = int(os.environ.get("MQTT_OFFLINE_QUEUE_SIZE", 600))
+# RTT 計測用の QoS1 メッセージを送る間隔 [秒] (0 で計測しない)
+MQTT_RTT_PROBE_SEC = float(os.environ.get("MQTT_RTT_PROBE_SEC", 5.0))
 
 # --- PlotJuggler / UDP Telemetry 設定 ---
 # 複数のIPに送る場合はカンマ区切りで指定
@@ -52,4 +185,105 @@ MQTT_KEEP_ALIVE_SEC = int(os.environ.get("MQTT_KEEP_ALIVE_SEC", 10))
 _ips_str = os.environ.get("PLOTJUGGLER_TARGET_IPS", "100.94.77.77,100.86.101.38")
 PLOTJUGGLER_TARGET_IPS = [ip.strip() for ip in _ips_str.split(",") if ip.strip()]
 
-PLOTJUGGLER_PORT = int(os.environ.get("PLOTJUGGLER_PORT", 9870))
\ No newline at end of file
+PLOTJUGGLER_PORT = int(os.environ.get("PLOTJUGGLER_PORT", 9870))
+
+# 宛先モード: unicast (TARGET_IPSへ個別送信) / multicast / broadcast
+# multicast / broadcast はピットのPCが何台でも送信は1回で済む
+PLOTJUGGLER_MODE = os.environ.get("PLOTJUGGLER_MODE", "unicast").lower()
+PLOTJUGGLER_MULTICAST_GROUP = os.environ.get(
+    "PLOTJUGGLER_MULTICAST_GROUP", "239.255.77.77"
+)
+PLOTJUGGLER_MULTICAST_TTL = int(os.environ.get("PLOTJUGGLER_MULTICAST_TTL", 1))
+PLOTJUGGLER_BROADCAST_ADDRESS = os.environ.get(
+    "PLOTJUGGLER_BROADCAST_ADDRESS", "255.255.255.255"
+)
+
+# ペイロード形式: verbose (従来の長いキー。PlotJuggler のレイアウトはこちら) /
+# compact (数値だけの平らなJSONを短いキーで送る。PlotJuggler には rpm, tp ... の
+# チャンネルとしてそのまま出る)
+PLOTJUGGLER_FORMAT = os.environ.get("PLOTJUGGLER_FORMAT", "verbose").lower()
+# compact のとき、短縮キー -> 表示名の対応 {"schema": {...}} を送る間隔 [秒]。
+# PlotJuggler はこのメッセージを解釈できないので、既定 (0) は送らない。
+# 短縮キーを表示名に戻す自作の受信側を使うときだけ設定する
+PLOTJUGGLER_SCHEMA_INTERVAL_SEC = float(
+    os.environ.get("PLOTJUGGLER_SCHEMA_INTERVAL_SEC", 0.0)
+)
+
+# 送信レート [Hz] (GUIの更新周期とは独立)。0 の場合は send() のたびに即送信
+PLOTJUGGLER_RATE_HZ = float(os.environ.get("PLOTJUGGLER_RATE_HZ", 50.0))
+
+# --- テレメトリ送信機の選択 ---
+# GUI周期で send() を呼ぶストリーム系送信機 (カンマ区切り: mqtt, plotjuggler)
+_senders_str = os.environ.get("TELEMETRY_SENDERS", "mqtt,plotjuggler")
+TELEMETRY_SENDERS = [s.strip().lower() for s in _senders_str.split(",") if s.strip()]
+# --- ネットワークI/O (共有asyncioループ) ---
+# ブロッキング呼び出し (Sheets API, HTTP) 用のスレッドプールの大きさ
+IO_REACTOR_WORKERS = int(os.environ.get("IO_REACTOR_WORKERS", 2))
+
+# --- シフトライト設定 ---
+# "点灯回転数:色" をカンマ区切りで左から並べる。未指定なら RpmLightBar の既定値
+_rpm_light_map_str = os.environ.get("RPM_LIGHT_MAP", "")
+RPM_LIGHT_MAP = [
+    (int(rpm), color.strip())
+    for rpm, color in (
+        item.split(":", 1) for item in _rpm_light_map_str.split(",") if ":" in item
+    )
+]
+RPM_SHIFT_RPM = int(os.environ.get("RPM_SHIFT_RPM", 12300))
+# シフト回転数以上での点滅周波数 [Hz]。0 なら点滅せず点灯し続ける
+RPM_SHIFT_FLASH_HZ = float(os.environ.get("RPM_SHIFT_FLASH_HZ", 8.0))
+
+# --- GUI描画の計測 ---
+# ダッシュボードの fps / フレーム処理時間 / 更新スキップ数をログに出す間隔 [秒]。0 で無効
+RENDER_STATS_LOG_SEC = float(os.environ.get("RENDER_STATS_LOG_SEC", 0))
+
+# --- GUIスレッドの更新レート [Hz] (FrameScheduler) ---
+# 新しいデータがなければ描画しない。処理落ちしたフレームは取り戻さず捨てる
+DISPLAY_HZ = float(os.environ.get("DISPLAY_HZ", 30))
+SHIFT_LIGHT_HZ = float(os.environ.get("SHIFT_LIGHT_HZ", 60))
+# 温度・電圧・燃料・TPMS など変化の遅い表示
+SLOW_WIDGET_HZ = float(os.environ.get("SLOW_WIDGET_HZ", 2))
+# テレメトリ送信・走行距離の集計
+TELEMETRY_PROCESS_HZ = float(os.environ.get("TELEMETRY_PROCESS_HZ", 20))
+# GoPro自動録画などの制御判定
+CONTROL_HZ = float(os.environ.get("CONTROL_HZ", 10))
+
+# --- 自動化ルール (CANデータで評価する) ---
+# 名前 -> (条件, ONにするまでの継続秒, OFFにするまでの継続秒, 動作)
+# 条件は "信号>=ON値:OFF値" を & (かつ) と | (または) でつなぐ。OFF値を省くとON値と同じ。
+# 値を書かない信号は真偽値。信号: rpm, speed (GPS km/h), throttle, water_temp, lap_running
+# 動作: gopro (録画), csv_log (CSVログ), session (走行セッション)
+AUTO_RULES = {
+    "engine_running": (
+        os.environ.get("AUTO_RULE_ENGINE_RUNNING", "rpm>=500:300"),
+        float(os.environ.get("AUTO_RULE_ENGINE_RUNNING_ON_SEC", 1.0)),
+        float(os.environ.get("AUTO_RULE_ENGINE_RUNNING_OFF_SEC", 5.0)),
+        ("gopro", "csv_log"),
+    ),
+    "on_track": (
+        os.environ.get(
+            "AUTO_RULE_ON_TRACK", "rpm>=500:300 & speed>=15:5 | lap_running"
+        ),
+        float(os.environ.get("AUTO_RULE_ON_TRACK_ON_SEC", 3.0)),
+        float(os.environ.get("AUTO_RULE_ON_TRACK_OFF_SEC", 30.0)),
+        ("session",),
+    ),
+}
+# CANがこの秒数途絶えたら、信号をすべて 0 として評価する (ECUの電源断 = エンジン停止)
+AUTO_RULE_STALE_SEC = float(os.environ.get("AUTO_RULE_STALE_SEC", 1.0))
+
+# --- 表示パネルの解像度 ---
+# 起動時にこの大きさで全画面のレイアウトとフォントを先に計算しておく
+PANEL_WIDTH = int(os.environ.get("PANEL_WIDTH", 800))
+PANEL_HEIGHT = int(os.environ.get("PANEL_HEIGHT", 480))
+
+# --- メニュー画面の事前生成 ---
+# ダッシュボード表示後のアイドル時間に作っておく画面 (カンマ区切り、空なら全て遅延生成)
+SCREEN_WARMUP = [
+    name.strip()
+    for name in os.environ.get(
+        "SCREEN_WARMUP", "settings,race_menu,machine_menu,device_menu,info_menu"
+    ).split(",")
+    if name.strip()
+]
+SCREEN_WARMUP_INTERVAL_MS = int(os.environ.get("SCREEN_WARMUP_INTERVAL_MS", 200))
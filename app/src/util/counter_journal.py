@@ -0,0 +1,310 @@
+"""
+燃料消費量と走行距離の差分を追記していくバイナリジャーナル (先行書き込みログ)。
+
+StateStore に保存するスナップショット (世代番号付き) と、それ以降の差分を
+このファイルに持つ。起動時は「スナップショット + 同じ世代の差分」で復元するので、
+電源を落とされても最後のコミット (JOURNAL_COMMIT_SEC ごと) までの値が残る。
+
+ファイル形式 (リトルエンディアン):
+    ヘッダー  : "KFJ1" + 世代番号 (uint32)
+    レコード : 種類 (uint8) + 値 (int32) + チェックサム (uint8) の 6 バイト固定
+
+- グループコミット: 差分は種類ごとにメモリで足し合わせ、コミット時に
+  1種類1レコードだけ書いて fsync する (1秒あたり十数バイト)
+- チェックポイント: ファイルが JOURNAL_CHECKPOINT_BYTES を超えたら、今の値を
+  世代+1 のスナップショットとして StateStore に書き、ジャーナルを空にする。
+  スナップショットを書いた後で落ちても、古い世代のジャーナルは読み飛ばすので
+  二重に数えない。まだ区画が登録されていない種類 (起動処理の途中など) の差分は
+  スナップショットに入らないので、新しい世代のジャーナルへそのまま引き継ぐ
+- 末尾の書きかけのレコードやチェックサムの合わないレコードは捨てる
+"""
+
+import logging
+import os
+import struct
+import threading
+from typing import Callable, Optional
+
+from src.util import config
+from src.util.state_store import StateStore, get_state_store
+
+logger = logging.getLogger(__name__)
+
+# レコードの種類
+FUEL_CONSUMED = 1  # 燃料消費量の差分 [ml]
+ECU_FUEL_USED = 2  # ECU の Fuel Used の最新値 [ml] (差分ではなく値そのもの)
+DISTANCE = 3  # 走行距離の差分 [km]
+
+# 値 → int32 にするときの倍率 (燃料は 0.01 ml、距離は 1 m 単位)
+SCALE = {FUEL_CONSUMED: 100, ECU_FUEL_USED: 100, DISTANCE: 1000}
+ABSOLUTE_KINDS = {ECU_FUEL_USED}
+
+# 区画の復元関数: (スナップショット, 世代内の合計) -> 今の値
+Fold = Callable[[dict, dict], dict]
+
+
+class CounterJournal:
+    FILE_PATH = "counters.journal"
+    SECTION = "journal"  # StateStore 上の世代番号
+    MAGIC = b"KFJ1"
+    HEADER = struct.Struct("<4sI")
+    RECORD = struct.Struct("<BiB")
+
+    def __init__(self, path: str = None, store: StateStore = None):
+        self.path = os.path.abspath(path or self.FILE_PATH)
+        self.store = store or get_state_store()
+        self.generation = int(self.store.get(self.SECTION, {}).get("generation", 0))
+
+        # 世代内の合計 (差分は足し算、ABSOLUTE_KINDS は最新値)
+        self.totals: dict[int, float] = {}
+        # まだ書いていない分と、整数に丸めたときの端数
+        self._pending: dict[int, float] = {}
+        self._residual: dict[int, float] = {}
+        self._sections: dict[str, Fold] = {}
+        # 区画ごとの、スナップショットに畳み込む種類
+        self._section_kinds: dict[str, frozenset[int]] = {}
+
+        self._lock = threading.Lock()  # totals / _pending (CAN受信スレッドからも触る)
+        self._io_lock = threading.Lock()  # ファイルと世代の更新
+        self._file = None
+        self._size = 0
+        self._stop = threading.Event()
+        self._checkpoint_requested = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.commits = 0
+        self.checkpoints = 0
+
+    # -------------------------------------------------
+    # 起動時の復元
+    # -------------------------------------------------
+    def open(self):
+        replayed = self._replay()
+        self._file = open(self.path, "r+b" if os.path.exists(self.path) else "w+b")
+        if replayed is None:
+            # ない / 古い世代 / 壊れている: 今の世代で作り直す
+            self._file.truncate(0)
+            self._file.write(self.HEADER.pack(self.MAGIC, self.generation))
+            self._sync()
+            self._size = self.HEADER.size
+        else:
+            self._file.truncate(replayed)  # 書きかけの末尾を捨てる
+            self._size = replayed
+        self._file.seek(self._size)
+        self._thread = threading.Thread(
+            target=self._run, name="counter-journal", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _replay(self) -> Optional[int]:
+        """同じ世代のレコードを totals に足し、有効な部分の長さを返す"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < self.HEADER.size:
+            return None
+        magic, generation = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC or generation != self.generation:
+            if magic == self.MAGIC:
+                logger.info(
+                    f"Counter journal gen {generation} already checkpointed "
+                    f"(snapshot gen {self.generation}), discarding"
+                )
+            return None
+
+        offset, records = self.HEADER.size, 0
+        while offset + self.RECORD.size <= len(data):
+            kind, value, check = self.RECORD.unpack_from(data, offset)
+            if kind not in SCALE or check != self._checksum(data, offset):
+                logger.warning(f"Counter journal: bad record at {offset}, truncating")
+                break
+            amount = value / SCALE[kind]
+            if kind in ABSOLUTE_KINDS:
+                self.totals[kind] = amount
+            else:
+                self.totals[kind] = self.totals.get(kind, 0.0) + amount
+            offset += self.RECORD.size
+            records += 1
+        logger.info(
+            f"Counter journal replayed {records} records (gen {self.generation}): "
+            f"fuel +{self.totals.get(FUEL_CONSUMED, 0.0):.1f} ml, "
+            f"distance +{self.totals.get(DISTANCE, 0.0):.3f} km"
+        )
+        return offset
+
+    def register(self, section: str, fold: Fold, kinds) -> dict:
+        """
+        StateStore の区画 section を、このジャーナルで復元する区画として登録し、
+        今の値 (スナップショット + 世代内の差分) を返す。
+        kinds: fold が畳み込むレコードの種類 (チェックポイントではこれだけを空にする)
+        """
+        with self._lock:
+            self._sections[section] = fold
+            self._section_kinds[section] = frozenset(kinds)
+            return fold(self.store.get(section, {}), dict(self.totals))
+
+    # -------------------------------------------------
+    # 差分の記録 (どのスレッドからでもよい)
+    # -------------------------------------------------
+    def add(self, kind: int, amount: float):
+        if not amount:
+            return
+        with self._lock:
+            self.totals[kind] = self.totals.get(kind, 0.0) + amount
+            self._pending[kind] = self._pending.get(kind, 0.0) + amount
+
+    def set(self, kind: int, value: float):
+        with self._lock:
+            if self.totals.get(kind) == value:
+                return
+            self.totals[kind] = value
+            self._pending[kind] = value
+
+    # -------------------------------------------------
+    # 書き込み
+    # -------------------------------------------------
+    @staticmethod
+    def _checksum(buffer, offset: int) -> int:
+        return sum(buffer[offset : offset + 5]) & 0xFF
+
+    def _encode(self) -> bytes:
+        """_pending を種類ごとに1レコードへまとめる (_lock を持って呼ぶ)"""
+        out = bytearray()
+        for kind, amount in self._pending.items():
+            units = amount * SCALE[kind]
+            if kind not in ABSOLUTE_KINDS:
+                # 丸めた端数は次のコミットに持ち越す (積み重ねても誤差が増えない)
+                units += self._residual.get(kind, 0.0)
+                value = round(units)
+                self._residual[kind] = units - value
+                if value == 0:
+                    continue
+            else:
+                value = round(units)
+            offset = len(out)
+            out += self.RECORD.pack(kind, value, 0)
+            out[offset + 5] = self._checksum(out, offset)
+        self._pending.clear()
+        return bytes(out)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def commit(self):
+        """溜まった差分を書いて fsync する"""
+        with self._io_lock:
+            if self._file is None:
+                return
+            with self._lock:
+                data = self._encode()
+            if not data:
+                return
+            try:
+                self._file.write(data)
+                self._sync()
+                self._size += len(data)
+                self.commits += 1
+            except Exception as e:
+                logger.error(f"Counter journal write failed: {e}")
+
+    def request_checkpoint(self):
+        """次の周期でチェックポイントを取る (GUIスレッドを待たせない)"""
+        self._checkpoint_requested.set()
+
+    def checkpoint(self, overrides: dict[str, dict] = None):
+        """
+        今の値を世代+1 のスナップショットとして StateStore に書き、
+        ジャーナルを空にする。overrides の区画は、復元した値にその内容を
+        上書きする (給油でのリセットなど)。
+        登録された区画が畳み込まない種類の差分は、新しい世代に書き直して残す
+        """
+        with self._io_lock:
+            if self._file is None:
+                return
+            with self._lock:
+                generation = self.generation + 1
+                snapshots = {
+                    section: fold(self.store.get(section, {}), dict(self.totals))
+                    for section, fold in self._sections.items()
+                }
+                for section, values in (overrides or {}).items():
+                    snapshots.setdefault(section, {}).update(values)
+                folded = frozenset().union(*self._section_kinds.values())
+                carried = {
+                    kind: amount
+                    for kind, amount in self.totals.items()
+                    if kind not in folded
+                }
+                # 引き継ぐ分は、新しいファイルに合計を1レコードずつ書き直す
+                self.totals = dict(carried)
+                self._pending = dict(carried)
+                self._residual.clear()
+                carried_data = self._encode()
+
+            # スナップショットと世代は一緒に書く (片方だけ残ると再生で二重に数える)
+            self.store.set_many({**snapshots, self.SECTION: {"generation": generation}})
+            # スナップショットが確実に残ってから、ジャーナルを新しい世代で作り直す
+            self.store.flush()
+            try:
+                self._file.seek(0)
+                self._file.truncate(0)
+                self._file.write(self.HEADER.pack(self.MAGIC, generation))
+                self._file.write(carried_data)
+                self._sync()
+            except Exception as e:
+                logger.error(f"Counter journal reset failed: {e}")
+            self.generation = generation
+            self._size = self.HEADER.size + len(carried_data)
+            self.checkpoints += 1
+            if carried:
+                logger.info(
+                    f"Counter journal checkpoint: gen {generation} "
+                    f"(carried unregistered kinds {sorted(carried)})"
+                )
+            else:
+                logger.info(f"Counter journal checkpoint: gen {generation}")
+
+    def _run(self):
+        while not self._stop.wait(config.JOURNAL_COMMIT_SEC):
+            self.commit()
+            if (
+                self._checkpoint_requested.is_set()
+                or self._size >= config.JOURNAL_CHECKPOINT_BYTES
+            ):
+                self._checkpoint_requested.clear()
+                self.checkpoint()
+
+    def close(self):
+        """終了時: 残りを書き、チェックポイントを取ってジャーナルを空にしておく"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._file is None:
+            return
+        self.commit()
+        self.checkpoint()
+        with self._io_lock:
+            self._file.close()
+            self._file = None
+        logger.info(
+            f"Counter journal closed: {self.commits} commits, "
+            f"{self.checkpoints} checkpoints"
+        )
+
+
+_shared: Optional[CounterJournal] = None
+_shared_lock = threading.Lock()
+
+
+def get_counter_journal() -> CounterJournal:
+    """アプリ全体で共有するジャーナル (最初に呼ばれたときに復元して開始する)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = CounterJournal().open()
+        return _shared
@@ -1,67 +1,85 @@
-import json
 import os
 import datetime
 
+from src.util.counter_journal import DISTANCE, CounterJournal, get_counter_journal
+from src.util.state_store import StateStore, get_state_store, load_legacy_json
+
 
 class DistanceStore:
     """
-    総走行距離と日別走行距離の状態をJSONファイルに読み書きするクラス。
+    総走行距離と日別走行距離の状態を読み書きするクラス。
+    StateStore の "distance" 区画をスナップショットとし、それ以降に走った距離は
+    CounterJournal に差分として追記する。
     """
 
+    # 旧形式の個別ファイル (StateStore に区画がなければここから移行する)
     STATE_FILE_PATH = "distance_state.json"
+    SECTION = "distance"
 
-    def __init__(self):
+    def __init__(self, store: StateStore = None, journal: CounterJournal = None):
         self.storage_path = os.path.abspath(self.STATE_FILE_PATH)
+        self.store = store or get_state_store()
+        if not self.store.has(self.SECTION):
+            data = load_legacy_json(self.storage_path)
+            if data is not None:
+                print(f"走行距離を旧ファイルから移行します: {self.storage_path}")
+                self.store.set(self.SECTION, data)
+        self.journal = journal or get_counter_journal()
+        self._loaded = self.journal.register(self.SECTION, self._fold, (DISTANCE,))
+
+    @staticmethod
+    def _fold(base: dict, totals: dict) -> dict:
+        """
+        スナップショットにジャーナルの差分を足した、今の状態。
+        差分は日付を持たないので、まとめた日の走行分として数える。
+        """
+        km = totals.get(DISTANCE, 0.0)
+        state = {
+            "total_km": float(base.get("total_km", 0.0)) + km,
+            "daily_km": float(base.get("daily_km", 0.0)),
+            "last_date": str(base.get("last_date", "")),
+        }
+        if km:
+            today_str = datetime.date.today().isoformat()  # YYYY-MM-DD
+            if state["last_date"] != today_str:
+                state["daily_km"] = 0.0
+            state["daily_km"] += km
+            state["last_date"] = today_str
+        return state
 
     def load_state(self) -> dict:
         """
-        ファイルから走行距離データを読み込む。
+        保存された走行距離データを読み込む。
         戻り値: {"total_km": float, "daily_km": float, "last_date": str}
         ファイルがない場合やエラー時はデフォルト値を返す。
         """
         default_state = {"total_km": 0.0, "daily_km": 0.0, "last_date": ""}
 
         try:
-            if not os.path.exists(self.storage_path):
-                return default_state
+            data = self._loaded
 
-            with open(self.storage_path, "r") as f:
-                data = json.load(f)
+            # 古い形式(total_kmのみ)の場合の互換性対応も含め、getで取得
+            # もしファイルにキーがなければデフォルト値(0.0)が使われる
+            total_km = float(data.get("total_km", 0.0))
+            daily_km = float(data.get("daily_km", 0.0))
+            last_date = str(data.get("last_date", ""))
 
-                # 古い形式(total_kmのみ)の場合の互換性対応も含め、getで取得
-                # もしファイルにキーがなければデフォルト値(0.0)が使われる
-                total_km = float(data.get("total_km", 0.0))
-                daily_km = float(data.get("daily_km", 0.0))
-                last_date = str(data.get("last_date", ""))
-
-                if total_km < 0 or daily_km < 0:
-                    return default_state
+            if total_km < 0 or daily_km < 0:
+                return default_state
 
-                print(
-                    f"走行距離ロード: Total={total_km:.1f}km, Daily={daily_km:.1f}km ({last_date})"
-                )
-                return {
-                    "total_km": total_km,
-                    "daily_km": daily_km,
-                    "last_date": last_date,
-                }
+            print(
+                f"走行距離ロード: Total={total_km:.1f}km, Daily={daily_km:.1f}km ({last_date})"
+            )
+            return {
+                "total_km": total_km,
+                "daily_km": daily_km,
+                "last_date": last_date,
+            }
 
         except Exception as e:
             print(f"エラー: 走行距離ファイルの読み込みに失敗しました。 {e}")
             return default_state
 
-    def save_state(self, total_km: float, daily_km: float):
-        """
-        現在の総走行距離と日別距離を保存する。
-        日付は保存時の現在日付（ローカル）を使用する。
-        """
-        try:
-            today_str = datetime.date.today().isoformat()  # YYYY-MM-DD
-
-            data = {"total_km": total_km, "daily_km": daily_km, "last_date": today_str}
-
-            with open(self.storage_path, "w") as f:
-                json.dump(data, f, indent=4)
-
-        except Exception as e:
-            print(f"エラー: 走行距離の保存に失敗しました。 {e}")
+    def record(self, delta_km: float):
+        """走った分をジャーナルに記録する (書き込みはまとめて行う)"""
+        self.journal.add(DISTANCE, delta_km)
@@ -1,56 +1,97 @@
-import json
 import os
 
+from src.util.counter_journal import (
+    ECU_FUEL_USED,
+    FUEL_CONSUMED,
+    CounterJournal,
+    get_counter_journal,
+)
+from src.util.state_store import StateStore, get_state_store, load_legacy_json
+
 
 class FuelStore:
     """
-    燃料の「状態（State）」を不揮発性メモリ（JSONファイル）に
+    燃料の「状態（State）」を不揮発性メモリに
     読み書きすることに特化したクラス。
+    StateStore の "fuel" 区画をスナップショットとし、それ以降の消費量は
+    CounterJournal に差分として追記する (電源断でも最後の1秒分までしか失わない)。
     """
 
+    # 旧形式の個別ファイル (StateStore に区画がなければここから移行する)
     STATE_FILE_PATH = "fuel_state.json"
+    SECTION = "fuel"
 
-    def __init__(self):
+    def __init__(self, store: StateStore = None, journal: CounterJournal = None):
         self.storage_path = os.path.abspath(self.STATE_FILE_PATH)
+        self.store = store or get_state_store()
+        if not self.store.has(self.SECTION):
+            data = load_legacy_json(self.storage_path)
+            if data is not None:
+                print(f"燃料状態を旧ファイルから移行します: {self.storage_path}")
+                self.store.set(self.SECTION, data)
+        self.journal = journal or get_counter_journal()
+        self._loaded = self.journal.register(
+            self.SECTION, self._fold, (FUEL_CONSUMED, ECU_FUEL_USED)
+        )
+
+    @staticmethod
+    def _fold(base: dict, totals: dict) -> dict:
+        """スナップショットにジャーナルの差分を足した、今の状態"""
+        consumed = totals.get(FUEL_CONSUMED, 0.0)
+        state = dict(base)
+        if "remaining_ml" in base:
+            state["remaining_ml"] = max(0.0, float(base["remaining_ml"]) - consumed)
+        state["consumed_ml"] = float(base.get("consumed_ml", 0.0)) + consumed
+        if ECU_FUEL_USED in totals:
+            state["ecu_used_ml"] = totals[ECU_FUEL_USED]
+        return state
 
-    def load_state(self) -> tuple[float | None, float]:
+    def load_state(self) -> tuple[float | None, float, float | None]:
         """
-        ファイルから状態を読み込む。
-        戻り値: (前回の燃料残量 [ml], 前回の合計消費量 [ml])
+        保存された状態を読み込む。
+        戻り値: (前回の燃料残量 [ml], 前回の合計消費量 [ml], 前回のECUの Fuel Used [ml])
         """
         default_consumed = 0.0
-        
+
         try:
-            if not os.path.exists(self.storage_path):
-                return None, default_consumed
+            data = self._loaded
+            if "remaining_ml" not in data:
+                return None, default_consumed, None
 
-            with open(self.storage_path, "r") as f:
-                data = json.load(f)
-                remaining_ml = float(data.get("remaining_ml", -1))
-                consumed_ml = float(data.get("consumed_ml", 0.0)) # ★追加
+            remaining_ml = float(data.get("remaining_ml", -1))
+            consumed_ml = float(data.get("consumed_ml", 0.0))
+            ecu_used_ml = data.get("ecu_used_ml")
 
-                if remaining_ml < 0:
-                    print(f"警告: 保存された残量が不正です。リセットします。")
-                    return None, default_consumed
+            if remaining_ml < 0:
+                print(f"警告: 保存された残量が不正です。リセットします。")
+                return None, default_consumed, None
 
-                print(f"燃料状態ロード: 残量={remaining_ml:.1f}ml, 消費合計={consumed_ml:.1f}ml")
-                return remaining_ml, consumed_ml
+            print(f"燃料状態ロード: 残量={remaining_ml:.1f}ml, 消費合計={consumed_ml:.1f}ml")
+            return (
+                remaining_ml,
+                consumed_ml,
+                None if ecu_used_ml is None else float(ecu_used_ml),
+            )
 
         except Exception as e:
-            print(f"エラー: 燃料状態ファイルの読み込みに失敗しました。 {e}")
-            return None, default_consumed
+            print(f"エラー: 燃料状態の読み込みに失敗しました。 {e}")
+            return None, default_consumed, None
 
-    def save_state(self, remaining_ml: float, consumed_ml: float):
+    def record(self, consumed_ml: float, ecu_used_ml: float):
         """
-        現在の燃料残量と合計消費量を保存する。
+        消費した分と、ECUの Fuel Used の最新値をジャーナルに記録する。
+        CANの受信スレッドから呼ばれる (メモリに足すだけで、書き込みはまとめて行う)。
         """
-        try:
-            data = {
-                "remaining_ml": remaining_ml,
-                "consumed_ml": consumed_ml # ★追加
-            }
-            with open(self.storage_path, "w") as f:
-                json.dump(data, f, indent=4)
+        self.journal.add(FUEL_CONSUMED, consumed_ml)
+        self.journal.set(ECU_FUEL_USED, ecu_used_ml)
 
+    def reset(self, remaining_ml: float):
+        """給油時: 残量を remaining_ml、合計消費量を0としてすぐに保存する"""
+        try:
+            self.journal.checkpoint(
+                overrides={
+                    self.SECTION: {"remaining_ml": remaining_ml, "consumed_ml": 0.0}
+                }
+            )
         except Exception as e:
-            print(f"エラー: 燃料状態の保存に失敗しました。 {e}")
\ No newline at end of file
+            print(f"エラー: 燃料状態の保存に失敗しました。 {e}")
@@ -0,0 +1,70 @@
+import logging
+import os
+
+from src.util.state_store import StateStore, get_state_store, load_legacy_json
+
+logger = logging.getLogger(__name__)
+
+
+class GoProStore:
+    """
+    最後に接続できた GoPro のアドレスとペアリング状態を
+    不揮発性メモリに読み書きするクラス。
+    次回の起動時はスキャンせずにそのアドレスへ直接接続する。
+
+    保存先は StateStore の "gopro" 区画で、中身はカメラ名ごとの dict。
+    区画がなければ旧形式の gopro_state.json から移行する。1台だけだった頃の
+    形式 ({"address": ...}) は legacy=True のカメラの分として読む。
+    """
+
+    # 旧形式の個別ファイル
+    STATE_FILE_PATH = "gopro_state.json"
+    SECTION = "gopro"
+    _LEGACY_KEY = "_legacy"
+
+    def __init__(
+        self,
+        camera: str = "onboard",
+        path: str = None,
+        legacy: bool = False,
+        store: StateStore = None,
+    ):
+        self.camera = camera
+        self.legacy = legacy
+        self.storage_path = os.path.abspath(path or self.STATE_FILE_PATH)
+        self.store = store or get_state_store()
+
+    def _read_all(self) -> dict:
+        data = self.store.get(self.SECTION)
+        if data is None:
+            data = load_legacy_json(self.storage_path) or {}
+        if "address" in data:
+            # 旧形式: 1台分だけが入っている。legacy のカメラが保存するまで残しておく
+            return {self._LEGACY_KEY: data}
+        return data
+
+    def load(self) -> dict:
+        """
+        戻り値: {"address": str | None, "name": str | None, "bonded": bool}
+        """
+        state = {"address": None, "name": None, "bonded": False}
+        try:
+            data = self._read_all()
+            if self.camera in data:
+                state.update(data[self.camera])
+            elif self.legacy:
+                state.update(data.get(self._LEGACY_KEY, {}))
+        except Exception as e:
+            logger.error(f"GoPro state load failed: {e}")
+        return state
+
+    def save(self, address: str | None, name: str | None, bonded: bool):
+        # 他のカメラの分は残したまま、このカメラの分だけ書き換える
+        try:
+            data = self._read_all()
+            if self.legacy:
+                data.pop(self._LEGACY_KEY, None)
+            data[self.camera] = {"address": address, "name": name, "bonded": bonded}
+            self.store.set(self.SECTION, data)
+        except Exception as e:
+            logger.error(f"GoPro state save failed: {e}")
@@ -0,0 +1,148 @@
+"""
+起動時の import にかかる時間をサブシステムごとに集計する。
+
+    python -m src.util.import_report                 # main.py と同じ import を計測
+    python -m src.util.import_report --target src.telemetry.mqtt_sender
+    python -m src.util.import_report --touch gspread --touch bleak
+
+別プロセスで `python -X importtime` を実行し、各モジュール自身の読み込み時間
+(self) を、下の SUBSYSTEMS の分類ごとに合計して表示する。
+--touch で指定したモジュールは、遅延読み込みを解除した状態 (実際に使われた状態)
+を再現するために、ターゲットの後で import する。
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+# トップレベルのパッケージ名 → サブシステム
+SUBSYSTEMS = {
+    "PyQt5": "qt",
+    "sip": "qt",
+    "can": "can",
+    "gspread": "sheets",
+    "oauth2client": "sheets",
+    "google": "sheets",
+    "googleapiclient": "sheets",
+    "httplib2": "sheets",
+    "pyparsing": "sheets",
+    "oauthlib": "sheets",
+    "requests_oauthlib": "sheets",
+    "google_auth_oauthlib": "sheets",
+    "pyasn1": "sheets",
+    "pyasn1_modules": "sheets",
+    "rsa": "sheets",
+    "OpenSSL": "sheets",
+    "cryptography": "sheets",
+    "paho": "mqtt",
+    "requests": "http",
+    "urllib3": "http",
+    "charset_normalizer": "http",
+    "chardet": "http",
+    "idna": "http",
+    "certifi": "http",
+    "bleak": "gopro (ble)",
+    "dbus_fast": "gopro (ble)",
+    "serial": "gps (serial)",
+    "gpiozero": "gpio",
+    "colorzero": "gpio",
+    "lgpio": "gpio",
+    "RPi": "gpio",
+    "numpy": "numpy",
+    "pandas": "pandas",
+    "dotenv": "config",
+}
+
+DEFAULT_TARGET = "src.application.application"
+
+
+def classify(module: str) -> str:
+    top = module.split(".", 1)[0]
+    if top == "src":
+        parts = module.split(".")
+        return f"app: {parts[1]}" if len(parts) > 1 else "app"
+    if top in SUBSYSTEMS:
+        return SUBSYSTEMS[top]
+    if top in sys.stdlib_module_names or top.startswith("_"):
+        return "stdlib"
+    return f"other: {top}"
+
+
+def run_importtime(targets: list[str], touch: list[str]) -> list[tuple[str, int, int]]:
+    """(モジュール名, self[us], cumulative[us]) のリストを返す"""
+    code = "import sys; " + "; ".join(f"import {name}" for name in targets)
+    for name in touch:
+        # lazy_import の仮モジュールを外してから読み込み、実際の読み込み時間を測る
+        code += f"; sys.modules.pop({name!r}, None); import {name}"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-5:]
+        raise RuntimeError("import failed:\n" + "\n".join(tail))
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [f.strip() for f in line[len("import time:"):].split("|")]
+        if not fields[0].isdigit():
+            continue  # ヘッダー行
+        rows.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return rows
+
+
+def print_report(rows: list[tuple[str, int, int]], top: int) -> None:
+    per_subsystem: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    for module, self_us, _ in rows:
+        entry = per_subsystem[classify(module)]
+        entry[0] += self_us
+        entry[1] += 1
+    total_us = sum(self_us for _, self_us, _ in rows)
+
+    print(f"{'subsystem':<24} {'self [ms]':>10} {'share':>7} {'modules':>8}")
+    print("-" * 52)
+    for name, (self_us, count) in sorted(
+        per_subsystem.items(), key=lambda item: item[1][0], reverse=True
+    ):
+        share = self_us / total_us * 100 if total_us else 0.0
+        print(f"{name:<24} {self_us / 1000:>10.1f} {share:>6.1f}% {count:>8}")
+    print("-" * 52)
+    print(f"{'total':<24} {total_us / 1000:>10.1f} {'':>7} {len(rows):>8}")
+
+    if top > 0:
+        print()
+        print(f"slowest {top} modules (cumulative)")
+        for module, _, cumulative_us in sorted(
+            rows, key=lambda row: row[2], reverse=True
+        )[:top]:
+            print(f"  {cumulative_us / 1000:>8.1f} ms  {module}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--target",
+        action="append",
+        help=f"計測する import (複数指定可, 既定: {DEFAULT_TARGET})",
+    )
+    parser.add_argument(
+        "--touch",
+        action="append",
+        default=[],
+        help="ターゲットの後に読み込むモジュール (遅延読み込みの解除を再現する)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=15, help="累積時間の大きいモジュールを何件出すか"
+    )
+    args = parser.parse_args(argv)
+
+    rows = run_importtime(args.target or [DEFAULT_TARGET], args.touch)
+    print_report(rows, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import importlib.util
+import sys
+import types
+
+
+class _MissingModule(types.ModuleType):
+    """インストールされていないモジュールの代わり。属性を参照した時点で ImportError"""
+
+    def __getattr__(self, attr):
+        raise ModuleNotFoundError(f"No module named '{self.__name__}'")
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    モジュールを、最初に属性を参照したときに読み込むようにして返す。
+
+    gspread や bleak のような重いライブラリを import 文の時点では読み込まず、
+    その送信機やワーカーを実際に使うときまで遅らせる (起動時間の短縮)。
+    インストールされていない場合も、使うまではエラーにしない。
+
+    サブモジュール (例: "paho.mqtt.client") を指定すると親パッケージの
+    __init__ だけは即座に読み込まれるので、親が軽いものに限ること。
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    try:
+        spec = importlib.util.find_spec(name)
+    except ModuleNotFoundError:
+        spec = None
+    if spec is None or spec.loader is None:
+        return _MissingModule(name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -1,9 +1,17 @@
-import json
-import os
+from src.util.state_store import StateStore, get_state_store, load_legacy_json
 
 class SettingsStore:
-    def __init__(self, filepath="settings.json"):
+    """
+    ドライバー・タイヤ・PWM などの設定。保存は StateStore の "settings" 区画に
+    まとめて行うので、エンコーダーを回すたびにファイルを書き直すことはない。
+    filepath は旧形式の設定ファイル (区画がなければここから移行する)。
+    """
+
+    SECTION = "settings"
+
+    def __init__(self, filepath="settings.json", store: StateStore = None):
         self.filepath = filepath
+        self.store = store or get_state_store()
         self.settings = {
             "driver": "Unknown",
             "radiator_fan": 0,
@@ -13,18 +21,17 @@ class SettingsStore:
         self.load()
 
     def load(self):
-        if os.path.exists(self.filepath):
-            try:
-                with open(self.filepath, "r") as f:
-                    data = json.load(f)
-                    self.settings.update(data)
-            except Exception as e:
-                print(f"Error loading settings: {e}")
+        data = self.store.get(self.SECTION)
+        if data is None:
+            data = load_legacy_json(self.filepath)
+            if data is not None:
+                self.store.set(self.SECTION, data)  # 旧ファイルから移行
+        if data is not None:
+            self.settings.update(data)
 
     def save(self):
         try:
-            with open(self.filepath, "w") as f:
-                json.dump(self.settings, f)
+            self.store.set(self.SECTION, self.settings)
         except Exception as e:
             print(f"Error saving settings: {e}")
 
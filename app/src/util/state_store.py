@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+from src.util import config
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore:
+    """
+    燃料・走行距離・設定・コース・GoPro の状態を、区画 (section) ごとに
+    1つのJSONファイルにまとめて保存するクラス。
+
+    - set() は値が変わったときだけ区画を dirty にする (ファイルには書かない)
+    - 専用スレッドが、最初の変更から STATE_COALESCE_SEC 待って変更をまとめて書く
+      (SDカードへの書き込み回数を減らす)
+    - 書き込みは tmp ファイル → fsync → os.replace → ディレクトリの fsync。
+      書き込み中に電源が落ちても、前回か今回のどちらかの内容が必ず残る
+
+    各 *Store クラスはこのクラスの区画を読み書きするアダプタになっている。
+    区画がまだなければ、旧形式の個別ファイルから読み込んで移行する。
+    """
+
+    STATE_FILE_PATH = "state.json"
+
+    def __init__(self, path: str = None, coalesce_sec: float = None):
+        self.storage_path = os.path.abspath(path or self.STATE_FILE_PATH)
+        self.coalesce_sec = (
+            config.STATE_COALESCE_SEC if coalesce_sec is None else coalesce_sec
+        )
+        self._data: dict[str, Any] = self._read()
+        self._dirty: set[str] = set()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.changes = 0  # 値が変わった set() の回数
+        self.unchanged = 0  # 同じ値だったので捨てた set() の回数
+        self.writes = 0
+
+    def _read(self) -> dict:
+        try:
+            if os.path.exists(self.storage_path):
+                with open(self.storage_path, "r") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"State file load failed ({self.storage_path}): {e}")
+        return {}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="state-store", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    # -------------------------------------------------
+    # 区画の読み書き (どのスレッドからでもよい)
+    # -------------------------------------------------
+    def has(self, section: str) -> bool:
+        with self._cond:
+            return section in self._data
+
+    def get(self, section: str, default=None):
+        """区画の値のコピーを返す (呼び出し側で書き換えてもよい)"""
+        with self._cond:
+            if section not in self._data:
+                return default
+            return json.loads(json.dumps(self._data[section]))
+
+    def set(self, section: str, value):
+        # JSONに通して正規化しておくと、tuple と list なども同じ値として比べられる
+        value = json.loads(json.dumps(value))
+        with self._cond:
+            if section in self._data and self._data[section] == value:
+                self.unchanged += 1
+                return
+            self._data[section] = value
+            self._dirty.add(section)
+            self.changes += 1
+            self._cond.notify()
+
+    def set_many(self, sections: dict[str, Any]):
+        """
+        複数の区画をまとめて更新する。途中の状態 (一部の区画だけ新しい) が
+        ファイルに書かれることはない
+        """
+        sections = {
+            section: json.loads(json.dumps(value))
+            for section, value in sections.items()
+        }
+        with self._cond:
+            changed = False
+            for section, value in sections.items():
+                if section in self._data and self._data[section] == value:
+                    self.unchanged += 1
+                    continue
+                self._data[section] = value
+                self._dirty.add(section)
+                self.changes += 1
+                changed = True
+            if changed:
+                self._cond.notify()
+
+    # -------------------------------------------------
+    # 書き込み
+    # -------------------------------------------------
+    def _run(self):
+        while not self._closed.is_set():
+            with self._cond:
+                while not self._dirty and not self._closed.is_set():
+                    self._cond.wait()
+            # 続けて届く変更 (設定の連続操作など) を1回の書き込みにまとめる
+            self._closed.wait(self.coalesce_sec)
+            self.flush()
+
+    def flush(self):
+        """変更があれば今すぐ書く"""
+        with self._write_lock:
+            with self._cond:
+                if not self._dirty:
+                    return
+                sections = sorted(self._dirty)
+                text = json.dumps(self._data, indent=1, ensure_ascii=False)
+                self._dirty.clear()
+            try:
+                self._write_atomic(text)
+                self.writes += 1
+                logger.debug(f"State saved: {', '.join(sections)}")
+            except Exception as e:
+                logger.error(f"State save failed: {e}")
+                with self._cond:
+                    self._dirty.update(sections)  # 次の機会に書き直す
+
+    def _write_atomic(self, text: str):
+        tmp_path = self.storage_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.storage_path)
+        # rename 自体をディスクに残すため、ディレクトリも fsync する
+        dir_fd = os.open(os.path.dirname(self.storage_path), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def close(self):
+        """書き込みスレッドを止め、残っている変更を書く (終了時に呼ぶ)"""
+        self._closed.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.flush()
+        logger.info(
+            f"State store closed: {self.writes} writes for {self.changes} changes "
+            f"({self.unchanged} unchanged saves skipped)"
+        )
+
+
+_shared: Optional[StateStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_state_store() -> StateStore:
+    """アプリ全体で共有する StateStore (最初に呼ばれたときに読み込んで開始する)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = StateStore().start()
+        return _shared
+
+
+def load_legacy_json(path: str):
+    """旧形式の個別ファイルを読む (なければ / 壊れていれば None)"""
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        logger.error(f"Legacy state file {path} unreadable: {e}")
+    return None
@@ -0,0 +1,183 @@
+"""
+全チャンネル共通の、メモリ上の時系列ストア。
+
+チャンネルごとに NumPy の配列を確保したリングバッファを持ち、追加は O(1)、
+直近 N 秒 / N 件の min・max・平均・傾きはベクトル演算で求める。
+各処理が自前の履歴 (list.pop(0) など) を持たずに、同じ履歴を参照できる。
+
+- 追加は CAN の受信スレッドなど、どのスレッドからでもよい (チャンネルごとのロック)
+- 時刻は既定で time.monotonic()。明示する場合も、チャンネル内では増えていく値にすること
+  (窓の検索に二分探索を使うため)
+"""
+
+import threading
+import time
+from typing import Optional
+
+from src.util import config
+from src.util.lazy_import import lazy_import
+
+# 起動時の import を軽くするため、最初のチャンネルを作るまで読み込まない
+np = lazy_import("numpy")
+
+
+class Channel:
+    """1チャンネル分のリングバッファ"""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self._times = np.zeros(capacity)
+        self._values = np.zeros(capacity)
+        self._count = 0  # これまでに書いた数 (通し番号)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def append(self, value: float, t: float = None):
+        if t is None:
+            t = time.monotonic()
+        with self._lock:
+            index = self._count % self.capacity
+            self._times[index] = t
+            self._values[index] = value
+            self._count += 1
+
+    def latest(self) -> Optional[tuple[float, float]]:
+        """(時刻, 値) (まだなければ None)"""
+        with self._lock:
+            if self._count == 0:
+                return None
+            index = (self._count - 1) % self.capacity
+            return float(self._times[index]), float(self._values[index])
+
+    def _segments(self) -> list[tuple[int, int]]:
+        """古い順に並べた配列の区間 (リングの折り返しで最大2つ)"""
+        if self._count <= self.capacity:
+            return [(0, self._count)]
+        head = self._count % self.capacity
+        return [(head, self.capacity), (0, head)]
+
+    def last(self, n: int) -> "tuple[np.ndarray, np.ndarray]":
+        """直近 n 件の (時刻, 値) を古い順に返す (コピー)"""
+        with self._lock:
+            n = min(n, len(self))
+            parts = []
+            for start, end in reversed(self._segments()):
+                take = min(n, end - start)
+                if take > 0:
+                    parts.append((end - take, end))
+                n -= take
+            parts.reverse()
+            return self._gather(parts)
+
+    def window(
+        self, seconds: float, now: float = None
+    ) -> "tuple[np.ndarray, np.ndarray]":
+        """直近 seconds 秒の (時刻, 値) を古い順に返す (コピー)"""
+        if now is None:
+            now = time.monotonic()
+        since = now - seconds
+        with self._lock:
+            parts = []
+            for start, end in self._segments():
+                # 各区間の中は時刻順なので二分探索で窓の先頭を探す
+                first = start + int(
+                    np.searchsorted(self._times[start:end], since, side="left")
+                )
+                if first < end:
+                    parts.append((first, end))
+            return self._gather(parts)
+
+    def _gather(self, parts) -> "tuple[np.ndarray, np.ndarray]":
+        if not parts:
+            return np.empty(0), np.empty(0)
+        if len(parts) == 1:
+            start, end = parts[0]
+            return self._times[start:end].copy(), self._values[start:end].copy()
+        return (
+            np.concatenate([self._times[s:e] for s, e in parts]),
+            np.concatenate([self._values[s:e] for s, e in parts]),
+        )
+
+    # -------------------------------------------------
+    # 窓の集計 (データがなければ None)
+    # -------------------------------------------------
+    def min(self, seconds: float, now: float = None) -> Optional[float]:
+        _, values = self.window(seconds, now)
+        return float(values.min()) if len(values) else None
+
+    def max(self, seconds: float, now: float = None) -> Optional[float]:
+        _, values = self.window(seconds, now)
+        return float(values.max()) if len(values) else None
+
+    def mean(self, seconds: float, now: float = None) -> Optional[float]:
+        _, values = self.window(seconds, now)
+        return float(values.mean()) if len(values) else None
+
+    def mean_last(self, n: int) -> Optional[float]:
+        _, values = self.last(n)
+        return float(values.mean()) if len(values) else None
+
+    def slope(self, seconds: float, now: float = None) -> Optional[float]:
+        """窓の回帰直線の傾き [値/秒]"""
+        return regression_slope(*self.window(seconds, now))
+
+
+def regression_slope(times: "np.ndarray", values: "np.ndarray") -> Optional[float]:
+    """(時刻, 値) の回帰直線の傾き [値/秒] (求まらなければ None)"""
+    if len(times) < 2:
+        return None
+    t = times - times[0]  # 桁落ちを防ぐため窓の先頭を原点にする
+    n = len(t)
+    denom = n * np.dot(t, t) - t.sum() ** 2
+    if denom <= 1e-12:
+        return None
+    return float((n * np.dot(t, values) - t.sum() * values.sum()) / denom)
+
+
+class TimeSeriesStore:
+    """チャンネル名 -> Channel。チャンネルは最初の追加で作る"""
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or config.SERIES_CAPACITY
+        self._channels: dict[str, Channel] = {}
+        self._lock = threading.Lock()
+
+    def channel(self, name: str, capacity: int = None) -> Channel:
+        channel = self._channels.get(name)
+        if channel is None:
+            with self._lock:
+                channel = self._channels.get(name)
+                if channel is None:
+                    channel = Channel(name, capacity or self.capacity)
+                    self._channels[name] = channel
+        return channel
+
+    def names(self) -> list[str]:
+        return list(self._channels)
+
+    def append(self, name: str, value: float, t: float = None):
+        self.channel(name).append(value, t)
+
+    def record(self, values: dict[str, float], t: float = None):
+        """複数チャンネルに同じ時刻で追加する"""
+        if t is None:
+            t = time.monotonic()
+        for name, value in values.items():
+            if value is not None:
+                self.channel(name).append(value, t)
+
+
+_shared: Optional[TimeSeriesStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_time_series_store() -> TimeSeriesStore:
+    """アプリ全体で共有する時系列ストア"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TimeSeriesStore()
+        return _shared
@@ -0,0 +1,59 @@
+"""CounterJournal のチェックポイントと StateStore.set_many"""
+
+import json
+
+from src.util.counter_journal import DISTANCE, CounterJournal
+from src.util.state_store import StateStore
+
+
+def _fold_distance(section: dict, totals: dict) -> dict:
+    return {"km": section.get("km", 0.0) + totals.get(DISTANCE, 0.0)}
+
+
+class _RecordingStore(StateStore):
+    """書いた内容を残し、set() のたびに書き込みスレッドが割り込んだことにする"""
+
+    def __init__(self, path):
+        super().__init__(path, coalesce_sec=0.0)
+        self.written: list[dict] = []
+
+    def set(self, section, value):
+        super().set(section, value)
+        self.flush()
+
+    def _write_atomic(self, text):
+        self.written.append(json.loads(text))
+        super()._write_atomic(text)
+
+
+def test_set_many_writes_sections_together(tmp_path):
+    store = _RecordingStore(str(tmp_path / "state.json"))
+    store.set_many({"a": {"x": 1}, "b": {"y": 2}})
+    store.set_many({"a": {"x": 1}})  # 変わらない値は dirty にしない
+    store.flush()
+    assert store.written == [{"a": {"x": 1}, "b": {"y": 2}}]
+    assert store.changes == 2 and store.unchanged == 1
+
+
+def test_checkpoint_snapshot_and_generation_are_written_atomically(tmp_path):
+    store = _RecordingStore(str(tmp_path / "state.json"))
+    journal = CounterJournal(str(tmp_path / "counters.journal"), store)
+    journal.register("distance", _fold_distance, [DISTANCE])
+    journal.open()
+    try:
+        journal.add(DISTANCE, 1.5)
+        journal.commit()
+        journal.checkpoint()
+    finally:
+        journal.close()
+
+    # どの時点のファイルでも、世代が進んでいればスナップショットも新しい
+    for state in store.written:
+        generation = state.get("journal", {}).get("generation", 0)
+        km = state.get("distance", {}).get("km", 0.0)
+        assert (generation > 0) == (km == 1.5)
+    assert store.written[-1]["journal"]["generation"] >= 1
+
+    # 再起動しても二重に数えない
+    reopened = CounterJournal(str(tmp_path / "counters.journal"), store)
+    assert reopened.register("distance", _fold_distance, [DISTANCE]) == {"km": 1.5}
@@ -0,0 +1,157 @@
+"""
+ループバック (MQTTブローカーのスタブ・Sheetsのフェイク・UDPシンク) で
+各 TelemetrySender が送った内容を確かめる。
+"""
+
+import json
+
+import pytest
+
+from src.services.io_reactor import IoReactor
+from src.telemetry import benchmark
+from src.telemetry.loopback import (
+    FakeSheetsClient,
+    LoopbackMqttBroker,
+    UdpSink,
+    install_fake_sheets,
+)
+from src.util import config
+
+TIMEOUT = 5.0
+
+
+@pytest.fixture
+def frames():
+    return benchmark.synthetic_frames(20)
+
+
+@pytest.fixture
+def reactor():
+    reactor = IoReactor().start()
+    yield reactor
+    reactor.stop()
+
+
+@pytest.mark.parametrize("payload_format", ["compact", "verbose"])
+def test_plotjuggler_sends_json_per_frame(frames, payload_format):
+    from src.telemetry.plotjuggler_sender import PlotJugglerSender
+
+    sink = UdpSink(keep_payloads=True).start()
+    sender = PlotJugglerSender(rate_hz=0, payload_format=payload_format, mode="unicast")
+    sender.target_ips = [sink.host]
+    sender.target_port = sink.port
+    try:
+        sender.start()
+        for info, fuel_percent, tpms in frames:
+            sender.send(info, fuel_percent, tpms)
+        assert sink.wait_for_messages(len(frames), TIMEOUT)
+    finally:
+        sender.stop()
+        sink.stop()
+
+    # 既定ではスキーマを送らず、どのメッセージも数値だけの平らなJSON
+    data = [json.loads(p) for p in sink.payloads]
+    assert len(data) == len(frames)
+    assert all(isinstance(v, (int, float)) for p in data for v in p.values())
+    rpm_key = "rpm" if payload_format == "compact" else "RPM"
+    assert data[-1][rpm_key] == int(frames[-1][0].rpm)
+
+
+def test_plotjuggler_drops_non_finite_values(frames):
+    from src.telemetry.plotjuggler_sender import PlotJugglerSender
+
+    info, fuel_percent, _ = frames[0]
+    info.lambda1 = float("nan")
+    compact = json.loads(PlotJugglerSender.encode_compact(info, float("inf")))
+    verbose = json.loads(PlotJugglerSender.encode_verbose(info, float("inf")))
+    assert "la1" not in compact and "fp" not in compact
+    assert compact["rpm"] == int(info.rpm)
+    assert "Lambda 1" not in verbose and "Fuel Level (%)" not in verbose
+
+
+def test_mqtt_publishes_every_frame(frames, reactor, monkeypatch):
+    from src.telemetry.mqtt_sender import MqttTelemetrySender
+
+    broker = LoopbackMqttBroker(keep_payloads=True).start()
+    monkeypatch.setattr(config, "MQTT_BROKER_URL", broker.host)
+    monkeypatch.setattr(config, "MQTT_BROKER_PORT", broker.port)
+    sender = MqttTelemetrySender(reactor)
+    try:
+        sender.start()
+        for info, fuel_percent, tpms in frames:
+            sender.send(info, fuel_percent, tpms)
+        # 接続前に送った分はオフラインキューから送られる
+        assert broker.wait_for_messages(len(frames), TIMEOUT)
+    finally:
+        sender.stop()
+        broker.stop()
+
+    data = [
+        json.loads(payload)
+        for topic, payload in broker.payloads
+        if topic == config.MQTT_TOPIC
+    ]
+    assert len(data) == len(frames)
+    info, fuel_percent, tpms = frames[-1]
+    assert data[-1]["rpm"] == int(info.rpm)
+    assert data[-1]["fp"] == round(fuel_percent, 2)
+    assert data[-1]["t_fl_p"] == tpms["FL"]["pressure_kpa"]
+    assert data[-1]["t_fl_t"] == tpms["FL"]["temp_c"]
+
+
+def test_sheets_writes_header_and_rows(frames, reactor):
+    from src.telemetry.google_sheets_sender import GoogleSheetsSender
+
+    client = FakeSheetsClient()
+    sender = GoogleSheetsSender(reactor, json_keyfile="", spreadsheet_name="test")
+    install_fake_sheets(sender, client)
+    try:
+        sender.start()
+        for info, fuel_percent, tpms in frames:
+            sender.send(info, fuel_percent, tpms)
+        assert client.sheet.wait_for_inserts(len(frames) + 1, TIMEOUT)
+    finally:
+        sender.stop()
+
+    header, *rows = client.sheet.rows
+    assert header[:5] == ["Date", "Driver", "Tire", "Lap", "Total"]
+    assert len(rows) == len(frames)
+    # 新しい行は2行目に入るので、先頭が最後に送ったラップ
+    newest = dict(zip(header, rows[0]))
+    assert newest["Lap"] == frames[-1][0].lapCount - 1
+    assert newest["S1"] == 20.1
+
+
+def test_benchmark_counts_every_message(frames):
+    results = benchmark.run_benchmarks(benchmark.ALL_SENDERS, frames, timeout=TIMEOUT)
+    assert [r.sender for r in results] == list(benchmark.ALL_SENDERS)
+    for result in results:
+        assert result.delivered == result.messages == len(frames)
+        assert result.p50_us > 0
+        assert result.cpu_us_per_msg > 0
+
+
+def test_sheets_migrates_header_without_fuel_columns(frames, reactor):
+    from src.telemetry.google_sheets_sender import GoogleSheetsSender
+
+    client = FakeSheetsClient()
+    # 燃料の列を足す前の形式で書かれたシート
+    old_header = ["Date", "Driver", "Tire", "Lap", "Total", "S1", "S1_Diff"]
+    old_row = ["2026-01-01 10:00:00", "A", "Soft", 1, 61.234, 20.1, ""]
+    client.sheet.rows = [old_header, old_row]
+    sender = GoogleSheetsSender(reactor, json_keyfile="", spreadsheet_name="test")
+    install_fake_sheets(sender, client)
+    try:
+        sender.start()
+        for info, fuel_percent, tpms in frames[:3]:
+            sender.send(info, fuel_percent, tpms)
+        assert client.sheet.wait_for_inserts(3, TIMEOUT)
+    finally:
+        sender.stop()
+
+    header, newest, *_, oldest = client.sheet.rows
+    assert header[:9] == GoogleSheetsSender.HEADERS + ["S1", "S1_Diff"]
+    # 既存の行は燃料の欄が空になり、区間の値は S1 の列のまま
+    assert dict(zip(header, oldest))["S1"] == 20.1
+    assert dict(zip(header, oldest))["Fuel_ml"] == ""
+    assert dict(zip(header, newest))["S1"] == 20.1
@@ -0,0 +1,74 @@
+"""TireTrendEngine の警告レベル (スローパンクチャーの検出と解除)"""
+
+import pytest
+
+from src.models.models import TireAlert
+from src.tpms.tire_trend import TireTrendEngine
+from src.util import config
+from src.util.time_series import TimeSeriesStore
+
+STEP_SEC = 2.0
+
+
+def _run(engine, start, pressures, temp_c=20.0):
+    """2秒ごとの FL の圧力を流し、各時点の結果を返す"""
+    results = []
+    for i, pressure in enumerate(pressures):
+        t = start + i * STEP_SEC
+        engine.update(
+            {"FL": {"pressure_kpa": pressure, "temp_c": temp_c, "last_seen": t}}
+        )
+        results.append(engine.result("FL"))
+    return results, start + len(pressures) * STEP_SEC
+
+
+def _leak_to(low_kpa, rate_kpa_per_min=5.0):
+    steady = [200.0] * 60
+    drop = int((200.0 - low_kpa) / rate_kpa_per_min * 60 / STEP_SEC)
+    leak = [200.0 - rate_kpa_per_min * (i + 1) * STEP_SEC / 60 for i in range(drop)]
+    return steady + leak + [low_kpa] * 600  # 漏れ切ってから20分そのまま
+
+
+@pytest.mark.parametrize("cold_min_kpa", [config.TIRE_COLD_MIN_KPA, 0.0])
+def test_leaked_tire_stays_alerted(monkeypatch, cold_min_kpa):
+    # 下限の判定を切っても、漏れ切って傾きが 0 に戻った後も LEAK を保つ
+    monkeypatch.setattr(config, "TIRE_COLD_MIN_KPA", cold_min_kpa)
+    engine = TireTrendEngine(TimeSeriesStore())
+    results, _ = _run(engine, 1_000_000.0, _leak_to(17.0))
+
+    first = next(i for i, r in enumerate(results) if r.alert > TireAlert.OK)
+    assert all(r.alert > TireAlert.OK for r in results[first:])
+    assert results[-1].alert == TireAlert.ALERT
+    if cold_min_kpa == 0:
+        assert results[-1].reason == "LEAK"
+
+
+def test_history_is_kept_in_the_time_series_store():
+    series = TimeSeriesStore()
+    engine = TireTrendEngine(series)
+    results, t = _run(engine, 1_000_000.0, [200.0] * 10, temp_c=50.0)
+    # 50℃ の 200kPa は 20℃ 換算で下がる。ストアの窓から同じ値が読める
+    times, cold = series.channel("tire_fl_cold_kpa").window(60.0, t)
+    assert len(cold) == 10 and times[-1] == t - STEP_SEC
+    assert cold[-1] == results[-1].cold_kpa < 200.0
+    assert series.channel("tire_fl_temp").latest() == (t - STEP_SEC, 50.0)
+
+
+def test_default_cold_minimum_flags_low_pressure():
+    assert config.TIRE_COLD_MIN_KPA > 0
+    engine = TireTrendEngine(TimeSeriesStore())
+    results, _ = _run(engine, 1_000_000.0, [120.0] * 10)
+    assert results[-1].alert == TireAlert.ALERT
+    assert results[-1].reason == "LOW"
+
+
+def test_leak_clears_after_reinflation(monkeypatch):
+    monkeypatch.setattr(config, "TIRE_COLD_MIN_KPA", 0.0)
+    engine = TireTrendEngine(TimeSeriesStore())
+    results, t = _run(engine, 1_000_000.0, _leak_to(170.0))
+    assert results[-1].reason == "LEAK"
+
+    # 空気を入れ直して規定圧に戻り、解除待ちの時間が過ぎれば OK に戻る
+    hold = int((config.TIRE_TREND_WINDOW_SEC + config.TIRE_ALERT_CLEAR_SEC) / STEP_SEC)
+    results, _ = _run(engine, t, [200.0] * (hold + 10))
+    assert results[-1].alert == TireAlert.OK
@@ -0,0 +1,58 @@
+"""UdpTransmitter の送信エラーの扱い"""
+
+import socket
+import time
+
+from src.services.io_reactor import IoReactor
+from src.udp.udp_transmitter import UdpTransmitter
+
+
+class _StubPayloadListener:
+    payloadSize = 16
+
+    def writeUdpPayload(self, buffer, machineId, runId, errorCode):
+        buffer[:4] = runId.to_bytes(4, "big")
+
+
+def _closed_port() -> int:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_unreachable_destination_is_counted(monkeypatch):
+    # 受信側のいないポートへ送ると ICMP port unreachable が error_received に来る
+    reactor = IoReactor().start()
+    transmitter = UdpTransmitter(_StubPayloadListener(), reactor)
+    transmitter.udpAddress = ("127.0.0.1", _closed_port())
+    monkeypatch.setattr(transmitter, "acquireRunId", lambda: _noop())
+    try:
+        transmitter.start()
+        deadline = time.monotonic() + 3.0
+        while transmitter.sendErrors == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        transmitter.stop()
+        reactor.stop()
+    assert transmitter.sendErrors > 0
+
+
+def test_endpoint_failure_is_retried():
+    reactor = IoReactor().start()
+    transmitter = UdpTransmitter(_StubPayloadListener(), reactor)
+    # 名前解決できない送信先でも sendEvery は落ちずに再試行を続ける
+    transmitter.udpAddress = ("invalid.invalid", 9)
+    try:
+        future = reactor.submit(transmitter.sendEvery())
+        time.sleep(0.3)
+        assert not future.done()
+        assert transmitter.transport is None
+    finally:
+        future.cancel()
+        reactor.stop()
+
+
+async def _noop():
+    return None